@@ -62,5 +62,6 @@ setup(
     },
     extras_require={
         'ui': _GUI_REQUIREMENTS,
+        'jit': ['numba'],
     },
 )
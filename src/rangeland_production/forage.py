@@ -6,7 +6,10 @@ import shutil
 from builtins import range
 import re
 import math
-import pickle
+import multiprocessing
+import hashlib
+import json
+import collections
 
 import numpy
 import pandas
@@ -18,6 +21,13 @@ import pygeoprocessing
 from rangeland_production import utils
 from rangeland_production import validation
 
+try:
+    import numba
+except ImportError:
+    # compiled per-pixel kernels are optional; without numba, the NumPy
+    # implementation of each kernel is used
+    numba = None
+
 LOGGER = logging.getLogger('rangeland_production.forage')
 
 # we only have these types of soils
@@ -26,6 +36,27 @@ SOIL_TYPE_LIST = ['clay', 'silt', 'sand']
 # temporary directory to store intermediate files
 PROCESSING_DIR = None
 
+# memory-backed file system used to hold intermediate files and state
+# variables when the model is run with `args['in_memory_state']`
+_RAM_BACKED_DIR = '/dev/shm'
+
+# directory where parameter rasters are cached for the duration of a model
+# run; parameter rasters are not cached if None
+_PARAM_CACHE_DIR = None
+
+# file in the workspace recording the state of the simulation after the last
+# completed month, from which an interrupted run can be resumed
+_CHECKPOINT_FILE = 'checkpoint.json'
+
+# keys of aligned inputs holding monthly climate data, which are aligned to
+# the grid of the other inputs on demand as virtual rasters
+_CLIMATE_INPUT_PATTERN = re.compile(r'^(precip|min_temp|max_temp)_\d+$')
+
+# creation options for rasters holding one tile of the study area
+_TILE_CREATION_OPTIONS = [
+    'TILED=YES', 'BIGTIFF=IF_SAFER', 'COMPRESS=LZW', 'BLOCKXSIZE=256',
+    'BLOCKYSIZE=256']
+
 # user-supplied crude protein of vegetation
 CRUDE_PROTEIN = None
 
@@ -183,7 +214,7 @@ _PFT_INTERMEDIATE_VALUES = [
     'cercrp_max_above_1', 'cercrp_max_above_2',
     'cercrp_min_below_1', 'cercrp_min_below_2',
     'cercrp_max_below_1', 'cercrp_max_below_2',
-    'tgprod', 'rtsh', 'flgrem', 'fdgrem']
+    'fracrc', 'tgprod', 'rtsh', 'flgrem', 'fdgrem']
 
 # intermediate site-level values that are shared between submodels,
 # but do not need to be saved as output
@@ -191,6 +222,16 @@ _SITE_INTERMEDIATE_VALUES = [
     'amov_1', 'amov_2', 'amov_3', 'amov_4', 'amov_5', 'amov_6', 'amov_7',
     'amov_8', 'amov_9', 'amov_10', 'snowmelt', 'bgwfunc', 'diet_sufficiency']
 
+# monthly outputs that are summarized inside each animal grazing area
+_SUMMARY_OUTPUT_VALUES = [
+    'potential_biomass', 'standing_biomass', 'diet_sufficiency']
+
+# fields of the summary results vector giving the mean of monthly outputs
+_SUMMARY_FIELD_VALUES = [
+    ('potbiom_m', 'potential_biomass'),
+    ('stdbiom_m', 'standing_biomass'),
+    ('dietsuff_m', 'diet_sufficiency')]
+
 # fixed parameters for each grazing animal type are adapted from the GRAZPLAN
 # model as described by Freer et al. 2012, "The GRAZPLAN animal biology model
 # for sheep and cattle and the GrazFeed decision support tool"
@@ -601,6 +642,32 @@ def execute(args):
         args['save_sv_rasters'] (boolean): optional input, default false.
             Should rasters containing all state variables be saved for each
             model time step?
+        args['in_memory_state'] (boolean): optional input, default false.
+            Should state variables and intermediate values be held in
+            memory-backed storage for the duration of the run? If true,
+            temporary files, persistent parameters and state variables for
+            each time step are kept on a memory-backed file system (e.g.,
+            /dev/shm) where one is available. Regardless of this option,
+            state variable rasters are only written to the workspace if
+            `save_sv_rasters` is true, and state variables of each time step
+            are removed as soon as the following time step is complete.
+        args['tile_size'] (int): optional input, length in pixels of the side
+            of square tiles into which the aligned study area is divided. If
+            supplied, each monthly time step is simulated separately for each
+            tile, and the tiles are assembled into monthly outputs. Tiles
+            share only the order in which animals select feed types, which is
+            calculated across the study area. If not supplied, the study area
+            is simulated as one tile.
+        args['monthly_annual_precip'] (boolean): optional input, default
+            false. Should annual precipitation, and the annual N deposition
+            and lignin content of plant residue that are calculated from it,
+            be updated every month from the 12 months including the current
+            one? If false, these are updated once every 12 months.
+        args['n_workers'] (int): optional input, number of worker processes
+            used to simulate tiles of the study area in parallel. Values less
+            than 2 indicate that tiles are simulated in the main process. If
+            greater than 1 and `tile_size` is not supplied, the study area is
+            divided into approximately one tile per worker process.
         args['animal_density'] (string): optional input, density of grazing
             animals in animals per hectare.
         args['crude_protein'] (float): optional input, crude protein
@@ -609,6 +676,25 @@ def execute(args):
             substituted for N content of forage when calculating digestibility
             and "ingestibility" of forage, and protein content of the diet, for
             grazing animals.
+        args['resume'] (boolean): optional input, default false. Should the
+            simulation continue from the last month completed by a previous
+            run in the same workspace? A checkpoint is written after each
+            month if `save_sv_rasters` is true and `in_memory_state` is
+            false. When resuming, aligned inputs, initial conditions and
+            persistent parameters of the previous run are reused, and only
+            inputs that were not aligned by the previous run, such as
+            precipitation of months beyond its last month, are aligned.
+        args['deduplicate_pixels'] (boolean): optional input, default false.
+            Should pixels in the same row that share identical inputs,
+            initial conditions and persistent parameters be simulated once?
+            If true, each class of identical pixels is represented by a
+            single pixel during the simulation, and monthly outputs and
+            saved state variables are copied to every pixel of the class.
+            Statistics summarized across the study area count each
+            represented pixel. This reduces the time and storage required
+            to simulate study areas where inputs are homogeneous, e.g.
+            where climate inputs are coarser than the site and vegetation
+            inputs.
 
     Returns:
         None.
@@ -616,6 +702,32 @@ def execute(args):
     """
     LOGGER.info("model execute: %s", args)
 
+    global PROCESSING_DIR, _PARAM_CACHE_DIR
+    PROCESSING_DIR = None
+    try:
+        _execute(args)
+    finally:
+        # cached parameter rasters belong to this run only
+        _PARAM_CACHE_DIR = None
+        # files on a memory-backed file system hold memory until they are
+        # removed, so they are removed even if the run fails
+        if (PROCESSING_DIR is not None and
+                os.path.dirname(PROCESSING_DIR) ==
+                os.path.abspath(_RAM_BACKED_DIR) and
+                os.path.exists(PROCESSING_DIR)):
+            shutil.rmtree(PROCESSING_DIR)
+
+
+def _execute(args):
+    """Run the forage model.
+
+    Parameters:
+        args (dict): model arguments, as described in `execute`
+
+    Returns:
+        None
+
+    """
     starting_month = int(args['starting_month'])
     starting_year = int(args['starting_year'])
     n_months = int(args['n_months'])
@@ -623,6 +735,33 @@ def execute(args):
         delete_sv_folders = not args['save_sv_rasters']
     except KeyError:
         delete_sv_folders = True
+    try:
+        in_memory_state = args['in_memory_state']
+    except KeyError:
+        in_memory_state = False
+    try:
+        monthly_annual_precip = args['monthly_annual_precip']
+    except KeyError:
+        monthly_annual_precip = False
+    try:
+        deduplicate_pixels = args['deduplicate_pixels']
+    except KeyError:
+        deduplicate_pixels = False
+    try:
+        resume = args['resume']
+    except KeyError:
+        resume = False
+    # the simulation can be resumed only if state variables and persistent
+    # parameters of each completed month are kept in the workspace; when
+    # resuming, persistent parameters are those of the previous run
+    write_checkpoint = not delete_sv_folders and (
+        resume or not in_memory_state)
+    if resume:
+        checkpoint = _read_checkpoint(args['workspace_dir'])
+        # inputs aligned by the previous run need not be found again
+        aligned_key_set = set(checkpoint['aligned_inputs'])
+    else:
+        aligned_key_set = set()
 
     try:
         global CRUDE_PROTEIN
@@ -649,6 +788,8 @@ def execute(args):
     for month_index in range(n_months):
         month_i = (starting_month + month_index - 1) % 12 + 1
         temperature_month_set.add(month_i)
+        if 'precip_{}'.format(month_index) in aligned_key_set:
+            continue
         year = starting_year + (starting_month + month_index - 1) // 12
         year_month_match = re.compile(
             r'.*[^\d]%d_%d\.[^.]+$' % (year, month_i))
@@ -671,6 +812,10 @@ def execute(args):
     if n_precip_months < 12:
         m_index = int(args['n_months'])
         while n_precip_months < 12:
+            if 'precip_%d' % m_index in aligned_key_set:
+                n_precip_months = n_precip_months + 1
+                m_index = m_index + 1
+                continue
             month_i = (starting_month + m_index - 1) % 12 + 1
             year = starting_year + (starting_month + m_index - 1) // 12
             year_month_match = re.compile(
@@ -696,6 +841,8 @@ def execute(args):
         os.path.join(args['min_temp_dir'], f) for f in
         os.listdir(args['min_temp_dir'])]
     for month_i in temperature_month_set:
+        if 'min_temp_%d' % month_i in aligned_key_set:
+            continue
         month_file_match = re.compile(r'.*[^\d]%d\.[^.]+$' % month_i)
         file_list = [
             month_file_path for month_file_path in min_temp_dir_list if
@@ -714,6 +861,8 @@ def execute(args):
         os.path.join(args['max_temp_dir'], f) for f in
         os.listdir(args['max_temp_dir'])]
     for month_i in temperature_month_set:
+        if 'max_temp_%d' % month_i in aligned_key_set:
+            continue
         month_file_match = re.compile(r'.*[^\d]%d\.[^.]+$' % month_i)
         file_list = [
             month_file_path for month_file_path in max_temp_dir_list if
@@ -801,13 +950,6 @@ def execute(args):
     base_align_raster_path_id_map['proportion_legume_path'] = args[
         'proportion_legume_path']
 
-    # track separate state variable files for each PFT
-    pft_sv_dict = {}
-    for pft_i in pft_id_set:
-        for sv in _PFT_STATE_VARIABLES:
-            pft_sv_dict['{}_{}_path'.format(
-                sv, pft_i)] = '{}_{}.tif'.format(sv, pft_i)
-
     # make sure animal traits exist for each feature in animal management
     # layer
     anim_id_list = []
@@ -833,6 +975,9 @@ def execute(args):
             args['animal_density'])['pixel_size']
         base_align_raster_path_id_map['animal_density'] = args[
             'animal_density']
+    elif resume:
+        target_pixel_size = pygeoprocessing.get_raster_info(
+            checkpoint['aligned_inputs']['site_index'])['pixel_size']
     else:
         target_pixel_size = pygeoprocessing.get_raster_info(
             base_align_raster_path_id_map['precip_0'])['pixel_size']
@@ -841,63 +986,125 @@ def execute(args):
 
     # temporary directory for intermediate files
     global PROCESSING_DIR
-    PROCESSING_DIR = os.path.join(args['workspace_dir'], "temporary_files")
-    if not os.path.exists(PROCESSING_DIR):
-        os.makedirs(PROCESSING_DIR)
+    PROCESSING_DIR = _make_processing_dir(
+        args['workspace_dir'], in_memory_state, resume)
+
+    # parameter rasters are created once and reused for the rest of the run
+    global _PARAM_CACHE_DIR
+    _PARAM_CACHE_DIR = tempfile.mkdtemp(
+        prefix='parameter_cache_', dir=PROCESSING_DIR)
 
-    # set up a dictionary that uses the same keys as
-    # 'base_align_raster_path_id_map' to point to the clipped/resampled
-    # rasters to be used in raster calculations for the model.
     aligned_raster_dir = os.path.join(
         args['workspace_dir'], 'aligned_inputs')
-    if os.path.exists(aligned_raster_dir):
-        shutil.rmtree(aligned_raster_dir)
-    os.makedirs(aligned_raster_dir)
-    aligned_inputs = dict([(key, os.path.join(
-        aligned_raster_dir, 'aligned_%s' % os.path.basename(path)))
-        for key, path in base_align_raster_path_id_map.items()])
-
-    # align all the base inputs to be the minimum known pixel size and to
-    # only extend over their combined intersections
-    source_input_path_list = [
-        base_align_raster_path_id_map[k] for k in sorted(
-            base_align_raster_path_id_map.keys())]
-    aligned_input_path_list = [
-        aligned_inputs[k] for k in sorted(aligned_inputs.keys())]
-    pygeoprocessing.align_and_resize_raster_stack(
-        source_input_path_list, aligned_input_path_list,
-        ['near'] * len(source_input_path_list),
-        target_pixel_size, 'intersection',
-        base_vector_path_list=[args['aoi_path']],
-        vector_mask_options={'mask_vector_path': args['aoi_path']})
-    _check_pft_fractional_cover_sum(aligned_inputs, pft_id_set)
+    if resume:
+        # inputs were aligned by the previous run
+        aligned_inputs = checkpoint['aligned_inputs']
+        aligned_input_md5 = checkpoint['aligned_input_md5']
+        if _aligned_input_md5(aligned_inputs) != aligned_input_md5:
+            raise ValueError(
+                "Aligned inputs in the workspace have changed since the "
+                "checkpoint was written")
+        # inputs that have become available since, such as precipitation
+        # of new months, are aligned to the grid of the previous run
+        new_input_dict = dict(
+            (key, path) for key, path in base_align_raster_path_id_map.items()
+            if key not in aligned_inputs)
+        if new_input_dict:
+            LOGGER.info("Aligning %d new inputs", len(new_input_dict))
+            new_aligned_inputs = _align_to_existing_grid(
+                new_input_dict, aligned_inputs['site_index'],
+                aligned_raster_dir, args['aoi_path'])
+            aligned_inputs.update(new_aligned_inputs)
+            aligned_input_md5.update(_aligned_input_md5(new_aligned_inputs))
+    else:
+        # set up a dictionary that uses the same keys as
+        # 'base_align_raster_path_id_map' to point to the clipped/resampled
+        # rasters to be used in raster calculations for the model.
+        if os.path.exists(aligned_raster_dir):
+            shutil.rmtree(aligned_raster_dir)
+        os.makedirs(aligned_raster_dir)
+        # monthly climate inputs are not copied here; they are aligned below
+        # as virtual rasters that are read on demand
+        climate_path_id_map = dict(
+            (key, path) for key, path in base_align_raster_path_id_map.items()
+            if _CLIMATE_INPUT_PATTERN.match(key))
+        aligned_inputs = dict([(key, os.path.join(
+            aligned_raster_dir, 'aligned_%s' % os.path.basename(path)))
+            for key, path in base_align_raster_path_id_map.items() if
+            key not in climate_path_id_map])
+
+        # align all the base inputs to be the minimum known pixel size and to
+        # only extend over their combined intersections, including the
+        # extent of climate inputs
+        target_bounding_box = pygeoprocessing.merge_bounding_box_list(
+            [pygeoprocessing.get_raster_info(path)['bounding_box'] for path in
+                base_align_raster_path_id_map.values()] +
+            [pygeoprocessing.get_vector_info(
+                args['aoi_path'])['bounding_box']],
+            'intersection')
+        source_input_path_list = [
+            base_align_raster_path_id_map[k] for k in sorted(
+                aligned_inputs.keys())]
+        aligned_input_path_list = [
+            aligned_inputs[k] for k in sorted(aligned_inputs.keys())]
+        pygeoprocessing.align_and_resize_raster_stack(
+            source_input_path_list, aligned_input_path_list,
+            ['near'] * len(source_input_path_list),
+            target_pixel_size, target_bounding_box,
+            vector_mask_options={'mask_vector_path': args['aoi_path']})
+        aligned_inputs.update(_align_to_existing_grid(
+            climate_path_id_map, aligned_inputs['site_index'],
+            aligned_raster_dir, args['aoi_path']))
+        _check_pft_fractional_cover_sum(aligned_inputs, pft_id_set)
+
+        # create animal trait spatial index raster from management polygon
+        aligned_inputs['animal_index'] = os.path.join(
+            aligned_raster_dir, 'animal_spatial_index.tif')
+        pygeoprocessing.new_raster_from_base(
+            aligned_inputs['site_index'], aligned_inputs['animal_index'],
+            gdal.GDT_Int32, [_TARGET_NODATA], fill_value_list=[_TARGET_NODATA])
+        pygeoprocessing.rasterize(
+            args['animal_grazing_areas_path'], aligned_inputs['animal_index'],
+            option_list=["ATTRIBUTE=animal_id"])
+
+        # index pixels by the animal grazing areas feature that contains them
+        aligned_inputs['grazing_area_index'] = os.path.join(
+            aligned_raster_dir, 'grazing_area_index.tif')
+        _rasterize_feature_index(
+            aligned_inputs['site_index'], args['animal_grazing_areas_path'],
+            aligned_inputs['grazing_area_index'])
+
+        # create uniform animal density raster, if not supplied as input
+        if not args['animal_density']:
+            aligned_inputs['animal_density'] = os.path.join(
+                aligned_raster_dir, 'animal_density.tif')
+            _animal_density(aligned_inputs, args['animal_grazing_areas_path'])
     file_suffix = utils.make_suffix_string(args, 'results_suffix')
-
-    # create animal trait spatial index raster from management polygon
-    aligned_inputs['animal_index'] = os.path.join(
-        aligned_raster_dir, 'animal_spatial_index.tif')
-    pygeoprocessing.new_raster_from_base(
-        aligned_inputs['site_index'], aligned_inputs['animal_index'],
-        gdal.GDT_Int32, [_TARGET_NODATA], fill_value_list=[_TARGET_NODATA])
-    pygeoprocessing.rasterize(
-        args['animal_grazing_areas_path'], aligned_inputs['animal_index'],
-        option_list=["ATTRIBUTE=animal_id"])
-
-    # create uniform animal density raster, if not supplied as input
-    if not args['animal_density']:
-        aligned_inputs['animal_density'] = os.path.join(
-            aligned_raster_dir, 'animal_density.tif')
-        _animal_density(aligned_inputs, args['animal_grazing_areas_path'])
+    grazing_area_fid_list = _vector_fid_list(
+        args['animal_grazing_areas_path'])
 
     # Initialization
-    sv_dir = os.path.join(args['workspace_dir'], 'state_variables_m-1')
-    os.makedirs(sv_dir)
+    # state variables are written to the workspace only if they should be
+    # saved for each model time step
+    if delete_sv_folders:
+        sv_root_dir = PROCESSING_DIR
+    else:
+        sv_root_dir = args['workspace_dir']
+    if resume:
+        sv_dir = checkpoint['sv_dir']
+    else:
+        sv_dir = _state_variable_dir(sv_root_dir, -1)
+        utils.make_directories([sv_dir])
     initial_conditions_dir = None
     try:
         initial_conditions_dir = args['initial_conditions_dir']
     except KeyError:
         pass
-    if initial_conditions_dir:
+    global _SV_NODATA
+    if resume:
+        sv_reg = checkpoint['sv_reg']
+        _SV_NODATA = checkpoint['sv_nodata']
+    elif initial_conditions_dir:
         # check that a raster for each required state variable is supplied
         missing_initial_values = []
         # set _SV_NODATA from initial rasters
@@ -930,7 +1137,6 @@ def execute(args):
         if len(state_var_nodata) > 1:
             raise ValueError(
                 "Initial state variable rasters contain >1 nodata value")
-        global _SV_NODATA
         _SV_NODATA = list(state_var_nodata)[0]
 
         # align initial values with inputs
@@ -987,8 +1193,12 @@ def execute(args):
 
     # calculate persistent intermediate parameters that do not change during
     # the simulation
-    persist_param_dir = os.path.join(
-        args['workspace_dir'], 'intermediate_parameters')
+    if in_memory_state:
+        persist_param_dir = os.path.join(
+            PROCESSING_DIR, 'intermediate_parameters')
+    else:
+        persist_param_dir = os.path.join(
+            args['workspace_dir'], 'intermediate_parameters')
     utils.make_directories([persist_param_dir])
     pp_reg = utils.build_file_registry(
         [(_PERSISTENT_PARAMS_FILES, persist_param_dir)], file_suffix)
@@ -1006,385 +1216,2338 @@ def execute(args):
             animal_trait_table[animal_id])
         animal_trait_table[animal_id] = revised_animal_trait_dict
 
-    # calculate field capacity and wilting point
-    LOGGER.info("Calculating field capacity and wilting point")
-    _afiel_awilt(
-        aligned_inputs['site_index'], site_param_table,
-        sv_reg['som1c_2_path'], sv_reg['som2c_2_path'], sv_reg['som3c_path'],
-        aligned_inputs['sand'], aligned_inputs['silt'],
-        aligned_inputs['clay'], aligned_inputs['bulk_d_path'], pp_reg)
-
-    # calculate other persistent parameters
-    LOGGER.info("Calculating persistent parameters")
-    _persistent_params(
-        aligned_inputs['site_index'], site_param_table,
-        aligned_inputs['sand'], aligned_inputs['clay'], pp_reg)
-
-    # calculate required ratios for decomposition of structural material
-    LOGGER.info("Calculating required ratios for structural decomposition")
-    _structural_ratios(
-        aligned_inputs['site_index'], site_param_table, sv_reg, pp_reg)
-
-    # make yearly directory for values that are updated every twelve months
-    year_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
-    year_reg = dict(
-        [(key, os.path.join(year_dir, path)) for key, path in
-            _YEARLY_FILES.items()])
-    for pft_i in pft_id_set:
-        for file in _YEARLY_PFT_FILES:
-            year_reg['{}_{}'.format(file, pft_i)] = os.path.join(
-                year_dir, '{}_{}.tif'.format(file, pft_i))
-
-    # make monthly directory for monthly intermediate parameters that are
-    # shared between submodels, but do not need to be saved as output
-    month_temp_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
-    month_reg = {}
-    for pft_i in pft_id_set:
-        for val in _PFT_INTERMEDIATE_VALUES:
-            month_reg['{}_{}'.format(
-                val, pft_i)] = os.path.join(
-                month_temp_dir, '{}_{}.tif'.format(val, pft_i))
-    for val in _SITE_INTERMEDIATE_VALUES:
-        month_reg[val] = os.path.join(month_temp_dir, '{}.tif'.format(val))
+    if resume:
+        pp_reg = checkpoint['pp_reg']
+        animal_trait_table = dict(
+            (animal_id, traits) for animal_id, traits in
+            checkpoint['animal_trait_table'])
+    else:
+        # calculate field capacity and wilting point
+        LOGGER.info("Calculating field capacity and wilting point")
+        _afiel_awilt(
+            aligned_inputs['site_index'], site_param_table,
+            sv_reg['som1c_2_path'], sv_reg['som2c_2_path'],
+            sv_reg['som3c_path'], aligned_inputs['sand'],
+            aligned_inputs['silt'], aligned_inputs['clay'],
+            aligned_inputs['bulk_d_path'], pp_reg)
+
+        # calculate other persistent parameters
+        LOGGER.info("Calculating persistent parameters")
+        _persistent_params(
+            aligned_inputs['site_index'], site_param_table,
+            aligned_inputs['sand'], aligned_inputs['clay'], pp_reg)
+
+        # calculate required ratios for decomposition of structural material
+        LOGGER.info("Calculating required ratios for structural decomposition")
+        _structural_ratios(
+            aligned_inputs['site_index'], site_param_table, sv_reg, pp_reg)
 
     output_dir = os.path.join(args['workspace_dir'], "output")
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    # provisional state variable registry contains provisional biomass in
-    #   absence of grazing
-    provisional_sv_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
-    provisional_sv_reg = utils.build_file_registry(
-        [(_SITE_STATE_VARIABLE_FILES, provisional_sv_dir),
-            (pft_sv_dict, provisional_sv_dir)], file_suffix)
-
-    intermediate_sv_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
+    # pixels of a row with identical inputs and initial state follow
+    # identical trajectories, so each class of such pixels is simulated once
+    # on a compact grid and results are copied back to every pixel
+    if deduplicate_pixels:
+        compact_dir = os.path.join(PROCESSING_DIR, 'compact')
+        utils.make_directories([compact_dir])
+        (sim_inputs, sim_sv_reg, sim_pp_reg,
+         class_column_path) = _compact_pixels(
+            aligned_inputs, sv_reg, pp_reg, compact_dir)
+    else:
+        sim_inputs = aligned_inputs
+        sim_sv_reg = sv_reg
+        sim_pp_reg = pp_reg
+        class_column_path = None
+
+    # divide the study area into tiles that are simulated separately. Tiles
+    # share only the order of feed types selected by grazing animals, which
+    # is calculated across the study area in a separate reduction step.
+    tile_size = None
+    try:
+        tile_size = args['tile_size']
+    except KeyError:
+        pass
+    try:
+        n_workers = int(float(args['n_workers']))
+    except (KeyError, ValueError, TypeError):
+        n_workers = -1
+    n_cols, n_rows = pygeoprocessing.get_raster_info(
+        sim_inputs['site_index'])['raster_size']
+    if not tile_size and n_workers > 1:
+        # approximately one tile per worker process
+        tile_size = int(math.ceil(
+            math.sqrt(float(n_cols * n_rows) / n_workers)))
+    if tile_size:
+        offset_list = _tile_offset_list(
+            sim_inputs['site_index'], int(tile_size))
+    else:
+        offset_list = [(0, 0, n_cols, n_rows)]
 
-    # Main simulation loop
-    # for each step in the simulation
-    for month_index in range(n_months):
-        if (month_index % 12) == 0:
-            # Update yearly quantities
-            _yearly_tasks(
-                aligned_inputs, site_param_table, veg_trait_table, month_index,
-                pft_id_set, year_reg)
-
-        current_month = (starting_month + month_index - 1) % 12 + 1
-        current_year = starting_year + (starting_month + month_index - 1) // 12
-
-        # track state variables from previous step
-        prev_sv_reg = sv_reg
-
-        for animal_id in animal_trait_table.keys():
-            if animal_trait_table[animal_id]['sex'] == 'breeding_female':
-                revised_animal_trait_dict = update_breeding_female_status(
-                    animal_trait_table[animal_id], month_index)
+    # pixels outside the study area are not simulated: tiles are cropped to
+    # the extent of valid pixels they contain and empty tiles are dropped
+    offset_list = _crop_to_valid_pixels(
+        sim_inputs['site_index'], offset_list)
+    if not offset_list:
+        raise ValueError(
+            "The site spatial index contains no valid pixels inside the "
+            "area of interest")
+    worker_pool = None
+    if n_workers > 1 and len(offset_list) > 1:
+        LOGGER.info("Simulating tiles with %d worker processes", n_workers)
+        worker_pool = multiprocessing.Pool(processes=n_workers)
+    try:
+        if (offset_list == [(0, 0, n_cols, n_rows)] and
+                class_column_path is None):
+            tile_list = [_new_tile(
+                aligned_inputs, sv_reg, sv_dir, pp_reg, pft_id_set,
+                sv_root_dir, output_dir, not delete_sv_folders, None,
+                file_suffix)]
+        else:
+            LOGGER.info(
+                "Simulating %d tiles containing valid pixels",
+                len(offset_list))
+            tile_list = _map_tiles(
+                worker_pool, _cut_tile, [
+                    (sim_inputs, sim_sv_reg, sim_pp_reg, pft_id_set, offset,
+                     os.path.join(PROCESSING_DIR, 'tile_%d' % tile_index),
+                     file_suffix) for tile_index, offset in
+                    enumerate(offset_list)])
+
+        # running statistics of monthly outputs inside each grazing area
+        n_features = (
+            max(grazing_area_fid_list) + 1 if grazing_area_fid_list else 0)
+        if resume:
+            summary_accumulator = dict(
+                (val, {
+                    'sum': numpy.array(
+                        accumulator['sum'], dtype=numpy.float64),
+                    'count': numpy.array(
+                        accumulator['count'], dtype=numpy.int64),
+                }) for val, accumulator in
+                checkpoint['summary_accumulator'].items())
+        else:
+            summary_accumulator = dict(
+                (val, _new_feature_accumulator(n_features)) for val in
+                _SUMMARY_OUTPUT_VALUES)
+
+        # table of monthly outputs inside each grazing area, written as each
+        # month completes
+        summary_output_dir = os.path.join(output_dir, 'summary_results')
+        utils.make_directories([summary_output_dir])
+        monthly_summary_table_path = os.path.join(
+            summary_output_dir,
+            'grazing_areas_monthly_rpm{}.csv'.format(file_suffix))
+        if resume:
+            start_month_index = checkpoint['month_index'] + 1
+            _truncate_monthly_summary_table(
+                monthly_summary_table_path, starting_year, starting_month,
+                start_month_index)
+            LOGGER.info("Resuming simulation at month %d", start_month_index)
+        else:
+            start_month_index = 0
+            if os.path.exists(monthly_summary_table_path):
+                os.remove(monthly_summary_table_path)
+
+        # quantities updated once every 12 months are calculated from
+        # inputs only, so they are restored from the months preceding the
+        # resumed month
+        if start_month_index % 12 != 0:
+            if monthly_annual_precip:
+                year_month_index = start_month_index - 1
+            else:
+                year_month_index = start_month_index - start_month_index % 12
+            tile_list = _map_tiles(
+                worker_pool, _restore_yearly_tasks, [
+                    (tile, site_param_table, veg_trait_table, year_month_index,
+                     pft_id_set) for tile in tile_list])
+
+        if write_checkpoint and not resume:
+            aligned_input_md5 = _aligned_input_md5(aligned_inputs)
+
+        # animal density does not change over time
+        density_accumulator = _new_feature_accumulator(n_features)
+        _accumulate_feature_statistics(
+            density_accumulator, _feature_statistics(
+                aligned_inputs['grazing_area_index'],
+                [aligned_inputs['animal_density']])[0])
+        density_summary = _feature_mean_summary(
+            density_accumulator, grazing_area_fid_list)
+
+        # Main simulation loop
+        # for each step in the simulation
+        for month_index in range(start_month_index, n_months):
+            current_month = (starting_month + month_index - 1) % 12 + 1
+            current_year = (
+                starting_year + (starting_month + month_index - 1) // 12)
+
+            for animal_id in animal_trait_table.keys():
+                if animal_trait_table[animal_id]['sex'] == 'breeding_female':
+                    revised_animal_trait_dict = update_breeding_female_status(
+                        animal_trait_table[animal_id], month_index)
+                    animal_trait_table[animal_id] = revised_animal_trait_dict
+                revised_animal_trait_dict = calc_max_intake(
+                    animal_trait_table[animal_id])
                 animal_trait_table[animal_id] = revised_animal_trait_dict
-            revised_animal_trait_dict = calc_max_intake(
-                animal_trait_table[animal_id])
-            animal_trait_table[animal_id] = revised_animal_trait_dict
 
-        # enforce absence of grazing as zero biomass removed
-        for pft_i in pft_id_set:
-            pygeoprocessing.new_raster_from_base(
-                aligned_inputs['pft_{}'.format(pft_i)],
-                month_reg['flgrem_{}'.format(pft_i)], gdal.GDT_Float32,
-                [_TARGET_NODATA], fill_value_list=[0])
-            pygeoprocessing.new_raster_from_base(
-                aligned_inputs['pft_{}'.format(pft_i)],
-                month_reg['fdgrem_{}'.format(pft_i)], gdal.GDT_Float32,
-                [_TARGET_NODATA], fill_value_list=[0])
-
-        # populate provisional_sv_reg with provisional biomass in absence of
-        #   grazing
-        _potential_production(
-            aligned_inputs, site_param_table, current_month, month_index,
-            pft_id_set, veg_trait_table, prev_sv_reg, pp_reg, month_reg)
-        _root_shoot_ratio(
-            aligned_inputs, site_param_table, current_month, pft_id_set,
-            veg_trait_table, prev_sv_reg, year_reg, month_reg)
-        _soil_water(
-            aligned_inputs, site_param_table, veg_trait_table, current_month,
-            month_index, prev_sv_reg, pp_reg, pft_id_set, month_reg,
-            provisional_sv_reg)
-        _decomposition(
-            aligned_inputs, current_month, month_index, pft_id_set,
-            site_param_table, year_reg, month_reg, prev_sv_reg, pp_reg,
-            provisional_sv_reg)
-        _death_and_partition(
-            'stded', aligned_inputs, site_param_table, current_month,
-            year_reg, pft_id_set, veg_trait_table, prev_sv_reg,
-            provisional_sv_reg)
-        _death_and_partition(
-            'bgliv', aligned_inputs, site_param_table, current_month,
-            year_reg, pft_id_set, veg_trait_table, prev_sv_reg,
-            provisional_sv_reg)
-        _shoot_senescence(
-            pft_id_set, veg_trait_table, prev_sv_reg, month_reg, current_month,
-            provisional_sv_reg)
-        intermediate_sv_reg = copy_intermediate_sv(
-            pft_id_set, provisional_sv_reg, intermediate_sv_dir)
-        delta_agliv_dict = _new_growth(
-            pft_id_set, aligned_inputs, site_param_table, veg_trait_table,
-            month_reg, current_month, provisional_sv_reg)
-        _apply_new_growth(delta_agliv_dict, pft_id_set, provisional_sv_reg)
-
-        # estimate grazing offtake by animals relative to provisional biomass
-        #   at an intermediate step, after senescence but before new growth
-        _calc_grazing_offtake(
-            aligned_inputs, args['aoi_path'], args['management_threshold'],
-            intermediate_sv_reg, pft_id_set, aligned_inputs['animal_index'],
-            animal_trait_table, veg_trait_table, current_month, month_reg)
-
-        # estimate actual biomass production for this step, integrating impacts
-        #   of grazing
-        sv_dir = os.path.join(
-            args['workspace_dir'], 'state_variables_m%d' % month_index)
-        utils.make_directories([sv_dir])
-        sv_reg = utils.build_file_registry(
-            [(_SITE_STATE_VARIABLE_FILES, sv_dir),
-                (pft_sv_dict, sv_dir)], file_suffix)
+            # provisional biomass in the absence of grazing
+            result_list = _map_tiles(
+                worker_pool, _simulate_ungrazed_step, [
+                    (tile, site_param_table, veg_trait_table, pft_id_set,
+                     month_index, current_month, args['aoi_path'],
+                     monthly_annual_precip) for tile in tile_list])
+            tile_list = [tile for tile, nc_sum_dict in result_list]
+
+            # order of feed types across the study area
+            ordered_feed_types = order_feed_types(
+                [nc_sum_dict for tile, nc_sum_dict in result_list])
+
+            # actual biomass production, integrating impacts of grazing
+            tile_list = _map_tiles(
+                worker_pool, _simulate_grazed_step, [
+                    (tile, site_param_table, veg_trait_table,
+                     animal_trait_table, pft_id_set, month_index,
+                     current_month, current_year,
+                     args['aoi_path'], args['management_threshold'],
+                     ordered_feed_types, file_suffix) for tile in tile_list])
+
+            # combine statistics of monthly outputs across tiles
+            monthly_summary_dict = {}
+            for val in _SUMMARY_OUTPUT_VALUES:
+                month_accumulator = _new_feature_accumulator(n_features)
+                for tile in tile_list:
+                    _accumulate_feature_statistics(
+                        month_accumulator, tile['output_stats'][val])
+                _accumulate_feature_statistics(
+                    summary_accumulator[val], month_accumulator)
+                monthly_summary_dict[val] = _feature_mean_summary(
+                    month_accumulator, grazing_area_fid_list)
+            monthly_summary_dict['animal_density'] = density_summary
+            _append_monthly_summary_table(
+                monthly_summary_table_path, grazing_area_fid_list,
+                current_year, current_month, monthly_summary_dict)
+
+            if tile_list[0]['offset'] is not None:
+                # assemble monthly outputs of each tile
+                for val in _SUMMARY_OUTPUT_VALUES:
+                    output_basename = '{}_{}_{}{}.tif'.format(
+                        val, current_year, current_month, file_suffix)
+                    tile_path_list = [
+                        os.path.join(tile['output_dir'], output_basename) for
+                        tile in tile_list]
+                    _mosaic_tiles(
+                        tile_path_list, offset_list, sim_inputs['site_index'],
+                        os.path.join(output_dir, output_basename),
+                        class_column_path)
+                    for tile_path in tile_path_list:
+                        os.remove(tile_path)
+                if not delete_sv_folders:
+                    sv_dir = _state_variable_dir(
+                        args['workspace_dir'], month_index)
+                    utils.make_directories([sv_dir])
+                    sv_reg = {}
+                    for key, tile_path in tile_list[0]['sv_reg'].items():
+                        sv_reg[key] = os.path.join(
+                            sv_dir, os.path.basename(tile_path))
+                        _mosaic_tiles(
+                            [tile['sv_reg'][key] for tile in tile_list],
+                            offset_list, sim_inputs['site_index'],
+                            sv_reg[key], class_column_path)
+            else:
+                sv_dir = tile_list[0]['sv_dir']
+                sv_reg = tile_list[0]['sv_reg']
+
+            if write_checkpoint:
+                _write_checkpoint(args['workspace_dir'], {
+                    'month_index': month_index,
+                    'sv_dir': sv_dir,
+                    'sv_reg': sv_reg,
+                    'sv_nodata': _SV_NODATA,
+                    'pp_reg': pp_reg,
+                    'animal_trait_table': list(animal_trait_table.items()),
+                    'aligned_inputs': aligned_inputs,
+                    'aligned_input_md5': aligned_input_md5,
+                    'summary_accumulator': dict(
+                        (val, dict(
+                            (key, value_array.tolist()) for key, value_array in
+                            accumulator.items()))
+                        for val, accumulator in summary_accumulator.items()),
+                })
 
-        _potential_production(
-            aligned_inputs, site_param_table, current_month, month_index,
-            pft_id_set, veg_trait_table, prev_sv_reg, pp_reg, month_reg)
+        # summary results
+        summary_shp_path = os.path.join(
+            summary_output_dir,
+            'grazing_areas_results_rpm{}.shp'.format(file_suffix))
+        create_vector_copy(
+            args['animal_grazing_areas_path'], summary_shp_path)
+
+        field_summary_map = {}
+        for field_name, val in _SUMMARY_FIELD_VALUES:
+            field_summary_map[field_name] = _feature_mean_summary(
+                summary_accumulator[val], grazing_area_fid_list)
+        _add_fields_to_shapefile(
+            field_summary_map,
+            [field_name for field_name, val in _SUMMARY_FIELD_VALUES],
+            summary_shp_path)
+    except BaseException:
+        if worker_pool is not None:
+            worker_pool.terminate()
+        raise
+    else:
+        if worker_pool is not None:
+            worker_pool.close()
+    finally:
+        if worker_pool is not None:
+            worker_pool.join()
+
+    # clean up, including state variables that should not be saved;
+    # persistent parameters are kept if the run may be extended
+    if not write_checkpoint:
+        shutil.rmtree(persist_param_dir)
+    shutil.rmtree(PROCESSING_DIR)
 
-        _root_shoot_ratio(
-            aligned_inputs, site_param_table, current_month, pft_id_set,
-            veg_trait_table, prev_sv_reg, year_reg, month_reg)
 
-        _soil_water(
-            aligned_inputs, site_param_table, veg_trait_table, current_month,
-            month_index, prev_sv_reg, pp_reg, pft_id_set, month_reg, sv_reg)
+def _make_processing_dir(workspace_dir, in_memory_state, resume):
+    """Create the temporary directory for intermediate files.
 
-        _decomposition(
-            aligned_inputs, current_month, month_index, pft_id_set,
-            site_param_table, year_reg, month_reg, prev_sv_reg, pp_reg, sv_reg)
+    Parameters:
+        workspace_dir (string): path to the model workspace
+        in_memory_state (bool): should intermediate files be stored on a
+            memory-backed file system, if one is available?
+        resume (bool): is the model resuming a previous run in the
+            workspace?
 
-        _death_and_partition(
-            'stded', aligned_inputs, site_param_table, current_month,
-            year_reg, pft_id_set, veg_trait_table, prev_sv_reg, sv_reg)
+    Side effects:
+        creates a temporary directory on the memory-backed file system
+            `_RAM_BACKED_DIR`, or the directory 'temporary_files' inside
+            `workspace_dir`
 
-        _death_and_partition(
-            'bgliv', aligned_inputs, site_param_table, current_month,
-            year_reg, pft_id_set, veg_trait_table, prev_sv_reg, sv_reg)
+    Returns:
+        path to the temporary directory
 
-        _shoot_senescence(
-            pft_id_set, veg_trait_table, prev_sv_reg, month_reg, current_month,
-            sv_reg)
+    """
+    if in_memory_state and os.path.isdir(_RAM_BACKED_DIR):
+        return tempfile.mkdtemp(
+            prefix='temporary_files_', dir=os.path.abspath(_RAM_BACKED_DIR))
+    if in_memory_state:
+        LOGGER.warning(
+            "Memory-backed file system not found at %s; intermediate "
+            "files will be stored in the workspace", _RAM_BACKED_DIR)
+    processing_dir = os.path.join(workspace_dir, "temporary_files")
+    if resume and os.path.exists(processing_dir):
+        # remove intermediate files left by the interrupted run
+        shutil.rmtree(processing_dir)
+    if not os.path.exists(processing_dir):
+        os.makedirs(processing_dir)
+    return processing_dir
+
+
+def _state_variable_dir(sv_root_dir, month_index):
+    """Get the directory where state variables of one time step are stored.
+
+    State variables are stored in the workspace only if they should be saved
+    for each model time step. Otherwise, they are stored in the temporary
+    processing directory, or in the directory of the tile to which they
+    belong, and are removed once they are no longer needed.
 
-        delta_agliv_dict = _new_growth(
-            pft_id_set, aligned_inputs, site_param_table, veg_trait_table,
-            month_reg, current_month, sv_reg)
+    Parameters:
+        sv_root_dir (string): path to the directory holding state variables
+            of each time step
+        month_index (int): index of the model time step, where -1 indicates
+            initial conditions
 
-        _animal_diet_sufficiency(
-            sv_reg, pft_id_set, aligned_inputs, animal_trait_table,
-            veg_trait_table, current_month, month_reg)
+    Returns:
+        path to the directory where state variables of the time step should
+            be stored
 
-        _grazing(
-            aligned_inputs, site_param_table, month_reg, animal_trait_table,
-            pft_id_set, sv_reg)
+    """
+    return os.path.join(sv_root_dir, 'state_variables_m%d' % month_index)
 
-        _apply_new_growth(delta_agliv_dict, pft_id_set, sv_reg)
 
-        _leach(aligned_inputs, site_param_table, month_reg, sv_reg)
+def extend(args):
+    """Continue a completed simulation with additional months.
 
-        _write_monthly_outputs(
-            aligned_inputs, provisional_sv_reg, sv_reg, month_reg, pft_id_set,
-            current_year, current_month, output_dir, file_suffix)
+    Simulate months that follow the last month simulated in the workspace,
+    starting from the state variables of that month. Only inputs for the
+    additional months are aligned; aligned inputs, persistent parameters and
+    monthly outputs of the previous run are kept, and summary results are
+    updated to include the additional months.
 
-    # summary results
-    summary_output_dir = os.path.join(output_dir, 'summary_results')
-    os.makedirs(summary_output_dir)
-    summary_shp_path = os.path.join(
-        summary_output_dir,
-        'grazing_areas_results_rpm{}.shp'.format(file_suffix))
-    create_vector_copy(
-        args['animal_grazing_areas_path'], summary_shp_path)
+    Parameters:
+        args (dict): arguments to `execute` for the workspace of a previous
+            run that saved state variables, where args['n_months'] gives the
+            total number of months including those already simulated and
+            args['precip_dir'] contains precipitation for the additional
+            months
 
-    field_pickle_map, field_header_order_list = aggregate_and_pickle_results(
-        output_dir, summary_shp_path)
-    _add_fields_to_shapefile(
-        field_pickle_map, field_header_order_list, summary_shp_path)
+    Side effects:
+        as for `execute`
 
-    # clean up
-    shutil.rmtree(persist_param_dir)
-    shutil.rmtree(PROCESSING_DIR)
-    if delete_sv_folders:
-        for month_index in range(-1, n_months):
-            shutil.rmtree(
-                os.path.join(
-                    args['workspace_dir'],
-                    'state_variables_m%d' % month_index))
+    Returns:
+        None
 
+    Raises:
+        ValueError if the workspace contains no checkpoint
+        ValueError if args['n_months'] does not exceed the number of months
+            already simulated
 
-def raster_multiplication(
-        raster1, raster1_nodata, raster2, raster2_nodata, target_path,
-        target_path_nodata):
-    """Multiply raster1 by raster2.
+    """
+    checkpoint = _read_checkpoint(args['workspace_dir'])
+    n_completed_months = checkpoint['month_index'] + 1
+    if int(args['n_months']) <= n_completed_months:
+        raise ValueError(
+            "n_months must exceed the %d months already simulated in the "
+            "workspace" % n_completed_months)
+    extend_args = args.copy()
+    extend_args['resume'] = True
+    extend_args['save_sv_rasters'] = True
+    execute(extend_args)
 
-    Multiply raster1 by raster2 element-wise. In any pixel where raster1 or
-    raster2 is nodata, the result is nodata. The result is always of float
-    datatype.
+
+def spin_up(args):
+    """Equilibrate soil organic matter by cycling a climatology year.
+
+    Starting from the initial conditions given in `args`, simulate a
+    climatology year of mean monthly precipitation repeatedly until the slow
+    soil organic matter pools (som2c_1, som2c_2 and som3c) change by less
+    than a relative tolerance over one year on every pixel, or until a
+    maximum number of years is reached. The state variables at the end of
+    the last year are written as a set of rasters that can be supplied to
+    `execute` as args['initial_conditions_dir'].
+
+    Parameters:
+        args (dict): arguments to `execute`, where precipitation of the
+            months from args['starting_month'] of args['starting_year'] for
+            args['n_months'] months is averaged by calendar month to build
+            the climatology year, and the following optional entries:
+            args['spin_up_max_years'] (int): maximum number of years to
+                simulate, default 100
+            args['spin_up_tolerance'] (float): relative change in slow soil
+                organic matter pools over one year below which a pixel is
+                considered to have converged, default 0.001
+            args['spin_up_grazing'] (boolean): should grazing animals be
+                simulated during spin-up? Default false
+            args['spin_up_dir'] (string): directory where the equilibrated
+                state variables should be written. Default
+                'spin_up_initial_conditions' inside args['workspace_dir']
 
     Side effects:
-        modifies or creates the raster indicated by `target_path`
+        creates the directory indicated by args['spin_up_dir'], containing
+            one raster for each site and plant functional type state variable
+        creates the outputs of `execute` in args['workspace_dir']. Monthly
+            output rasters, the monthly summary table and the summary results
+            vector cover only the last year simulated; outputs of earlier
+            years are removed as spin-up proceeds
 
     Returns:
-        None
+        path to the directory containing the equilibrated state variables
 
     """
-    def raster_multiply_op(raster1, raster2):
-        """Multiply two rasters."""
-        valid_mask = (
-            (~numpy.isclose(raster1, raster1_nodata)) &
-            (~numpy.isclose(raster2, raster2_nodata)))
-        result = numpy.empty(raster1.shape, dtype=numpy.float32)
-        result[:] = target_path_nodata
-        result[valid_mask] = raster1[valid_mask] * raster2[valid_mask]
-        return result
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [raster1, raster2]],
-        raster_multiply_op, target_path, gdal.GDT_Float32,
-        target_path_nodata)
+    max_years = int(args.get('spin_up_max_years', 100))
+    tolerance = float(args.get('spin_up_tolerance', 0.001))
+    spin_up_grazing = args.get('spin_up_grazing', False)
+    spin_up_dir = args.get('spin_up_dir') or os.path.join(
+        args['workspace_dir'], 'spin_up_initial_conditions')
+    starting_month = int(args['starting_month'])
+    starting_year = int(args['starting_year'])
+    n_months = int(args['n_months'])
+    if n_months < 12:
+        raise ValueError(
+            "At least 12 months of precipitation data required to build the "
+            "climatology year")
+
+    # mean precipitation of each calendar month
+    precip_dir_list = [
+        os.path.join(args['precip_dir'], f) for f in
+        os.listdir(args['precip_dir'])]
+    month_path_dict = collections.defaultdict(list)
+    for month_index in range(n_months):
+        month_i = (starting_month + month_index - 1) % 12 + 1
+        year = starting_year + (starting_month + month_index - 1) // 12
+        year_month_match = re.compile(
+            r'.*[^\d]%d_%d\.[^.]+$' % (year, month_i))
+        file_list = [
+            month_file_path for month_file_path in precip_dir_list if
+            year_month_match.match(month_file_path)]
+        if len(file_list) != 1:
+            raise ValueError(
+                "Expected one precipitation raster for year %d, month %d, "
+                "found %d" % (year, month_i, len(file_list)))
+        month_path_dict[month_i].append(file_list[0])
+
+    # inputs built for spin-up are removed once it is done
+    utils.make_directories([args['workspace_dir']])
+    spin_up_input_dir = tempfile.mkdtemp(
+        prefix='spin_up_inputs_', dir=args['workspace_dir'])
+    try:
+        _spin_up(
+            args, spin_up_input_dir, month_path_dict, max_years, tolerance,
+            spin_up_grazing)
+    finally:
+        shutil.rmtree(spin_up_input_dir)
+
+    # equilibrated state variables in the layout of initial conditions
+    checkpoint = _read_checkpoint(args['workspace_dir'])
+    utils.make_directories([spin_up_dir])
+    for key, path in checkpoint['sv_reg'].items():
+        if key in _SITE_STATE_VARIABLE_FILES:
+            basename = _SITE_STATE_VARIABLE_FILES[key]
+        else:
+            basename = '{}.tif'.format(key[:-len('_path')])
+        shutil.copyfile(path, os.path.join(spin_up_dir, basename))
+    return spin_up_dir
 
 
-def raster_division(
-        raster1, raster1_nodata, raster2, raster2_nodata, target_path,
-        target_path_nodata):
-    """Divide raster1 by raster2.
+def _spin_up(
+        args, spin_up_input_dir, month_path_dict, max_years, tolerance,
+        spin_up_grazing):
+    """Cycle the climatology year until slow soil organic matter converges.
 
-    Divide raster1 by raster2 element-wise. In any pixel where raster1 or
-    raster2 is nodata, the result is nodata. The result is always of float
-    datatype.
+    Parameters:
+        args (dict): arguments to `execute`, as supplied to `spin_up`
+        spin_up_input_dir (string): path to directory where the climatology
+            year and other inputs built for spin-up should be stored
+        month_path_dict (dict): map of calendar month to list of paths to
+            precipitation rasters of that month
+        max_years (int): maximum number of years to simulate
+        tolerance (float): relative change in slow soil organic matter pools
+            over one year below which a pixel is considered to have converged
+        spin_up_grazing (boolean): should grazing animals be simulated?
 
     Side effects:
-        modifies or creates the raster indicated by `target_path`
+        creates the outputs of `execute` in args['workspace_dir'] for the
+            last year simulated, with state variables of the last month
+            simulated
 
     Returns:
         None
 
     """
-    def raster_divide_op(raster1, raster2):
-        """Divide raster1 by raster2."""
-        valid_mask = (
-            (~numpy.isclose(raster1, raster1_nodata)) &
-            (~numpy.isclose(raster2, raster2_nodata)))
-        raster1 = raster1.astype(numpy.float32)
-        raster2 = raster2.astype(numpy.float32)
-
-        result = numpy.empty(raster1.shape, dtype=numpy.float32)
-        result[:] = target_path_nodata
-        error_mask = ((raster1 != 0) & (raster2 == 0.) & valid_mask)
-        zero_mask = ((raster1 == 0.) & (raster2 == 0.) & valid_mask)
-        nonzero_mask = ((raster2 != 0.) & valid_mask)
-        result[error_mask] = target_path_nodata
-        result[zero_mask] = 0.
-        result[nonzero_mask] = raster1[nonzero_mask] / raster2[nonzero_mask]
-        return result
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [raster1, raster2]],
-        raster_divide_op, target_path, gdal.GDT_Float32,
-        target_path_nodata)
+    starting_month = int(args['starting_month'])
+    starting_year = int(args['starting_year'])
+    output_dir = os.path.join(args['workspace_dir'], 'output')
+    file_suffix = utils.make_suffix_string(args, 'results_suffix')
+    monthly_summary_table_path = os.path.join(
+        output_dir, 'summary_results',
+        'grazing_areas_monthly_rpm{}.csv'.format(file_suffix))
+    climatology_path_dict = {}
+    for month_i, path_list in month_path_dict.items():
+        climatology_path_dict[month_i] = os.path.join(
+            spin_up_input_dir, 'climatology_%d.tif' % month_i)
+        nodata_list = [
+            pygeoprocessing.get_raster_info(path)['nodata'][0] for path in
+            path_list]
+        pygeoprocessing.raster_calculator(
+            [(path, 1) for path in path_list] +
+            [(nodata, 'raw') for nodata in nodata_list] +
+            [(_TARGET_NODATA, 'raw')],
+            _mean_of_arrays, climatology_path_dict[month_i],
+            gdal.GDT_Float32, _TARGET_NODATA)
 
+    def add_climatology_year(year_index):
+        """Copy the climatology year into the precipitation directory."""
+        for month_index in range(year_index * 12, (year_index + 1) * 12):
+            month_i = (starting_month + month_index - 1) % 12 + 1
+            year = starting_year + (starting_month + month_index - 1) // 12
+            shutil.copyfile(
+                climatology_path_dict[month_i], os.path.join(
+                    spin_up_args['precip_dir'],
+                    'precip_%d_%d.tif' % (year, month_i)))
 
-def raster_list_sum(
-        raster_list, input_nodata, target_path, target_nodata,
-        nodata_remove=False):
-    """Calculate the sum per pixel across rasters in a list.
+    def remove_year_outputs(checkpoint):
+        """Remove outputs of the last year simulated before the next year.
 
-    Sum the rasters in `raster_list` element-wise, allowing nodata values
-    in the rasters to propagate to the result or treating nodata as zero. If
-    nodata is treated as zero, areas where all inputs are nodata will be nodata
-    in the output.
+        Monthly output rasters of the year, the monthly summary table and
+        summary statistics accumulated in the checkpoint are removed, so that
+        the next year starts its outputs from scratch.
+        """
+        for month_index in range(
+                checkpoint['month_index'] - 11,
+                checkpoint['month_index'] + 1):
+            month_i = (starting_month + month_index - 1) % 12 + 1
+            year = starting_year + (starting_month + month_index - 1) // 12
+            for val in _SUMMARY_OUTPUT_VALUES:
+                output_path = os.path.join(
+                    output_dir, '{}_{}_{}{}.tif'.format(
+                        val, year, month_i, file_suffix))
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+        if os.path.exists(monthly_summary_table_path):
+            os.remove(monthly_summary_table_path)
+        for accumulator in checkpoint['summary_accumulator'].values():
+            accumulator['sum'] = [0.] * len(accumulator['sum'])
+            accumulator['count'] = [0] * len(accumulator['count'])
+        _write_checkpoint(args['workspace_dir'], checkpoint)
+
+    spin_up_args = args.copy()
+    spin_up_args['precip_dir'] = os.path.join(spin_up_input_dir, 'precip')
+    utils.make_directories([spin_up_args['precip_dir']])
+    spin_up_args['save_sv_rasters'] = True
+    spin_up_args['n_months'] = 12
+    if not spin_up_grazing:
+        spin_up_args['animal_density'] = os.path.join(
+            spin_up_input_dir, 'animal_density.tif')
+        pygeoprocessing.new_raster_from_base(
+            climatology_path_dict[starting_month],
+            spin_up_args['animal_density'], gdal.GDT_Float32,
+            [_TARGET_NODATA], fill_value_list=[0])
+
+    # the first year aligns inputs and keeps persistent parameters in the
+    # workspace; following years only align the new climatology year and
+    # hold intermediate files in memory
+    add_climatology_year(0)
+    spin_up_args['in_memory_state'] = False
+    execute(spin_up_args)
+    spin_up_args['in_memory_state'] = True
+    prev_sv_reg = None
+    # year_index is the number of years simulated so far
+    for year_index in range(1, max_years + 1):
+        checkpoint = _read_checkpoint(args['workspace_dir'])
+        if prev_sv_reg is not None:
+            n_unconverged = _count_unconverged_pixels(
+                prev_sv_reg, checkpoint['sv_reg'], tolerance)
+            LOGGER.info(
+                "Spin-up year %d: %d pixels not converged", year_index,
+                n_unconverged)
+            if n_unconverged == 0:
+                break
+            # only state variables at the end of this year are needed
+            for month_index in range(
+                    (year_index - 2) * 12, year_index * 12 - 1):
+                sv_dir = _state_variable_dir(
+                    args['workspace_dir'], month_index)
+                if os.path.exists(sv_dir):
+                    shutil.rmtree(sv_dir)
+        if year_index == max_years:
+            LOGGER.warning(
+                "Spin-up did not converge within %d years", max_years)
+            break
+        prev_sv_reg = checkpoint['sv_reg']
+        remove_year_outputs(checkpoint)
+        add_climatology_year(year_index)
+        spin_up_args['n_months'] = (year_index + 1) * 12
+        extend(spin_up_args)
+
+
+def _mean_of_arrays(*args):
+    """Calculate the pixelwise mean of arrays, propagating nodata.
 
     Parameters:
-        raster_list (list): list of paths to rasters to sum
-        input_nodata (float or int): nodata value in the input rasters
-        target_path (string): path to location to store the result
-        target_nodata (float or int): nodata value for the result raster
-        nodata_remove (bool): if true, treat nodata values in input
-            rasters as zero. If false, the sum in a pixel where any input
-            raster is nodata is nodata.
-
-    Side effects:
-        modifies or creates the raster indicated by `target_path`
+        args: arrays to average, followed by the nodata value of each array
+            in the same order, followed by the nodata value of the result
 
     Returns:
-        None
+        mean of the arrays, with nodata where any array contains nodata
 
     """
-    def raster_sum_op(*raster_list):
-        """Add the rasters in raster_list without removing nodata values."""
-        invalid_mask = numpy.any(
-            numpy.isclose(numpy.array(raster_list), input_nodata), axis=0)
-        for r in raster_list:
-            numpy.place(r, numpy.isclose(r, input_nodata), [0])
-        sum_of_rasters = numpy.sum(raster_list, axis=0)
-        sum_of_rasters[invalid_mask] = target_nodata
-        return sum_of_rasters
+    n_arrays = (len(args) - 1) // 2
+    array_list = args[:n_arrays]
+    nodata_list = args[n_arrays:2 * n_arrays]
+    target_nodata = args[-1]
+    valid_mask = numpy.ones(array_list[0].shape, dtype=bool)
+    for array, input_nodata in zip(array_list, nodata_list):
+        if input_nodata is not None:
+            valid_mask &= _valid_mask(array, input_nodata)
+    result = numpy.empty(array_list[0].shape, dtype=numpy.float32)
+    result[:] = target_nodata
+    result[valid_mask] = numpy.mean(
+        [array[valid_mask] for array in array_list], axis=0)
+    return result
+
+
+def _count_unconverged_pixels(prev_sv_reg, sv_reg, tolerance):
+    """Count pixels where slow soil organic matter pools are still changing.
 
-    def raster_sum_op_nodata_remove(*raster_list):
-        """Add the rasters in raster_list, treating nodata as zero."""
-        invalid_mask = numpy.all(
-            numpy.isclose(numpy.array(raster_list), input_nodata), axis=0)
-        for r in raster_list:
-            numpy.place(r, numpy.isclose(r, input_nodata), [0])
-        sum_of_rasters = numpy.sum(raster_list, axis=0)
-        sum_of_rasters[invalid_mask] = target_nodata
-        return sum_of_rasters
+    Parameters:
+        prev_sv_reg (dict): map of key, path pairs giving paths to state
+            variables at the end of the previous year
+        sv_reg (dict): map of key, path pairs giving paths to state
+            variables at the end of the current year
+        tolerance (float): relative change below which a pool is considered
+            to have converged
 
-    if nodata_remove:
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in raster_list], raster_sum_op_nodata_remove,
-            target_path, gdal.GDT_Float32, target_nodata)
+    Returns:
+        number of valid pixels where the relative change of som2c_1, som2c_2
+            or som3c exceeds `tolerance`
 
-    else:
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in raster_list], raster_sum_op,
-            target_path, gdal.GDT_Float32, target_nodata)
+    """
+    key_list = ['som2c_1_path', 'som2c_2_path', 'som3c_path']
+    raster_list = [
+        gdal.OpenEx(sv_path, gdal.OF_RASTER) for sv_path in
+        [prev_sv_reg[key] for key in key_list] +
+        [sv_reg[key] for key in key_list]]
+    band_list = [raster.GetRasterBand(1) for raster in raster_list]
+    n_unconverged = 0
+    for offset_map in pygeoprocessing.iterblocks(
+            (sv_reg[key_list[0]], 1), offset_only=True):
+        unconverged_mask = numpy.zeros(
+            (offset_map['win_ysize'], offset_map['win_xsize']), dtype=bool)
+        for pool_index in range(len(key_list)):
+            previous = band_list[pool_index].ReadAsArray(**offset_map)
+            current = band_list[pool_index + len(key_list)].ReadAsArray(
+                **offset_map)
+            valid_mask = (
+                _valid_mask(current, _SV_NODATA) &
+                _valid_mask(previous, _SV_NODATA))
+            unconverged_mask[valid_mask] |= (
+                numpy.abs(current[valid_mask] - previous[valid_mask]) >
+                tolerance * numpy.abs(previous[valid_mask]))
+        n_unconverged += numpy.count_nonzero(unconverged_mask)
+    band_list = None
+    raster_list = None
+    return n_unconverged
+
+
+def _align_to_existing_grid(
+        base_raster_path_id_map, template_raster_path, aligned_raster_dir,
+        aoi_path):
+    """Align new inputs to the grid of previously aligned inputs.
+
+    Monthly climate inputs are aligned as virtual rasters by
+    `_warp_virtual_raster`, so that each month is resampled only when it is
+    read during the simulation.
 
+    Parameters:
+        base_raster_path_id_map (dict): map of key, path pairs giving paths
+            to inputs that should be aligned
+        template_raster_path (string): path to a previously aligned input
+            giving the extent, resolution and projection of the grid
+        aligned_raster_dir (string): path to directory where aligned inputs
+            should be stored
+        aoi_path (string): path to vector layer giving the spatial extent of
+            the model
 
-def raster_sum(
-        raster1, raster1_nodata, raster2, raster2_nodata, target_path,
-        target_nodata, nodata_remove=False):
-    """Add raster 1 and raster2.
+    Side effects:
+        creates an aligned raster or virtual raster in `aligned_raster_dir`
+            for each input
 
-    Add raster1 and raster2, allowing nodata values in the rasters to
-    propagate to the result or treating nodata as zero.
+    Returns:
+        map of key, path pairs giving paths to the aligned inputs
+
+    """
+    template_info = pygeoprocessing.get_raster_info(template_raster_path)
+    aligned_inputs = {}
+    for key, path in base_raster_path_id_map.items():
+        if _CLIMATE_INPUT_PATTERN.match(key):
+            aligned_inputs[key] = os.path.join(
+                aligned_raster_dir, 'aligned_%s.vrt' % os.path.splitext(
+                    os.path.basename(path))[0])
+            _warp_virtual_raster(
+                path, template_raster_path, aoi_path, aligned_inputs[key])
+            continue
+        aligned_inputs[key] = os.path.join(
+            aligned_raster_dir, 'aligned_%s' % os.path.basename(path))
+        pygeoprocessing.warp_raster(
+            path, template_info['pixel_size'], aligned_inputs[key], 'near',
+            target_bb=template_info['bounding_box'],
+            target_projection_wkt=template_info['projection_wkt'],
+            vector_mask_options={'mask_vector_path': aoi_path})
+    return aligned_inputs
+
+
+def _warp_virtual_raster(
+        base_raster_path, template_raster_path, aoi_path, target_vrt_path):
+    """Create a virtual raster aligning an input to an existing grid.
+
+    The virtual raster resamples `base_raster_path` by nearest neighbor to
+    the grid of `template_raster_path` each time it is read, and pixels
+    outside the area of interest are nodata, as for inputs aligned by
+    `pygeoprocessing.warp_raster`. If the input has no nodata value,
+    `_TARGET_NODATA` is used.
 
     Parameters:
-        raster1 (string): path to one raster operand
-        raster1_nodata (float or int): nodata value in raster1
-        raster2 (string): path to second raster operand
-        raster2_nodata (float or int): nodata value in raster2
-        target_path (string): path to location to store the sum
-        target_nodata (float or int): nodata value for the result raster
-        nodata_remove (bool): if true, treat nodata values in input
-            rasters as zero. If false, the sum in a pixel where any
-            input raster is nodata is nodata.
+        base_raster_path (string): path to the raster that should be aligned
+        template_raster_path (string): path to a previously aligned input
+            giving the extent, resolution and projection of the grid
+        aoi_path (string): path to vector layer giving the spatial extent of
+            the model
+        target_vrt_path (string): path to location where the virtual raster
+            should be created
 
     Side effects:
-        modifies or creates the raster indicated by `target_path`
+        creates the virtual raster indicated by `target_vrt_path`
 
     Returns:
         None
 
     """
-    def raster_sum_op(raster1, raster2):
-        """Add raster1 and raster2 without removing nodata values."""
-        valid_mask = (
-            (~numpy.isclose(raster1, raster1_nodata)) &
-            (~numpy.isclose(raster2, raster2_nodata)))
-        result = numpy.empty(raster1.shape, dtype=numpy.float32)
-        result[:] = target_nodata
-        result[valid_mask] = raster1[valid_mask] + raster2[valid_mask]
-        return result
+    template_info = pygeoprocessing.get_raster_info(template_raster_path)
+    base_nodata = pygeoprocessing.get_raster_info(
+        base_raster_path)['nodata'][0]
+    if base_nodata is None:
+        base_nodata = _TARGET_NODATA
+    n_cols, n_rows = template_info['raster_size']
+    gdal.Warp(
+        target_vrt_path, base_raster_path, format='VRT',
+        outputBounds=template_info['bounding_box'], width=n_cols,
+        height=n_rows, dstSRS=template_info['projection_wkt'],
+        resampleAlg='near', cutlineDSName=aoi_path, dstNodata=base_nodata)
+
+
+def _build_sv_reg(sv_dir, pft_id_set, file_suffix):
+    """Build a registry of state variable rasters inside `sv_dir`.
 
-    def raster_sum_op_nodata_remove(raster1, raster2):
+    Parameters:
+        sv_dir (string): path to directory where state variable rasters
+            should be stored
+        pft_id_set (set): set of integers identifying plant functional types
+        file_suffix (string): suffix to be added to state variable file names
+
+    Returns:
+        sv_reg (dict), map of key, path pairs giving paths to site and plant
+            functional type state variables inside `sv_dir`
+
+    """
+    pft_sv_dict = {}
+    for pft_i in pft_id_set:
+        for sv in _PFT_STATE_VARIABLES:
+            pft_sv_dict['{}_{}_path'.format(
+                sv, pft_i)] = '{}_{}.tif'.format(sv, pft_i)
+    return utils.build_file_registry(
+        [(_SITE_STATE_VARIABLE_FILES, sv_dir), (pft_sv_dict, sv_dir)],
+        file_suffix)
+
+
+def _tile_offset_list(base_raster_path, tile_size):
+    """Divide the extent of a raster into square tiles.
+
+    Parameters:
+        base_raster_path (string): path to raster whose extent should be
+            divided into tiles
+        tile_size (int): length of the side of each tile, in pixels. Tiles on
+            the right and bottom edges of the raster may be smaller
+
+    Returns:
+        list of (xoff, yoff, win_xsize, win_ysize) tuples giving the pixel
+            window of each tile inside `base_raster_path`
+
+    """
+    if tile_size <= 0:
+        raise ValueError("Tile size must be a positive integer")
+    n_cols, n_rows = pygeoprocessing.get_raster_info(
+        base_raster_path)['raster_size']
+    offset_list = []
+    for yoff in range(0, n_rows, tile_size):
+        for xoff in range(0, n_cols, tile_size):
+            offset_list.append((
+                xoff, yoff, min(tile_size, n_cols - xoff),
+                min(tile_size, n_rows - yoff)))
+    return offset_list
+
+
+def _crop_to_valid_pixels(site_index_path, offset_list):
+    """Crop tiles to the extent of valid pixels that they contain.
+
+    Valid pixels are those where the site spatial index is not nodata. Inputs
+    are masked to the area of interest during alignment, so pixels outside
+    the area of interest are not valid.
+
+    Parameters:
+        site_index_path (string): path to aligned site spatial index raster
+        offset_list (list): list of (xoff, yoff, win_xsize, win_ysize) tuples
+            giving the pixel window of each tile
+
+    Returns:
+        list of (xoff, yoff, win_xsize, win_ysize) tuples giving the pixel
+            window of each tile cropped to the bounding box of its valid
+            pixels. Tiles that contain no valid pixels are excluded.
+
+    """
+    site_nodata = pygeoprocessing.get_raster_info(
+        site_index_path)['nodata'][0]
+    # (min col, min row, max col, max row) of valid pixels in each tile,
+    # collected from the blocks of the raster that overlap the tile
+    bounds_list = [None] * len(offset_list)
+    for offset_map, site_index in pygeoprocessing.iterblocks(
+            (site_index_path, 1)):
+        if site_nodata is None:
+            valid_mask = numpy.ones(site_index.shape, dtype=bool)
+        else:
+            valid_mask = site_index != site_nodata
+        if not valid_mask.any():
+            continue
+        block_xoff = offset_map['xoff']
+        block_yoff = offset_map['yoff']
+        for tile_index, (xoff, yoff, win_xsize, win_ysize) in enumerate(
+                offset_list):
+            col_start = max(xoff, block_xoff)
+            col_stop = min(
+                xoff + win_xsize, block_xoff + offset_map['win_xsize'])
+            row_start = max(yoff, block_yoff)
+            row_stop = min(
+                yoff + win_ysize, block_yoff + offset_map['win_ysize'])
+            if col_start >= col_stop or row_start >= row_stop:
+                continue
+            tile_mask = valid_mask[
+                row_start - block_yoff:row_stop - block_yoff,
+                col_start - block_xoff:col_stop - block_xoff]
+            if not tile_mask.any():
+                continue
+            valid_rows = numpy.where(tile_mask.any(axis=1))[0] + row_start
+            valid_cols = numpy.where(tile_mask.any(axis=0))[0] + col_start
+            block_bounds = (
+                int(valid_cols[0]), int(valid_rows[0]), int(valid_cols[-1]),
+                int(valid_rows[-1]))
+            if bounds_list[tile_index] is None:
+                bounds_list[tile_index] = block_bounds
+            else:
+                tile_bounds = bounds_list[tile_index]
+                bounds_list[tile_index] = (
+                    min(tile_bounds[0], block_bounds[0]),
+                    min(tile_bounds[1], block_bounds[1]),
+                    max(tile_bounds[2], block_bounds[2]),
+                    max(tile_bounds[3], block_bounds[3]))
+    cropped_offset_list = []
+    for tile_bounds in bounds_list:
+        if tile_bounds is None:
+            continue
+        min_col, min_row, max_col, max_row = tile_bounds
+        cropped_offset_list.append((
+            min_col, min_row, max_col - min_col + 1, max_row - min_row + 1))
+    return cropped_offset_list
+
+
+def _extract_tile(base_raster_path, offset, target_raster_path):
+    """Copy a window of a raster to a new raster.
+
+    Parameters:
+        base_raster_path (string): path to raster from which the tile should
+            be copied
+        offset (tuple): (xoff, yoff, win_xsize, win_ysize) tuple giving the
+            pixel window of the tile inside `base_raster_path`
+        target_raster_path (string): path to location where the tile should
+            be created
+
+    Side effects:
+        creates the raster indicated by `target_raster_path`, with the data
+            type and nodata value of `base_raster_path`. If
+            `base_raster_path` is a virtual raster, the tile is a virtual
+            raster referring to it
+
+    Returns:
+        None
+
+    """
+    if os.path.splitext(base_raster_path)[1] == '.vrt':
+        # tiles of virtual inputs are also read on demand
+        gdal.Translate(
+            target_raster_path, base_raster_path, format='VRT',
+            srcWin=list(offset))
+    else:
+        gdal.Translate(
+            target_raster_path, base_raster_path, format='GTiff',
+            srcWin=list(offset), creationOptions=_TILE_CREATION_OPTIONS)
+
+
+def _mosaic_tiles(
+        tile_raster_path_list, offset_list, template_raster_path,
+        target_raster_path, class_column_path=None):
+    """Assemble tiles into a raster covering the extent of the study area.
+
+    Parameters:
+        tile_raster_path_list (list): list of paths to tile rasters
+        offset_list (list): list of (xoff, yoff, win_xsize, win_ysize) tuples
+            giving the pixel window of each tile in `tile_raster_path_list`
+        template_raster_path (string): path to raster giving the extent and
+            resolution of the target raster
+        target_raster_path (string): path to location where the assembled
+            raster should be created
+        class_column_path (string): optional path to raster mapping each
+            pixel of the study area to a column of `template_raster_path`,
+            as created by `_pixel_equivalence_classes`. If supplied, tiles
+            are assembled on the compact grid of `template_raster_path` and
+            then copied to every pixel of the study area
+
+    Side effects:
+        creates the raster indicated by `target_raster_path`, with the data
+            type and nodata value of the tile rasters. Pixels not covered by
+            any tile are filled with nodata
+
+    Returns:
+        None
+
+    """
+    if class_column_path is not None:
+        compact_raster_path = os.path.join(
+            tempfile.mkdtemp(dir=PROCESSING_DIR),
+            os.path.basename(target_raster_path))
+        _mosaic_tiles(
+            tile_raster_path_list, offset_list, template_raster_path,
+            compact_raster_path)
+        _scatter_compact_raster(
+            compact_raster_path, class_column_path, target_raster_path)
+        shutil.rmtree(os.path.dirname(compact_raster_path))
+        return
+    tile_info = pygeoprocessing.get_raster_info(tile_raster_path_list[0])
+    pygeoprocessing.new_raster_from_base(
+        template_raster_path, target_raster_path, tile_info['datatype'],
+        tile_info['nodata'], fill_value_list=tile_info['nodata'])
+    target_raster = gdal.OpenEx(
+        target_raster_path, gdal.OF_RASTER | gdal.GA_Update)
+    target_band = target_raster.GetRasterBand(1)
+    for tile_raster_path, offset in zip(tile_raster_path_list, offset_list):
+        tile_raster = gdal.OpenEx(tile_raster_path, gdal.OF_RASTER)
+        target_band.WriteArray(
+            tile_raster.GetRasterBand(1).ReadAsArray(), xoff=offset[0],
+            yoff=offset[1])
+        tile_raster = None
+    target_band.FlushCache()
+    target_band = None
+    target_raster = None
+
+
+def _pixel_equivalence_classes(
+        base_raster_path_list, site_index_path, class_column_path):
+    """Identify pixels that share identical inputs within each row.
+
+    Valid pixels in the same row whose values are identical in every raster
+    of `base_raster_path_list` belong to one equivalence class and are
+    simulated identically. Classes are identified separately in each row
+    because inputs that vary with latitude, such as shortwave radiation, are
+    calculated from the row of each pixel.
+
+    Parameters:
+        base_raster_path_list (list): list of paths to aligned rasters giving
+            inputs, initial state and persistent parameters of the model
+        site_index_path (string): path to aligned site spatial index raster;
+            pixels where this raster is nodata are not valid
+        class_column_path (string): path to location where the raster giving
+            the class of each pixel should be created
+
+    Side effects:
+        creates the raster indicated by `class_column_path`, giving the index
+            of the class of each valid pixel within its row
+
+    Returns:
+        a tuple (representative_list, weight_list) of lists containing, for
+            each row, a numpy array giving the column of the first pixel in
+            each class and a numpy array giving the number of pixels in each
+            class
+
+    """
+    site_info = pygeoprocessing.get_raster_info(site_index_path)
+    site_nodata = site_info['nodata'][0]
+    n_cols, n_rows = site_info['raster_size']
+    pygeoprocessing.new_raster_from_base(
+        site_index_path, class_column_path, gdal.GDT_Int32, [_TARGET_NODATA],
+        fill_value_list=[_TARGET_NODATA])
+
+    site_index_raster = gdal.OpenEx(site_index_path, gdal.OF_RASTER)
+    site_index_band = site_index_raster.GetRasterBand(1)
+    base_raster_list = [
+        gdal.OpenEx(path, gdal.OF_RASTER) for path in base_raster_path_list]
+    base_band_list = [raster.GetRasterBand(1) for raster in base_raster_list]
+    class_raster = gdal.OpenEx(
+        class_column_path, gdal.OF_RASTER | gdal.GA_Update)
+    class_band = class_raster.GetRasterBand(1)
+
+    # read as many rows at once as fit in about 256 MB
+    chunk_rows = max(1, 2 ** 28 // (8 * n_cols * len(base_band_list)))
+    representative_list = []
+    weight_list = []
+    for yoff in range(0, n_rows, chunk_rows):
+        win_ysize = min(chunk_rows, n_rows - yoff)
+        site_index = site_index_band.ReadAsArray(0, yoff, n_cols, win_ysize)
+        if site_nodata is None:
+            valid_mask = numpy.ones(site_index.shape, dtype=bool)
+        else:
+            valid_mask = site_index != site_nodata
+        value_stack = numpy.stack([
+            band.ReadAsArray(0, yoff, n_cols, win_ysize).astype(
+                numpy.float64) for band in base_band_list], axis=-1)
+        class_column = numpy.full(
+            site_index.shape, _TARGET_NODATA, dtype=numpy.int32)
+        for row in range(win_ysize):
+            valid_cols = numpy.flatnonzero(valid_mask[row])
+            if valid_cols.size == 0:
+                representative_list.append(numpy.zeros(0, dtype=numpy.int64))
+                weight_list.append(numpy.zeros(0, dtype=numpy.int64))
+                continue
+            _, first_index, inverse, class_size = numpy.unique(
+                value_stack[row, valid_cols], axis=0, return_index=True,
+                return_inverse=True, return_counts=True)
+            class_column[row, valid_cols] = inverse.reshape(-1)
+            representative_list.append(valid_cols[first_index])
+            weight_list.append(class_size)
+        class_band.WriteArray(class_column, xoff=0, yoff=yoff)
+    class_band.FlushCache()
+    class_band = None
+    class_raster = None
+    base_band_list = None
+    base_raster_list = None
+    site_index_band = None
+    site_index_raster = None
+    return representative_list, weight_list
+
+
+def _compact_raster(
+        base_raster_path, representative_list, n_compact_cols,
+        target_raster_path):
+    """Copy one pixel of each equivalence class to a compact raster.
+
+    The compact raster has the same rows, origin and resolution as the base
+    raster. Column i of each row holds the value of the first pixel of class
+    i in that row; columns beyond the number of classes in a row are nodata.
+
+    Parameters:
+        base_raster_path (string): path to raster that should be compacted
+        representative_list (list): list containing, for each row, a numpy
+            array giving the column of the first pixel in each class, as
+            returned by `_pixel_equivalence_classes`
+        n_compact_cols (int): number of columns of the compact raster
+        target_raster_path (string): path to location where the compact
+            raster should be created
+
+    Side effects:
+        creates the raster indicated by `target_raster_path`, with the data
+            type and nodata value of `base_raster_path`
+
+    Returns:
+        None
+
+    """
+    base_info = pygeoprocessing.get_raster_info(base_raster_path)
+    nodata = base_info['nodata'][0]
+    n_cols, n_rows = base_info['raster_size']
+    target_raster = gdal.GetDriverByName('GTiff').Create(
+        target_raster_path, n_compact_cols, n_rows, 1, base_info['datatype'],
+        options=_TILE_CREATION_OPTIONS)
+    target_raster.SetGeoTransform(base_info['geotransform'])
+    target_raster.SetProjection(base_info['projection_wkt'])
+    target_band = target_raster.GetRasterBand(1)
+    if nodata is not None:
+        target_band.SetNoDataValue(nodata)
+        fill_value = nodata
+    else:
+        fill_value = 0
+
+    base_raster = gdal.OpenEx(base_raster_path, gdal.OF_RASTER)
+    base_band = base_raster.GetRasterBand(1)
+    chunk_rows = max(1, 2 ** 24 // n_cols)
+    for yoff in range(0, n_rows, chunk_rows):
+        win_ysize = min(chunk_rows, n_rows - yoff)
+        base_array = base_band.ReadAsArray(0, yoff, n_cols, win_ysize)
+        compact_array = numpy.full(
+            (win_ysize, n_compact_cols), fill_value, dtype=base_array.dtype)
+        for row in range(win_ysize):
+            representative_cols = representative_list[yoff + row]
+            compact_array[row, :representative_cols.size] = base_array[
+                row, representative_cols]
+        target_band.WriteArray(compact_array, xoff=0, yoff=yoff)
+    target_band.FlushCache()
+    target_band = None
+    target_raster = None
+    base_band = None
+    base_raster = None
+
+
+def _compact_pixels(aligned_inputs, sv_reg, pp_reg, compact_dir):
+    """Represent each class of identical pixels by a single pixel.
+
+    Pixels within a row that share identical inputs, initial state and
+    persistent parameters follow identical trajectories through the
+    simulation, so each class of such pixels is simulated once. The number of
+    pixels belonging to each class is recorded in the 'pixel_weight' raster
+    of the compact inputs and is used to weight statistics calculated across
+    the study area.
+
+    Parameters:
+        aligned_inputs (dict): map of key, path pairs indicating paths
+            to aligned model inputs covering the study area
+        sv_reg (dict): map of key, path pairs giving paths to initial state
+            variables covering the study area
+        pp_reg (dict): map of key, path pairs giving paths to persistent
+            parameters covering the study area
+        compact_dir (string): path to directory where compact rasters should
+            be stored
+
+    Side effects:
+        creates compact copies of aligned inputs, initial state variables and
+            persistent parameters inside `compact_dir`, and a raster giving
+            the class of each pixel of the study area
+
+    Returns:
+        a tuple (compact_inputs, compact_sv_reg, compact_pp_reg,
+            class_column_path) giving registries of compact rasters and the
+            path to the raster that maps each pixel of the study area to its
+            column in the compact rasters
+
+    """
+    base_reg_list = [
+        (aligned_inputs, 'aligned_inputs'),
+        (sv_reg, 'state_variables_m-1'),
+        (pp_reg, 'intermediate_parameters')]
+    base_raster_path_list = [
+        path for base_reg, dir_name in base_reg_list for path in
+        base_reg.values() if os.path.exists(path)]
+    class_column_path = os.path.join(compact_dir, 'class_column.tif')
+    representative_list, weight_list = _pixel_equivalence_classes(
+        base_raster_path_list, aligned_inputs['site_index'],
+        class_column_path)
+    n_compact_cols = max(
+        [1] + [class_size.size for class_size in weight_list])
+
+    compact_reg_list = []
+    for base_reg, dir_name in base_reg_list:
+        target_dir = os.path.join(compact_dir, dir_name)
+        utils.make_directories([target_dir])
+        compact_reg = {}
+        for key, base_path in base_reg.items():
+            if not os.path.exists(base_path):
+                continue
+            # compact rasters are written to GeoTIFF, including those
+            # compacted from virtual rasters
+            compact_reg[key] = os.path.join(
+                target_dir, '%s.tif' % os.path.splitext(
+                    os.path.basename(base_path))[0])
+            _compact_raster(
+                base_path, representative_list, n_compact_cols,
+                compact_reg[key])
+        compact_reg_list.append(compact_reg)
+
+    compact_inputs = compact_reg_list[0]
+    compact_inputs['pixel_weight'] = os.path.join(
+        compact_dir, 'aligned_inputs', 'pixel_weight.tif')
+    pygeoprocessing.new_raster_from_base(
+        compact_inputs['site_index'], compact_inputs['pixel_weight'],
+        gdal.GDT_Float32, [_TARGET_NODATA], fill_value_list=[0])
+    weight_raster = gdal.OpenEx(
+        compact_inputs['pixel_weight'], gdal.OF_RASTER | gdal.GA_Update)
+    weight_band = weight_raster.GetRasterBand(1)
+    weight_array = numpy.zeros(
+        (len(weight_list), n_compact_cols), dtype=numpy.float32)
+    for row, class_size in enumerate(weight_list):
+        weight_array[row, :class_size.size] = class_size
+    weight_band.WriteArray(weight_array)
+    weight_band.FlushCache()
+    weight_band = None
+    weight_raster = None
+
+    n_pixels = sum(int(class_size.sum()) for class_size in weight_list)
+    n_classes = sum(class_size.size for class_size in weight_list)
+    LOGGER.info(
+        "Simulating %d classes of identical pixels representing %d pixels",
+        n_classes, n_pixels)
+    return (
+        compact_inputs, compact_reg_list[1], compact_reg_list[2],
+        class_column_path)
+
+
+def _scatter_compact_raster(
+        compact_raster_path, class_column_path, target_raster_path):
+    """Copy values of a compact raster to every pixel of their class.
+
+    Parameters:
+        compact_raster_path (string): path to raster giving one value for
+            each equivalence class, as created by `_compact_raster`
+        class_column_path (string): path to raster giving the column of each
+            pixel of the study area in the compact raster, as created by
+            `_pixel_equivalence_classes`
+        target_raster_path (string): path to location where the raster
+            covering the study area should be created
+
+    Side effects:
+        creates the raster indicated by `target_raster_path`, with the extent
+            of `class_column_path` and the data type and nodata value of
+            `compact_raster_path`
+
+    Returns:
+        None
+
+    """
+    compact_info = pygeoprocessing.get_raster_info(compact_raster_path)
+    nodata = compact_info['nodata'][0]
+    if nodata is not None:
+        fill_value = nodata
+    else:
+        fill_value = 0
+    n_compact_cols = compact_info['raster_size'][0]
+    pygeoprocessing.new_raster_from_base(
+        class_column_path, target_raster_path, compact_info['datatype'],
+        [nodata], fill_value_list=[fill_value])
+
+    compact_raster = gdal.OpenEx(compact_raster_path, gdal.OF_RASTER)
+    compact_band = compact_raster.GetRasterBand(1)
+    class_raster = gdal.OpenEx(class_column_path, gdal.OF_RASTER)
+    class_band = class_raster.GetRasterBand(1)
+    target_raster = gdal.OpenEx(
+        target_raster_path, gdal.OF_RASTER | gdal.GA_Update)
+    target_band = target_raster.GetRasterBand(1)
+    for offset_map in pygeoprocessing.iterblocks(
+            (class_column_path, 1), offset_only=True):
+        class_column = class_band.ReadAsArray(**offset_map)
+        valid_mask = class_column != _TARGET_NODATA
+        if not valid_mask.any():
+            continue
+        compact_array = compact_band.ReadAsArray(
+            0, offset_map['yoff'], n_compact_cols, offset_map['win_ysize'])
+        target_array = numpy.full(
+            class_column.shape, fill_value, dtype=compact_array.dtype)
+        row_index = numpy.nonzero(valid_mask)[0]
+        target_array[valid_mask] = compact_array[
+            row_index, class_column[valid_mask]]
+        target_band.WriteArray(
+            target_array, xoff=offset_map['xoff'], yoff=offset_map['yoff'])
+    target_band.FlushCache()
+    target_band = None
+    target_raster = None
+    class_band = None
+    class_raster = None
+    compact_band = None
+    compact_raster = None
+
+
+def _call_with_globals(global_value_dict, func, func_args):
+    """Call a function after setting module-level values.
+
+    Worker processes do not necessarily inherit module-level values set by
+    `execute`, so these are passed explicitly to each task.
+
+    Parameters:
+        global_value_dict (dict): map of module-level variable names to
+            the values that should be set before calling `func`
+        func (function): function to call
+        func_args (tuple): positional arguments to `func`
+
+    Returns:
+        the value returned by `func`
+
+    """
+    global PROCESSING_DIR, CRUDE_PROTEIN, _SV_NODATA, _PARAM_CACHE_DIR
+    PROCESSING_DIR = global_value_dict['PROCESSING_DIR']
+    CRUDE_PROTEIN = global_value_dict['CRUDE_PROTEIN']
+    _SV_NODATA = global_value_dict['_SV_NODATA']
+    _PARAM_CACHE_DIR = global_value_dict['_PARAM_CACHE_DIR']
+    return func(*func_args)
+
+
+def _map_tiles(worker_pool, func, func_args_list):
+    """Apply a function to each tile, in worker processes if available.
+
+    Parameters:
+        worker_pool (multiprocessing.Pool): pool of worker processes in which
+            tasks should be run, or None to run tasks in this process
+        func (function): function to apply to each tile
+        func_args_list (list): list of tuples of positional arguments to
+            `func`, one per tile
+
+    Returns:
+        list of values returned by `func`, in the order of `func_args_list`
+
+    """
+    if worker_pool is None:
+        return [func(*func_args) for func_args in func_args_list]
+    global_value_dict = {
+        'PROCESSING_DIR': PROCESSING_DIR,
+        'CRUDE_PROTEIN': CRUDE_PROTEIN,
+        '_SV_NODATA': _SV_NODATA,
+        '_PARAM_CACHE_DIR': _PARAM_CACHE_DIR,
+    }
+    async_result_list = [
+        worker_pool.apply_async(
+            _call_with_globals, (global_value_dict, func, func_args)) for
+        func_args in func_args_list]
+    return [async_result.get() for async_result in async_result_list]
+
+
+def _aligned_input_md5(aligned_inputs):
+    """Calculate the md5 hash of each aligned input raster.
+
+    Monthly climate inputs are virtual rasters that read their source file
+    each time they are used, so the hash of a climate input also covers the
+    path, size and modification time of each of its source files.
+
+    Parameters:
+        aligned_inputs (dict): map of key, path pairs indicating paths
+            to aligned model inputs
+
+    Returns:
+        dictionary mapping each key of `aligned_inputs` to the hex digest of
+            the file at its path
+
+    """
+    md5_dict = {}
+    for key, path in aligned_inputs.items():
+        md5_hash = hashlib.md5()
+        with open(path, 'rb') as raster_file:
+            for chunk in iter(lambda: raster_file.read(2**20), b''):
+                md5_hash.update(chunk)
+        if _CLIMATE_INPUT_PATTERN.match(key):
+            raster = gdal.OpenEx(path, gdal.OF_RASTER)
+            source_path_list = [
+                source_path for source_path in raster.GetFileList() if
+                os.path.abspath(source_path) != os.path.abspath(path)]
+            raster = None
+            for source_path in sorted(source_path_list):
+                source_stat = os.stat(source_path)
+                md5_hash.update(('%s %d %d' % (
+                    os.path.abspath(source_path), source_stat.st_size,
+                    source_stat.st_mtime_ns)).encode('utf-8'))
+        md5_dict[key] = md5_hash.hexdigest()
+    return md5_dict
+
+
+def _write_checkpoint(workspace_dir, checkpoint):
+    """Record the state of the simulation after a completed month.
+
+    The checkpoint is written to a temporary file that replaces the previous
+    checkpoint, so that an interruption while writing leaves the previous
+    checkpoint intact.
+
+    Parameters:
+        workspace_dir (string): path to the model workspace
+        checkpoint (dict): state of the simulation, with the keys
+            'month_index', 'sv_dir', 'sv_reg', 'sv_nodata', 'pp_reg',
+            'animal_trait_table', 'aligned_inputs', 'aligned_input_md5' and
+            'summary_accumulator'
+
+    Side effects:
+        creates or replaces the checkpoint file in `workspace_dir`
+
+    Returns:
+        None
+
+    """
+    def to_builtin(value):
+        """Convert numpy scalars to built-in types for serialization."""
+        return value.item()
+
+    checkpoint_path = os.path.join(workspace_dir, _CHECKPOINT_FILE)
+    temp_path = '{}.tmp'.format(checkpoint_path)
+    with open(temp_path, 'w') as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file, default=to_builtin)
+    os.replace(temp_path, checkpoint_path)
+
+
+def _read_checkpoint(workspace_dir):
+    """Read the state of the simulation after the last completed month.
+
+    Parameters:
+        workspace_dir (string): path to the model workspace
+
+    Returns:
+        checkpoint (dict), as written by `_write_checkpoint`
+
+    Raises:
+        ValueError if the workspace contains no checkpoint, or if state
+            variables or persistent parameters recorded in the checkpoint
+            cannot be found
+
+    """
+    checkpoint_path = os.path.join(workspace_dir, _CHECKPOINT_FILE)
+    if not os.path.exists(checkpoint_path):
+        raise ValueError(
+            "No checkpoint found in workspace %s; a checkpoint is written "
+            "only if state variables are saved and not held in memory" %
+            workspace_dir)
+    with open(checkpoint_path, 'r') as checkpoint_file:
+        checkpoint = json.load(checkpoint_file)
+    missing_path_list = [
+        path for path in (
+            list(checkpoint['sv_reg'].values()) +
+            list(checkpoint['pp_reg'].values()) +
+            list(checkpoint['aligned_inputs'].values())) if
+        not os.path.exists(path)]
+    if missing_path_list:
+        raise ValueError(
+            "Couldn't find the following files recorded in the checkpoint: " +
+            "\n\t".join(missing_path_list))
+    return checkpoint
+
+
+def _restore_yearly_tasks(
+        tile, site_param_table, veg_trait_table, month_index, pft_id_set):
+    """Recalculate quantities updated once every 12 months for one tile.
+
+    Used when resuming a simulation at a month other than the first of a
+    12-month period, when the yearly quantities of the interrupted run are
+    no longer available.
+
+    Parameters:
+        tile (dict): map of registries and directories used to simulate the
+            tile, as returned by `_new_tile`
+        site_param_table (dict): map of site spatial index to dictionaries
+            that contain site-level parameters
+        veg_trait_table (dict): map of pft id to dictionaries containing
+            plant functional type parameters
+        month_index (int): month of the simulation at which yearly
+            quantities were last calculated
+        pft_id_set (set): set of integers identifying plant functional types
+
+    Returns:
+        the tile, with 'annual_precip_rasters' updated
+
+    """
+    tile['annual_precip_rasters'] = _yearly_tasks(
+        tile['aligned_inputs'], site_param_table, veg_trait_table,
+        month_index, pft_id_set, tile['year_reg'])
+    return tile
+
+
+def _new_tile(
+        aligned_inputs, sv_reg, sv_dir, pp_reg, pft_id_set, sv_root_dir,
+        output_dir, save_sv_rasters, offset, file_suffix):
+    """Create the registries required to simulate one tile.
+
+    Parameters:
+        aligned_inputs (dict): map of key, path pairs indicating paths
+            to aligned model inputs covering the tile
+        sv_reg (dict): map of key, path pairs giving paths to initial state
+            variables of the tile
+        sv_dir (string): path to directory containing initial state variables
+            of the tile
+        pp_reg (dict): map of key, path pairs giving paths to persistent
+            parameters of the tile
+        pft_id_set (set): set of integers identifying plant functional types
+        sv_root_dir (string): path to directory where state variables for
+            each model time step should be stored
+        output_dir (string): path to directory where monthly outputs of the
+            tile should be written
+        save_sv_rasters (bool): should state variables of each time step be
+            kept in `sv_root_dir`?
+        offset (tuple): (xoff, yoff, win_xsize, win_ysize) tuple giving the
+            pixel window of the tile inside the study area, or None if the
+            tile covers the study area
+        file_suffix (string): suffix to be added to file names
+
+    Returns:
+        tile (dict), map of registries and directories used to simulate the
+            tile, with the keys 'aligned_inputs', 'sv_reg', 'sv_dir',
+            'pp_reg', 'year_reg', 'month_reg', 'provisional_sv_reg',
+            'intermediate_sv_dir', 'sv_root_dir', 'output_dir',
+            'save_sv_rasters', 'offset', 'annual_precip_rasters' and
+            'output_stats'
+
+    """
+    # make yearly directory for values that are updated every twelve months
+    year_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
+    year_reg = dict(
+        [(key, os.path.join(year_dir, path)) for key, path in
+            _YEARLY_FILES.items()])
+    for pft_i in pft_id_set:
+        for file in _YEARLY_PFT_FILES:
+            year_reg['{}_{}'.format(file, pft_i)] = os.path.join(
+                year_dir, '{}_{}.tif'.format(file, pft_i))
+
+    # make monthly directory for monthly intermediate parameters that are
+    # shared between submodels, but do not need to be saved as output
+    month_temp_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
+    month_reg = {}
+    for pft_i in pft_id_set:
+        for val in _PFT_INTERMEDIATE_VALUES:
+            month_reg['{}_{}'.format(
+                val, pft_i)] = os.path.join(
+                month_temp_dir, '{}_{}.tif'.format(val, pft_i))
+    for val in _SITE_INTERMEDIATE_VALUES:
+        month_reg[val] = os.path.join(month_temp_dir, '{}.tif'.format(val))
+
+    # provisional state variable registry contains provisional biomass in
+    #   absence of grazing
+    provisional_sv_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
+    provisional_sv_reg = _build_sv_reg(
+        provisional_sv_dir, pft_id_set, file_suffix)
+
+    intermediate_sv_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
+
+    return {
+        'aligned_inputs': aligned_inputs,
+        'sv_reg': sv_reg,
+        'sv_dir': sv_dir,
+        'pp_reg': pp_reg,
+        'year_reg': year_reg,
+        'month_reg': month_reg,
+        'provisional_sv_reg': provisional_sv_reg,
+        'intermediate_sv_dir': intermediate_sv_dir,
+        'sv_root_dir': sv_root_dir,
+        'output_dir': output_dir,
+        'save_sv_rasters': save_sv_rasters,
+        'offset': offset,
+        'annual_precip_rasters': None,
+        'output_stats': None,
+    }
+
+
+def _cut_tile(
+        aligned_inputs, sv_reg, pp_reg, pft_id_set, offset, tile_dir,
+        file_suffix):
+    """Copy inputs, initial state and persistent parameters of one tile.
+
+    Parameters:
+        aligned_inputs (dict): map of key, path pairs indicating paths
+            to aligned model inputs covering the study area
+        sv_reg (dict): map of key, path pairs giving paths to initial state
+            variables covering the study area
+        pp_reg (dict): map of key, path pairs giving paths to persistent
+            parameters covering the study area
+        pft_id_set (set): set of integers identifying plant functional types
+        offset (tuple): (xoff, yoff, win_xsize, win_ysize) tuple giving the
+            pixel window of the tile inside the study area
+        tile_dir (string): path to directory where files belonging to the
+            tile should be stored
+        file_suffix (string): suffix to be added to file names
+
+    Side effects:
+        creates copies of aligned inputs, initial state variables and
+            persistent parameters of the tile inside `tile_dir`
+
+    Returns:
+        tile (dict), map of registries and directories used to simulate the
+            tile, as returned by `_new_tile`
+
+    """
+    tile_reg_list = []
+    for base_reg, dir_name in [
+            (aligned_inputs, 'aligned_inputs'),
+            (sv_reg, 'state_variables_m-1'),
+            (pp_reg, 'intermediate_parameters')]:
+        target_dir = os.path.join(tile_dir, dir_name)
+        os.makedirs(target_dir)
+        tile_reg = {}
+        for key, base_path in base_reg.items():
+            if not os.path.exists(base_path):
+                continue
+            tile_reg[key] = os.path.join(
+                target_dir, os.path.basename(base_path))
+            _extract_tile(base_path, offset, tile_reg[key])
+        tile_reg_list.append(tile_reg)
+    output_dir = os.path.join(tile_dir, 'output')
+    os.makedirs(output_dir)
+    return _new_tile(
+        tile_reg_list[0], tile_reg_list[1],
+        _state_variable_dir(tile_dir, -1), tile_reg_list[2],
+        pft_id_set, tile_dir, output_dir, False, offset, file_suffix)
+
+
+def _simulate_ungrazed_step(
+        tile, site_param_table, veg_trait_table, pft_id_set, month_index,
+        current_month, aoi_path, monthly_annual_precip):
+    """Simulate provisional biomass of one tile in the absence of grazing.
+
+    Populate the provisional state variable registry of the tile with
+    provisional biomass in the absence of grazing, and copy the state
+    variables from which grazing animals select their diet into the
+    intermediate registry of the tile.
+
+    Parameters:
+        tile (dict): map of registries and directories used to simulate the
+            tile, as returned by `_new_tile`
+        site_param_table (dict): map of site spatial index to dictionaries
+            that contain site-level parameters
+        veg_trait_table (dict): map of pft id to dictionaries containing
+            plant functional type parameters
+        pft_id_set (set): set of integers identifying plant functional types
+        month_index (int): month of the simulation, such that month_index=0
+            indicates the first month of the simulation
+        current_month (int): month of the year, such that current_month=1
+            indicates January
+        aoi_path (string): path to vector layer giving the spatial extent of
+            the model
+        monthly_annual_precip (bool): should annual precipitation, and
+            quantities calculated from it, be updated every month rather than
+            every 12 months?
+
+    Returns:
+        a tuple containing the tile, updated with the key
+            'intermediate_sv_reg', and sums of carbon and nitrogen of each
+            feed type inside the tile as returned by `calc_feed_type_nc_sums`
+
+    """
+    aligned_inputs = tile['aligned_inputs']
+    prev_sv_reg = tile['sv_reg']
+    month_reg = tile['month_reg']
+    provisional_sv_reg = tile['provisional_sv_reg']
+    if (month_index % 12) == 0:
+        # Update yearly quantities
+        tile['annual_precip_rasters'] = _yearly_tasks(
+            aligned_inputs, site_param_table, veg_trait_table, month_index,
+            pft_id_set, tile['year_reg'])
+    elif monthly_annual_precip:
+        # move the 12-month window of annual quantities by one month; these
+        #   are still recalculated in full every 12 months, above, so that
+        #   rounding error from moving the window does not accumulate
+        tile['annual_precip_rasters'] = _yearly_tasks(
+            aligned_inputs, site_param_table, veg_trait_table, month_index,
+            pft_id_set, tile['year_reg'],
+            prev_annual_precip_rasters=tile['annual_precip_rasters'])
+
+    # enforce absence of grazing as zero biomass removed
+    for pft_i in pft_id_set:
+        pygeoprocessing.new_raster_from_base(
+            aligned_inputs['pft_{}'.format(pft_i)],
+            month_reg['flgrem_{}'.format(pft_i)], gdal.GDT_Float32,
+            [_TARGET_NODATA], fill_value_list=[0])
+        pygeoprocessing.new_raster_from_base(
+            aligned_inputs['pft_{}'.format(pft_i)],
+            month_reg['fdgrem_{}'.format(pft_i)], gdal.GDT_Float32,
+            [_TARGET_NODATA], fill_value_list=[0])
+
+    # populate provisional_sv_reg with provisional biomass in absence of
+    #   grazing
+    _potential_production(
+        aligned_inputs, site_param_table, current_month, month_index,
+        pft_id_set, veg_trait_table, prev_sv_reg, tile['pp_reg'], month_reg)
+    _root_shoot_ratio(
+        aligned_inputs, site_param_table, current_month, pft_id_set,
+        veg_trait_table, prev_sv_reg, tile['year_reg'], month_reg)
+    _soil_water(
+        aligned_inputs, site_param_table, veg_trait_table, current_month,
+        month_index, prev_sv_reg, tile['pp_reg'], pft_id_set, month_reg,
+        provisional_sv_reg)
+    _decomposition(
+        aligned_inputs, current_month, month_index, pft_id_set,
+        site_param_table, tile['year_reg'], month_reg, prev_sv_reg,
+        tile['pp_reg'], provisional_sv_reg)
+    _death_and_partition(
+        'stded', aligned_inputs, site_param_table, current_month,
+        tile['year_reg'], pft_id_set, veg_trait_table, prev_sv_reg,
+        provisional_sv_reg)
+    _death_and_partition(
+        'bgliv', aligned_inputs, site_param_table, current_month,
+        tile['year_reg'], pft_id_set, veg_trait_table, prev_sv_reg,
+        provisional_sv_reg)
+    _shoot_senescence(
+        pft_id_set, veg_trait_table, prev_sv_reg, month_reg, current_month,
+        provisional_sv_reg)
+    tile['intermediate_sv_reg'] = copy_intermediate_sv(
+        pft_id_set, provisional_sv_reg, tile['intermediate_sv_dir'])
+    delta_agliv_dict = _new_growth(
+        pft_id_set, aligned_inputs, site_param_table, veg_trait_table,
+        month_reg, current_month, provisional_sv_reg)
+    _apply_new_growth(delta_agliv_dict, pft_id_set, provisional_sv_reg)
+
+    nc_sum_dict = calc_feed_type_nc_sums(
+        tile['intermediate_sv_reg'], pft_id_set, aoi_path,
+        weight_raster_path=aligned_inputs.get('pixel_weight'))
+    return tile, nc_sum_dict
+
+
+def _simulate_grazed_step(
+        tile, site_param_table, veg_trait_table, animal_trait_table,
+        pft_id_set, month_index, current_month, current_year, aoi_path,
+        management_threshold, ordered_feed_types, file_suffix):
+    """Simulate actual biomass of one tile integrating impacts of grazing.
+
+    Estimate grazing offtake by animals relative to provisional biomass at an
+    intermediate step, after senescence but before new growth, then estimate
+    actual biomass production for this step integrating impacts of grazing.
+    Write monthly outputs of the tile to its output directory.
+
+    Parameters:
+        tile (dict): map of registries and directories used to simulate the
+            tile, as updated by `_simulate_ungrazed_step`
+        site_param_table (dict): map of site spatial index to dictionaries
+            that contain site-level parameters
+        veg_trait_table (dict): map of pft id to dictionaries containing
+            plant functional type parameters
+        animal_trait_table (dict): map of animal id to dictionaries containing
+            animal parameters and traits
+        pft_id_set (set): set of integers identifying plant functional types
+        month_index (int): month of the simulation, such that month_index=0
+            indicates the first month of the simulation
+        current_month (int): month of the year, such that current_month=1
+            indicates January
+        current_year (int): current year, for example 2016
+        aoi_path (string): path to vector layer giving the spatial extent of
+            the model
+        management_threshold (float): biomass required to be left
+            standing at each model step after offtake by grazing animals
+        ordered_feed_types (list): list of feed types in descending order of
+            digestibility across the study area
+        file_suffix (string): suffix to be added to file names
+
+    Returns:
+        the tile, with 'sv_reg' and 'sv_dir' giving state variables at the
+            end of this step and 'output_stats' giving statistics of monthly
+            outputs inside each animal grazing area
+
+    """
+    aligned_inputs = tile['aligned_inputs']
+    prev_sv_reg = tile['sv_reg']
+    prev_sv_dir = tile['sv_dir']
+    month_reg = tile['month_reg']
+
+    # estimate grazing offtake by animals relative to provisional biomass
+    #   at an intermediate step, after senescence but before new growth
+    _calc_grazing_offtake(
+        aligned_inputs, aoi_path, management_threshold,
+        tile['intermediate_sv_reg'], pft_id_set,
+        aligned_inputs['animal_index'], animal_trait_table, veg_trait_table,
+        current_month, month_reg, ordered_feed_types=ordered_feed_types)
+
+    # estimate actual biomass production for this step, integrating impacts
+    #   of grazing
+    sv_dir = _state_variable_dir(tile['sv_root_dir'], month_index)
+    utils.make_directories([sv_dir])
+    sv_reg = _build_sv_reg(sv_dir, pft_id_set, file_suffix)
+
+    # potential production prior to effects of grazing depends only on the
+    #   previous step, so it is shared with the ungrazed step; only the
+    #   impact of grazing offtake must be recalculated
+    _grazing_effect_on_production(
+        aligned_inputs, current_month, pft_id_set, veg_trait_table,
+        month_reg)
+
+    _soil_water(
+        aligned_inputs, site_param_table, veg_trait_table, current_month,
+        month_index, prev_sv_reg, tile['pp_reg'], pft_id_set, month_reg,
+        sv_reg)
+
+    _decomposition(
+        aligned_inputs, current_month, month_index, pft_id_set,
+        site_param_table, tile['year_reg'], month_reg, prev_sv_reg,
+        tile['pp_reg'], sv_reg)
+
+    _death_and_partition(
+        'stded', aligned_inputs, site_param_table, current_month,
+        tile['year_reg'], pft_id_set, veg_trait_table, prev_sv_reg, sv_reg)
+
+    _death_and_partition(
+        'bgliv', aligned_inputs, site_param_table, current_month,
+        tile['year_reg'], pft_id_set, veg_trait_table, prev_sv_reg, sv_reg)
+
+    _shoot_senescence(
+        pft_id_set, veg_trait_table, prev_sv_reg, month_reg, current_month,
+        sv_reg)
+
+    delta_agliv_dict = _new_growth(
+        pft_id_set, aligned_inputs, site_param_table, veg_trait_table,
+        month_reg, current_month, sv_reg)
+
+    _animal_diet_sufficiency(
+        sv_reg, pft_id_set, aligned_inputs, animal_trait_table,
+        veg_trait_table, current_month, month_reg)
+
+    _grazing(
+        aligned_inputs, site_param_table, month_reg, animal_trait_table,
+        pft_id_set, sv_reg)
+
+    _apply_new_growth(delta_agliv_dict, pft_id_set, sv_reg)
+
+    _leach(aligned_inputs, site_param_table, month_reg, sv_reg)
+
+    tile['output_stats'] = _write_monthly_outputs(
+        aligned_inputs, tile['provisional_sv_reg'], sv_reg, month_reg,
+        pft_id_set, current_year, current_month, tile['output_dir'],
+        file_suffix)
+
+    # state variables from the previous step are no longer needed
+    if not tile['save_sv_rasters']:
+        shutil.rmtree(prev_sv_dir)
+
+    tile['sv_reg'] = sv_reg
+    tile['sv_dir'] = sv_dir
+    return tile
+
+
+def _nodata_mask(array, nodata):
+    """Identify pixels in array that are equal to nodata.
+
+    Values are compared with the default tolerance of `numpy.isclose`, so
+    that float values written to rasters of a different precision are still
+    recognized as nodata, but without the checks for infinite values that
+    make `numpy.isclose` much slower than a direct comparison.
+
+    Parameters:
+        array (numpy.ndarray): array that may contain nodata values
+        nodata (float or int): nodata value of the array
+
+    Returns:
+        boolean array that is True where `array` is nodata
+
+    """
+    return numpy.abs(array - nodata) <= (1e-08 + 1e-05 * abs(nodata))
+
+
+def _valid_mask(array, nodata):
+    """Identify pixels in array that are not equal to nodata.
+
+    Parameters:
+        array (numpy.ndarray): array that may contain nodata values
+        nodata (float or int): nodata value of the array
+
+    Returns:
+        boolean array that is True where `array` is not nodata
+
+    """
+    return ~_nodata_mask(array, nodata)
+
+
+def _array_sum(array1, array1_nodata, array2, array2_nodata, target_nodata):
+    """Add array1 and array2, propagating nodata values to the result."""
+    valid_mask = (
+        _valid_mask(array1, array1_nodata) &
+        _valid_mask(array2, array2_nodata))
+    result = numpy.empty(array1.shape, dtype=numpy.float32)
+    result[:] = target_nodata
+    result[valid_mask] = array1[valid_mask] + array2[valid_mask]
+    return result
+
+
+def _array_list_sum(
+        array_list, input_nodata, target_nodata, nodata_remove=False):
+    """Add the arrays in array_list, allowing nodata values to propagate.
+
+    If `nodata_remove` is true, nodata values are treated as zero and the sum
+    is nodata only where all arrays are nodata. Otherwise, the sum is nodata
+    where any array is nodata. The input arrays are not modified.
+    """
+    nodata_mask_list = [
+        _nodata_mask(array, input_nodata) for array in array_list]
+    if nodata_remove:
+        invalid_mask = numpy.all(nodata_mask_list, axis=0)
+    else:
+        invalid_mask = numpy.any(nodata_mask_list, axis=0)
+    sum_of_arrays = numpy.sum([
+        numpy.where(nodata_mask, 0, array) for array, nodata_mask in zip(
+            array_list, nodata_mask_list)], axis=0)
+    sum_of_arrays[invalid_mask] = target_nodata
+    return sum_of_arrays
+
+
+def _array_difference(
+        array1, array1_nodata, array2, array2_nodata, target_nodata):
+    """Subtract array2 from array1, propagating nodata values."""
+    valid_mask = (
+        _valid_mask(array1, array1_nodata) &
+        _valid_mask(array2, array2_nodata))
+    result = numpy.empty(array1.shape, dtype=numpy.float32)
+    result[:] = target_nodata
+    result[valid_mask] = array1[valid_mask] - array2[valid_mask]
+    return result
+
+
+def _array_product(
+        array1, array1_nodata, array2, array2_nodata, target_nodata):
+    """Multiply array1 by array2, propagating nodata values."""
+    valid_mask = (
+        _valid_mask(array1, array1_nodata) &
+        _valid_mask(array2, array2_nodata))
+    result = numpy.empty(array1.shape, dtype=numpy.float32)
+    result[:] = target_nodata
+    result[valid_mask] = array1[valid_mask] * array2[valid_mask]
+    return result
+
+
+def _array_quotient(
+        array1, array1_nodata, array2, array2_nodata, target_nodata):
+    """Divide array1 by array2, propagating nodata values.
+
+    Where both arrays are zero the result is zero; where only array2 is zero
+    the result is nodata.
+
+    """
+    valid_mask = (
+        _valid_mask(array1, array1_nodata) &
+        _valid_mask(array2, array2_nodata))
+    array1 = array1.astype(numpy.float32)
+    array2 = array2.astype(numpy.float32)
+
+    result = numpy.empty(array1.shape, dtype=numpy.float32)
+    result[:] = target_nodata
+    zero_mask = ((array1 == 0.) & (array2 == 0.) & valid_mask)
+    nonzero_mask = ((array2 != 0.) & valid_mask)
+    result[zero_mask] = 0.
+    result[nonzero_mask] = array1[nonzero_mask] / array2[nonzero_mask]
+    return result
+
+
+def raster_multiplication(
+        raster1, raster1_nodata, raster2, raster2_nodata, target_path,
+        target_path_nodata):
+    """Multiply raster1 by raster2.
+
+    Multiply raster1 by raster2 element-wise. In any pixel where raster1 or
+    raster2 is nodata, the result is nodata. The result is always of float
+    datatype.
+
+    Side effects:
+        modifies or creates the raster indicated by `target_path`
+
+    Returns:
+        None
+
+    """
+    def raster_multiply_op(raster1, raster2):
+        """Multiply two rasters."""
+        return _array_product(
+            raster1, raster1_nodata, raster2, raster2_nodata,
+            target_path_nodata)
+    pygeoprocessing.raster_calculator(
+        [(path, 1) for path in [raster1, raster2]],
+        raster_multiply_op, target_path, gdal.GDT_Float32,
+        target_path_nodata)
+
+
+def raster_division(
+        raster1, raster1_nodata, raster2, raster2_nodata, target_path,
+        target_path_nodata):
+    """Divide raster1 by raster2.
+
+    Divide raster1 by raster2 element-wise. In any pixel where raster1 or
+    raster2 is nodata, the result is nodata. The result is always of float
+    datatype.
+
+    Side effects:
+        modifies or creates the raster indicated by `target_path`
+
+    Returns:
+        None
+
+    """
+    def raster_divide_op(raster1, raster2):
+        """Divide raster1 by raster2."""
+        return _array_quotient(
+            raster1, raster1_nodata, raster2, raster2_nodata,
+            target_path_nodata)
+    pygeoprocessing.raster_calculator(
+        [(path, 1) for path in [raster1, raster2]],
+        raster_divide_op, target_path, gdal.GDT_Float32,
+        target_path_nodata)
+
+
+def raster_list_sum(
+        raster_list, input_nodata, target_path, target_nodata,
+        nodata_remove=False):
+    """Calculate the sum per pixel across rasters in a list.
+
+    Sum the rasters in `raster_list` element-wise, allowing nodata values
+    in the rasters to propagate to the result or treating nodata as zero. If
+    nodata is treated as zero, areas where all inputs are nodata will be nodata
+    in the output.
+
+    Parameters:
+        raster_list (list): list of paths to rasters to sum
+        input_nodata (float or int): nodata value in the input rasters
+        target_path (string): path to location to store the result
+        target_nodata (float or int): nodata value for the result raster
+        nodata_remove (bool): if true, treat nodata values in input
+            rasters as zero. If false, the sum in a pixel where any input
+            raster is nodata is nodata.
+
+    Side effects:
+        modifies or creates the raster indicated by `target_path`
+
+    Returns:
+        None
+
+    """
+    def raster_sum_op(*raster_list):
+        """Add the rasters in raster_list without removing nodata values."""
+        return _array_list_sum(raster_list, input_nodata, target_nodata)
+
+    def raster_sum_op_nodata_remove(*raster_list):
+        """Add the rasters in raster_list, treating nodata as zero."""
+        return _array_list_sum(
+            raster_list, input_nodata, target_nodata, nodata_remove=True)
+
+    if nodata_remove:
+        pygeoprocessing.raster_calculator(
+            [(path, 1) for path in raster_list], raster_sum_op_nodata_remove,
+            target_path, gdal.GDT_Float32, target_nodata)
+
+    else:
+        pygeoprocessing.raster_calculator(
+            [(path, 1) for path in raster_list], raster_sum_op,
+            target_path, gdal.GDT_Float32, target_nodata)
+
+
+def multi_raster_calculator(
+        base_raster_path_list, local_op, target_path_list,
+        target_nodata_list):
+    """Apply a function with several results to blocks of aligned rasters.
+
+    Like `pygeoprocessing.raster_calculator`, but `local_op` returns one
+    array for each raster in `target_path_list`, so that quantities that
+    depend on each other (e.g., a sequence of flows between soil layers) can
+    be calculated in memory in one pass over the inputs. Targets are written
+    to temporary rasters and moved into place after all blocks have been
+    processed, so a target may also be one of the base rasters.
+
+    Parameters:
+        base_raster_path_list (list): list of paths to aligned rasters whose
+            blocks are passed to `local_op`
+        local_op (function): function that takes one array for each raster
+            in `base_raster_path_list` and returns a list of arrays, one for
+            each raster in `target_path_list`
+        target_path_list (list): list of paths to rasters that should
+            contain the results
+        target_nodata_list (list): nodata value of each target raster
+
+    Side effects:
+        modifies or creates the rasters indicated by `target_path_list`
+
+    Returns:
+        None
+
+    """
+    temp_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
+    temp_target_path_list = [
+        os.path.join(temp_dir, 'target_{}.tif'.format(target_i)) for
+        target_i in range(len(target_path_list))]
+    for temp_target_path, target_nodata in zip(
+            temp_target_path_list, target_nodata_list):
+        pygeoprocessing.new_raster_from_base(
+            base_raster_path_list[0], temp_target_path, gdal.GDT_Float32,
+            [target_nodata])
+
+    base_raster_list = [
+        gdal.OpenEx(path, gdal.OF_RASTER) for path in base_raster_path_list]
+    base_band_list = [raster.GetRasterBand(1) for raster in base_raster_list]
+    target_raster_list = [
+        gdal.OpenEx(path, gdal.OF_RASTER | gdal.GA_Update) for path in
+        temp_target_path_list]
+    target_band_list = [
+        raster.GetRasterBand(1) for raster in target_raster_list]
+    for offset_map in pygeoprocessing.iterblocks(
+            (base_raster_path_list[0], 1), offset_only=True):
+        block_list = [
+            band.ReadAsArray(**offset_map) for band in base_band_list]
+        result_list = local_op(*block_list)
+        for target_band, result in zip(target_band_list, result_list):
+            target_band.WriteArray(
+                result, xoff=offset_map['xoff'], yoff=offset_map['yoff'])
+
+    for target_band in target_band_list:
+        target_band.FlushCache()
+    target_band = None
+    target_band_list = None
+    target_raster_list = None
+    base_band_list = None
+    base_raster_list = None
+
+    for temp_target_path, target_path in zip(
+            temp_target_path_list, target_path_list):
+        shutil.move(temp_target_path, target_path)
+
+    # clean up temporary files
+    shutil.rmtree(temp_dir)
+
+
+def stacked_raster_calculator(
+        base_path_list_list, local_op, target_path_list_list,
+        target_nodata_list):
+    """Apply a function to stacks of rasters in one pass over the inputs.
+
+    Rasters holding the same quantity for several plant functional types
+    (PFTs) are passed to `local_op` as one three-dimensional array with
+    dimensions (pft, y, x), so that a calculation is vectorized across PFTs
+    rather than repeated for each PFT. A stack holding one raster, such as
+    an input shared by all PFTs, has one layer and is broadcast against the
+    other stacks. Each raster is read once per block, even if it appears in
+    several stacks. As in `multi_raster_calculator`, a target may also be
+    one of the base rasters.
+
+    Parameters:
+        base_path_list_list (list): list of stacks, where each stack is a
+            list of paths to aligned rasters
+        local_op (function): function that takes one three-dimensional
+            array for each stack in `base_path_list_list` and returns a list
+            of three-dimensional arrays, one for each stack in
+            `target_path_list_list`
+        target_path_list_list (list): list of stacks, where each stack is a
+            list of paths to rasters that should contain the layers of one
+            result of `local_op`
+        target_nodata_list (list): nodata value of the rasters in each
+            target stack
+
+    Side effects:
+        modifies or creates the rasters indicated by `target_path_list_list`
+
+    Returns:
+        None
+
+    """
+    base_raster_path_list = []
+    index_list_list = []
+    for path_list in base_path_list_list:
+        index_list = []
+        for path in path_list:
+            if path not in base_raster_path_list:
+                base_raster_path_list.append(path)
+            index_list.append(base_raster_path_list.index(path))
+        index_list_list.append(index_list)
+
+    def stacked_op(*block_list):
+        """Stack blocks of each stack of inputs and split the results."""
+        result_list = local_op(*[
+            numpy.stack([block_list[index] for index in index_list]) for
+            index_list in index_list_list])
+        return [
+            result[layer_i] for result, path_list in zip(
+                result_list, target_path_list_list) for
+            layer_i in range(len(path_list))]
+
+    multi_raster_calculator(
+        base_raster_path_list, stacked_op,
+        [path for path_list in target_path_list_list for path in path_list],
+        [target_nodata for path_list, target_nodata in zip(
+            target_path_list_list, target_nodata_list) for
+         _ in path_list])
+
+
+def _select_outputs(return_type, output_dict):
+    """Select the results of a local operation to return.
+
+    Local operations that calculate several related quantities take a
+    `return_type` flag identifying the quantity to return. If `return_type`
+    is a list of flags, all of the identified quantities are returned, so
+    that one call to `multi_raster_calculator` can write each of them in a
+    single pass over the inputs.
+
+    Parameters:
+        return_type (string or list): flag, or list of flags, identifying
+            the quantities to return
+        output_dict (dict): map of flag to the array calculated for that
+            quantity
+
+    Returns:
+        the array identified by `return_type` if `return_type` is a string,
+            or a list of arrays in the order of `return_type` if it is a list
+
+    """
+    if isinstance(return_type, (list, tuple)):
+        return [output_dict[flag] for flag in return_type]
+    return output_dict[return_type]
+
+
+def _jit_kernel(pixel_loop):
+    """Compile a loop over pixels with numba, if numba is installed.
+
+    Parameters:
+        pixel_loop (function): function that loops over flattened input
+            arrays and fills flattened output arrays, using only operations
+            supported by numba in nopython mode
+
+    Returns:
+        the compiled function, or None if numba is not installed
+
+    """
+    if numba is None:
+        return None
+    return numba.njit(nogil=True, error_model='numpy')(pixel_loop)
+
+
+def _apply_jit_kernel(kernel, input_list, n_outputs):
+    """Apply a compiled loop over pixels to blocks of input arrays.
+
+    Nodata values are passed to the kernel as arguments following the
+    inputs, rather than read from module-level values, because numba treats
+    module-level values as constants when a function is compiled and
+    `_SV_NODATA` may differ between model runs.
+
+    Parameters:
+        kernel (function): compiled loop returned by `_jit_kernel`, taking
+            flattened input arrays, the nodata values `_SV_NODATA`,
+            `_TARGET_NODATA` and `_IC_NODATA`, and flattened output arrays
+        input_list (list): list of input arrays, which are broadcast to a
+            common shape
+        n_outputs (int): number of output arrays filled by the kernel
+
+    Returns:
+        list of float32 output arrays with the shape of the inputs
+
+    """
+    input_list = numpy.broadcast_arrays(*input_list)
+    output_list = [
+        numpy.empty(input_list[0].shape, dtype=numpy.float32) for
+        _ in range(n_outputs)]
+    kernel(*(
+        [numpy.ascontiguousarray(array).ravel() for array in input_list] +
+        [_SV_NODATA, _TARGET_NODATA, _IC_NODATA] +
+        [output.ravel() for output in output_list]))
+    return output_list
+
+
+def weighted_raster_list_sum(
+        raster_list, input_nodata, weight_list, target_path, target_nodata):
+    """Calculate the weighted sum per pixel across rasters in a list.
+
+    Multiply each raster in `raster_list` by the corresponding raster in
+    `weight_list` and sum the products, in a single pass over all inputs.
+    Products in pixels where the raster or its weight is nodata are treated
+    as zero; areas where all products are nodata will be nodata in the
+    output. This is equivalent to `raster_multiplication` of each pair of
+    rasters followed by `raster_list_sum` with `nodata_remove=True`, without
+    the intermediate rasters.
+
+    Parameters:
+        raster_list (list): list of paths to rasters to sum
+        input_nodata (float or int): nodata value in the input rasters
+        weight_list (list): list of paths to rasters by which the rasters in
+            `raster_list` should be weighted, e.g. fractional cover of each
+            plant functional type
+        target_path (string): path to location to store the result
+        target_nodata (float or int): nodata value for the result raster
+
+    Side effects:
+        modifies or creates the raster indicated by `target_path`
+
+    Returns:
+        None
+
+    """
+    weight_nodata_list = [
+        pygeoprocessing.get_raster_info(path)['nodata'][0] for path in
+        weight_list]
+
+    def weighted_sum_op(*block_list):
+        """Add the products of each raster and its weight."""
+        n_rasters = len(weight_nodata_list)
+        weighted_sum = numpy.zeros(block_list[0].shape, dtype=numpy.float32)
+        any_valid_mask = numpy.zeros(block_list[0].shape, dtype=bool)
+        for raster, weight, weight_nodata in zip(
+                block_list[:n_rasters], block_list[n_rasters:],
+                weight_nodata_list):
+            valid_mask = (
+                _valid_mask(raster, input_nodata) &
+                _valid_mask(weight, weight_nodata))
+            weighted_sum[valid_mask] += (
+                raster[valid_mask] * weight[valid_mask])
+            any_valid_mask |= valid_mask
+        weighted_sum[~any_valid_mask] = target_nodata
+        return weighted_sum
+
+    pygeoprocessing.raster_calculator(
+        [(path, 1) for path in raster_list + weight_list],
+        weighted_sum_op, target_path, gdal.GDT_Float32, target_nodata)
+
+
+def raster_sum(
+        raster1, raster1_nodata, raster2, raster2_nodata, target_path,
+        target_nodata, nodata_remove=False):
+    """Add raster 1 and raster2.
+
+    Add raster1 and raster2, allowing nodata values in the rasters to
+    propagate to the result or treating nodata as zero.
+
+    Parameters:
+        raster1 (string): path to one raster operand
+        raster1_nodata (float or int): nodata value in raster1
+        raster2 (string): path to second raster operand
+        raster2_nodata (float or int): nodata value in raster2
+        target_path (string): path to location to store the sum
+        target_nodata (float or int): nodata value for the result raster
+        nodata_remove (bool): if true, treat nodata values in input
+            rasters as zero. If false, the sum in a pixel where any
+            input raster is nodata is nodata.
+
+    Side effects:
+        modifies or creates the raster indicated by `target_path`
+
+    Returns:
+        None
+
+    """
+    def raster_sum_op(raster1, raster2):
+        """Add raster1 and raster2 without removing nodata values."""
+        return _array_sum(
+            raster1, raster1_nodata, raster2, raster2_nodata, target_nodata)
+
+    def raster_sum_op_nodata_remove(raster1, raster2):
         """Add raster1 and raster2, treating nodata as zero."""
-        numpy.place(raster1, numpy.isclose(raster1, raster1_nodata), [0])
-        numpy.place(raster2, numpy.isclose(raster2, raster2_nodata), [0])
+        numpy.place(raster1, _nodata_mask(raster1, raster1_nodata), [0])
+        numpy.place(raster2, _nodata_mask(raster2, raster2_nodata), [0])
         result = raster1 + raster2
         return result
 
@@ -1429,18 +3592,13 @@ def raster_difference(
     """
     def raster_difference_op(raster1, raster2):
         """Subtract raster2 from raster1 without removing nodata values."""
-        valid_mask = (
-            (~numpy.isclose(raster1, raster1_nodata)) &
-            (~numpy.isclose(raster2, raster2_nodata)))
-        result = numpy.empty(raster1.shape, dtype=numpy.float32)
-        result[:] = target_nodata
-        result[valid_mask] = raster1[valid_mask] - raster2[valid_mask]
-        return result
+        return _array_difference(
+            raster1, raster1_nodata, raster2, raster2_nodata, target_nodata)
 
     def raster_difference_op_nodata_remove(raster1, raster2):
         """Subtract raster2 from raster1, treating nodata as zero."""
-        numpy.place(raster1, numpy.isclose(raster1, raster1_nodata), [0])
-        numpy.place(raster2, numpy.isclose(raster2, raster2_nodata), [0])
+        numpy.place(raster1, _nodata_mask(raster1, raster1_nodata), [0])
+        numpy.place(raster2, _nodata_mask(raster2, raster2_nodata), [0])
         result = raster1 - raster2
         return result
 
@@ -1520,29 +3678,263 @@ def weighted_state_variable_sum(
         None
 
     """
-    temp_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
-    temp_val_dict = {}
-    for pft_i in pft_id_set:
-        val = '{}_weighted'.format(sv)
-        temp_val_dict['{}_{}'.format(val, pft_i)] = os.path.join(
-            temp_dir, '{}_{}.tif'.format(val, pft_i))
+    pft_id_list = sorted(pft_id_set)
+    weighted_raster_list_sum(
+        [sv_reg['{}_{}_path'.format(sv, pft_i)] for pft_i in pft_id_list],
+        _SV_NODATA,
+        [aligned_inputs['pft_{}'.format(pft_i)] for pft_i in pft_id_list],
+        weighted_sum_path, _TARGET_NODATA)
 
-    weighted_path_list = []
-    for pft_i in pft_id_set:
-        target_path = temp_val_dict['{}_weighted_{}'.format(sv, pft_i)]
-        pft_nodata = pygeoprocessing.get_raster_info(
-            aligned_inputs['pft_{}'.format(pft_i)])['nodata'][0]
-        raster_multiplication(
-            sv_reg['{}_{}_path'.format(sv, pft_i)], _SV_NODATA,
-            aligned_inputs['pft_{}'.format(pft_i)], pft_nodata,
-            target_path, _TARGET_NODATA)
-        weighted_path_list.append(target_path)
-    raster_list_sum(
-        weighted_path_list, _TARGET_NODATA, weighted_sum_path, _TARGET_NODATA,
-        nodata_remove=True)
 
-    # clean up temporary files
-    shutil.rmtree(temp_dir)
+def _cached_param_raster(
+        template_raster_path, param_key, target_path, create_raster):
+    """Create a parameter raster once per model run.
+
+    If parameter rasters are cached, the raster is identified by the grid of
+    `template_raster_path` together with `param_key`, and is created only if
+    the cache does not contain it yet. It is created under a temporary name
+    and then moved into the cache, so that a raster that was only partly
+    written is never found in the cache.
+
+    Parameters:
+        template_raster_path (string): path to raster sharing the
+            projection, extent and resolution of the parameter raster
+        param_key (tuple): values that, together with the grid of
+            `template_raster_path`, uniquely identify the contents of the
+            parameter raster
+        target_path (string): path where the raster should be created if
+            parameter rasters are not cached
+        create_raster (function): function that creates the parameter
+            raster at the path given as its only argument
+
+    Returns:
+        path to the parameter raster
+
+    """
+    if _PARAM_CACHE_DIR is None:
+        create_raster(target_path)
+        return target_path
+    template_info = pygeoprocessing.get_raster_info(template_raster_path)
+    grid_key = (
+        template_info['projection_wkt'],
+        tuple(template_info['geotransform']),
+        tuple(template_info['raster_size']))
+    digest = hashlib.md5(
+        repr(grid_key + tuple(param_key)).encode('utf-8')).hexdigest()
+    cached_path = os.path.join(_PARAM_CACHE_DIR, '{}.tif'.format(digest))
+    if not os.path.exists(cached_path):
+        temp_path = os.path.join(
+            _PARAM_CACHE_DIR, '{}_{}.tmp.tif'.format(digest, os.getpid()))
+        create_raster(temp_path)
+        os.replace(temp_path, cached_path)
+    return cached_path
+
+
+def _index_param_raster(index_path, param_table, val, target_path):
+    """Get a raster of parameter values indexed by an integer raster.
+
+    Parameter values are looked up from `param_table` according to the value
+    of `index_path` at each pixel. During a model run, the raster is created
+    once for each combination of index raster and parameter values and
+    reused by all subsequent calls.
+
+    Parameters:
+        index_path (string): path to integer raster indexing the location of
+            each set of parameters, e.g. site index or animal index
+        param_table (dict): map of index value to dictionaries containing
+            parameter values
+        val (string): name of the parameter
+        target_path (string): path where the raster should be created if
+            parameter rasters are not cached
+
+    Returns:
+        path to the parameter raster
+
+    """
+    index_to_val = dict(
+        [(index_code, float(table[val])) for
+            (index_code, table) in param_table.items()])
+
+    def create_raster(raster_path):
+        """Reclassify the index raster to parameter values."""
+        pygeoprocessing.reclassify_raster(
+            (index_path, 1), index_to_val, raster_path, gdal.GDT_Float32,
+            _IC_NODATA)
+
+    return _cached_param_raster(
+        index_path, (index_path, tuple(sorted(index_to_val.items()))),
+        target_path, create_raster)
+
+
+def _site_param_raster(site_index_path, site_param_table, val, target_path):
+    """Get a raster of one site parameter.
+
+    Parameters:
+        site_index_path (string): path to the site spatial index raster
+        site_param_table (dict): map of site spatial index to dictionaries
+            that contain site-level parameters
+        val (string): name of the site parameter
+        target_path (string): path where the raster should be created if
+            parameter rasters are not cached
+
+    Returns:
+        path to the parameter raster
+
+    """
+    return _index_param_raster(
+        site_index_path, site_param_table, val, target_path)
+
+
+def _animal_param_raster(
+        animal_index_path, animal_trait_table, val, target_path):
+    """Get a raster of one animal parameter.
+
+    Parameters:
+        animal_index_path (string): path to raster that indexes the location
+            of grazing animal types to their parameters and traits
+        animal_trait_table (dict): map of animal id to dictionaries containing
+            animal parameters and traits
+        val (string): name of the animal parameter
+        target_path (string): path where the raster should be created if
+            parameter rasters are not cached
+
+    Returns:
+        path to the parameter raster
+
+    """
+    return _index_param_raster(
+        animal_index_path, animal_trait_table, val, target_path)
+
+
+def _constant_param_raster(template_raster_path, fill_val, target_path):
+    """Get a raster containing one parameter value at every pixel.
+
+    During a model run, the raster is created once for each combination of
+    raster extent and parameter value and reused by all subsequent calls.
+
+    Parameters:
+        template_raster_path (string): path to raster giving the extent and
+            resolution of the parameter raster
+        fill_val (float): parameter value, e.g. of a plant functional type
+        target_path (string): path where the raster should be created if
+            parameter rasters are not cached
+
+    Returns:
+        path to the parameter raster
+
+    """
+    def create_raster(raster_path):
+        """Fill a new raster with the parameter value."""
+        pygeoprocessing.new_raster_from_base(
+            template_raster_path, raster_path, gdal.GDT_Float32,
+            [_IC_NODATA], fill_value_list=[fill_val])
+
+    return _cached_param_raster(
+        template_raster_path, ('constant', float(fill_val)), target_path,
+        create_raster)
+
+
+def _aoi_weight_raster(template_raster_path, aoi_path, target_path):
+    """Get a raster counting the study area features covering each pixel.
+
+    Pixels are counted for each feature of the study area in the same way as
+    by `pygeoprocessing.zonal_statistics`, so that weighted sums over the
+    raster equal zonal statistics summed across features: a pixel is counted
+    once for each feature that contains its center, and a feature that
+    contains no pixel center is represented by every pixel in its bounding
+    box. During a model run, the raster is created once for each combination
+    of raster extent and study area and reused by all subsequent calls.
+
+    Parameters:
+        template_raster_path (string): path to raster giving the extent and
+            resolution of the weight raster
+        aoi_path (string): path to vector layer giving the spatial extent of
+            the model
+        target_path (string): path where the raster should be created if
+            parameter rasters are not cached
+
+    Returns:
+        path to the weight raster, where the value of each pixel is the
+            number of times it is counted for the study area
+
+    """
+    def create_raster(raster_path):
+        """Rasterize each study area feature onto the grid of the template."""
+        pygeoprocessing.new_raster_from_base(
+            template_raster_path, raster_path, gdal.GDT_Int32, [-1],
+            fill_value_list=[0])
+        target_raster = gdal.OpenEx(
+            raster_path, gdal.OF_RASTER | gdal.GA_Update)
+        target_band = target_raster.GetRasterBand(1)
+        geotransform = target_raster.GetGeoTransform()
+        aoi_vector = gdal.OpenEx(aoi_path, gdal.OF_VECTOR)
+        aoi_layer = aoi_vector.GetLayer()
+        memory_driver = ogr.GetDriverByName('Memory')
+        for feature in aoi_layer:
+            geometry = feature.GetGeometryRef()
+            if geometry is None:
+                continue
+            # pixel window of the feature's bounding box, as in
+            # pygeoprocessing.zonal_statistics
+            envelope = list(geometry.GetEnvelope())
+            if geotransform[1] < 0:
+                envelope[0], envelope[1] = envelope[1], envelope[0]
+            if geotransform[5] < 0:
+                envelope[2], envelope[3] = envelope[3], envelope[2]
+            xoff = int((envelope[0] - geotransform[0]) / geotransform[1])
+            yoff = int((envelope[2] - geotransform[3]) / geotransform[5])
+            win_xsize = int(numpy.ceil(
+                (envelope[1] - geotransform[0]) / geotransform[1])) - xoff
+            win_ysize = int(numpy.ceil(
+                (envelope[3] - geotransform[3]) / geotransform[5])) - yoff
+            if xoff < 0:
+                win_xsize += xoff
+                xoff = 0
+            if yoff < 0:
+                win_ysize += yoff
+                yoff = 0
+            win_xsize = min(win_xsize, target_band.XSize - xoff)
+            win_ysize = min(win_ysize, target_band.YSize - yoff)
+            if win_xsize <= 0 or win_ysize <= 0:
+                continue
+
+            # rasterize the feature alone onto its window
+            feature_vector = memory_driver.CreateDataSource('feature')
+            feature_layer = feature_vector.CreateLayer(
+                'feature', aoi_layer.GetSpatialRef(),
+                geometry.GetGeometryType())
+            feature_layer.CreateFeature(feature.Clone())
+            window_raster = gdal.GetDriverByName('MEM').Create(
+                '', win_xsize, win_ysize, 1, gdal.GDT_Byte)
+            window_raster.SetProjection(target_raster.GetProjection())
+            window_raster.SetGeoTransform([
+                geotransform[0] + xoff * geotransform[1],
+                geotransform[1], geotransform[2],
+                geotransform[3] + yoff * geotransform[5],
+                geotransform[4], geotransform[5]])
+            gdal.RasterizeLayer(
+                window_raster, [1], feature_layer, burn_values=[1],
+                options=['ALL_TOUCHED=FALSE'])
+            feature_count = window_raster.ReadAsArray().astype(numpy.int32)
+            window_raster = None
+            feature_layer = None
+            feature_vector = None
+            if not feature_count.any():
+                feature_count[:] = 1
+
+            count_array = target_band.ReadAsArray(
+                xoff=xoff, yoff=yoff, win_xsize=win_xsize,
+                win_ysize=win_ysize)
+            target_band.WriteArray(
+                count_array + feature_count, xoff=xoff, yoff=yoff)
+        aoi_layer = None
+        aoi_vector = None
+        target_band = None
+        target_raster = None
+
+    return _cached_param_raster(
+        template_raster_path, ('aoi_weight', os.path.abspath(aoi_path)),
+        target_path, create_raster)
 
 
 def _check_pft_fractional_cover_sum(aligned_inputs, pft_id_set):
@@ -1635,7 +4027,7 @@ def initial_conditions_from_tables(
 
         """
         valid_mask = (
-            (~numpy.isclose(pft_cover, _SV_NODATA)) &
+            _valid_mask(pft_cover, _SV_NODATA) &
             (pft_cover > 0))
         full_masked = numpy.empty(pft_cover.shape, dtype=numpy.float32)
         full_masked[:] = _SV_NODATA
@@ -1737,10 +4129,10 @@ def _calc_ompc(
         ompc = numpy.empty(som1c_2.shape, dtype=numpy.float32)
         ompc[:] = _TARGET_NODATA
         valid_mask = (
-            (~numpy.isclose(som1c_2, _SV_NODATA)) &
-            (~numpy.isclose(som2c_2, _SV_NODATA)) &
-            (~numpy.isclose(som3c, _SV_NODATA)) &
-            (~numpy.isclose(bulkd, bulkd_nodata)) &
+            _valid_mask(som1c_2, _SV_NODATA) &
+            _valid_mask(som2c_2, _SV_NODATA) &
+            _valid_mask(som3c, _SV_NODATA) &
+            _valid_mask(bulkd, bulkd_nodata) &
             (edepth != _IC_NODATA))
         ompc[valid_mask] = (
             (som1c_2[valid_mask] + som2c_2[valid_mask] +
@@ -1799,11 +4191,11 @@ def _calc_afiel(
         afiel = numpy.empty(sand.shape, dtype=numpy.float32)
         afiel[:] = _TARGET_NODATA
         valid_mask = (
-            (~numpy.isclose(sand, sand_nodata)) &
-            (~numpy.isclose(silt, silt_nodata)) &
-            (~numpy.isclose(clay, clay_nodata)) &
+            _valid_mask(sand, sand_nodata) &
+            _valid_mask(silt, silt_nodata) &
+            _valid_mask(clay, clay_nodata) &
             (ompc != _TARGET_NODATA) &
-            (~numpy.isclose(bulkd, bulkd_nodata)))
+            _valid_mask(bulkd, bulkd_nodata))
         afiel[valid_mask] = (
             0.3075 * sand[valid_mask] + 0.5886 * silt[valid_mask] +
             0.8039 * clay[valid_mask] + 2.208E-03 * ompc[valid_mask] +
@@ -1870,11 +4262,11 @@ def _calc_awilt(
         awilt = numpy.empty(sand.shape, dtype=numpy.float32)
         awilt[:] = _TARGET_NODATA
         valid_mask = (
-            (~numpy.isclose(sand, sand_nodata)) &
-            (~numpy.isclose(silt, silt_nodata)) &
-            (~numpy.isclose(clay, clay_nodata)) &
+            _valid_mask(sand, sand_nodata) &
+            _valid_mask(silt, silt_nodata) &
+            _valid_mask(clay, clay_nodata) &
             (ompc != _TARGET_NODATA) &
-            (~numpy.isclose(bulkd, bulkd_nodata)))
+            _valid_mask(bulkd, bulkd_nodata))
         awilt[valid_mask] = (
             -0.0059 * sand[valid_mask] + 0.1142 * silt[valid_mask] +
             0.5766 * clay[valid_mask] + 2.228E-03 * ompc[valid_mask] +
@@ -1965,13 +4357,8 @@ def _afiel_awilt(
     edepth_path = os.path.join(temp_dir, 'edepth.tif')
     ompc_path = os.path.join(temp_dir, 'ompc.tif')
 
-    site_to_edepth = dict(
-        [(site_code, float(table['edepth'])) for
-         (site_code, table) in site_param_table.items()])
-
-    pygeoprocessing.reclassify_raster(
-        (site_index_path, 1), site_to_edepth, edepth_path, gdal.GDT_Float32,
-        _IC_NODATA)
+    edepth_path = _site_param_raster(
+        site_index_path, site_param_table, 'edepth', edepth_path)
 
     # estimate total soil organic matter
     _calc_ompc(
@@ -2037,13 +4424,8 @@ def _persistent_params(
             'peftxa', 'peftxb', 'p1co2a_2', 'p1co2b_2', 'ps1s3_1',
             'ps1s3_2', 'ps2s3_1', 'ps2s3_2', 'omlech_1', 'omlech_2', 'vlossg']:
         target_path = os.path.join(temp_dir, '{}.tif'.format(val))
-        param_val_dict[val] = target_path
-        site_to_val = dict(
-            [(site_code, float(table[val])) for (
-                site_code, table) in site_param_table.items()])
-        pygeoprocessing.reclassify_raster(
-            (site_index_path, 1), site_to_val, target_path, gdal.GDT_Float32,
-            _IC_NODATA)
+        param_val_dict[val] = _site_param_raster(
+            site_index_path, site_param_table, val, target_path)
 
     def calc_wc(afiel_1, awilt_1):
         """Calculate water content of soil layer 1."""
@@ -2074,7 +4456,7 @@ def _persistent_params(
         valid_mask = (
             (peftxa != _IC_NODATA) &
             (peftxb != _IC_NODATA) &
-            (~numpy.isclose(sand, sand_nodata)))
+            _valid_mask(sand, sand_nodata))
         eftext[valid_mask] = (
             peftxa[valid_mask] + (peftxb[valid_mask] * sand[valid_mask]))
         return eftext
@@ -2108,7 +4490,7 @@ def _persistent_params(
         valid_mask = (
             (p1co2a_2 != _IC_NODATA) &
             (p1co2b_2 != _IC_NODATA) &
-            (~numpy.isclose(sand, sand_nodata)))
+            _valid_mask(sand, sand_nodata))
         p1co2_2[valid_mask] = (
             p1co2a_2[valid_mask] + (p1co2b_2[valid_mask] * sand[valid_mask]))
         return p1co2_2
@@ -2141,7 +4523,7 @@ def _persistent_params(
         valid_mask = (
             (ps1s3_1 != _IC_NODATA) &
             (ps1s3_2 != _IC_NODATA) &
-            (~numpy.isclose(clay, clay_nodata)))
+            _valid_mask(clay, clay_nodata))
         fps1s3[valid_mask] = (
             ps1s3_1[valid_mask] + (ps1s3_2[valid_mask] * clay[valid_mask]))
         return fps1s3
@@ -2173,7 +4555,7 @@ def _persistent_params(
         valid_mask = (
             (ps2s3_1 != _IC_NODATA) &
             (ps2s3_2 != _IC_NODATA) &
-            (~numpy.isclose(clay, clay_nodata)))
+            _valid_mask(clay, clay_nodata))
         fps2s3[valid_mask] = (
             ps2s3_1[valid_mask] + (ps2s3_2[valid_mask] * clay[valid_mask]))
         return fps2s3
@@ -2205,7 +4587,7 @@ def _persistent_params(
         valid_mask = (
             (omlech_1 != _IC_NODATA) &
             (omlech_2 != _IC_NODATA) &
-            (~numpy.isclose(sand, sand_nodata)))
+            _valid_mask(sand, sand_nodata))
         orglch[valid_mask] = (
             omlech_1[valid_mask] + (omlech_2[valid_mask] * sand[valid_mask]))
         return orglch
@@ -2233,7 +4615,7 @@ def _persistent_params(
         """
         valid_mask = (
             (vlossg_param != _IC_NODATA) &
-            (~numpy.isclose(clay, clay_nodata)))
+            _valid_mask(clay, clay_nodata))
         vlossg = numpy.empty(vlossg_param.shape, dtype=numpy.float32)
         vlossg[:] = _IC_NODATA
 
@@ -2272,8 +4654,8 @@ def _aboveground_ratio(anps, tca, pcemic_1, pcemic_2, pcemic_3):
 
     """
     valid_mask = (
-        (~numpy.isclose(anps, _SV_NODATA)) &
-        (~numpy.isclose(tca, _SV_NODATA)) &
+        _valid_mask(anps, _SV_NODATA) &
+        _valid_mask(tca, _SV_NODATA) &
         (pcemic_1 != _IC_NODATA) &
         (pcemic_2 != _IC_NODATA) &
         (pcemic_3 != _IC_NODATA))
@@ -2320,7 +4702,7 @@ def _belowground_ratio(aminrl, varat_1_iel, varat_2_iel, varat_3_iel):
 
     """
     valid_mask = (
-        (~numpy.isclose(aminrl, _SV_NODATA)) &
+        _valid_mask(aminrl, _SV_NODATA) &
         (varat_1_iel != _IC_NODATA) &
         (varat_2_iel != _IC_NODATA) &
         (varat_3_iel != _IC_NODATA))
@@ -2380,13 +4762,9 @@ def _structural_ratios(site_index_path, site_param_table, sv_reg, pp_reg):
                 'pcemic2_1', 'pcemic2_3', 'rad1p_1', 'rad1p_2',
                 'rad1p_3', 'varat1_1', 'varat22_1']:
             target_path = os.path.join(temp_dir, '{}_{}.tif'.format(val, iel))
-            param_val_dict['{}_{}'.format(val, iel)] = target_path
-            site_to_val = dict(
-                [(site_code, float(table['{}_{}'.format(val, iel)])) for
-                    (site_code, table) in site_param_table.items()])
-            pygeoprocessing.reclassify_raster(
-                (site_index_path, 1), site_to_val, target_path,
-                gdal.GDT_Float32, _IC_NODATA)
+            param_val_dict['{}_{}'.format(val, iel)] = _site_param_raster(
+                site_index_path, site_param_table, '{}_{}'.format(val, iel),
+                target_path)
 
     def calc_rnewas_som2(
             pcemic2_2, pcemic2_1, pcemic2_3, struce_1, strucc_1, rad1p_1,
@@ -2432,8 +4810,8 @@ def _structural_ratios(site_index_path, site_param_table, sv_reg, pp_reg):
             (pcemic2_2 != _IC_NODATA) &
             (pcemic2_1 != _IC_NODATA) &
             (pcemic2_3 != _IC_NODATA) &
-            (~numpy.isclose(struce_1, _SV_NODATA)) &
-            (~numpy.isclose(strucc_1, _SV_NODATA)) &
+            _valid_mask(struce_1, _SV_NODATA) &
+            _valid_mask(strucc_1, _SV_NODATA) &
             (rad1p_1 != _IC_NODATA) &
             (rad1p_2 != _IC_NODATA) &
             (rad1p_3 != _IC_NODATA) &
@@ -2501,9 +4879,94 @@ def _structural_ratios(site_index_path, site_param_table, sv_reg, pp_reg):
     shutil.rmtree(temp_dir)
 
 
+def _roll_annual_precip(
+        annual_precip_path, added_precip_list, removed_precip_list,
+        window_precip_list, precip_nodata):
+    """Move the 12-month window of annual precipitation.
+
+    Update the sum of precipitation over 12 months in place by adding
+    precipitation of months that entered the window and subtracting
+    precipitation of months that left it, rather than summing all 12 months.
+    Annual precipitation is nodata where any month inside the window is
+    nodata, so where a nodata month left the window the sum is calculated
+    again from all months inside the new window.
+
+    Parameters:
+        annual_precip_path (string): path to raster containing the sum of
+            precipitation over the previous window
+        added_precip_list (list): list of paths to monthly precipitation
+            rasters that entered the window
+        removed_precip_list (list): list of paths to monthly precipitation
+            rasters that left the window
+        window_precip_list (list): list of paths to the monthly
+            precipitation rasters inside the new window
+        precip_nodata (float or int): nodata value in monthly precipitation
+            rasters
+
+    Side effects:
+        modifies the raster indicated by `annual_precip_path`
+
+    Returns:
+        None
+
+    """
+    n_added = len(added_precip_list)
+    # number of pixels where a nodata month left the window and the months
+    # that entered it are valid
+    n_recalculate = [0]
+
+    def roll_op(annual_precip, *precip_list):
+        """Add entering months to and subtract leaving months from the sum."""
+        valid_mask = (annual_precip != _TARGET_NODATA)
+        added_mask = numpy.ones(annual_precip.shape, dtype=bool)
+        for precip in precip_list[:n_added]:
+            added_mask &= _valid_mask(precip, precip_nodata)
+        removed_mask = numpy.ones(annual_precip.shape, dtype=bool)
+        for precip in precip_list[n_added:]:
+            removed_mask &= _valid_mask(precip, precip_nodata)
+        n_recalculate[0] += numpy.count_nonzero(added_mask & ~removed_mask)
+        valid_mask &= added_mask & removed_mask
+        rolled_precip = numpy.empty(annual_precip.shape, dtype=numpy.float32)
+        rolled_precip[:] = _TARGET_NODATA
+        rolled_precip[valid_mask] = annual_precip[valid_mask]
+        for precip in precip_list[:n_added]:
+            rolled_precip[valid_mask] += precip[valid_mask]
+        for precip in precip_list[n_added:]:
+            rolled_precip[valid_mask] -= precip[valid_mask]
+        return rolled_precip
+
+    def recalculate_op(rolled_precip, *precip_list):
+        """Sum all months of the window where the rolled sum is nodata."""
+        recalculate_mask = (rolled_precip == _TARGET_NODATA)
+        for precip in precip_list:
+            recalculate_mask &= _valid_mask(precip, precip_nodata)
+        annual_precip = rolled_precip.copy()
+        annual_precip[recalculate_mask] = numpy.sum(
+            [precip[recalculate_mask] for precip in precip_list], axis=0)
+        return annual_precip
+
+    temp_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
+    rolled_precip_path = os.path.join(temp_dir, 'annual_precip.tif')
+    pygeoprocessing.raster_calculator(
+        [(path, 1) for path in (
+            [annual_precip_path] + added_precip_list + removed_precip_list)],
+        roll_op, rolled_precip_path, gdal.GDT_Float32, _TARGET_NODATA)
+    if n_recalculate[0] > 0:
+        pygeoprocessing.raster_calculator(
+            [(path, 1) for path in (
+                [rolled_precip_path] + window_precip_list)],
+            recalculate_op, annual_precip_path, gdal.GDT_Float32,
+            _TARGET_NODATA)
+    else:
+        shutil.move(rolled_precip_path, annual_precip_path)
+
+    # clean up temporary files
+    shutil.rmtree(temp_dir)
+
+
 def _yearly_tasks(
         aligned_inputs, site_param_table, veg_trait_table, month_index,
-        pft_id_set, year_reg):
+        pft_id_set, year_reg, prev_annual_precip_rasters=None):
     """Calculate quantities that remain static for 12 months.
 
     These quantities are annual precipitation, annual atmospheric N
@@ -2528,6 +4991,12 @@ def _yearly_tasks(
         pft_id_set (set): set of integers identifying plant functional types
         year_reg (dict): map of key, path pairs giving paths to the annual
             precipitation and N deposition rasters
+        prev_annual_precip_rasters (list): optional, list of monthly
+            precipitation rasters summed in `year_reg['annual_precip_path']`
+            by the previous call to this function. If supplied, annual
+            precipitation is updated from the months that entered and left
+            the window, and nothing is recalculated if the window is
+            unchanged.
 
     Side effects:
         modifies or creates the rasters indicated by:
@@ -2537,7 +5006,8 @@ def _yearly_tasks(
             year_reg['pltlig_below_<pft>'] for each pft
 
     Returns:
-        None
+        list of monthly precipitation rasters summed to calculate annual
+            precipitation
 
     Raises:
         ValueError if fewer than 12 monthly precipitation rasters can be found
@@ -2623,31 +5093,36 @@ def _yearly_tasks(
         raise ValueError("Precipitation rasters include >1 nodata value")
     precip_nodata = list(precip_nodata)[0]
 
-    raster_list_sum(
-        annual_precip_rasters, precip_nodata, year_reg['annual_precip_path'],
-        _TARGET_NODATA)
+    if prev_annual_precip_rasters is None:
+        raster_list_sum(
+            annual_precip_rasters, precip_nodata,
+            year_reg['annual_precip_path'], _TARGET_NODATA)
+    else:
+        if annual_precip_rasters == prev_annual_precip_rasters:
+            return annual_precip_rasters
+        _roll_annual_precip(
+            year_reg['annual_precip_path'],
+            [path for path in annual_precip_rasters if
+                path not in prev_annual_precip_rasters],
+            [path for path in prev_annual_precip_rasters if
+                path not in annual_precip_rasters],
+            annual_precip_rasters, precip_nodata)
 
     # intermediate parameter rasters for this operation
     temp_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
     param_val_dict = {}
     for val in['epnfa_1', 'epnfa_2']:
         target_path = os.path.join(temp_dir, '{}.tif'.format(val))
-        param_val_dict[val] = target_path
-        site_to_val = dict(
-            [(site_code, float(table[val])) for
-                (site_code, table) in site_param_table.items()])
-        pygeoprocessing.reclassify_raster(
-            (aligned_inputs['site_index'], 1), site_to_val, target_path,
-            gdal.GDT_Float32, _IC_NODATA)
+        param_val_dict[val] = _site_param_raster(
+            aligned_inputs['site_index'], site_param_table, val, target_path)
     for val in ['fligni_1_1', 'fligni_2_1', 'fligni_1_2', 'fligni_2_2']:
         for pft_i in pft_id_set:
             target_path = os.path.join(
                 temp_dir, '{}_{}.tif'.format(val, pft_i))
-            param_val_dict['{}_{}'.format(val, pft_i)] = target_path
             fill_val = veg_trait_table[pft_i][val]
-            pygeoprocessing.new_raster_from_base(
-                aligned_inputs['site_index'], target_path, gdal.GDT_Float32,
-                [_IC_NODATA], fill_value_list=[fill_val])
+            param_val_dict['{}_{}'.format(val, pft_i)] = (
+                _constant_param_raster(
+                    aligned_inputs['site_index'], fill_val, target_path))
 
     # calculate base N deposition
     pygeoprocessing.raster_calculator(
@@ -2678,53 +5153,69 @@ def _yearly_tasks(
 
     # clean up temporary files
     shutil.rmtree(temp_dir)
+    return annual_precip_rasters
 
 
-def calc_latitude(template_raster, latitude_raster_path):
-    """Calculate latitude at the center of each pixel in a template raster."""
-    pygeoprocessing.new_raster_from_base(
-        template_raster, latitude_raster_path, gdal.GDT_Float32,
-        [_IC_NODATA])
-    latitude_raster = gdal.OpenEx(
-        latitude_raster_path, gdal.OF_RASTER | gdal.GA_Update)
-    target_band = latitude_raster.GetRasterBand(1)
-    base_raster_info = pygeoprocessing.get_raster_info(template_raster)
-    geotransform = base_raster_info['geotransform']
-    for offset_map, raster_block in pygeoprocessing.iterblocks(
-            (template_raster, 1)):
-        n_y_block = raster_block.shape[0]
-        n_x_block = raster_block.shape[1]
+def _latitude_raster_calculator(
+        template_raster, base_raster_path_list, local_op, target_path):
+    """Apply a function of latitude to each block of a raster.
 
-        # offset by .5 so we're in the center of the pixel
-        xoff = offset_map['xoff'] + 0.5
-        yoff = offset_map['yoff'] + 0.5
+    Latitude at pixel centers depends only on the row in a geographic grid,
+    so it is passed to `local_op` as a column vector with one value per row
+    of the block, followed by the blocks of each raster in
+    `base_raster_path_list`. Calculations that depend only on latitude can
+    be done once per row; the result of `local_op` is broadcast to the shape
+    of the block before it is written.
 
-        # calculate the projected x and y coordinate bounds for the block
-        x_range = numpy.linspace(
-            geotransform[0] + geotransform[1] * xoff,
-            geotransform[0] + geotransform[1] * (xoff + n_x_block - 1),
-            n_x_block)
-        y_range = numpy.linspace(
-            geotransform[3] + geotransform[5] * yoff,
-            geotransform[3] + geotransform[5] * (yoff + n_y_block - 1),
-            n_y_block)
+    Parameters:
+        template_raster (string): path to a raster in geographic coordinates
+            giving the extent and resolution of the target raster
+        base_raster_path_list (list): list of paths to rasters aligned with
+            `template_raster` whose values should be passed to `local_op`
+        local_op (function): function that takes latitude in degrees as a
+            column vector and one array for each raster in
+            `base_raster_path_list`
+        target_path (string): path to the raster that should contain the
+            result
 
-        # we'll use this to avoid generating any nodata points
-        valid_mask = raster_block != base_raster_info['nodata']
+    Side effects:
+        modifies or creates the raster indicated by `target_path`
 
-        # these indexes correspond to projected coordinates
-        # y_vector is what we want, an array of latitude coordinates
-        x_vector, y_vector = numpy.meshgrid(x_range, y_range)
+    Returns:
+        None
 
+    """
+    pygeoprocessing.new_raster_from_base(
+        template_raster, target_path, gdal.GDT_Float32, [_TARGET_NODATA])
+    geotransform = pygeoprocessing.get_raster_info(
+        template_raster)['geotransform']
+    base_raster_list = [
+        gdal.OpenEx(path, gdal.OF_RASTER) for path in base_raster_path_list]
+    base_band_list = [raster.GetRasterBand(1) for raster in base_raster_list]
+    target_raster = gdal.OpenEx(target_path, gdal.OF_RASTER | gdal.GA_Update)
+    target_band = target_raster.GetRasterBand(1)
+    for offset_map in pygeoprocessing.iterblocks(
+            (template_raster, 1), offset_only=True):
+        # offset by .5 so we're in the center of the pixel
+        yoff = offset_map['yoff'] + 0.5
+        n_y_block = offset_map['win_ysize']
+        latitude = numpy.linspace(
+            geotransform[3] + geotransform[5] * yoff,
+            geotransform[3] + geotransform[5] * (yoff + n_y_block - 1),
+            n_y_block).reshape((n_y_block, 1))
+        base_block_list = [
+            band.ReadAsArray(**offset_map) for band in base_band_list]
+        target_block = numpy.ascontiguousarray(numpy.broadcast_to(
+            local_op(latitude, *base_block_list),
+            (n_y_block, offset_map['win_xsize'])))
         target_band.WriteArray(
-            y_vector, xoff=offset_map['xoff'], yoff=offset_map['yoff'])
+            target_block, xoff=offset_map['xoff'], yoff=offset_map['yoff'])
 
-    # Making sure the band and dataset is flushed and not in memory
-    target_band.FlushCache()
     target_band.FlushCache()
     target_band = None
-    gdal.Dataset.__swig_destroy__(latitude_raster)
-    latitude_raster = None
+    target_raster = None
+    base_band_list = None
+    base_raster_list = None
 
 
 def _calc_daylength(template_raster, month, daylength_path):
@@ -2767,17 +5258,9 @@ def _calc_daylength(template_raster, month, daylength_path):
             return hours_of_daylength
         return _daylength
 
-    # calculate an intermediate input, latitude at each pixel center
-    temp_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
-    latitude_raster_path = os.path.join(temp_dir, 'latitude.tif')
-    calc_latitude(template_raster, latitude_raster_path)
-
-    pygeoprocessing.raster_calculator(
-        [(latitude_raster_path, 1)], daylength(month), daylength_path,
-        gdal.GDT_Float32, _TARGET_NODATA)
-
-    # clean up temporary files
-    shutil.rmtree(temp_dir)
+    # daylength depends only on latitude, which is constant within each row
+    _latitude_raster_calculator(
+        template_raster, [], daylength(month), daylength_path)
 
 
 def _shortwave_radiation(template_raster, month, shwave_path):
@@ -2848,18 +5331,10 @@ def _shortwave_radiation(template_raster, month, shwave_path):
             return shwave
         return _shwave
 
-    # calculate an intermediate input, latitude at each pixel center
-    temp_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
-    latitude_raster_path = os.path.join(temp_dir, 'latitude.tif')
-    calc_latitude(template_raster, latitude_raster_path)
-
-    pygeoprocessing.raster_calculator(
-        [(latitude_raster_path, 1)],
-        shwave(month), shwave_path,
-        gdal.GDT_Float32, _TARGET_NODATA)
-
-    # clean up temporary files
-    shutil.rmtree(temp_dir)
+    # shortwave radiation depends only on latitude, which is constant within
+    # each row
+    _latitude_raster_calculator(
+        template_raster, [], shwave(month), shwave_path)
 
 
 def _reference_evapotranspiration(
@@ -2911,8 +5386,8 @@ def _reference_evapotranspiration(
         langleys2watts = 54.0
 
         valid_mask = (
-            (~numpy.isclose(max_temp, maxtmp_nodata)) &
-            (~numpy.isclose(min_temp, mintmp_nodata)) &
+            _valid_mask(max_temp, maxtmp_nodata) &
+            _valid_mask(min_temp, mintmp_nodata) &
             (shwave != _TARGET_NODATA) &
             (fwloss_4 != _IC_NODATA))
         trange = numpy.empty(fwloss_4.shape, dtype=numpy.float32)
@@ -2953,6 +5428,90 @@ def _reference_evapotranspiration(
         _calc_pevap, pevap_path, gdal.GDT_Float32, _TARGET_NODATA)
 
 
+def _monthly_shortwave_radiation(template_raster, month, shwave_path):
+    """Get shortwave radiation outside the atmosphere for a calendar month.
+
+    Shortwave radiation depends only on latitude and the month of the year,
+    so during a model run it is calculated once for each month of the year
+    by `_shortwave_radiation` and reused in every simulated year.
+
+    Parameters:
+        template_raster (string): path to a raster in geographic coordinates
+            that is aligned with model inputs
+        month (int): current month of the year, such that month=1 indicates
+            January
+        shwave_path (string): path where shortwave radiation should be
+            calculated if climate rasters are not cached
+
+    Returns:
+        path to the shortwave radiation raster
+
+    """
+    return _cached_param_raster(
+        template_raster, ('shwave', month), shwave_path,
+        lambda raster_path: _shortwave_radiation(
+            template_raster, month, raster_path))
+
+
+def _monthly_daylength(template_raster, month, daylength_path):
+    """Get estimated hours of daylength for a calendar month.
+
+    Daylength depends only on latitude and the month of the year, so during
+    a model run it is calculated once for each month of the year by
+    `_calc_daylength` and reused in every simulated year.
+
+    Parameters:
+        template_raster (string): path to a raster in geographic coordinates
+            that is aligned with model inputs
+        month (int): current month of the year, such that month=1 indicates
+            January
+        daylength_path (string): path where daylength should be calculated
+            if climate rasters are not cached
+
+    Returns:
+        path to the daylength raster
+
+    """
+    return _cached_param_raster(
+        template_raster, ('daylength', month), daylength_path,
+        lambda raster_path: _calc_daylength(
+            template_raster, month, raster_path))
+
+
+def _monthly_reference_evapotranspiration(
+        max_temp_path, min_temp_path, shwave_path, fwloss_4_path,
+        pevap_path):
+    """Get reference evapotranspiration for a calendar month.
+
+    Temperature inputs are indexed by the month of the year, so during a
+    model run reference evapotranspiration is calculated once for each
+    combination of inputs by `_reference_evapotranspiration` and reused in
+    every simulated year. Inputs are identified by path, so the shortwave
+    radiation and fwloss_4 rasters should themselves be cached rasters.
+
+    Parameters:
+        max_temp_path (string): path to maximum monthly temperature
+        min_temp_path (string): path to minimum monthly temperature
+        shwave_path (string): path to shortwave radiation outside the
+            atmosphere
+        fwloss_4_path (string): path to parameter, scaling factor for
+            reference evapotranspiration
+        pevap_path (string): path where reference evapotranspiration should
+            be calculated if climate rasters are not cached
+
+    Returns:
+        path to the reference evapotranspiration raster
+
+    """
+    return _cached_param_raster(
+        max_temp_path, (
+            'pevap', max_temp_path, min_temp_path, shwave_path,
+            fwloss_4_path), pevap_path,
+        lambda raster_path: _reference_evapotranspiration(
+            max_temp_path, min_temp_path, shwave_path, fwloss_4_path,
+            raster_path))
+
+
 def _potential_production(
         aligned_inputs, site_param_table, current_month, month_index,
         pft_id_set, veg_trait_table, prev_sv_reg, pp_reg, month_reg):
@@ -3035,9 +5594,9 @@ def _potential_production(
         valid_mask = (
             (aglivc >= 0.) &
             (pmxbio != _IC_NODATA) &
-            (~numpy.isclose(maxtmp, maxtmp_nodata)) &
+            _valid_mask(maxtmp, maxtmp_nodata) &
             (pmxtmp != _IC_NODATA) &
-            (~numpy.isclose(mintmp, mintmp_nodata)) &
+            _valid_mask(mintmp, mintmp_nodata) &
             (pmntmp != _IC_NODATA))
         bio[valid_mask] = aglivc[valid_mask] * 2.5
         bio[bio > pmxbio] = pmxbio[bio > pmxbio]
@@ -3092,8 +5651,8 @@ def _potential_production(
 
         """
         valid_mask = (
-            (~numpy.isclose(mintmp, mintmp_nodata)) &
-            (~numpy.isclose(maxtmp, maxtmp_nodata)) &
+            _valid_mask(mintmp, mintmp_nodata) &
+            _valid_mask(maxtmp, maxtmp_nodata) &
             (ctemp != _IC_NODATA) &
             (ppdf_1 != _IC_NODATA) &
             (ppdf_2 != _IC_NODATA) &
@@ -3151,8 +5710,8 @@ def _potential_production(
         """
         valid_mask = (
             (pevap != _TARGET_NODATA) &
-            (~numpy.isclose(avh2o_1, _SV_NODATA)) &
-            (~numpy.isclose(precip, precip_nodata)) &
+            _valid_mask(avh2o_1, _SV_NODATA) &
+            _valid_mask(precip, precip_nodata) &
             (wc != _TARGET_NODATA) &
             (pprpts_1 != _IC_NODATA) &
             (pprpts_2 != _IC_NODATA) &
@@ -3203,7 +5762,7 @@ def _potential_production(
 
         """
         valid_mask = (
-            (~numpy.isclose(strucc_1, _SV_NODATA)) &
+            _valid_mask(strucc_1, _SV_NODATA) &
             (pmxbio != _IC_NODATA) &
             (biok5 != _IC_NODATA))
 
@@ -3301,24 +5860,18 @@ def _potential_production(
             'pmxbio', 'pmxtmp', 'pmntmp', 'fwloss_4', 'pprpts_1',
             'pprpts_2', 'pprpts_3']:
         target_path = os.path.join(temp_dir, '{}.tif'.format(val))
-        param_val_dict[val] = target_path
-        site_to_val = dict(
-            [(site_code, float(table[val])) for
-                (site_code, table) in site_param_table.items()])
-        pygeoprocessing.reclassify_raster(
-            (aligned_inputs['site_index'], 1), site_to_val, target_path,
-            gdal.GDT_Float32, _IC_NODATA)
+        param_val_dict[val] = _site_param_raster(
+            aligned_inputs['site_index'], site_param_table, val, target_path)
     # PFT-level parameters
     for val in [
             'ppdf_1', 'ppdf_2', 'ppdf_3', 'ppdf_4', 'biok5', 'prdx_1']:
         for pft_i in do_PFT:
             target_path = os.path.join(
                 temp_dir, '{}_{}.tif'.format(val, pft_i))
-            param_val_dict['{}_{}'.format(val, pft_i)] = target_path
             fill_val = veg_trait_table[pft_i][val]
-            pygeoprocessing.new_raster_from_base(
-                aligned_inputs['site_index'], target_path, gdal.GDT_Float32,
-                [_IC_NODATA], fill_value_list=[fill_val])
+            param_val_dict['{}_{}'.format(val, pft_i)] = (
+                _constant_param_raster(
+                    aligned_inputs['site_index'], fill_val, target_path))
 
     maxtmp_nodata = pygeoprocessing.get_raster_info(
         aligned_inputs['max_temp_{}'.format(current_month)])['nodata'][0]
@@ -3347,11 +5900,11 @@ def _potential_production(
         calc_ctemp, temp_val_dict['ctemp'], gdal.GDT_Float32, _IC_NODATA)
 
     # shwave, shortwave radiation outside the atmosphere
-    _shortwave_radiation(
+    temp_val_dict['shwave'] = _monthly_shortwave_radiation(
         aligned_inputs['site_index'], current_month, temp_val_dict['shwave'])
 
     # pet, reference evapotranspiration modified by fwloss parameter
-    _reference_evapotranspiration(
+    temp_val_dict['pevap'] = _monthly_reference_evapotranspiration(
         aligned_inputs['max_temp_{}'.format(current_month)],
         aligned_inputs['min_temp_{}'.format(current_month)],
         temp_val_dict['shwave'],
@@ -3458,7 +6011,7 @@ def _calc_favail_P(sv_reg, param_val_dict):
 
         """
         valid_mask = (
-            (~numpy.isclose(minerl_1_1, _SV_NODATA)) &
+            _valid_mask(minerl_1_1, _SV_NODATA) &
             (favail_4 != _IC_NODATA) &
             (favail_5 != _IC_NODATA) &
             (favail_6 != _IC_NODATA))
@@ -3584,11 +6137,11 @@ def _calc_available_nutrient(
         """
         valid_mask = (
             (rictrl != _IC_NODATA) &
-            (~numpy.isclose(bglivc, _SV_NODATA)) &
+            _valid_mask(bglivc, _SV_NODATA) &
             (riint != _IC_NODATA) &
             (availm != _TARGET_NODATA) &
             (favail != _IC_NODATA) &
-            (~numpy.isclose(crpstg, _SV_NODATA)))
+            _valid_mask(crpstg, _SV_NODATA))
 
         rimpct = numpy.empty(rictrl.shape, dtype=numpy.float32)
         rimpct[:] = _TARGET_NODATA
@@ -3643,20 +6196,13 @@ def _calc_available_nutrient(
     param_val_dict = {}
     for val in ['rictrl', 'riint']:
         target_path = os.path.join(temp_dir, '{}.tif'.format(val))
-        param_val_dict[val] = target_path
-        site_to_val = dict(
-            [(site_code, float(table[val])) for
-                (site_code, table) in site_param_table.items()])
-        pygeoprocessing.reclassify_raster(
-            (site_index_path, 1), site_to_val, target_path,
-            gdal.GDT_Float32, _IC_NODATA)
+        param_val_dict[val] = _site_param_raster(
+            site_index_path, site_param_table, val, target_path)
     for val in ['snfxmx_1']:
         target_path = os.path.join(temp_dir, '{}.tif'.format(val))
-        param_val_dict[val] = target_path
         fill_val = pft_param_dict[val]
-        pygeoprocessing.new_raster_from_base(
-            site_index_path, target_path, gdal.GDT_Float32,
-            [_IC_NODATA], fill_value_list=[fill_val])
+        param_val_dict[val] = _constant_param_raster(
+            site_index_path, fill_val, target_path)
 
     pygeoprocessing.raster_calculator(
         [(path, 1) for path in [
@@ -3710,61 +6256,66 @@ def _calc_nutrient_demand(
         None
 
     """
-    def nutrient_demand_op(
-            biomass_production, root_fraction, cercrp_min_above,
-            cercrp_min_below):
-        """Calculate nutrient demand.
-
-        Parameters:
-            biomass_production (numpy.ndarray): derived, total biomass
-                production
-            root_fraction (numpy.ndarray): derived, fraction of biomass
-                allocated to roots
-            cercrp_min_above (numpy.ndarray): derived, minimum carbon to
-                nutrient ratio of new aboveground live material
-            cercrp_min_below (numpy.ndarray): derived, minimum carbon to
-                nutrient ratio of new belowground live material
-
-        Returns:
-            demand_e, nutrient demand
-
-        """
-        valid_mask = (
-            (biomass_production != _TARGET_NODATA) &
-            (root_fraction != _TARGET_NODATA) &
-            (cercrp_min_above != _TARGET_NODATA) &
-            (cercrp_min_above > 0) &
-            (cercrp_min_below > 0) &
-            (cercrp_min_below != _TARGET_NODATA))
-
-        demand_above = numpy.empty(root_fraction.shape, dtype=numpy.float32)
-        demand_above[:] = _TARGET_NODATA
-        demand_above[valid_mask] = (
-            ((biomass_production[valid_mask] *
-                (1. - root_fraction[valid_mask])) / 2.5) *
-            (1. / cercrp_min_above[valid_mask]))
-
-        demand_below = numpy.empty(root_fraction.shape, dtype=numpy.float32)
-        demand_below[:] = _TARGET_NODATA
-        demand_below[valid_mask] = (
-            ((biomass_production[valid_mask] *
-                (root_fraction[valid_mask])) / 2.5) *
-            (1. / cercrp_min_below[valid_mask]))
-
-        demand_e = numpy.empty(root_fraction.shape, dtype=numpy.float32)
-        demand_e[:] = _TARGET_NODATA
-        demand_e[valid_mask] = (
-            demand_above[valid_mask] + demand_below[valid_mask])
-        return demand_e
-
     pygeoprocessing.raster_calculator(
         [(path, 1) for path in [
             biomass_production_path, fraction_allocated_to_roots_path,
             cercrp_min_above_path, cercrp_min_below_path]],
-        nutrient_demand_op, demand_path,
+        calc_nutrient_demand, demand_path,
         gdal.GDT_Float32, _TARGET_NODATA)
 
 
+def calc_nutrient_demand(
+        biomass_production, root_fraction, cercrp_min_above,
+        cercrp_min_below):
+    """Calculate nutrient demand.
+
+    The calculation is element-wise, so that demand of several plant
+    functional types and nutrients may be calculated at once from arrays
+    stacked by `stacked_raster_calculator`.
+
+    Parameters:
+        biomass_production (numpy.ndarray): derived, total biomass
+            production
+        root_fraction (numpy.ndarray): derived, fraction of biomass
+            allocated to roots
+        cercrp_min_above (numpy.ndarray): derived, minimum carbon to
+            nutrient ratio of new aboveground live material
+        cercrp_min_below (numpy.ndarray): derived, minimum carbon to
+            nutrient ratio of new belowground live material
+
+    Returns:
+        demand_e, nutrient demand
+
+    """
+    valid_mask = (
+        (biomass_production != _TARGET_NODATA) &
+        (root_fraction != _TARGET_NODATA) &
+        (cercrp_min_above != _TARGET_NODATA) &
+        (cercrp_min_above > 0) &
+        (cercrp_min_below > 0) &
+        (cercrp_min_below != _TARGET_NODATA))
+
+    demand_above = numpy.empty(root_fraction.shape, dtype=numpy.float32)
+    demand_above[:] = _TARGET_NODATA
+    demand_above[valid_mask] = (
+        ((biomass_production[valid_mask] *
+            (1. - root_fraction[valid_mask])) / 2.5) *
+        (1. / cercrp_min_above[valid_mask]))
+
+    demand_below = numpy.empty(root_fraction.shape, dtype=numpy.float32)
+    demand_below[:] = _TARGET_NODATA
+    demand_below[valid_mask] = (
+        ((biomass_production[valid_mask] *
+            (root_fraction[valid_mask])) / 2.5) *
+        (1. / cercrp_min_below[valid_mask]))
+
+    demand_e = numpy.empty(root_fraction.shape, dtype=numpy.float32)
+    demand_e[:] = _TARGET_NODATA
+    demand_e[valid_mask] = (
+        demand_above[valid_mask] + demand_below[valid_mask])
+    return demand_e
+
+
 def calc_provisional_fracrc(
         annual_precip, frtcindx, bgppa, bgppb, agppa, agppb,
         cfrtcw_1, cfrtcw_2, cfrtcn_1, cfrtcn_2):
@@ -3909,7 +6460,7 @@ def calc_ce_ratios(
         valid_mask = (
             (pra_1 != _IC_NODATA) &
             (pra_2 != _IC_NODATA) &
-            (~numpy.isclose(aglivc, _SV_NODATA)) &
+            _valid_mask(aglivc, _SV_NODATA) &
             (biomax != _IC_NODATA))
 
         cercrp_above = numpy.empty(pra_1.shape, dtype=numpy.float32)
@@ -4442,6 +6993,9 @@ def _root_shoot_ratio(
             calculated values that are shared between submodels
 
     Side effects:
+        creates the raster indicated by `month_reg['fracrc_<PFT>']`, fraction
+            of carbon production allocated to roots prior to effects of
+            grazing, for each plant functional type (PFT)
         creates the raster indicated by
             `month_reg['tgprod_<PFT>']`, total potential production (g biomass)
             for each plant functional type (PFT)
@@ -4469,7 +7023,7 @@ def _root_shoot_ratio(
     temp_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
     temp_val_dict = {}
     for pft_i in do_PFT:
-        for val in ['fracrc_p', 'fracrc', 'availm']:
+        for val in ['fracrc_p', 'availm']:
             temp_val_dict['{}_{}'.format(val, pft_i)] = os.path.join(
                 temp_dir, '{}_{}.tif'.format(val, pft_i))
         for iel in [1, 2]:
@@ -4485,26 +7039,19 @@ def _root_shoot_ratio(
             'bgppa', 'bgppb', 'agppa', 'agppb', 'favail_1', 'favail_4',
             'favail_5', 'favail_6']:
         target_path = os.path.join(temp_dir, '{}.tif'.format(val))
-        param_val_dict[val] = target_path
-        site_to_val = dict(
-            [(site_code, float(table[val])) for
-                (site_code, table) in site_param_table.items()])
-        pygeoprocessing.reclassify_raster(
-            (aligned_inputs['site_index'], 1), site_to_val, target_path,
-            gdal.GDT_Float32, _IC_NODATA)
+        param_val_dict[val] = _site_param_raster(
+            aligned_inputs['site_index'], site_param_table, val, target_path)
     # PFT-level parameters
     for pft_i in do_PFT:
         for val in [
                 'frtcindx', 'cfrtcw_1', 'cfrtcw_2', 'cfrtcn_1', 'cfrtcn_2',
-                'biomax', 'cfrtcw_1', 'cfrtcw_2', 'cfrtcn_1', 'cfrtcn_2',
-                'grzeff', 'gremb']:
+                'biomax']:
             target_path = os.path.join(
                 temp_dir, '{}_{}.tif'.format(val, pft_i))
-            param_val_dict['{}_{}'.format(val, pft_i)] = target_path
             fill_val = veg_trait_table[pft_i][val]
-            pygeoprocessing.new_raster_from_base(
-                aligned_inputs['site_index'], target_path, gdal.GDT_Float32,
-                [_IC_NODATA], fill_value_list=[fill_val])
+            param_val_dict['{}_{}'.format(val, pft_i)] = (
+                _constant_param_raster(
+                    aligned_inputs['site_index'], fill_val, target_path))
         for val in [
                 'pramn_1_1', 'pramn_1_2', 'pramx_1_1', 'pramx_1_2',
                 'prbmn_1_1', 'prbmn_1_2', 'prbmx_1_1', 'prbmx_1_2',
@@ -4512,12 +7059,10 @@ def _root_shoot_ratio(
                 'prbmn_2_1', 'prbmn_2_2', 'prbmx_2_1', 'prbmx_2_2']:
             target_path = os.path.join(
                 temp_dir, '{}_{}.tif'.format(val, pft_i))
-            param_val_dict[
-                '{}_{}'.format(val, pft_i)] = target_path
             fill_val = veg_trait_table[pft_i][val]
-            pygeoprocessing.new_raster_from_base(
-                aligned_inputs['site_index'], target_path,
-                gdal.GDT_Float32, [_IC_NODATA], fill_value_list=[fill_val])
+            param_val_dict['{}_{}'.format(val, pft_i)] = (
+                _constant_param_raster(
+                    aligned_inputs['site_index'], fill_val, target_path))
 
     # the parameter favail_2 must be calculated from current mineral N in
     # surface layer
@@ -4566,13 +7111,25 @@ def _root_shoot_ratio(
                 param_val_dict['favail_{}'.format(iel)],
                 month_reg['tgprod_pot_prod_{}'.format(pft_i)],
                 temp_val_dict['eavail_{}_{}'.format(iel, pft_i)])
-            # demand_iel, demand for the nutrient
-            _calc_nutrient_demand(
-                month_reg['tgprod_pot_prod_{}'.format(pft_i)],
-                temp_val_dict['fracrc_p_{}'.format(pft_i)],
-                month_reg['cercrp_min_above_{}_{}'.format(iel, pft_i)],
-                month_reg['cercrp_min_below_{}_{}'.format(iel, pft_i)],
-                temp_val_dict['demand_{}_{}'.format(iel, pft_i)])
+
+    # demand_iel, demand for each nutrient by each PFT, in one pass
+    demand_key_list = [
+        (iel, pft_i) for iel in [1, 2] for pft_i in sorted(do_PFT)]
+    stacked_raster_calculator(
+        [[month_reg['tgprod_pot_prod_{}'.format(pft_i)] for
+          iel, pft_i in demand_key_list],
+         [temp_val_dict['fracrc_p_{}'.format(pft_i)] for
+          iel, pft_i in demand_key_list],
+         [month_reg['cercrp_min_above_{}_{}'.format(iel, pft_i)] for
+          iel, pft_i in demand_key_list],
+         [month_reg['cercrp_min_below_{}_{}'.format(iel, pft_i)] for
+          iel, pft_i in demand_key_list]],
+        lambda *stack_list: [calc_nutrient_demand(*stack_list)],
+        [[temp_val_dict['demand_{}_{}'.format(iel, pft_i)] for
+          iel, pft_i in demand_key_list]],
+        [_TARGET_NODATA])
+
+    for pft_i in do_PFT:
         # revised fraction of carbon allocated to roots
         calc_revised_fracrc(
             param_val_dict['frtcindx_{}'.format(pft_i)],
@@ -4586,12 +7143,78 @@ def _root_shoot_ratio(
             param_val_dict['cfrtcw_2_{}'.format(pft_i)],
             param_val_dict['cfrtcn_1_{}'.format(pft_i)],
             param_val_dict['cfrtcn_2_{}'.format(pft_i)],
-            temp_val_dict['fracrc_{}'.format(pft_i)])
-        # final potential production and root:shoot ratio accounting for
-        # impacts of grazing
+            month_reg['fracrc_{}'.format(pft_i)])
+
+    # final potential production and root:shoot ratio accounting for
+    # impacts of grazing
+    _grazing_effect_on_production(
+        aligned_inputs, current_month, pft_id_set, veg_trait_table,
+        month_reg)
+
+    # clean up temporary files
+    shutil.rmtree(temp_dir)
+
+
+def _grazing_effect_on_production(
+        aligned_inputs, current_month, pft_id_set, veg_trait_table,
+        month_reg):
+    """Apply the impact of defoliation to potential production.
+
+    Final potential production and root:shoot ratio are calculated from
+    potential production and allocation to roots prior to effects of
+    grazing, which are not affected by grazing in the current month and are
+    calculated by `_potential_production` and `_root_shoot_ratio`, and from
+    the fraction of live biomass removed by herbivores. Only this step must
+    be repeated once grazing offtake is known.
+
+    Parameters:
+        aligned_inputs (dict): map of key, path pairs indicating paths
+            to aligned model inputs, including the site spatial index raster
+        current_month (int): month of the year, such that current_month=1
+            indicates January
+        pft_id_set (set): set of integers identifying plant functional types
+        veg_trait_table (dict): map of pft id to dictionaries containing
+            plant functional type parameters
+        month_reg (dict): map of key, path pairs giving paths to intermediate
+            calculated values that are shared between submodels
+
+    Side effects:
+        creates the raster indicated by
+            `month_reg['tgprod_<PFT>']`, total potential production (g biomass)
+            for each plant functional type (PFT)
+        creates the raster indicated by `month_reg['rtsh_<PFT>']` for each
+            plant functional type (PFT)
+
+    Returns:
+        None
+
+    """
+    do_PFT = []
+    for pft_i in pft_id_set:
+        # growth occurs in growth months and when senescence not scheduled
+        do_growth = (
+            current_month != veg_trait_table[pft_i]['senescence_month'] and
+            str(current_month) in veg_trait_table[pft_i]['growth_months'])
+        if do_growth:
+            do_PFT.append(pft_i)
+    if not do_PFT:
+        return
+
+    temp_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
+    param_val_dict = {}
+    for pft_i in do_PFT:
+        for val in ['grzeff', 'gremb']:
+            target_path = os.path.join(
+                temp_dir, '{}_{}.tif'.format(val, pft_i))
+            fill_val = veg_trait_table[pft_i][val]
+            param_val_dict['{}_{}'.format(val, pft_i)] = (
+                _constant_param_raster(
+                    aligned_inputs['site_index'], fill_val, target_path))
+
+    for pft_i in do_PFT:
         calc_final_tgprod_rtsh(
             month_reg['tgprod_pot_prod_{}'.format(pft_i)],
-            temp_val_dict['fracrc_{}'.format(pft_i)],
+            month_reg['fracrc_{}'.format(pft_i)],
             month_reg['flgrem_{}'.format(pft_i)],
             param_val_dict['grzeff_{}'.format(pft_i)],
             param_val_dict['gremb_{}'.format(pft_i)],
@@ -4656,9 +7279,10 @@ def _snow(
         evapotranspiration energy, and liquid draining into soil from snow.
 
         Parameters:
-            return_type (string): flag indicating whether modified snowpack,
-                modified liquid in snow, modified potential evapotranspiration,
-                or soil moisture inputs after snow should be returned
+            return_type (string or list): flag indicating whether modified
+                snowpack, modified liquid in snow, modified potential
+                evapotranspiration, or soil moisture inputs after snow should
+                be returned, or a list of such flags
 
         Returns:
             the function `_calc_snow_moisture`
@@ -4697,9 +7321,9 @@ def _snow(
             """
             valid_mask = (
                 (tave != _IC_NODATA) &
-                (~numpy.isclose(precip, precip_nodata)) &
-                (~numpy.isclose(snow, _SV_NODATA)) &
-                (~numpy.isclose(snlq, _SV_NODATA)) &
+                _valid_mask(precip, precip_nodata) &
+                _valid_mask(snow, _SV_NODATA) &
+                _valid_mask(snlq, _SV_NODATA) &
                 (pet != _TARGET_NODATA) &
                 (tmelt_1 != _IC_NODATA) &
                 (tmelt_2 != _IC_NODATA) &
@@ -4761,16 +7385,12 @@ def _snow(
             snlq_revised[drain_mask] = (
                 snlq_revised[drain_mask] - inputs_after_snow[drain_mask])
 
-            if return_type == 'snowmelt':
-                return snowmelt
-            elif return_type == 'snow':
-                return snow_revised
-            elif return_type == 'snlq':
-                return snlq_revised
-            elif return_type == 'pet':
-                return pet_revised
-            else:
-                return inputs_after_snow
+            return _select_outputs(return_type, {
+                'snowmelt': snowmelt,
+                'snow': snow_revised,
+                'snlq': snlq_revised,
+                'pet': pet_revised,
+                'inputs_after_snow': inputs_after_snow})
         return _calc_snow_moisture
 
     temp_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
@@ -4780,13 +7400,8 @@ def _snow(
     param_val_dict = {}
     for val in ['tmelt_1', 'tmelt_2', 'fwloss_4']:
         target_path = os.path.join(temp_dir, '{}.tif'.format(val))
-        param_val_dict[val] = target_path
-        site_to_val = dict(
-            [(site_code, float(table[val])) for (
-                site_code, table) in site_param_table.items()])
-        pygeoprocessing.reclassify_raster(
-            (site_index_path, 1), site_to_val, target_path, gdal.GDT_Float32,
-            _IC_NODATA)
+        param_val_dict[val] = _site_param_raster(
+            site_index_path, site_param_table, val, target_path)
 
     max_temp_nodata = pygeoprocessing.get_raster_info(
         max_temp_path)['nodata'][0]
@@ -4796,62 +7411,26 @@ def _snow(
         precip_path)['nodata'][0]
 
     # solar radiation outside the atmosphere
-    _shortwave_radiation(precip_path, current_month, temp_val_dict['shwave'])
+    temp_val_dict['shwave'] = _monthly_shortwave_radiation(
+        precip_path, current_month, temp_val_dict['shwave'])
 
     # pet, reference evapotranspiration modified by fwloss parameter
-    _reference_evapotranspiration(
+    temp_val_dict['pet'] = _monthly_reference_evapotranspiration(
         max_temp_path, min_temp_path, temp_val_dict['shwave'],
         param_val_dict['fwloss_4'], temp_val_dict['pet'])
 
-    # calculate snowmelt
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            tave_path, precip_path, prev_snow_path,
-            prev_snlq_path, temp_val_dict['pet'],
-            param_val_dict['tmelt_1'], param_val_dict['tmelt_2'],
-            temp_val_dict['shwave']]],
-        calc_snow_moisture('snowmelt'), snowmelt_path,
-        gdal.GDT_Float32, _TARGET_NODATA)
-
-    # calculate change in snow
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            tave_path, precip_path, prev_snow_path,
-            prev_snlq_path, temp_val_dict['pet'],
-            param_val_dict['tmelt_1'], param_val_dict['tmelt_2'],
-            temp_val_dict['shwave']]],
-        calc_snow_moisture("snow"), snow_path,
-        gdal.GDT_Float32, _TARGET_NODATA)
-
-    # calculate change in liquid in snow
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            tave_path, precip_path, prev_snow_path,
-            prev_snlq_path, temp_val_dict['pet'],
-            param_val_dict['tmelt_1'], param_val_dict['tmelt_2'],
-            temp_val_dict['shwave']]],
-        calc_snow_moisture("snlq"), snlq_path,
-        gdal.GDT_Float32, _TARGET_NODATA)
-
-    # calculate change in potential evapotranspiration energy
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            tave_path, precip_path, prev_snow_path,
-            prev_snlq_path, temp_val_dict['pet'],
-            param_val_dict['tmelt_1'], param_val_dict['tmelt_2'],
-            temp_val_dict['shwave']]],
-        calc_snow_moisture("pet"), pet_rem_path,
-        gdal.GDT_Float32, _TARGET_NODATA)
-
-    # calculate soil moisture inputs draining from snow after snowmelt
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            tave_path, precip_path, prev_snow_path,
-            prev_snlq_path, temp_val_dict['pet'],
-            param_val_dict['tmelt_1'], param_val_dict['tmelt_2'],
-            temp_val_dict['shwave']]],
-        calc_snow_moisture("inputs_after_snow"), inputs_after_snow_path,
-        gdal.GDT_Float32, _TARGET_NODATA)
+    # calculate snowmelt, change in snow, change in liquid in snow, change
+    # in potential evapotranspiration energy, and soil moisture inputs
+    # draining from snow after snowmelt
+    multi_raster_calculator(
+        [tave_path, precip_path, prev_snow_path, prev_snlq_path,
+         temp_val_dict['pet'], param_val_dict['tmelt_1'],
+         param_val_dict['tmelt_2'], temp_val_dict['shwave']],
+        calc_snow_moisture(
+            ['snowmelt', 'snow', 'snlq', 'pet', 'inputs_after_snow']),
+        [snowmelt_path, snow_path, snlq_path, pet_rem_path,
+         inputs_after_snow_path],
+        [_TARGET_NODATA] * 5)
 
     # clean up temporary files
     shutil.rmtree(temp_dir)
@@ -4923,9 +7502,9 @@ def subtract_surface_losses(return_type):
     and bare soil evaporation.
 
     Parameters:
-        return_type (string): flag indicating whether soil moisture inputs
-            after surface losses or total surface evaporation should be
-            returned
+        return_type (string or list): flag indicating whether soil moisture
+            inputs after surface losses or total surface evaporation should
+            be returned, or a list of such flags
 
     Returns:
         the function `_subtract_surface_losses`
@@ -5022,12 +7601,10 @@ def subtract_surface_losses(return_type):
         inputs_after_surface[evap_mask] = (
             inputs_after_runoff[evap_mask] - evap_losses[evap_mask])
 
-        if return_type == 'inputs_after_surface':
-            return inputs_after_surface
-        elif return_type == 'absevap':
-            return absevap
-        elif return_type == 'evap_losses':
-            return evap_losses
+        return _select_outputs(return_type, {
+            'inputs_after_surface': inputs_after_surface,
+            'absevap': absevap,
+            'evap_losses': evap_losses})
     return _subtract_surface_losses
 
 
@@ -5040,9 +7617,10 @@ def calc_potential_transpiration(return_type):
     at this step.
 
     Parameters:
-        return_type (string): flag indicating whether potential transpiration,
-            potential evaporation from soil layer 1, or modified moisture
-            inputs should be returned
+        return_type (string or list): flag indicating whether potential
+            transpiration, potential evaporation from soil layer 1, or
+            modified moisture inputs should be returned, or a list of such
+            flags
 
     Returns:
         the function `_calc_potential_transpiration`
@@ -5117,12 +7695,10 @@ def calc_potential_transpiration(return_type):
         modified_moisture_inputs[valid_mask] = (
             current_moisture_inputs[valid_mask] - tran[valid_mask])
 
-        if return_type == 'trap':
-            return trap
-        elif return_type == 'pevp':
-            return pevp
-        elif return_type == 'modified_moisture_inputs':
-            return modified_moisture_inputs
+        return _select_outputs(return_type, {
+            'trap': trap,
+            'pevp': pevp,
+            'modified_moisture_inputs': modified_moisture_inputs})
     return _calc_potential_transpiration
 
 
@@ -5164,7 +7740,7 @@ def distribute_water_to_soil_layer(return_type):
         valid_mask = (
             (adep != _IC_NODATA) &
             (afiel != _TARGET_NODATA) &
-            (~numpy.isclose(asmos, _SV_NODATA)) &
+            _valid_mask(asmos, _SV_NODATA) &
             (current_moisture_inputs != _TARGET_NODATA))
 
         afl = numpy.empty(adep.shape, dtype=numpy.float32)
@@ -5190,10 +7766,9 @@ def distribute_water_to_soil_layer(return_type):
         notexceeded_mask = (valid_mask & (asmos_interm <= afl))
         amov[notexceeded_mask] = 0.
 
-        if return_type == 'asmos_revised':
-            return asmos_revised
-        elif return_type == 'amov':
-            return amov
+        return _select_outputs(return_type, {
+            'asmos_revised': asmos_revised,
+            'amov': amov})
     return _distribute_water
 
 
@@ -5257,9 +7832,10 @@ def remove_transpiration(return_type):
     this soil layer. Lines 218-294, H2olos.f
 
     Parameters:
-        return_type (string): flag indicating whether avinj (water in this soil
-            layer available to plants for growth) or asmos (total water in this
-            soil layer) should be returned
+        return_type (string or list): flag indicating whether avinj (water
+            in this soil layer available to plants for growth) or asmos (total
+            water in this soil layer) should be returned, or a list of such
+            flags
 
     Returns:
         the function `_remove_transpiration`
@@ -5314,10 +7890,9 @@ def remove_transpiration(return_type):
         asmos_revised[valid_mask] = (
             asmos[valid_mask] - transpiration_loss[valid_mask])
 
-        if return_type == 'avinj':
-            return avinj
-        elif return_type == 'asmos':
-            return asmos_revised
+        return _select_outputs(return_type, {
+            'avinj': avinj,
+            'asmos': asmos_revised})
     return _remove_transpiration
 
 
@@ -5451,8 +8026,8 @@ def _soil_water(
     def calc_avg_temp(max_temp, min_temp):
         """Calculate average temperature from maximum and minimum temp."""
         valid_mask = (
-            (~numpy.isclose(max_temp, max_temp_nodata)) &
-            (~numpy.isclose(min_temp, min_temp_nodata)))
+            _valid_mask(max_temp, max_temp_nodata) &
+            _valid_mask(min_temp, min_temp_nodata))
         tave = numpy.empty(max_temp.shape, dtype=numpy.float32)
         tave[:] = _IC_NODATA
         tave[valid_mask] = (max_temp[valid_mask] + min_temp[valid_mask]) / 2.
@@ -5461,8 +8036,8 @@ def _soil_water(
     def calc_surface_litter_biomass(strucc_1, metabc_1):
         """Calculate biomass in surface litter."""
         valid_mask = (
-            (~numpy.isclose(strucc_1, _SV_NODATA)) &
-            (~numpy.isclose(metabc_1, _SV_NODATA)))
+            _valid_mask(strucc_1, _SV_NODATA) &
+            _valid_mask(metabc_1, _SV_NODATA))
         alit = numpy.empty(strucc_1.shape, dtype=numpy.float32)
         alit[:] = _TARGET_NODATA
         alit[valid_mask] = (strucc_1[valid_mask] + metabc_1[valid_mask]) * 2.5
@@ -5484,10 +8059,10 @@ def _soil_water(
     temp_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
     temp_val_dict = {}
     for val in [
-            'tave', 'current_moisture_inputs', 'modified_moisture_inputs',
-            'pet_rem', 'alit', 'sum_aglivc', 'sum_stdedc', 'sum_tgprod',
-            'aliv', 'sd', 'absevap', 'evap_losses', 'trap', 'trap_revised',
-            'pevp', 'tot', 'tot2', 'rwcf_1', 'evlos', 'avinj_interim_1']:
+            'tave', 'modified_moisture_inputs', 'pet_rem', 'alit',
+            'sum_aglivc', 'sum_stdedc', 'sum_tgprod', 'aliv', 'sd',
+            'absevap', 'evap_losses', 'trap', 'trap_revised', 'pevp', 'tot',
+            'tot2', 'rwcf_1', 'evlos', 'avinj_interim_1']:
         temp_val_dict[val] = os.path.join(temp_dir, '{}.tif'.format(val))
     # temporary intermediate values for each layer accessible by plants
     for val in ['avw', 'awwt', 'avinj']:
@@ -5502,40 +8077,27 @@ def _soil_water(
             temp_dir, '{}.tif'.format(val_lyr))
     # PFT-level temporary calculated values
     for pft_i in pft_id_set:
-        for val in ['tgprod_weighted', 'sum_avinj']:
+        for val in ['sum_avinj']:
             temp_val_dict['{}_{}'.format(val, pft_i)] = os.path.join(
                 temp_dir, '{}_{}.tif'.format(val, pft_i))
 
     param_val_dict = {}
     for val in ['fracro', 'precro', 'fwloss_1', 'fwloss_2']:
         target_path = os.path.join(temp_dir, '{}.tif'.format(val))
-        param_val_dict[val] = target_path
-        site_to_val = dict(
-            [(site_code, float(table[val])) for
-                (site_code, table) in site_param_table.items()])
-        pygeoprocessing.reclassify_raster(
-            (aligned_inputs['site_index'], 1), site_to_val, target_path,
-            gdal.GDT_Float32, _IC_NODATA)
+        param_val_dict[val] = _site_param_raster(
+            aligned_inputs['site_index'], site_param_table, val, target_path)
     for lyr in range(1, nlaypg_max + 1):
         val_lyr = 'awtl_{}'.format(lyr)
         target_path = os.path.join(temp_dir, '{}.tif'.format(val_lyr))
-        param_val_dict[val_lyr] = target_path
-        site_to_val = dict(
-            [(site_code, float(table[val_lyr])) for
-                (site_code, table) in site_param_table.items()])
-        pygeoprocessing.reclassify_raster(
-            (aligned_inputs['site_index'], 1), site_to_val, target_path,
-            gdal.GDT_Float32, _IC_NODATA)
+        param_val_dict[val_lyr] = _site_param_raster(
+            aligned_inputs['site_index'], site_param_table, val_lyr,
+            target_path)
     for lyr in range(1, nlayer_max + 1):
         val_lyr = 'adep_{}'.format(lyr)
         target_path = os.path.join(temp_dir, '{}.tif'.format(val_lyr))
-        param_val_dict[val_lyr] = target_path
-        site_to_val = dict(
-            [(site_code, float(table[val_lyr])) for
-                (site_code, table) in site_param_table.items()])
-        pygeoprocessing.reclassify_raster(
-            (aligned_inputs['site_index'], 1), site_to_val, target_path,
-            gdal.GDT_Float32, _IC_NODATA)
+        param_val_dict[val_lyr] = _site_param_raster(
+            aligned_inputs['site_index'], site_param_table, val_lyr,
+            target_path)
 
     # calculate canopy and litter cover that influence moisture inputs
     # calculate biomass in surface litter
@@ -5553,24 +8115,19 @@ def _soil_water(
             sv, prev_sv_reg, aligned_inputs, pft_id_set, weighted_sum_path)
 
     # calculate the weighted sum of tgprod, potential production, across PFTs
-    weighted_path_list = []
-    for pft_i in pft_id_set:
+    do_PFT = []
+    for pft_i in sorted(pft_id_set):
         do_growth = (
             current_month != veg_trait_table[pft_i]['senescence_month'] and
             str(current_month) in veg_trait_table[pft_i]['growth_months'])
         if do_growth:
-            target_path = temp_val_dict['tgprod_weighted_{}'.format(pft_i)]
-            pft_nodata = pygeoprocessing.get_raster_info(
-                aligned_inputs['pft_{}'.format(pft_i)])['nodata'][0]
-            raster_multiplication(
-                month_reg['tgprod_{}'.format(pft_i)], _TARGET_NODATA,
-                aligned_inputs['pft_{}'.format(pft_i)], pft_nodata,
-                target_path, _TARGET_NODATA)
-            weighted_path_list.append(target_path)
-    if weighted_path_list:
-        raster_list_sum(
-            weighted_path_list, _TARGET_NODATA,
-            temp_val_dict['sum_tgprod'], _TARGET_NODATA, nodata_remove=True)
+            do_PFT.append(pft_i)
+    if do_PFT:
+        weighted_raster_list_sum(
+            [month_reg['tgprod_{}'.format(pft_i)] for pft_i in do_PFT],
+            _TARGET_NODATA,
+            [aligned_inputs['pft_{}'.format(pft_i)] for pft_i in do_PFT],
+            temp_val_dict['sum_tgprod'], _TARGET_NODATA)
     else:  # no potential production occurs this month, so tgprod = 0
         pygeoprocessing.new_raster_from_base(
             temp_val_dict['sum_aglivc'], temp_val_dict['sum_tgprod'],
@@ -5609,225 +8166,173 @@ def _soil_water(
         sv_reg['snlq_path'], temp_val_dict['modified_moisture_inputs'],
         temp_val_dict['pet_rem'])
 
-    # remove runoff and surface evaporation from moisture inputs
-    shutil.copyfile(
-        temp_val_dict['modified_moisture_inputs'],
-        temp_val_dict['current_moisture_inputs'])
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            temp_val_dict['current_moisture_inputs'],
-            param_val_dict['fracro'], param_val_dict['precro'],
-            sv_reg['snow_path'], temp_val_dict['alit'],
-            temp_val_dict['sd'], param_val_dict['fwloss_1'],
-            param_val_dict['fwloss_2'], temp_val_dict['pet_rem']]],
-        subtract_surface_losses('inputs_after_surface'),
-        temp_val_dict['modified_moisture_inputs'],
-        gdal.GDT_Float32, _TARGET_NODATA)
-
-    # calculate bare soil evaporation
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            temp_val_dict['current_moisture_inputs'],
-            param_val_dict['fracro'], param_val_dict['precro'],
-            sv_reg['snow_path'], temp_val_dict['alit'],
-            temp_val_dict['sd'], param_val_dict['fwloss_1'],
-            param_val_dict['fwloss_2'], temp_val_dict['pet_rem']]],
-        subtract_surface_losses('absevap'),
-        temp_val_dict['absevap'],
-        gdal.GDT_Float32, _TARGET_NODATA)
-
-    # calculate total losses to surface evaporation
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            temp_val_dict['current_moisture_inputs'],
-            param_val_dict['fracro'], param_val_dict['precro'],
-            sv_reg['snow_path'], temp_val_dict['alit'],
-            temp_val_dict['sd'], param_val_dict['fwloss_1'],
-            param_val_dict['fwloss_2'], temp_val_dict['pet_rem']]],
-        subtract_surface_losses('evap_losses'),
-        temp_val_dict['evap_losses'],
-        gdal.GDT_Float32, _TARGET_NODATA)
-
-    # remove losses due to initial transpiration from water inputs
-    shutil.copyfile(
-        temp_val_dict['modified_moisture_inputs'],
-        temp_val_dict['current_moisture_inputs'])
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            temp_val_dict['pet_rem'], temp_val_dict['evap_losses'],
-            temp_val_dict['tave'], temp_val_dict['aliv'],
-            temp_val_dict['current_moisture_inputs']]],
-        calc_potential_transpiration('modified_moisture_inputs'),
-        temp_val_dict['modified_moisture_inputs'],
-        gdal.GDT_Float32, _TARGET_NODATA)
-
-    # calculate potential transpiration
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            temp_val_dict['pet_rem'], temp_val_dict['evap_losses'],
-            temp_val_dict['tave'], temp_val_dict['aliv'],
-            temp_val_dict['current_moisture_inputs']]],
-        calc_potential_transpiration('trap'), temp_val_dict['trap'],
-        gdal.GDT_Float32, _TARGET_NODATA)
+    # remove runoff and surface evaporation from moisture inputs, and
+    # calculate bare soil evaporation and total losses to surface evaporation
+    multi_raster_calculator(
+        [temp_val_dict['modified_moisture_inputs'],
+         param_val_dict['fracro'], param_val_dict['precro'],
+         sv_reg['snow_path'], temp_val_dict['alit'], temp_val_dict['sd'],
+         param_val_dict['fwloss_1'], param_val_dict['fwloss_2'],
+         temp_val_dict['pet_rem']],
+        subtract_surface_losses(
+            ['inputs_after_surface', 'absevap', 'evap_losses']),
+        [temp_val_dict['modified_moisture_inputs'], temp_val_dict['absevap'],
+         temp_val_dict['evap_losses']],
+        [_TARGET_NODATA] * 3)
+
+    # remove losses due to initial transpiration from water inputs, and
+    # calculate potential transpiration and potential evaporation from top
+    # soil layer
+    multi_raster_calculator(
+        [temp_val_dict['pet_rem'], temp_val_dict['evap_losses'],
+         temp_val_dict['tave'], temp_val_dict['aliv'],
+         temp_val_dict['modified_moisture_inputs']],
+        calc_potential_transpiration(
+            ['modified_moisture_inputs', 'trap', 'pevp']),
+        [temp_val_dict['modified_moisture_inputs'], temp_val_dict['trap'],
+         temp_val_dict['pevp']],
+        [_TARGET_NODATA] * 3)
+
+    pft_id_list = sorted(pft_id_set)
+    pft_nodata_list = [
+        pygeoprocessing.get_raster_info(
+            aligned_inputs['pft_{}'.format(pft_i)])['nodata'][0] for
+        pft_i in pft_id_list]
+    nlaypg_list = [
+        int(veg_trait_table[pft_i]['nlaypg']) for pft_i in pft_id_list]
+
+    def soil_water_cascade(
+            moisture_inputs, trap, pevp, absevap, *layer_list):
+        """Move water down through soil layers and remove transpiration.
+
+        Layers are processed in order from the surface, so that water in
+        excess of field capacity of one layer flows into the next in the same
+        step.
 
-    # calculate potential evaporation from top soil layer
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            temp_val_dict['pet_rem'], temp_val_dict['evap_losses'],
-            temp_val_dict['tave'], temp_val_dict['aliv'],
-            temp_val_dict['current_moisture_inputs']]],
-        calc_potential_transpiration('pevp'), temp_val_dict['pevp'],
-        gdal.GDT_Float32, _TARGET_NODATA)
+        Parameters:
+            moisture_inputs (numpy.ndarray): derived, moisture inputs after
+                surface losses and initial transpiration
+            trap (numpy.ndarray): derived, potential transpiration
+            pevp (numpy.ndarray): derived, potential evaporation from soil
+                layer 1
+            absevap (numpy.ndarray): derived, bare soil evaporation
+            layer_list (list): depth of each soil layer, followed by field
+                capacity of each soil layer, soil moisture of each soil
+                layer, wilting point of each layer accessible by plants,
+                transpiration depth weight of each layer accessible by
+                plants, and fractional cover of each PFT
 
-    # distribute water to each layer
-    for lyr in range(1, nlayer_max + 1):
-        shutil.copyfile(
-            temp_val_dict['modified_moisture_inputs'],
-            temp_val_dict['current_moisture_inputs'])
-        # revise moisture content of this soil layer
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                param_val_dict['adep_{}'.format(lyr)],
-                pp_reg['afiel_{}_path'.format(lyr)],
-                prev_sv_reg['asmos_{}_path'.format(lyr)],
-                temp_val_dict['current_moisture_inputs']]],
-            distribute_water_to_soil_layer('asmos_revised'),
-            temp_val_dict['asmos_interim_{}'.format(lyr)],
-            gdal.GDT_Float32, _TARGET_NODATA)
-        # calculate soil moisture moving to next layer
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                param_val_dict['adep_{}'.format(lyr)],
-                pp_reg['afiel_{}_path'.format(lyr)],
-                prev_sv_reg['asmos_{}_path'.format(lyr)],
-                temp_val_dict['current_moisture_inputs']]],
-            distribute_water_to_soil_layer('amov'),
-            temp_val_dict['modified_moisture_inputs'],
-            gdal.GDT_Float32, _TARGET_NODATA)
-        # amov, water moving to next layer, persists between submodels
-        shutil.copyfile(
-            temp_val_dict['modified_moisture_inputs'],
-            month_reg['amov_{}'.format(lyr)])
+        Returns:
+            list of saturated flow of water from each soil layer, followed by
+                soil moisture of each soil layer, soil moisture available for
+                growth to each PFT, and available water in the top two soil
+                layers
 
-    # calculate available water for transpiration
-    avw_list = []
-    for lyr in range(1, nlaypg_max + 1):
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                temp_val_dict['asmos_interim_{}'.format(lyr)],
-                pp_reg['awilt_{}_path'.format(lyr)],
-                param_val_dict['adep_{}'.format(lyr)]]],
-            calc_available_water_for_transpiration,
-            temp_val_dict['avw_{}'.format(lyr)], gdal.GDT_Float32,
+        """
+        adep_list = layer_list[:nlayer_max]
+        afiel_list = layer_list[nlayer_max:2 * nlayer_max]
+        asmos_list = layer_list[2 * nlayer_max:3 * nlayer_max]
+        awilt_list = layer_list[3 * nlayer_max:3 * nlayer_max + nlaypg_max]
+        awtl_list = layer_list[
+            3 * nlayer_max + nlaypg_max:3 * nlayer_max + 2 * nlaypg_max]
+        pft_cover_list = layer_list[3 * nlayer_max + 2 * nlaypg_max:]
+
+        # distribute water to each layer: revise moisture content of each
+        # soil layer and calculate soil moisture moving to the next layer
+        amov_list = []
+        asmos_interim_list = []
+        for lyr_i in range(nlayer_max):
+            asmos_interim, moisture_inputs = distribute_water_to_soil_layer(
+                ['asmos_revised', 'amov'])(
+                    adep_list[lyr_i], afiel_list[lyr_i], asmos_list[lyr_i],
+                    moisture_inputs)
+            asmos_interim_list.append(asmos_interim)
+            amov_list.append(moisture_inputs)
+
+        # total water available for transpiration, and total weighted by
+        # transpiration depth for each soil layer
+        avw_list = [
+            calc_available_water_for_transpiration(
+                asmos_interim_list[lyr_i], awilt_list[lyr_i],
+                adep_list[lyr_i]) for lyr_i in range(nlaypg_max)]
+        tot = _array_list_sum(avw_list, _TARGET_NODATA, _TARGET_NODATA)
+        awwt_list = [
+            _array_product(
+                avw_list[lyr_i], _TARGET_NODATA, awtl_list[lyr_i],
+                _IC_NODATA, _TARGET_NODATA) for lyr_i in range(nlaypg_max)]
+        tot2 = _array_list_sum(awwt_list, _TARGET_NODATA, _TARGET_NODATA)
+        trap_revised = revise_potential_transpiration(trap, tot)
+
+        # remove water via transpiration; no transpiration is removed from
+        # layers not accessible by plants
+        asmos_revised_list = list(asmos_interim_list)
+        avinj_list = []
+        for lyr_i in range(nlaypg_max):
+            avinj, asmos_revised_list[lyr_i] = remove_transpiration(
+                ['avinj', 'asmos'])(
+                    asmos_interim_list[lyr_i], awilt_list[lyr_i],
+                    adep_list[lyr_i], trap_revised, awwt_list[lyr_i], tot2)
+            avinj_list.append(avinj)
+
+        # remove evaporation from soil layer 1 from total moisture and from
+        # moisture available to plants in that layer
+        rwcf_1 = calc_relative_water_content_lyr_1(
+            asmos_revised_list[0], adep_list[0], awilt_list[0],
+            afiel_list[0])
+        evlos = calc_evaporation_loss(
+            rwcf_1, pevp, absevap, asmos_revised_list[0], awilt_list[0],
+            adep_list[0])
+        asmos_revised_list[0] = _array_difference(
+            asmos_revised_list[0], _TARGET_NODATA, evlos, _TARGET_NODATA,
             _TARGET_NODATA)
-        avw_list.append(temp_val_dict['avw_{}'.format(lyr)])
-    # total water available for transpiration
-    raster_list_sum(
-        avw_list, _TARGET_NODATA, temp_val_dict['tot'], _TARGET_NODATA)
-
-    # calculate water available for transpiration weighted by transpiration
-    # depth for that soil layer
-    awwt_list = []
-    for lyr in range(1, nlaypg_max + 1):
-        raster_multiplication(
-            temp_val_dict['avw_{}'.format(lyr)], _TARGET_NODATA,
-            param_val_dict['awtl_{}'.format(lyr)], _IC_NODATA,
-            temp_val_dict['awwt_{}'.format(lyr)], _TARGET_NODATA)
-        awwt_list.append(temp_val_dict['awwt_{}'.format(lyr)])
-    # total weighted available water for transpiration
-    raster_list_sum(
-        awwt_list, _TARGET_NODATA, temp_val_dict['tot2'], _TARGET_NODATA)
-
-    # revise total potential transpiration
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [temp_val_dict['trap'], temp_val_dict['tot']]],
-        revise_potential_transpiration, temp_val_dict['trap_revised'],
-        gdal.GDT_Float32, _TARGET_NODATA)
-
-    # remove water via transpiration
-    for lyr in range(1, nlaypg_max + 1):
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                temp_val_dict['asmos_interim_{}'.format(lyr)],
-                pp_reg['awilt_{}_path'.format(lyr)],
-                param_val_dict['adep_{}'.format(lyr)],
-                temp_val_dict['trap_revised'],
-                temp_val_dict['awwt_{}'.format(lyr)], temp_val_dict['tot2']]],
-            remove_transpiration('avinj'),
-            temp_val_dict['avinj_{}'.format(lyr)], gdal.GDT_Float32,
+        avinj_list[0] = _array_difference(
+            avinj_list[0], _TARGET_NODATA, evlos, _TARGET_NODATA,
             _TARGET_NODATA)
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                temp_val_dict['asmos_interim_{}'.format(lyr)],
-                pp_reg['awilt_{}_path'.format(lyr)],
-                param_val_dict['adep_{}'.format(lyr)],
-                temp_val_dict['trap_revised'],
-                temp_val_dict['awwt_{}'.format(lyr)], temp_val_dict['tot2']]],
-            remove_transpiration('asmos'), sv_reg['asmos_{}_path'.format(lyr)],
-            gdal.GDT_Float32, _TARGET_NODATA)
-    # no transpiration is removed from layers not accessible by plants
-    for lyr in range(nlaypg_max + 1, nlayer_max + 1):
-        shutil.copyfile(
-            temp_val_dict['asmos_interim_{}'.format(lyr)],
-            sv_reg['asmos_{}_path'.format(lyr)])
-
-    # relative water content of soil layer 1
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            sv_reg['asmos_1_path'], param_val_dict['adep_1'],
-            pp_reg['awilt_1_path'], pp_reg['afiel_1_path']]],
-        calc_relative_water_content_lyr_1, temp_val_dict['rwcf_1'],
-        gdal.GDT_Float32, _TARGET_NODATA)
-
-    # evaporation from soil layer 1
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            temp_val_dict['rwcf_1'], temp_val_dict['pevp'],
-            temp_val_dict['absevap'], sv_reg['asmos_1_path'],
-            pp_reg['awilt_1_path'], param_val_dict['adep_1']]],
-        calc_evaporation_loss, temp_val_dict['evlos'],
-        gdal.GDT_Float32, _TARGET_NODATA)
-
-    # remove evaporation from total moisture in soil layer 1
-    shutil.copyfile(sv_reg['asmos_1_path'], temp_val_dict['asmos_interim_1'])
-    raster_difference(
-        temp_val_dict['asmos_interim_1'], _TARGET_NODATA,
-        temp_val_dict['evlos'], _TARGET_NODATA, sv_reg['asmos_1_path'],
-        _TARGET_NODATA)
-
-    # remove evaporation from moisture available to plants in soil layer 1
-    shutil.copyfile(temp_val_dict['avinj_1'], temp_val_dict['avinj_interim_1'])
-    raster_difference(
-        temp_val_dict['avinj_interim_1'], _TARGET_NODATA,
-        temp_val_dict['evlos'], _TARGET_NODATA, temp_val_dict['avinj_1'],
-        _TARGET_NODATA)
-
-    # calculate avh2o_1, soil water available for growth, for each PFT
-    for pft_i in pft_id_set:
-        pft_nodata = pygeoprocessing.get_raster_info(
-            aligned_inputs['pft_{}'.format(pft_i)])['nodata'][0]
-        soil_layers_accessible = [
-            temp_val_dict['avinj_{}'.format(lyr)] for lyr in
-            range(1, int(veg_trait_table[pft_i]['nlaypg']) + 1)]
-        raster_list_sum(
-            soil_layers_accessible, _TARGET_NODATA,
-            temp_val_dict['sum_avinj_{}'.format(pft_i)],
-            _TARGET_NODATA, nodata_remove=True)
-        raster_multiplication(
-            temp_val_dict['sum_avinj_{}'.format(pft_i)], _TARGET_NODATA,
-            aligned_inputs['pft_{}'.format(pft_i)], pft_nodata,
-            sv_reg['avh2o_1_{}_path'.format(pft_i)], _SV_NODATA)
-
-    # calculate avh2o_3, moisture in top two soil layers
-    soil_layers_to_sum = [
-        temp_val_dict['avinj_{}'.format(lyr)] for lyr in [1, 2]]
-    raster_list_sum(
-        soil_layers_to_sum, _TARGET_NODATA, sv_reg['avh2o_3_path'],
-        _SV_NODATA, nodata_remove=False)
 
-    # set correct nodata value for all revised asmos rasters
-    for lyr in range(1, nlayer_max + 1):
-        reclassify_nodata(sv_reg['asmos_{}_path'.format(lyr)], _SV_NODATA)
+        # avh2o_1, soil water available for growth, for each PFT
+        avh2o_1_list = []
+        for pft_cover, pft_nodata, nlaypg in zip(
+                pft_cover_list, pft_nodata_list, nlaypg_list):
+            sum_avinj = _array_list_sum(
+                avinj_list[:nlaypg], _TARGET_NODATA, _TARGET_NODATA,
+                nodata_remove=True)
+            avh2o_1_list.append(_array_product(
+                sum_avinj, _TARGET_NODATA, pft_cover, pft_nodata,
+                _SV_NODATA))
+
+        # avh2o_3, moisture in top two soil layers
+        avh2o_3 = _array_list_sum(
+            avinj_list[:2], _TARGET_NODATA, _SV_NODATA)
+
+        # set correct nodata value for all revised asmos
+        for asmos in asmos_revised_list:
+            asmos[asmos == _TARGET_NODATA] = _SV_NODATA
+        return amov_list + asmos_revised_list + avh2o_1_list + [avh2o_3]
+
+    # water moves through all soil layers in one pass over the rasters
+    multi_raster_calculator(
+        [temp_val_dict['modified_moisture_inputs'], temp_val_dict['trap'],
+         temp_val_dict['pevp'], temp_val_dict['absevap']] +
+        [param_val_dict['adep_{}'.format(lyr)] for lyr in
+         range(1, nlayer_max + 1)] +
+        [pp_reg['afiel_{}_path'.format(lyr)] for lyr in
+         range(1, nlayer_max + 1)] +
+        [prev_sv_reg['asmos_{}_path'.format(lyr)] for lyr in
+         range(1, nlayer_max + 1)] +
+        [pp_reg['awilt_{}_path'.format(lyr)] for lyr in
+         range(1, nlaypg_max + 1)] +
+        [param_val_dict['awtl_{}'.format(lyr)] for lyr in
+         range(1, nlaypg_max + 1)] +
+        [aligned_inputs['pft_{}'.format(pft_i)] for pft_i in pft_id_list],
+        soil_water_cascade,
+        [month_reg['amov_{}'.format(lyr)] for lyr in
+         range(1, nlayer_max + 1)] +
+        [sv_reg['asmos_{}_path'.format(lyr)] for lyr in
+         range(1, nlayer_max + 1)] +
+        [sv_reg['avh2o_1_{}_path'.format(pft_i)] for pft_i in pft_id_list] +
+        [sv_reg['avh2o_3_path']],
+        [_TARGET_NODATA] * nlayer_max + [_SV_NODATA] * nlayer_max +
+        [_SV_NODATA] * len(pft_id_list) + [_SV_NODATA])
 
     # clean up temporary files
     shutil.rmtree(temp_dir)
@@ -5887,6 +8392,55 @@ def calc_anerb(rprpet, pevap, drain, aneref_1, aneref_2, aneref_3):
     return anerb
 
 
+def _esched_pixels(
+        cflow, tca, rcetob, anps, labile, sv_nodata, target_nodata,
+        ic_nodata, material_leaving_a, material_arriving_b, mnrflo):
+    """Calculate the flow accompanying decomposition of C pixel by pixel.
+
+    Equivalent to the function returned by `esched`, as a loop that can be
+    compiled by `_jit_kernel`.
+
+    """
+    sv_tolerance = 1e-8 + 1e-5 * abs(sv_nodata)
+    for i in range(cflow.size):
+        material_leaving_a[i] = ic_nodata
+        material_arriving_b[i] = ic_nodata
+        mnrflo[i] = ic_nodata
+        if (cflow[i] == ic_nodata or
+                abs(tca[i] - sv_nodata) <= sv_tolerance or
+                not tca[i] > 0 or
+                rcetob[i] == target_nodata or
+                abs(anps[i] - sv_nodata) <= sv_tolerance or
+                abs(labile[i] - sv_nodata) <= sv_tolerance):
+            continue
+        outofa = numpy.float32(anps[i] * (cflow[i] / tca[i]))
+        immobil_ratio = 0.
+        if outofa > 0:
+            immobil_ratio = cflow[i] / outofa
+        atob = cflow[i] / rcetob[i]
+        immflo = atob - outofa
+        labile_supply = labile[i] - immflo
+        if immobil_ratio <= rcetob[i]:
+            # mineralization
+            material_leaving_a[i] = outofa
+            material_arriving_b[i] = atob
+            mnrflo[i] = outofa - atob
+        elif immobil_ratio > rcetob[i]:
+            if labile_supply > 0:
+                # immobilization
+                material_leaving_a[i] = outofa
+                material_arriving_b[i] = outofa + immflo
+                mnrflo[i] = -immflo
+            elif labile_supply <= 0:
+                # no movement
+                material_leaving_a[i] = 0.
+                material_arriving_b[i] = 0.
+                mnrflo[i] = 0.
+
+
+_ESCHED_JIT = _jit_kernel(_esched_pixels)
+
+
 def esched(return_type):
     """Calculate flow of an element accompanying decomposition of C.
 
@@ -5895,9 +8449,9 @@ def esched(return_type):
     (the receiving stock, or box B).  Esched.f
 
     Parameters:
-        return_type (string): flag indicating whether to return material
-            leaving box A, material arriving in box B, or material flowing
-            into or out of the mineral pool
+        return_type (string or list): flag indicating whether to return
+            material leaving box A, material arriving in box B, or material
+            flowing into or out of the mineral pool, or a list of such flags
 
     Returns:
         the function `_esched`
@@ -5937,13 +8491,22 @@ def esched(return_type):
                 'mineral_flow'
 
         """
+        if _ESCHED_JIT is not None:
+            material_leaving_a, material_arriving_b, mnrflo = (
+                _apply_jit_kernel(
+                    _ESCHED_JIT, [cflow, tca, rcetob, anps, labile], 3))
+            return _select_outputs(return_type, {
+                'material_leaving_a': material_leaving_a,
+                'material_arriving_b': material_arriving_b,
+                'mineral_flow': mnrflo})
+
         valid_mask = (
             (cflow != _IC_NODATA) &
-            (~numpy.isclose(tca, _SV_NODATA)) &
+            _valid_mask(tca, _SV_NODATA) &
             (tca > 0) &
             (rcetob != _TARGET_NODATA) &
-            (~numpy.isclose(anps, _SV_NODATA)) &
-            (~numpy.isclose(labile, _SV_NODATA)))
+            _valid_mask(anps, _SV_NODATA) &
+            _valid_mask(labile, _SV_NODATA))
         outofa = numpy.empty(cflow.shape, dtype=numpy.float32)
         outofa[:] = _IC_NODATA
         outofa[valid_mask] = (
@@ -6001,12 +8564,10 @@ def esched(return_type):
         material_arriving_b[no_movt_mask] = 0.
         mnrflo[no_movt_mask] = 0.
 
-        if return_type == 'material_leaving_a':
-            return material_leaving_a
-        elif return_type == 'material_arriving_b':
-            return material_arriving_b
-        elif return_type == 'mineral_flow':
-            return mnrflo
+        return _select_outputs(return_type, {
+            'material_leaving_a': material_leaving_a,
+            'material_arriving_b': material_arriving_b,
+            'mineral_flow': mnrflo})
     return _esched
 
 
@@ -6027,7 +8588,7 @@ def fsfunc(minerl_1_2, sorpmx, pslsrb):
 
     """
     valid_mask = (
-        (~numpy.isclose(minerl_1_2, _SV_NODATA)) &
+        _valid_mask(minerl_1_2, _SV_NODATA) &
         (minerl_1_2 > 0) &
         (sorpmx != _IC_NODATA) &
         (pslsrb != _IC_NODATA))
@@ -6077,8 +8638,8 @@ def calc_surface_som2_ratio(
 
     """
     valid_mask = (
-        (~numpy.isclose(som1c_1, _SV_NODATA)) &
-        (~numpy.isclose(som1e_1_iel, _SV_NODATA)) &
+        _valid_mask(som1c_1, _SV_NODATA) &
+        _valid_mask(som1e_1_iel, _SV_NODATA) &
         (som1e_1_iel > 0) &
         (rad1p_1_iel != _IC_NODATA) &
         (rad1p_2_iel != _IC_NODATA) &
@@ -6098,6 +8659,48 @@ def calc_surface_som2_ratio(
     return rceto2_surface
 
 
+def _structural_tcflow_pixels(
+        aminrl_1, aminrl_2, strucc, struce_1, struce_2, rnew_1, rnew_2,
+        strmax, defac, dec1, pligst, strlig, pheff_struc, anerb, sv_nodata,
+        target_nodata, ic_nodata, tcflow):
+    """Calculate total flow out of structural C pixel by pixel.
+
+    Equivalent to `calc_tcflow_strucc_1` (with `anerb` equal to 1) and
+    `calc_tcflow_strucc_2`, as a loop that can be compiled by `_jit_kernel`.
+
+    """
+    sv_tolerance = 1e-8 + 1e-5 * abs(sv_nodata)
+    for i in range(aminrl_1.size):
+        if (abs(aminrl_1[i] - sv_nodata) <= sv_tolerance or
+                abs(aminrl_2[i] - sv_nodata) <= sv_tolerance or
+                abs(strucc[i] - sv_nodata) <= sv_tolerance or
+                abs(struce_1[i] - sv_nodata) <= sv_tolerance or
+                abs(struce_2[i] - sv_nodata) <= sv_tolerance or
+                rnew_1[i] == target_nodata or
+                rnew_2[i] == target_nodata or
+                strmax[i] == ic_nodata or
+                defac[i] == target_nodata or
+                dec1[i] == ic_nodata or
+                pligst[i] == ic_nodata or
+                abs(strlig[i] - sv_nodata) <= sv_tolerance or
+                pheff_struc[i] == target_nodata or
+                anerb[i] == target_nodata):
+            tcflow[i] = ic_nodata
+        elif ((aminrl_1[i] > 0.0000001 or
+                (strucc[i] / struce_1[i]) <= rnew_1[i]) and
+                (aminrl_2[i] > 0.0000001 or
+                    (strucc[i] / struce_2[i]) <= rnew_2[i])):
+            tcflow[i] = (
+                min(strucc[i], strmax[i]) * defac[i] * dec1[i] *
+                math.exp(-pligst[i] * strlig[i]) * 0.020833 *
+                pheff_struc[i] * anerb[i])
+        else:
+            tcflow[i] = 0.
+
+
+_STRUCTURAL_TCFLOW_JIT = _jit_kernel(_structural_tcflow_pixels)
+
+
 def calc_tcflow_strucc_1(
         aminrl_1, aminrl_2, strucc_1, struce_1_1, struce_1_2, rnewas_1_1,
         rnewas_2_1, strmax_1, defac, dec1_1, pligst_1, strlig_1, pheff_struc):
@@ -6134,19 +8737,26 @@ def calc_tcflow_strucc_1(
             material
 
     """
+    if _STRUCTURAL_TCFLOW_JIT is not None:
+        return _apply_jit_kernel(
+            _STRUCTURAL_TCFLOW_JIT, [
+                aminrl_1, aminrl_2, strucc_1, struce_1_1, struce_1_2,
+                rnewas_1_1, rnewas_2_1, strmax_1, defac, dec1_1, pligst_1,
+                strlig_1, pheff_struc, numpy.float32(1.)], 1)[0]
+
     valid_mask = (
-        (~numpy.isclose(aminrl_1, _SV_NODATA)) &
-        (~numpy.isclose(aminrl_2, _SV_NODATA)) &
-        (~numpy.isclose(strucc_1, _SV_NODATA)) &
-        (~numpy.isclose(struce_1_1, _SV_NODATA)) &
-        (~numpy.isclose(struce_1_2, _SV_NODATA)) &
+        _valid_mask(aminrl_1, _SV_NODATA) &
+        _valid_mask(aminrl_2, _SV_NODATA) &
+        _valid_mask(strucc_1, _SV_NODATA) &
+        _valid_mask(struce_1_1, _SV_NODATA) &
+        _valid_mask(struce_1_2, _SV_NODATA) &
         (rnewas_1_1 != _TARGET_NODATA) &
         (rnewas_2_1 != _TARGET_NODATA) &
         (strmax_1 != _IC_NODATA) &
         (defac != _TARGET_NODATA) &
         (dec1_1 != _IC_NODATA) &
         (pligst_1 != _IC_NODATA) &
-        (~numpy.isclose(strlig_1, _SV_NODATA)) &
+        _valid_mask(strlig_1, _SV_NODATA) &
         (pheff_struc != _TARGET_NODATA))
 
     potential_flow = numpy.zeros(aminrl_1.shape, dtype=numpy.float32)
@@ -6207,19 +8817,26 @@ def calc_tcflow_strucc_2(
             material
 
     """
+    if _STRUCTURAL_TCFLOW_JIT is not None:
+        return _apply_jit_kernel(
+            _STRUCTURAL_TCFLOW_JIT, [
+                aminrl_1, aminrl_2, strucc_2, struce_2_1, struce_2_2,
+                rnewbs_1_1, rnewbs_2_1, strmax_2, defac, dec1_2, pligst_2,
+                strlig_2, pheff_struc, anerb], 1)[0]
+
     valid_mask = (
-        (~numpy.isclose(aminrl_1, _SV_NODATA)) &
-        (~numpy.isclose(aminrl_2, _SV_NODATA)) &
-        (~numpy.isclose(strucc_2, _SV_NODATA)) &
-        (~numpy.isclose(struce_2_1, _SV_NODATA)) &
-        (~numpy.isclose(struce_2_2, _SV_NODATA)) &
+        _valid_mask(aminrl_1, _SV_NODATA) &
+        _valid_mask(aminrl_2, _SV_NODATA) &
+        _valid_mask(strucc_2, _SV_NODATA) &
+        _valid_mask(struce_2_1, _SV_NODATA) &
+        _valid_mask(struce_2_2, _SV_NODATA) &
         (rnewbs_1_1 != _TARGET_NODATA) &
         (rnewbs_2_1 != _TARGET_NODATA) &
         (strmax_2 != _IC_NODATA) &
         (defac != _TARGET_NODATA) &
         (dec1_2 != _IC_NODATA) &
         (pligst_2 != _IC_NODATA) &
-        (~numpy.isclose(strlig_2, _SV_NODATA)) &
+        _valid_mask(strlig_2, _SV_NODATA) &
         (pheff_struc != _TARGET_NODATA) &
         (anerb != _TARGET_NODATA))
 
@@ -6242,6 +8859,43 @@ def calc_tcflow_strucc_2(
     return tcflow_strucc_2
 
 
+def _surface_tcflow_pixels(
+        aminrl_1, aminrl_2, cstatv, estatv_1, estatv_2, rcetob_1, rcetob_2,
+        defac, dec_param, pheff, sv_nodata, target_nodata, ic_nodata,
+        tcflow):
+    """Calculate total flow of C out of a surface pool pixel by pixel.
+
+    Equivalent to `calc_tcflow_surface`, as a loop that can be compiled by
+    `_jit_kernel`.
+
+    """
+    sv_tolerance = 1e-8 + 1e-5 * abs(sv_nodata)
+    for i in range(aminrl_1.size):
+        if (abs(aminrl_1[i] - sv_nodata) <= sv_tolerance or
+                abs(aminrl_2[i] - sv_nodata) <= sv_tolerance or
+                abs(cstatv[i] - sv_nodata) <= sv_tolerance or
+                abs(estatv_1[i] - sv_nodata) <= sv_tolerance or
+                abs(estatv_2[i] - sv_nodata) <= sv_tolerance or
+                rcetob_1[i] == target_nodata or
+                rcetob_2[i] == target_nodata or
+                defac[i] == target_nodata or
+                dec_param[i] == ic_nodata or
+                pheff[i] == target_nodata):
+            tcflow[i] = ic_nodata
+        elif ((aminrl_1[i] > 0.0000001 or
+                (cstatv[i] / estatv_1[i]) <= rcetob_1[i]) and
+                (aminrl_2[i] > 0.0000001 or
+                    (cstatv[i] / estatv_2[i]) <= rcetob_2[i])):
+            tcflow[i] = min(
+                cstatv[i] * defac[i] * dec_param[i] * 0.020833 * pheff[i],
+                cstatv[i])
+        else:
+            tcflow[i] = 0.
+
+
+_SURFACE_TCFLOW_JIT = _jit_kernel(_surface_tcflow_pixels)
+
+
 def calc_tcflow_surface(
         aminrl_1, aminrl_2, cstatv, estatv_1, estatv_2, rcetob_1, rcetob_2,
         defac, dec_param, pheff):
@@ -6271,12 +8925,18 @@ def calc_tcflow_surface(
         tcflow, total flow of C out of the decomposing pool
 
     """
+    if _SURFACE_TCFLOW_JIT is not None:
+        return _apply_jit_kernel(
+            _SURFACE_TCFLOW_JIT, [
+                aminrl_1, aminrl_2, cstatv, estatv_1, estatv_2, rcetob_1,
+                rcetob_2, defac, dec_param, pheff], 1)[0]
+
     valid_mask = (
-        (~numpy.isclose(aminrl_1, _SV_NODATA)) &
-        (~numpy.isclose(aminrl_2, _SV_NODATA)) &
-        (~numpy.isclose(cstatv, _SV_NODATA)) &
-        (~numpy.isclose(estatv_1, _SV_NODATA)) &
-        (~numpy.isclose(estatv_2, _SV_NODATA)) &
+        _valid_mask(aminrl_1, _SV_NODATA) &
+        _valid_mask(aminrl_2, _SV_NODATA) &
+        _valid_mask(cstatv, _SV_NODATA) &
+        _valid_mask(estatv_1, _SV_NODATA) &
+        _valid_mask(estatv_2, _SV_NODATA) &
         (rcetob_1 != _TARGET_NODATA) &
         (rcetob_2 != _TARGET_NODATA) &
         (defac != _TARGET_NODATA) &
@@ -6334,11 +8994,11 @@ def calc_tcflow_soil(
 
     """
     valid_mask = (
-        (~numpy.isclose(aminrl_1, _SV_NODATA)) &
-        (~numpy.isclose(aminrl_2, _SV_NODATA)) &
-        (~numpy.isclose(cstatv, _SV_NODATA)) &
-        (~numpy.isclose(estatv_1, _SV_NODATA)) &
-        (~numpy.isclose(estatv_2, _SV_NODATA)) &
+        _valid_mask(aminrl_1, _SV_NODATA) &
+        _valid_mask(aminrl_2, _SV_NODATA) &
+        _valid_mask(cstatv, _SV_NODATA) &
+        _valid_mask(estatv_1, _SV_NODATA) &
+        _valid_mask(estatv_2, _SV_NODATA) &
         (rcetob_1 != _TARGET_NODATA) &
         (rcetob_2 != _TARGET_NODATA) &
         (defac != _TARGET_NODATA) &
@@ -6399,11 +9059,11 @@ def calc_tcflow_som1c_2(
 
     """
     valid_mask = (
-        (~numpy.isclose(aminrl_1, _SV_NODATA)) &
-        (~numpy.isclose(aminrl_2, _SV_NODATA)) &
-        (~numpy.isclose(som1c_2, _SV_NODATA)) &
-        (~numpy.isclose(som1e_2_1, _SV_NODATA)) &
-        (~numpy.isclose(som1e_2_2, _SV_NODATA)) &
+        _valid_mask(aminrl_1, _SV_NODATA) &
+        _valid_mask(aminrl_2, _SV_NODATA) &
+        _valid_mask(som1c_2, _SV_NODATA) &
+        _valid_mask(som1e_2_1, _SV_NODATA) &
+        _valid_mask(som1e_2_2, _SV_NODATA) &
         (rceto2_1 != _TARGET_NODATA) &
         (rceto2_2 != _TARGET_NODATA) &
         (defac != _TARGET_NODATA) &
@@ -6478,7 +9138,7 @@ def calc_som2_flow(som2c_1, cmix, defac):
 
     """
     valid_mask = (
-        (~numpy.isclose(som2c_1, _SV_NODATA)) &
+        _valid_mask(som2c_1, _SV_NODATA) &
         (cmix != _IC_NODATA) &
         (defac != _TARGET_NODATA))
     tcflow = numpy.empty(som2c_1.shape, dtype=numpy.float32)
@@ -6489,6 +9149,32 @@ def calc_som2_flow(som2c_1, cmix, defac):
     return tcflow
 
 
+def _respiration_mineral_flow_pixels(
+        cflow, frac_co2, estatv, cstatv, sv_nodata, target_nodata, ic_nodata,
+        mineral_flow):
+    """Calculate mineral flow associated with respiration pixel by pixel.
+
+    Equivalent to `calc_respiration_mineral_flow`, as a loop that can be
+    compiled by `_jit_kernel`.
+
+    """
+    sv_tolerance = 1e-8 + 1e-5 * abs(sv_nodata)
+    for i in range(cflow.size):
+        if (cflow[i] == ic_nodata or
+                frac_co2[i] == ic_nodata or
+                abs(estatv[i] - sv_nodata) <= sv_tolerance or
+                abs(cstatv[i] - sv_nodata) <= sv_tolerance):
+            mineral_flow[i] = ic_nodata
+        elif cstatv[i] > 0:
+            co2_loss = numpy.float32(cflow[i] * frac_co2[i])
+            mineral_flow[i] = co2_loss * estatv[i] / cstatv[i]
+        else:
+            mineral_flow[i] = 0.
+
+
+_RESPIRATION_MINERAL_FLOW_JIT = _jit_kernel(_respiration_mineral_flow_pixels)
+
+
 def calc_respiration_mineral_flow(cflow, frac_co2, estatv, cstatv):
     """Calculate mineral flow of one element associated with respiration.
 
@@ -6510,11 +9196,16 @@ def calc_respiration_mineral_flow(cflow, frac_co2, estatv, cstatv):
         mineral_flow, flow of iel (N or P) accompanying respiration
 
     """
+    if _RESPIRATION_MINERAL_FLOW_JIT is not None:
+        return _apply_jit_kernel(
+            _RESPIRATION_MINERAL_FLOW_JIT,
+            [cflow, frac_co2, estatv, cstatv], 1)[0]
+
     valid_mask = (
         (cflow != _IC_NODATA) &
         (frac_co2 != _IC_NODATA) &
-        (~numpy.isclose(estatv, _SV_NODATA)) &
-        (~numpy.isclose(cstatv, _SV_NODATA)))
+        _valid_mask(estatv, _SV_NODATA) &
+        _valid_mask(cstatv, _SV_NODATA))
 
     co2_loss = numpy.zeros(cflow.shape, dtype=numpy.float32)
     co2_loss[valid_mask] = cflow[valid_mask] * frac_co2[valid_mask]
@@ -6760,60 +9451,53 @@ def nutrient_flow(
         modifies or creates the raster indicated by `d_minerl_path`
         modifies or creates the raster indicated by `gromin_path`, if supplied
 
-    Returns:
-        None
-
-    """
-    with tempfile.NamedTemporaryFile(
-            prefix='operand_temp', dir=PROCESSING_DIR) as operand_temp_file:
-        operand_temp_path = operand_temp_file.name
-    with tempfile.NamedTemporaryFile(
-            prefix='d_statv_temp', dir=PROCESSING_DIR) as d_statv_temp_file:
-        d_statv_temp_path = d_statv_temp_file.name
+    Returns:
+        None
 
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            cflow_path, cstatv_donating_path, rcetob_path,
-            estatv_donating_path, minerl_1_path]],
-        esched('material_leaving_a'), operand_temp_path, gdal.GDT_Float32,
-        _IC_NODATA)
-    shutil.copyfile(d_estatv_donating_path, d_statv_temp_path)
-    raster_difference(
-        d_statv_temp_path, _IC_NODATA, operand_temp_path, _IC_NODATA,
-        d_estatv_donating_path, _IC_NODATA)
+    """
+    esched_all = esched(
+        ['material_leaving_a', 'material_arriving_b', 'mineral_flow'])
 
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            cflow_path, cstatv_donating_path, rcetob_path,
-            estatv_donating_path, minerl_1_path]],
-        esched('material_arriving_b'), operand_temp_path, gdal.GDT_Float32,
-        _IC_NODATA)
-    shutil.copyfile(d_estatv_receiving_path, d_statv_temp_path)
-    raster_sum(
-        d_statv_temp_path, _IC_NODATA, operand_temp_path, _IC_NODATA,
-        d_estatv_receiving_path, _IC_NODATA)
+    def apply_nutrient_flow(
+            cflow, cstatv_donating, rcetob, estatv_donating, minerl_1,
+            d_estatv_donating, d_estatv_receiving, d_minerl, *gromin):
+        """Calculate the flow of iel and add it to the change in each pool.
 
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            cflow_path, cstatv_donating_path, rcetob_path,
-            estatv_donating_path, minerl_1_path]],
-        esched('mineral_flow'), operand_temp_path, gdal.GDT_Float32,
-        _IC_NODATA)
-    shutil.copyfile(d_minerl_path, d_statv_temp_path)
-    raster_sum(
-        d_statv_temp_path, _IC_NODATA, operand_temp_path, _IC_NODATA,
-        d_minerl_path, _IC_NODATA)
-    if gromin_path:
-        shutil.copyfile(gromin_path, d_statv_temp_path)
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                d_statv_temp_path, operand_temp_path]],
-            update_gross_mineralization, gromin_path,
-            gdal.GDT_Float32, _TARGET_NODATA)
+        The flow is calculated once per block and applied to the change in
+        the donating, receiving and mineral pools, and to gross
+        mineralization if it is supplied as the last input.
 
-    # clean up
-    os.remove(operand_temp_path)
-    os.remove(d_statv_temp_path)
+        """
+        material_leaving_a, material_arriving_b, mineral_flow = esched_all(
+            cflow, cstatv_donating, rcetob, estatv_donating, minerl_1)
+        result_list = [
+            _array_difference(
+                d_estatv_donating, _IC_NODATA, material_leaving_a,
+                _IC_NODATA, _IC_NODATA),
+            _array_sum(
+                d_estatv_receiving, _IC_NODATA, material_arriving_b,
+                _IC_NODATA, _IC_NODATA),
+            _array_sum(
+                d_minerl, _IC_NODATA, mineral_flow, _IC_NODATA, _IC_NODATA)]
+        if gromin:
+            result_list.append(
+                update_gross_mineralization(gromin[0], mineral_flow))
+        return result_list
+
+    base_path_list = [
+        cflow_path, cstatv_donating_path, rcetob_path, estatv_donating_path,
+        minerl_1_path, d_estatv_donating_path, d_estatv_receiving_path,
+        d_minerl_path]
+    target_path_list = [
+        d_estatv_donating_path, d_estatv_receiving_path, d_minerl_path]
+    target_nodata_list = [_IC_NODATA] * 3
+    if gromin_path:
+        base_path_list.append(gromin_path)
+        target_path_list.append(gromin_path)
+        target_nodata_list.append(_TARGET_NODATA)
+    multi_raster_calculator(
+        base_path_list, apply_nutrient_flow, target_path_list,
+        target_nodata_list)
 
 
 def calc_c_leach(amov_2, tcflow, omlech_3, orglch):
@@ -6854,6 +9538,39 @@ def calc_c_leach(amov_2, tcflow, omlech_3, orglch):
     return cleach
 
 
+def calc_leached_N(som1c_2, som1e_2_1, cleach):
+    """Calculate the N leaching from soil SOM1."""
+    valid_mask = (
+        _valid_mask(som1c_2, _SV_NODATA) &
+        _valid_mask(som1e_2_1, _SV_NODATA) &
+        (som1c_2 > 0) &
+        (som1e_2_1 > 0) &
+        (cleach != _TARGET_NODATA))
+    rceof1_1 = numpy.zeros(som1c_2.shape)
+    rceof1_1[valid_mask] = som1c_2[valid_mask] / som1e_2_1[valid_mask] * 2.
+    orgflow = numpy.empty(som1c_2.shape, dtype=numpy.float32)
+    orgflow[:] = _IC_NODATA
+    orgflow[valid_mask] = cleach[valid_mask] / rceof1_1[valid_mask]
+    return orgflow
+
+
+def calc_leached_P(som1c_2, som1e_2_2, cleach):
+    """Calculate the P leaching from soil SOM1."""
+    valid_mask = (
+        _valid_mask(som1c_2, _SV_NODATA) &
+        _valid_mask(som1e_2_2, _SV_NODATA) &
+        (som1c_2 > 0) &
+        (som1e_2_2 > 0) &
+        (cleach != _TARGET_NODATA))
+    rceof1_2 = numpy.zeros(som1c_2.shape)
+    rceof1_2[valid_mask] = (
+        som1c_2[valid_mask] / som1e_2_2[valid_mask] * 35.)
+    orgflow = numpy.empty(som1c_2.shape, dtype=numpy.float32)
+    orgflow[:] = _IC_NODATA
+    orgflow[valid_mask] = cleach[valid_mask] / rceof1_2[valid_mask]
+    return orgflow
+
+
 def remove_leached_iel(
         som1c_2_path, som1e_2_iel_path, cleach_path, d_som1e_2_iel_path,
         iel):
@@ -6880,37 +9597,6 @@ def remove_leached_iel(
         None
 
     """
-    def calc_leached_N(som1c_2, som1e_2_1, cleach):
-        """Calculate the N leaching from soil SOM1."""
-        valid_mask = (
-            (~numpy.isclose(som1c_2, _SV_NODATA)) &
-            (~numpy.isclose(som1e_2_1, _SV_NODATA)) &
-            (som1c_2 > 0) &
-            (som1e_2_1 > 0) &
-            (cleach != _TARGET_NODATA))
-        rceof1_1 = numpy.zeros(som1c_2.shape)
-        rceof1_1[valid_mask] = som1c_2[valid_mask] / som1e_2_1[valid_mask] * 2.
-        orgflow = numpy.empty(som1c_2.shape, dtype=numpy.float32)
-        orgflow[:] = _IC_NODATA
-        orgflow[valid_mask] = cleach[valid_mask] / rceof1_1[valid_mask]
-        return orgflow
-
-    def calc_leached_P(som1c_2, som1e_2_2, cleach):
-        """Calculate the P leaching from soil SOM1."""
-        valid_mask = (
-            (~numpy.isclose(som1c_2, _SV_NODATA)) &
-            (~numpy.isclose(som1e_2_2, _SV_NODATA)) &
-            (som1c_2 > 0) &
-            (som1e_2_2 > 0) &
-            (cleach != _TARGET_NODATA))
-        rceof1_2 = numpy.zeros(som1c_2.shape)
-        rceof1_2[valid_mask] = (
-            som1c_2[valid_mask] / som1e_2_2[valid_mask] * 35.)
-        orgflow = numpy.empty(som1c_2.shape, dtype=numpy.float32)
-        orgflow[:] = _IC_NODATA
-        orgflow[valid_mask] = cleach[valid_mask] / rceof1_2[valid_mask]
-        return orgflow
-
     with tempfile.NamedTemporaryFile(
             prefix='operand_temp', dir=PROCESSING_DIR) as operand_temp_file:
         operand_temp_path = operand_temp_file.name
@@ -6960,7 +9646,7 @@ def calc_pflow(pstatv, rate_param, defac):
 
     """
     valid_mask = (
-        (~numpy.isclose(pstatv, _SV_NODATA)) &
+        _valid_mask(pstatv, _SV_NODATA) &
         (rate_param != _IC_NODATA) &
         (defac != _TARGET_NODATA))
     pflow = numpy.empty(pstatv.shape, dtype=numpy.float64)
@@ -6990,7 +9676,7 @@ def calc_pflow_to_secndy(minerl_lyr_2, pmnsec_2, fsol, defac):
 
     """
     valid_mask = (
-        (~numpy.isclose(minerl_lyr_2, _SV_NODATA)) &
+        _valid_mask(minerl_lyr_2, _SV_NODATA) &
         (pmnsec_2 != _IC_NODATA) &
         (fsol != _TARGET_NODATA) &
         (defac != _TARGET_NODATA))
@@ -7002,6 +9688,47 @@ def calc_pflow_to_secndy(minerl_lyr_2, pmnsec_2, fsol, defac):
     return fmnsec
 
 
+def calc_aminrl_1(aminrl_1_prev, minerl_1_1):
+    """Update average mineral N."""
+    valid_mask = (
+        _valid_mask(aminrl_1_prev, _SV_NODATA) &
+        _valid_mask(minerl_1_1, _SV_NODATA))
+    aminrl_1 = numpy.empty(aminrl_1_prev.shape, dtype=numpy.float32)
+    aminrl_1[:] = _SV_NODATA
+    aminrl_1[valid_mask] = (
+        aminrl_1_prev[valid_mask] + minerl_1_1[valid_mask] / 2.)
+    return aminrl_1
+
+
+def calc_aminrl_2(aminrl_2_prev, minerl_1_2, fsol):
+    """Update average mineral P.
+
+    Average mineral P is calculated from the fraction of mineral P in
+    soil layer 1 that is in solution.
+
+    Parameters:
+        aminrl_2_prev (numpy.ndarray): derived, previous average surface
+            mineral P
+        minerl_1_2 (numpy.ndarray): state variable, current mineral P in
+            soil layer 1
+        fsol (numpy.ndarray): derived, fraction of labile P in solution
+
+    Returns:
+        aminrl_2, updated average mineral P
+
+    """
+    valid_mask = (
+        _valid_mask(aminrl_2_prev, _SV_NODATA) &
+        _valid_mask(minerl_1_2, _SV_NODATA) &
+        (fsol != _TARGET_NODATA))
+    aminrl_2 = numpy.empty(aminrl_2_prev.shape, dtype=numpy.float32)
+    aminrl_2[:] = _SV_NODATA
+    aminrl_2[valid_mask] = (
+        aminrl_2_prev[valid_mask] +
+        (minerl_1_2[valid_mask] * fsol[valid_mask]) / 2.)
+    return aminrl_2
+
+
 def update_aminrl(
         minerl_1_1_path, minerl_1_2_path, fsol_path, aminrl_1_path,
         aminrl_2_path):
@@ -7030,45 +9757,6 @@ def update_aminrl(
         None
 
     """
-    def update_aminrl_1(aminrl_1_prev, minerl_1_1):
-        """Update average mineral N."""
-        valid_mask = (
-            (~numpy.isclose(aminrl_1_prev, _SV_NODATA)) &
-            (~numpy.isclose(minerl_1_1, _SV_NODATA)))
-        aminrl_1 = numpy.empty(aminrl_1_prev.shape, dtype=numpy.float32)
-        aminrl_1[:] = _SV_NODATA
-        aminrl_1[valid_mask] = (
-            aminrl_1_prev[valid_mask] + minerl_1_1[valid_mask] / 2.)
-        return aminrl_1
-
-    def update_aminrl_2(aminrl_2_prev, minerl_1_2, fsol):
-        """Update average mineral P.
-
-        Average mineral P is calculated from the fraction of mineral P in
-        soil layer 1 that is in solution.
-
-        Parameters:
-            aminrl_2_prev (numpy.ndarray): derived, previous average surface
-                mineral P
-            minerl_1_2 (numpy.ndarray): state variable, current mineral P in
-                soil layer 1
-            fsol (numpy.ndarray): derived, fraction of labile P in solution
-
-        Returns:
-            aminrl_2, updated average mineral P
-
-        """
-        valid_mask = (
-            (~numpy.isclose(aminrl_2_prev, _SV_NODATA)) &
-            (~numpy.isclose(minerl_1_2, _SV_NODATA)) &
-            (fsol != _TARGET_NODATA))
-        aminrl_2 = numpy.empty(aminrl_2_prev.shape, dtype=numpy.float32)
-        aminrl_2[:] = _SV_NODATA
-        aminrl_2[valid_mask] = (
-            aminrl_2_prev[valid_mask] +
-            (minerl_1_2[valid_mask] * fsol[valid_mask]) / 2.)
-        return aminrl_2
-
     with tempfile.NamedTemporaryFile(
             prefix='aminrl_prev', dir=PROCESSING_DIR) as aminrl_prev_file:
         aminrl_prev_path = aminrl_prev_file.name
@@ -7076,13 +9764,13 @@ def update_aminrl(
     shutil.copyfile(aminrl_1_path, aminrl_prev_path)
     pygeoprocessing.raster_calculator(
         [(path, 1) for path in [aminrl_prev_path, minerl_1_1_path]],
-        update_aminrl_1, aminrl_1_path, gdal.GDT_Float32, _SV_NODATA)
+        calc_aminrl_1, aminrl_1_path, gdal.GDT_Float32, _SV_NODATA)
 
     shutil.copyfile(aminrl_2_path, aminrl_prev_path)
     pygeoprocessing.raster_calculator(
         [(path, 1) for path in [
             aminrl_prev_path, minerl_1_2_path, fsol_path]],
-        update_aminrl_2, aminrl_2_path, gdal.GDT_Float32, _SV_NODATA)
+        calc_aminrl_2, aminrl_2_path, gdal.GDT_Float32, _SV_NODATA)
 
     # clean up
     os.remove(aminrl_prev_path)
@@ -7113,8 +9801,8 @@ def sum_biomass(
     valid_mask = (
         (weighted_live_c != _TARGET_NODATA) &
         (weighted_dead_c != _TARGET_NODATA) &
-        (~numpy.isclose(strucc_1, _SV_NODATA)) &
-        (~numpy.isclose(metabc_1, _SV_NODATA)) &
+        _valid_mask(strucc_1, _SV_NODATA) &
+        _valid_mask(metabc_1, _SV_NODATA) &
         (elitst != _IC_NODATA))
     biomass = numpy.empty(weighted_live_c.shape, dtype=numpy.float32)
     biomass[:] = _TARGET_NODATA
@@ -7189,7 +9877,7 @@ def _decomposition(
 
         """
         valid_mask = (
-            (~numpy.isclose(precip, precip_nodata)) &
+            _valid_mask(precip, precip_nodata) &
             (annual_precip != _TARGET_NODATA) &
             (annual_precip > 0) &
             (baseNdep != _TARGET_NODATA) &
@@ -7225,7 +9913,7 @@ def _decomposition(
             (pevap != _TARGET_NODATA) &
             (snowmelt != _TARGET_NODATA) &
             (avh2o_3 != _TARGET_NODATA) &
-            (~numpy.isclose(precip, precip_nodata)))
+            _valid_mask(precip, precip_nodata))
 
         rprpet = numpy.empty(pevap.shape, dtype=numpy.float32)
         rprpet[:] = _TARGET_NODATA
@@ -7290,8 +9978,8 @@ def _decomposition(
         valid_mask = (
             (biomass != _TARGET_NODATA) &
             (snow != _SV_NODATA) &
-            (~numpy.isclose(max_temp, max_temp_nodata)) &
-            (~numpy.isclose(min_temp, min_temp_nodata)) &
+            _valid_mask(max_temp, max_temp_nodata) &
+            _valid_mask(min_temp, min_temp_nodata) &
             (daylength != _TARGET_NODATA) &
             (pmntmp != _IC_NODATA) &
             (pmxtmp != _IC_NODATA))
@@ -7389,7 +10077,7 @@ def _decomposition(
                 structural material
 
         """
-        valid_mask = (~numpy.isclose(pH, pH_nodata))
+        valid_mask = _valid_mask(pH, pH_nodata)
         pheff_struc = numpy.empty(pH.shape, dtype=numpy.float32)
         pheff_struc[valid_mask] = numpy.clip(
             (0.5 + (1.1 / numpy.pi) *
@@ -7412,7 +10100,7 @@ def _decomposition(
                 metabolic material
 
         """
-        valid_mask = (~numpy.isclose(pH, pH_nodata))
+        valid_mask = _valid_mask(pH, pH_nodata)
         pheff_metab = numpy.empty(pH.shape, dtype=numpy.float32)
         pheff_metab[valid_mask] = numpy.clip(
             (0.5 + (1.14 / numpy.pi) *
@@ -7435,7 +10123,7 @@ def _decomposition(
                 SOM3
 
         """
-        valid_mask = (~numpy.isclose(pH, pH_nodata))
+        valid_mask = _valid_mask(pH, pH_nodata)
         pheff_metab = numpy.empty(pH.shape, dtype=numpy.float32)
         pheff_metab[valid_mask] = numpy.clip(
             (0.5 + (1.1 / numpy.pi) *
@@ -7454,49 +10142,40 @@ def _decomposition(
     temp_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
     temp_val_dict = {}
     for val in [
-            'd_statv_temp', 'operand_temp', 'shwave', 'pevap', 'rprpet',
-            'daylength', 'sum_aglivc', 'sum_stdedc', 'biomass', 'stemp',
-            'defac', 'anerb', 'gromin_1', 'pheff_struc', 'pheff_metab',
-            'aminrl_1', 'aminrl_2', 'fsol', 'tcflow', 'tosom2',
-            'net_tosom2', 'tosom1', 'net_tosom1', 'tosom3', 'cleach',
-            'pheff_som3', 'pflow']:
+            'shwave', 'pevap', 'rprpet', 'daylength', 'sum_aglivc',
+            'sum_stdedc', 'biomass', 'stemp', 'defac', 'anerb', 'pheff_struc',
+            'pheff_metab']:
         temp_val_dict[val] = os.path.join(temp_dir, '{}.tif'.format(val))
-        for iel in [1, 2]:
-            for val in ['rceto1', 'rceto2', 'rceto3']:
-                temp_val_dict['{}_{}'.format(val, iel)] = os.path.join(
-                    temp_dir, '{}.tif'.format('{}_{}'.format(val, iel)))
+    # site parameters used inside the decomposition kernel
+    decomp_param_list = [
+        'sorpmx', 'pslsrb', 'strmax_1', 'dec1_1', 'pligst_1', 'strmax_2',
+        'dec1_2', 'pligst_2', 'rsplig', 'ps1co2_1', 'ps1co2_2', 'dec2_1',
+        'pcemic1_1_1', 'pcemic1_2_1', 'pcemic1_3_1', 'pcemic1_1_2',
+        'pcemic1_2_2', 'pcemic1_3_2', 'varat1_1_1', 'varat1_2_1',
+        'varat1_3_1', 'varat1_1_2', 'varat1_2_2', 'varat1_3_2', 'dec2_2',
+        'pmco2_1', 'pmco2_2', 'rad1p_1_1', 'rad1p_2_1', 'rad1p_3_1',
+        'rad1p_1_2', 'rad1p_2_2', 'rad1p_3_2', 'dec3_1', 'p1co2a_1',
+        'varat22_1_1', 'varat22_2_1', 'varat22_3_1', 'varat22_1_2',
+        'varat22_2_2', 'varat22_3_2', 'dec3_2', 'animpt', 'varat3_1_1',
+        'varat3_2_1', 'varat3_3_1', 'varat3_1_2', 'varat3_2_2',
+        'varat3_3_2', 'omlech_3', 'dec5_2', 'p2co2_2', 'dec5_1', 'p2co2_1',
+        'dec4', 'p3co2', 'cmix', 'pparmn_2', 'psecmn_2', 'pmnsec_2',
+        'psecoc1', 'psecoc2', 'epnfs_2']
     param_val_dict = {}
     for val in [
             'fwloss_4', 'elitst', 'pmntmp', 'pmxtmp', 'teff_1', 'teff_2',
-            'teff_3', 'teff_4', 'drain', 'aneref_1', 'aneref_2', 'aneref_3',
-            'sorpmx', 'pslsrb', 'strmax_1', 'dec1_1', 'pligst_1', 'strmax_2',
-            'dec1_2', 'pligst_2', 'rsplig', 'ps1co2_1', 'ps1co2_2', 'dec2_1',
-            'pcemic1_1_1', 'pcemic1_2_1', 'pcemic1_3_1', 'pcemic1_1_2',
-            'pcemic1_2_2', 'pcemic1_3_2', 'varat1_1_1', 'varat1_2_1',
-            'varat1_3_1', 'varat1_1_2', 'varat1_2_2', 'varat1_3_2', 'dec2_2',
-            'pmco2_1', 'pmco2_2', 'rad1p_1_1', 'rad1p_2_1', 'rad1p_3_1',
-            'rad1p_1_2', 'rad1p_2_2', 'rad1p_3_2', 'dec3_1', 'p1co2a_1',
-            'varat22_1_1', 'varat22_2_1', 'varat22_3_1', 'varat22_1_2',
-            'varat22_2_2', 'varat22_3_2', 'dec3_2', 'animpt', 'varat3_1_1',
-            'varat3_2_1', 'varat3_3_1', 'varat3_1_2', 'varat3_2_2',
-            'varat3_3_2', 'omlech_3', 'dec5_2', 'p2co2_2', 'dec5_1', 'p2co2_1',
-            'dec4', 'p3co2', 'cmix', 'pparmn_2', 'psecmn_2', 'nlayer',
-            'pmnsec_2', 'psecoc1', 'psecoc2', 'epnfs_2']:
+            'teff_3', 'teff_4', 'drain', 'aneref_1', 'aneref_2',
+            'aneref_3'] + decomp_param_list:
         target_path = os.path.join(temp_dir, '{}.tif'.format(val))
-        param_val_dict[val] = target_path
-        site_to_val = dict(
-            [(site_code, float(table[val])) for
-                (site_code, table) in site_param_table.items()])
-        pygeoprocessing.reclassify_raster(
-            (aligned_inputs['site_index'], 1), site_to_val, target_path,
-            gdal.GDT_Float32, _IC_NODATA)
+        param_val_dict[val] = _site_param_raster(
+            aligned_inputs['site_index'], site_param_table, val, target_path)
 
     # shwave, shortwave radiation outside the atmosphere
-    _shortwave_radiation(
+    temp_val_dict['shwave'] = _monthly_shortwave_radiation(
         aligned_inputs['site_index'], current_month, temp_val_dict['shwave'])
 
     # pet, reference evapotranspiration modified by fwloss parameter
-    _reference_evapotranspiration(
+    temp_val_dict['pevap'] = _monthly_reference_evapotranspiration(
         aligned_inputs['max_temp_{}'.format(current_month)],
         aligned_inputs['min_temp_{}'.format(current_month)],
         temp_val_dict['shwave'], param_val_dict['fwloss_4'],
@@ -7518,7 +10197,7 @@ def _decomposition(
         _TARGET_NODATA)
 
     # estimated daylength
-    _calc_daylength(
+    temp_val_dict['daylength'] = _monthly_daylength(
         aligned_inputs['site_index'], current_month,
         temp_val_dict['daylength'])
 
@@ -7560,953 +10239,427 @@ def _decomposition(
         [(path, 1) for path in [
             temp_val_dict['rprpet'], temp_val_dict['pevap'],
             param_val_dict['drain'], param_val_dict['aneref_1'],
-            param_val_dict['aneref_2'], param_val_dict['aneref_3']]],
-        calc_anerb, temp_val_dict['anerb'], gdal.GDT_Float32,
-        _TARGET_NODATA)
-
-    # initialize gromin_1, gross mineralization of N
-    pygeoprocessing.new_raster_from_base(
-        aligned_inputs['site_index'], temp_val_dict['gromin_1'],
-        gdal.GDT_Float32, [_TARGET_NODATA], fill_value_list=[0])
-
-    # pH effect on decomposition for structural material
-    pygeoprocessing.raster_calculator(
-        [(aligned_inputs['ph_path'], 1)],
-        calc_pheff_struc, temp_val_dict['pheff_struc'], gdal.GDT_Float32,
-        _TARGET_NODATA)
-
-    # pH effect on decomposition for metabolic material
-    pygeoprocessing.raster_calculator(
-        [(aligned_inputs['ph_path'], 1)],
-        calc_pheff_metab, temp_val_dict['pheff_metab'], gdal.GDT_Float32,
-        _TARGET_NODATA)
-
-    # initialize aminrl_1 and aminrl_2
-    shutil.copyfile(prev_sv_reg['minerl_1_1_path'], temp_val_dict['aminrl_1'])
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            prev_sv_reg['minerl_1_2_path'], param_val_dict['sorpmx'],
-            param_val_dict['pslsrb']]],
-        fsfunc, temp_val_dict['fsol'], gdal.GDT_Float32, _TARGET_NODATA)
-    raster_multiplication(
-        prev_sv_reg['minerl_1_2_path'], _SV_NODATA,
-        temp_val_dict['fsol'], _TARGET_NODATA,
-        temp_val_dict['aminrl_2'], _SV_NODATA)
-
-    # initialize current month state variables and delta state variable dict
-    nlayer_max = int(max(
-        val['nlayer'] for val in site_param_table.values()))
-    delta_sv_dict = {
-        'minerl_1_1': os.path.join(temp_dir, 'minerl_1_1.tif'),
-        'parent_2': os.path.join(temp_dir, 'parent_2.tif'),
-        'secndy_2': os.path.join(temp_dir, 'secndy_2.tif'),
-        'occlud': os.path.join(temp_dir, 'occlud.tif'),
-    }
-    for lyr in range(1, nlayer_max + 1):
-        state_var = 'minerl_{}_2'.format(lyr)
-        shutil.copyfile(
-            prev_sv_reg['{}_path'.format(state_var)],
-            sv_reg['{}_path'.format(state_var)])
-        delta_sv_dict[state_var] = os.path.join(
-            temp_dir, '{}.tif'.format(state_var))
-    # initialize mineral N in current sv_reg
-    for lyr in range(1, nlayer_max + 1):
-        state_var = 'minerl_{}_1'.format(lyr)
-        shutil.copyfile(
-            prev_sv_reg['{}_path'.format(state_var)],
-            sv_reg['{}_path'.format(state_var)])
-    for compartment in ['strlig']:
-        for lyr in [1, 2]:
-            state_var = '{}_{}'.format(compartment, lyr)
-            shutil.copyfile(
-                prev_sv_reg['{}_path'.format(state_var)],
-                sv_reg['{}_path'.format(state_var)])
-    for compartment in ['som3']:
-        state_var = '{}c'.format(compartment)
-        delta_sv_dict[state_var] = os.path.join(
-            temp_dir, '{}.tif'.format(state_var))
-        shutil.copyfile(
-            prev_sv_reg['{}_path'.format(state_var)],
-            sv_reg['{}_path'.format(state_var)])
-        for iel in [1, 2]:
-            state_var = '{}e_{}'.format(compartment, iel)
-            delta_sv_dict[state_var] = os.path.join(
-                temp_dir, '{}.tif'.format(state_var))
-            shutil.copyfile(
-                prev_sv_reg['{}_path'.format(state_var)],
-                sv_reg['{}_path'.format(state_var)])
-    for compartment in ['struc', 'metab', 'som1', 'som2']:
-        for lyr in [1, 2]:
-            state_var = '{}c_{}'.format(compartment, lyr)
-            delta_sv_dict[state_var] = os.path.join(
-                temp_dir, '{}.tif'.format(state_var))
-            shutil.copyfile(
-                prev_sv_reg['{}_path'.format(state_var)],
-                sv_reg['{}_path'.format(state_var)])
-            for iel in [1, 2]:
-                state_var = '{}e_{}_{}'.format(compartment, lyr, iel)
-                delta_sv_dict[state_var] = os.path.join(
-                    temp_dir, '{}.tif'.format(state_var))
-                shutil.copyfile(
-                    prev_sv_reg['{}_path'.format(state_var)],
-                    sv_reg['{}_path'.format(state_var)])
-    for state_var in ['parent_2', 'secndy_2', 'occlud']:
-        shutil.copyfile(
-            prev_sv_reg['{}_path'.format(state_var)],
-            sv_reg['{}_path'.format(state_var)])
-
-    for dtm in range(4):
-        # initialize change (delta, d) in state variables for this decomp step
-        for state_var in delta_sv_dict.keys():
-            pygeoprocessing.new_raster_from_base(
-                aligned_inputs['site_index'], delta_sv_dict[state_var],
-                gdal.GDT_Float32, [_IC_NODATA], fill_value_list=[0])
-        if dtm == 0:
-            # schedule flow of N from atmospheric fixation to surface mineral
-            pygeoprocessing.raster_calculator(
-                [(path, 1) for path in [
-                    aligned_inputs['precip_{}'.format(month_index)],
-                    year_reg['annual_precip_path'], year_reg['baseNdep_path'],
-                    param_val_dict['epnfs_2']]],
-                calc_N_fixation, delta_sv_dict['minerl_1_1'],
-                gdal.GDT_Float32, _IC_NODATA)
-
-        # decomposition of structural material in surface and soil
-        for lyr in [1, 2]:
-            if lyr == 1:
-                pygeoprocessing.raster_calculator(
-                    [(path, 1) for path in [
-                        temp_val_dict['aminrl_1'], temp_val_dict['aminrl_2'],
-                        sv_reg['strucc_1_path'], sv_reg['struce_1_1_path'],
-                        sv_reg['struce_1_2_path'], pp_reg['rnewas_1_1_path'],
-                        pp_reg['rnewas_2_1_path'], param_val_dict['strmax_1'],
-                        temp_val_dict['defac'], param_val_dict['dec1_1'],
-                        param_val_dict['pligst_1'], sv_reg['strlig_1_path'],
-                        temp_val_dict['pheff_struc']]],
-                    calc_tcflow_strucc_1, temp_val_dict['tcflow'],
-                    gdal.GDT_Float32, _IC_NODATA)
-            else:
-                pygeoprocessing.raster_calculator(
-                    [(path, 1) for path in [
-                        temp_val_dict['aminrl_1'], temp_val_dict['aminrl_2'],
-                        sv_reg['strucc_2_path'], sv_reg['struce_2_1_path'],
-                        sv_reg['struce_2_2_path'], pp_reg['rnewbs_1_1_path'],
-                        pp_reg['rnewbs_2_1_path'], param_val_dict['strmax_2'],
-                        temp_val_dict['defac'], param_val_dict['dec1_2'],
-                        param_val_dict['pligst_2'], sv_reg['strlig_2_path'],
-                        temp_val_dict['pheff_struc'], temp_val_dict['anerb']]],
-                    calc_tcflow_strucc_2, temp_val_dict['tcflow'],
-                    gdal.GDT_Float32, _IC_NODATA)
-            shutil.copyfile(
-                delta_sv_dict['strucc_{}'.format(lyr)],
-                temp_val_dict['d_statv_temp'])
-
-            raster_difference(
-                temp_val_dict['d_statv_temp'], _IC_NODATA,
-                temp_val_dict['tcflow'], _IC_NODATA,
-                delta_sv_dict['strucc_{}'.format(lyr)], _IC_NODATA)
-
-            # structural material decomposes first to SOM2
-            raster_multiplication(
-                temp_val_dict['tcflow'], _IC_NODATA,
-                sv_reg['strlig_{}_path'.format(lyr)], _SV_NODATA,
-                temp_val_dict['tosom2'], _IC_NODATA)
-            # microbial respiration with decomposition to SOM2
-            respiration(
-                temp_val_dict['tosom2'], param_val_dict['rsplig'],
-                sv_reg['strucc_{}_path'.format(lyr)],
-                sv_reg['struce_{}_1_path'.format(lyr)],
-                delta_sv_dict['struce_{}_1'.format(lyr)],
-                delta_sv_dict['minerl_1_1'],
-                gromin_1_path=temp_val_dict['gromin_1'])
-            respiration(
-                temp_val_dict['tosom2'], param_val_dict['rsplig'],
-                sv_reg['strucc_{}_path'.format(lyr)],
-                sv_reg['struce_{}_2_path'.format(lyr)],
-                delta_sv_dict['struce_{}_2'.format(lyr)],
-                delta_sv_dict['minerl_1_2'])
-
-            pygeoprocessing.raster_calculator(
-                [(path, 1) for path in [
-                    temp_val_dict['tosom2'], param_val_dict['rsplig']]],
-                calc_net_cflow, temp_val_dict['net_tosom2'], gdal.GDT_Float32,
-                _IC_NODATA)
-            shutil.copyfile(
-                delta_sv_dict['som2c_{}'.format(lyr)],
-                temp_val_dict['d_statv_temp'])
-            raster_sum(
-                temp_val_dict['d_statv_temp'], _IC_NODATA,
-                temp_val_dict['net_tosom2'], _IC_NODATA,
-                delta_sv_dict['som2c_{}'.format(lyr)], _IC_NODATA)
-
-            if lyr == 1:
-                rcetob = 'rnewas'
-            else:
-                rcetob = 'rnewbs'
-            # N and P flows from STRUC to SOM2
-            nutrient_flow(
-                temp_val_dict['net_tosom2'],
-                sv_reg['strucc_{}_path'.format(lyr)],
-                sv_reg['struce_{}_1_path'.format(lyr)],
-                pp_reg['{}_1_2_path'.format(rcetob)],
-                sv_reg['minerl_1_1_path'],
-                delta_sv_dict['struce_{}_1'.format(lyr)],
-                delta_sv_dict['som2e_{}_1'.format(lyr)],
-                delta_sv_dict['minerl_1_1'],
-                gromin_path=temp_val_dict['gromin_1'])
-            nutrient_flow(
-                temp_val_dict['net_tosom2'],
-                sv_reg['strucc_{}_path'.format(lyr)],
-                sv_reg['struce_{}_2_path'.format(lyr)],
-                pp_reg['{}_2_2_path'.format(rcetob)],
-                sv_reg['minerl_1_2_path'],
-                delta_sv_dict['struce_{}_2'.format(lyr)],
-                delta_sv_dict['som2e_{}_2'.format(lyr)],
-                delta_sv_dict['minerl_1_2'])
-
-            # structural material decomposes next to SOM1
-            raster_difference(
-                temp_val_dict['tcflow'], _IC_NODATA, temp_val_dict['tosom2'],
-                _IC_NODATA, temp_val_dict['tosom1'], _IC_NODATA)
-            # microbial respiration with decomposition to SOM1
-            respiration(
-                temp_val_dict['tosom1'],
-                param_val_dict['ps1co2_{}'.format(lyr)],
-                sv_reg['strucc_{}_path'.format(lyr)],
-                sv_reg['struce_{}_1_path'.format(lyr)],
-                delta_sv_dict['struce_{}_1'.format(lyr)],
-                delta_sv_dict['minerl_1_1'],
-                gromin_1_path=temp_val_dict['gromin_1'])
-            respiration(
-                temp_val_dict['tosom1'],
-                param_val_dict['ps1co2_{}'.format(lyr)],
-                sv_reg['strucc_{}_path'.format(lyr)],
-                sv_reg['struce_{}_2_path'.format(lyr)],
-                delta_sv_dict['struce_{}_2'.format(lyr)],
-                delta_sv_dict['minerl_1_2'])
-
-            pygeoprocessing.raster_calculator(
-                [(path, 1) for path in [
-                    temp_val_dict['tosom1'],
-                    param_val_dict['ps1co2_{}'.format(lyr)]]],
-                calc_net_cflow, temp_val_dict['net_tosom1'], gdal.GDT_Float32,
-                _IC_NODATA)
-            shutil.copyfile(
-                delta_sv_dict['som1c_{}'.format(lyr)],
-                temp_val_dict['d_statv_temp'])
-            raster_sum(
-                temp_val_dict['d_statv_temp'], _IC_NODATA,
-                temp_val_dict['net_tosom1'], _IC_NODATA,
-                delta_sv_dict['som1c_{}'.format(lyr)], _IC_NODATA)
-
-            if lyr == 1:
-                rcetob = 'rnewas'
-            else:
-                rcetob = 'rnewbs'
-            # N and P flows from STRUC to SOM1
-            nutrient_flow(
-                temp_val_dict['net_tosom1'],
-                sv_reg['strucc_{}_path'.format(lyr)],
-                sv_reg['struce_{}_1_path'.format(lyr)],
-                pp_reg['{}_1_1_path'.format(rcetob)],
-                sv_reg['minerl_1_1_path'],
-                delta_sv_dict['struce_{}_1'.format(lyr)],
-                delta_sv_dict['som1e_{}_1'.format(lyr)],
-                delta_sv_dict['minerl_1_1'],
-                gromin_path=temp_val_dict['gromin_1'])
-            nutrient_flow(
-                temp_val_dict['net_tosom1'],
-                sv_reg['strucc_{}_path'.format(lyr)],
-                sv_reg['struce_{}_2_path'.format(lyr)],
-                pp_reg['{}_2_1_path'.format(rcetob)],
-                sv_reg['minerl_1_2_path'],
-                delta_sv_dict['struce_{}_2'.format(lyr)],
-                delta_sv_dict['som1e_{}_2'.format(lyr)],
-                delta_sv_dict['minerl_1_2'])
-
-        # decomposition of metabolic material in surface and soil to SOM1
-        for lyr in [1, 2]:
-            if lyr == 1:
-                for iel in [1, 2]:
-                    # required ratio for surface metabolic decomposing to SOM1
-                    pygeoprocessing.raster_calculator(
-                        [(path, 1) for path in [
-                            sv_reg['metabe_1_{}_path'.format(iel)],
-                            sv_reg['metabc_1_path'],
-                            param_val_dict['pcemic1_1_{}'.format(iel)],
-                            param_val_dict['pcemic1_2_{}'.format(iel)],
-                            param_val_dict['pcemic1_3_{}'.format(iel)]]],
-                        _aboveground_ratio,
-                        temp_val_dict['rceto1_{}'.format(iel)],
-                        gdal.GDT_Float32, _TARGET_NODATA)
-                pygeoprocessing.raster_calculator(
-                    [(path, 1) for path in [
-                        temp_val_dict['aminrl_1'], temp_val_dict['aminrl_2'],
-                        sv_reg['metabc_1_path'], sv_reg['metabe_1_1_path'],
-                        sv_reg['metabe_1_2_path'], temp_val_dict['rceto1_1'],
-                        temp_val_dict['rceto1_2'], temp_val_dict['defac'],
-                        param_val_dict['dec2_1'],
-                        temp_val_dict['pheff_metab']]],
-                    calc_tcflow_surface, temp_val_dict['tcflow'],
-                    gdal.GDT_Float32, _IC_NODATA)
-            else:
-                for iel in [1, 2]:
-                    # required ratio for soil metabolic decomposing to SOM1
-                    pygeoprocessing.raster_calculator(
-                        [(path, 1) for path in [
-                            temp_val_dict['aminrl_{}'.format(iel)],
-                            param_val_dict['varat1_1_{}'.format(iel)],
-                            param_val_dict['varat1_2_{}'.format(iel)],
-                            param_val_dict['varat1_3_{}'.format(iel)]]],
-                        _belowground_ratio,
-                        temp_val_dict['rceto1_{}'.format(iel)],
-                        gdal.GDT_Float32, _TARGET_NODATA)
-                pygeoprocessing.raster_calculator(
-                    [(path, 1) for path in [
-                        temp_val_dict['aminrl_1'], temp_val_dict['aminrl_2'],
-                        sv_reg['metabc_2_path'], sv_reg['metabe_2_1_path'],
-                        sv_reg['metabe_2_2_path'], temp_val_dict['rceto1_1'],
-                        temp_val_dict['rceto1_2'], temp_val_dict['defac'],
-                        param_val_dict['dec2_2'], temp_val_dict['pheff_metab'],
-                        temp_val_dict['anerb']]],
-                    calc_tcflow_soil, temp_val_dict['tcflow'],
-                    gdal.GDT_Float32, _IC_NODATA)
-            shutil.copyfile(
-                delta_sv_dict['metabc_{}'.format(lyr)],
-                temp_val_dict['d_statv_temp'])
-            raster_difference(
-                temp_val_dict['d_statv_temp'], _IC_NODATA,
-                temp_val_dict['tcflow'], _IC_NODATA,
-                delta_sv_dict['metabc_{}'.format(lyr)], _IC_NODATA)
-            # microbial respiration with decomposition to SOM1
-            respiration(
-                temp_val_dict['tcflow'],
-                param_val_dict['pmco2_{}'.format(lyr)],
-                sv_reg['metabc_{}_path'.format(lyr)],
-                sv_reg['metabe_{}_1_path'.format(lyr)],
-                delta_sv_dict['metabe_{}_1'.format(lyr)],
-                delta_sv_dict['minerl_1_1'],
-                gromin_1_path=temp_val_dict['gromin_1'])
-            respiration(
-                temp_val_dict['tcflow'],
-                param_val_dict['pmco2_{}'.format(lyr)],
-                sv_reg['metabc_{}_path'.format(lyr)],
-                sv_reg['metabe_{}_2_path'.format(lyr)],
-                delta_sv_dict['metabe_{}_2'.format(lyr)],
-                delta_sv_dict['minerl_1_2'])
-
-            pygeoprocessing.raster_calculator(
-                [(path, 1) for path in [
-                    temp_val_dict['tcflow'],
-                    param_val_dict['pmco2_{}'.format(lyr)]]],
-                calc_net_cflow, temp_val_dict['net_tosom1'], gdal.GDT_Float32,
-                _IC_NODATA)
-            shutil.copyfile(
-                delta_sv_dict['som1c_{}'.format(lyr)],
-                temp_val_dict['d_statv_temp'])
-            raster_sum(
-                temp_val_dict['d_statv_temp'], _IC_NODATA,
-                temp_val_dict['net_tosom1'], _IC_NODATA,
-                delta_sv_dict['som1c_{}'.format(lyr)], _IC_NODATA)
-
-            nutrient_flow(
-                temp_val_dict['net_tosom1'],
-                sv_reg['metabc_{}_path'.format(lyr)],
-                sv_reg['metabe_{}_1_path'.format(lyr)],
-                temp_val_dict['rceto1_1'], sv_reg['minerl_1_1_path'],
-                delta_sv_dict['metabe_{}_1'.format(lyr)],
-                delta_sv_dict['som1e_{}_1'.format(lyr)],
-                delta_sv_dict['minerl_1_1'],
-                gromin_path=temp_val_dict['gromin_1'])
-            nutrient_flow(
-                temp_val_dict['net_tosom1'],
-                sv_reg['metabc_{}_path'.format(lyr)],
-                sv_reg['metabe_{}_2_path'.format(lyr)],
-                temp_val_dict['rceto1_2'], sv_reg['minerl_1_2_path'],
-                delta_sv_dict['metabe_{}_2'.format(lyr)],
-                delta_sv_dict['som1e_{}_2'.format(lyr)],
-                delta_sv_dict['minerl_1_2'])
-
-        # decomposition of surface SOM1 to surface SOM2: line 63 Somdec.f
-        for iel in [1, 2]:
-            pygeoprocessing.raster_calculator(
-                [(path, 1) for path in [
-                    sv_reg['som1c_1_path'],
-                    sv_reg['som1e_1_{}_path'.format(iel)],
-                    param_val_dict['rad1p_1_{}'.format(iel)],
-                    param_val_dict['rad1p_2_{}'.format(iel)],
-                    param_val_dict['rad1p_3_{}'.format(iel)],
-                    param_val_dict['pcemic1_2_{}'.format(iel)]]],
-                calc_surface_som2_ratio,
-                temp_val_dict['rceto2_{}'.format(iel)],
-                gdal.GDT_Float32, _TARGET_NODATA)
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                temp_val_dict['aminrl_1'], temp_val_dict['aminrl_2'],
-                sv_reg['som1c_1_path'], sv_reg['som1e_1_1_path'],
-                sv_reg['som1e_1_2_path'], temp_val_dict['rceto2_1'],
-                temp_val_dict['rceto2_2'], temp_val_dict['defac'],
-                param_val_dict['dec3_1'],
-                temp_val_dict['pheff_struc']]],
-            calc_tcflow_surface, temp_val_dict['tcflow'],
-            gdal.GDT_Float32, _IC_NODATA)
-        shutil.copyfile(
-            delta_sv_dict['som1c_1'], temp_val_dict['d_statv_temp'])
-        raster_difference(
-            temp_val_dict['d_statv_temp'], _IC_NODATA,
-            temp_val_dict['tcflow'], _IC_NODATA,
-            delta_sv_dict['som1c_1'], _IC_NODATA)
-        # microbial respiration with decomposition to SOM2
-        respiration(
-            temp_val_dict['tcflow'], param_val_dict['p1co2a_1'],
-            sv_reg['som1c_1_path'], sv_reg['som1e_1_1_path'],
-            delta_sv_dict['som1e_1_1'], delta_sv_dict['minerl_1_1'],
-            gromin_1_path=temp_val_dict['gromin_1'])
-        respiration(
-            temp_val_dict['tcflow'], param_val_dict['p1co2a_1'],
-            sv_reg['som1c_1_path'], sv_reg['som1e_1_2_path'],
-            delta_sv_dict['som1e_1_2'], delta_sv_dict['minerl_1_2'])
-
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                temp_val_dict['tcflow'], param_val_dict['p1co2a_1']]],
-            calc_net_cflow, temp_val_dict['net_tosom2'], gdal.GDT_Float32,
-            _IC_NODATA)
-        shutil.copyfile(
-            delta_sv_dict['som2c_1'], temp_val_dict['d_statv_temp'])
-        raster_sum(
-            temp_val_dict['d_statv_temp'], _IC_NODATA,
-            temp_val_dict['net_tosom2'], _IC_NODATA,
-            delta_sv_dict['som2c_1'], _IC_NODATA)
-
-        # N and P flows from som1e_1 to som2e_1, line 123 Somdec.f
-        nutrient_flow(
-            temp_val_dict['net_tosom2'], sv_reg['som1c_1_path'],
-            sv_reg['som1e_1_1_path'], temp_val_dict['rceto2_1'],
-            sv_reg['minerl_1_1_path'], delta_sv_dict['som1e_1_1'],
-            delta_sv_dict['som2e_1_1'], delta_sv_dict['minerl_1_1'],
-            gromin_path=temp_val_dict['gromin_1'])
-        nutrient_flow(
-            temp_val_dict['net_tosom2'], sv_reg['som1c_1_path'],
-            sv_reg['som1e_1_2_path'], temp_val_dict['rceto2_2'],
-            sv_reg['minerl_1_2_path'], delta_sv_dict['som1e_1_2'],
-            delta_sv_dict['som2e_1_2'], delta_sv_dict['minerl_1_2'])
-
-        # soil SOM1 decomposes to soil SOM3 and SOM2, line 137 Somdec.f
-        for iel in [1, 2]:
-            # required ratio for soil SOM1 decomposing to SOM2
-            pygeoprocessing.raster_calculator(
-                [(path, 1) for path in [
-                    temp_val_dict['aminrl_{}'.format(iel)],
-                    param_val_dict['varat22_1_{}'.format(iel)],
-                    param_val_dict['varat22_2_{}'.format(iel)],
-                    param_val_dict['varat22_3_{}'.format(iel)]]],
-                _belowground_ratio,
-                temp_val_dict['rceto2_{}'.format(iel)],
-                gdal.GDT_Float32, _TARGET_NODATA)
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                temp_val_dict['aminrl_1'], temp_val_dict['aminrl_2'],
-                sv_reg['som1c_2_path'], sv_reg['som1e_2_1_path'],
-                sv_reg['som1e_2_2_path'], temp_val_dict['rceto2_1'],
-                temp_val_dict['rceto2_2'], temp_val_dict['defac'],
-                param_val_dict['dec3_2'], pp_reg['eftext_path'],
-                temp_val_dict['anerb'], temp_val_dict['pheff_metab']]],
-            calc_tcflow_som1c_2, temp_val_dict['tcflow'],
-            gdal.GDT_Float32, _IC_NODATA)
-        shutil.copyfile(
-            delta_sv_dict['som1c_2'], temp_val_dict['d_statv_temp'])
-        raster_difference(
-            temp_val_dict['d_statv_temp'], _IC_NODATA,
-            temp_val_dict['tcflow'], _IC_NODATA,
-            delta_sv_dict['som1c_2'], _IC_NODATA)
-        # microbial respiration with decomposition to SOM3, line 179
-        respiration(
-            temp_val_dict['tcflow'], pp_reg['p1co2_2_path'],
-            sv_reg['som1c_2_path'], sv_reg['som1e_2_1_path'],
-            delta_sv_dict['som1e_2_1'], delta_sv_dict['minerl_1_1'],
-            gromin_1_path=temp_val_dict['gromin_1'])
-        respiration(
-            temp_val_dict['tcflow'], pp_reg['p1co2_2_path'],
-            sv_reg['som1c_2_path'], sv_reg['som1e_2_2_path'],
-            delta_sv_dict['som1e_2_2'], delta_sv_dict['minerl_1_2'])
-
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                temp_val_dict['tcflow'], pp_reg['fps1s3_path'],
-                param_val_dict['animpt'], temp_val_dict['anerb']]],
-            calc_som3_flow, temp_val_dict['tosom3'], gdal.GDT_Float32,
-            _IC_NODATA)
-        shutil.copyfile(delta_sv_dict['som3c'], temp_val_dict['d_statv_temp'])
-        raster_sum(
-            temp_val_dict['d_statv_temp'], _IC_NODATA,
-            temp_val_dict['tosom3'], _IC_NODATA,
-            delta_sv_dict['som3c'], _IC_NODATA)
-        for iel in [1, 2]:
-            # required ratio for soil SOM1 decomposing to SOM3, line 198
-            pygeoprocessing.raster_calculator(
-                [(path, 1) for path in [
-                    temp_val_dict['aminrl_{}'.format(iel)],
-                    param_val_dict['varat3_1_{}'.format(iel)],
-                    param_val_dict['varat3_2_{}'.format(iel)],
-                    param_val_dict['varat3_3_{}'.format(iel)]]],
-                _belowground_ratio,
-                temp_val_dict['rceto3_{}'.format(iel)],
-                gdal.GDT_Float32, _TARGET_NODATA)
-        nutrient_flow(
-            temp_val_dict['tosom3'], sv_reg['som1c_2_path'],
-            sv_reg['som1e_2_1_path'], temp_val_dict['rceto3_1'],
-            sv_reg['minerl_1_1_path'], delta_sv_dict['som1e_2_1'],
-            delta_sv_dict['som3e_1'], delta_sv_dict['minerl_1_1'],
-            gromin_path=temp_val_dict['gromin_1'])
-        nutrient_flow(
-            temp_val_dict['tosom3'], sv_reg['som1c_2_path'],
-            sv_reg['som1e_2_2_path'], temp_val_dict['rceto3_2'],
-            sv_reg['minerl_1_2_path'], delta_sv_dict['som1e_2_2'],
-            delta_sv_dict['som3e_2'], delta_sv_dict['minerl_1_2'])
-
-        # organic leaching: line 204 Somdec.f
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                month_reg['amov_2'], temp_val_dict['tcflow'],
-                param_val_dict['omlech_3'], pp_reg['orglch_path']]],
-            calc_c_leach, temp_val_dict['cleach'], gdal.GDT_Float32,
-            _TARGET_NODATA)
-        for iel in [1, 2]:
-            remove_leached_iel(
-                sv_reg['som1c_2_path'], sv_reg['som1e_2_{}_path'.format(iel)],
-                temp_val_dict['cleach'],
-                delta_sv_dict['som1e_2_{}'.format(iel)], iel)
-
-        # rest of flow from soil SOM1 goes to SOM2
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                temp_val_dict['tcflow'], pp_reg['p1co2_2_path'],
-                temp_val_dict['tosom3'], temp_val_dict['cleach']]],
-            calc_net_cflow_tosom2, temp_val_dict['net_tosom2'],
-            gdal.GDT_Float32, _IC_NODATA)
-        shutil.copyfile(
-            delta_sv_dict['som2c_2'], temp_val_dict['d_statv_temp'])
-        raster_sum(
-            temp_val_dict['d_statv_temp'], _IC_NODATA,
-            temp_val_dict['net_tosom2'], _IC_NODATA,
-            delta_sv_dict['som2c_2'], _IC_NODATA)
-        # N and P flows from soil SOM1 to soil SOM2, line 257
-        nutrient_flow(
-            temp_val_dict['net_tosom2'],
-            sv_reg['som1c_2_path'], sv_reg['som1e_2_1_path'],
-            temp_val_dict['rceto2_1'], sv_reg['minerl_1_1_path'],
-            delta_sv_dict['som1e_2_1'], delta_sv_dict['som2e_2_1'],
-            delta_sv_dict['minerl_1_1'],
-            gromin_path=temp_val_dict['gromin_1'])
-        nutrient_flow(
-            temp_val_dict['net_tosom2'],
-            sv_reg['som1c_2_path'], sv_reg['som1e_2_2_path'],
-            temp_val_dict['rceto2_2'], sv_reg['minerl_1_2_path'],
-            delta_sv_dict['som1e_2_2'], delta_sv_dict['som2e_2_2'],
-            delta_sv_dict['minerl_1_2'])
-
-        # soil SOM2 decomposing to soil SOM1 and SOM3, line 269
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                temp_val_dict['aminrl_1'], temp_val_dict['aminrl_2'],
-                sv_reg['som2c_2_path'], sv_reg['som2e_2_1_path'],
-                sv_reg['som2e_2_2_path'], temp_val_dict['rceto1_1'],
-                temp_val_dict['rceto1_2'], temp_val_dict['defac'],
-                param_val_dict['dec5_2'], temp_val_dict['pheff_metab'],
-                temp_val_dict['anerb']]],
-            calc_tcflow_soil, temp_val_dict['tcflow'],
-            gdal.GDT_Float32, _IC_NODATA)
-        shutil.copyfile(
-            delta_sv_dict['som2c_2'], temp_val_dict['d_statv_temp'])
-        raster_difference(
-            temp_val_dict['d_statv_temp'], _IC_NODATA,
-            temp_val_dict['tcflow'], _IC_NODATA,
-            delta_sv_dict['som2c_2'], _IC_NODATA)
-        respiration(
-            temp_val_dict['tcflow'], param_val_dict['pmco2_2'],
-            sv_reg['som2c_2_path'], sv_reg['som2e_2_1_path'],
-            delta_sv_dict['som2e_2_1'], delta_sv_dict['minerl_1_1'],
-            gromin_1_path=temp_val_dict['gromin_1'])
-        respiration(
-            temp_val_dict['tcflow'], param_val_dict['pmco2_2'],
-            sv_reg['som2c_2_path'], sv_reg['som2e_2_2_path'],
-            delta_sv_dict['som2e_2_2'], delta_sv_dict['minerl_1_2'])
-
-        # soil SOM2 flows first to SOM3
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                temp_val_dict['tcflow'], pp_reg['fps2s3_path'],
-                param_val_dict['animpt'], temp_val_dict['anerb']]],
-            calc_som3_flow, temp_val_dict['tosom3'], gdal.GDT_Float32,
-            _IC_NODATA)
-        shutil.copyfile(delta_sv_dict['som3c'], temp_val_dict['d_statv_temp'])
-        raster_sum(
-            temp_val_dict['d_statv_temp'], _IC_NODATA,
-            temp_val_dict['tosom3'], _IC_NODATA,
-            delta_sv_dict['som3c'], _IC_NODATA)
-        nutrient_flow(
-            temp_val_dict['tosom3'], sv_reg['som2c_2_path'],
-            sv_reg['som2e_2_1_path'], temp_val_dict['rceto3_1'],
-            sv_reg['minerl_1_1_path'], delta_sv_dict['som2e_2_1'],
-            delta_sv_dict['som3e_1'], delta_sv_dict['minerl_1_1'],
-            gromin_path=temp_val_dict['gromin_1'])
-        nutrient_flow(
-            temp_val_dict['tosom3'], sv_reg['som2c_2_path'],
-            sv_reg['som2e_2_2_path'], temp_val_dict['rceto3_2'],
-            sv_reg['minerl_1_2_path'], delta_sv_dict['som2e_2_2'],
-            delta_sv_dict['som3e_2'], delta_sv_dict['minerl_1_2'])
-
-        # rest of flow from soil SOM2 goes to soil SOM1
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                temp_val_dict['tcflow'], param_val_dict['p2co2_2'],
-                temp_val_dict['tosom3']]],
-            calc_net_cflow_tosom1, temp_val_dict['net_tosom1'],
-            gdal.GDT_Float32, _IC_NODATA)
-        shutil.copyfile(
-            delta_sv_dict['som1c_2'], temp_val_dict['d_statv_temp'])
-        raster_sum(
-            temp_val_dict['d_statv_temp'], _IC_NODATA,
-            temp_val_dict['net_tosom1'], _IC_NODATA,
-            delta_sv_dict['som1c_2'], _IC_NODATA)
-        nutrient_flow(
-            temp_val_dict['net_tosom1'], sv_reg['som2c_2_path'],
-            sv_reg['som2e_2_1_path'], temp_val_dict['rceto1_1'],
-            sv_reg['minerl_1_1_path'], delta_sv_dict['som2e_2_1'],
-            delta_sv_dict['som1e_2_1'], delta_sv_dict['minerl_1_1'],
-            gromin_path=temp_val_dict['gromin_1'])
-        nutrient_flow(
-            temp_val_dict['net_tosom1'], sv_reg['som2c_2_path'],
-            sv_reg['som2e_2_2_path'], temp_val_dict['rceto1_2'],
-            sv_reg['minerl_1_2_path'], delta_sv_dict['som2e_2_2'],
-            delta_sv_dict['som1e_2_2'], delta_sv_dict['minerl_1_2'])
-
-        # surface SOM2 decomposes to surface SOM1
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                temp_val_dict['aminrl_1'], temp_val_dict['aminrl_2'],
-                sv_reg['som2c_1_path'], sv_reg['som2e_1_1_path'],
-                sv_reg['som2e_1_2_path'], temp_val_dict['rceto1_1'],
-                temp_val_dict['rceto1_2'], temp_val_dict['defac'],
-                param_val_dict['dec5_1'], temp_val_dict['pheff_struc']]],
-            calc_tcflow_surface, temp_val_dict['tcflow'],
-            gdal.GDT_Float32, _IC_NODATA)
-        shutil.copyfile(
-            delta_sv_dict['som2c_1'], temp_val_dict['d_statv_temp'])
-        raster_difference(
-            temp_val_dict['d_statv_temp'], _IC_NODATA,
-            temp_val_dict['tcflow'], _IC_NODATA,
-            delta_sv_dict['som2c_1'], _IC_NODATA)
-        respiration(
-            temp_val_dict['tcflow'], param_val_dict['p2co2_1'],
-            sv_reg['som2c_1_path'], sv_reg['som2e_1_1_path'],
-            delta_sv_dict['som2e_1_1'], delta_sv_dict['minerl_1_1'],
-            gromin_1_path=temp_val_dict['gromin_1'])
-        respiration(
-            temp_val_dict['tcflow'], param_val_dict['p2co2_1'],
-            sv_reg['som2c_1_path'], sv_reg['som2e_1_2_path'],
-            delta_sv_dict['som2e_1_2'], delta_sv_dict['minerl_1_2'])
-
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                temp_val_dict['tcflow'], param_val_dict['p2co2_1']]],
-            calc_net_cflow, temp_val_dict['tosom1'], gdal.GDT_Float32,
-            _IC_NODATA)
-        shutil.copyfile(
-            delta_sv_dict['som1c_1'], temp_val_dict['d_statv_temp'])
-        raster_sum(
-            temp_val_dict['d_statv_temp'], _IC_NODATA,
-            temp_val_dict['tosom1'], _IC_NODATA,
-            delta_sv_dict['som1c_1'], _IC_NODATA)
-        nutrient_flow(
-            temp_val_dict['tosom1'], sv_reg['som2c_1_path'],
-            sv_reg['som2e_1_1_path'], temp_val_dict['rceto1_1'],
-            sv_reg['minerl_1_1_path'], delta_sv_dict['som2e_1_1'],
-            delta_sv_dict['som1e_1_1'], delta_sv_dict['minerl_1_1'],
-            gromin_path=temp_val_dict['gromin_1'])
-        nutrient_flow(
-            temp_val_dict['tosom1'], sv_reg['som2c_1_path'],
-            sv_reg['som2e_1_2_path'], temp_val_dict['rceto1_2'],
-            sv_reg['minerl_1_2_path'], delta_sv_dict['som2e_1_2'],
-            delta_sv_dict['som1e_1_2'], delta_sv_dict['minerl_1_2'])
-
-        # SOM3 decomposing to soil SOM1
-        # pH effect on decomposition of SOM3
-        pygeoprocessing.raster_calculator(
-            [(aligned_inputs['ph_path'], 1)],
-            calc_pheff_som3, temp_val_dict['pheff_som3'], gdal.GDT_Float32,
-            _TARGET_NODATA)
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                temp_val_dict['aminrl_1'], temp_val_dict['aminrl_2'],
-                sv_reg['som3c_path'], sv_reg['som3e_1_path'],
-                sv_reg['som3e_2_path'], temp_val_dict['rceto1_1'],
-                temp_val_dict['rceto1_2'], temp_val_dict['defac'],
-                param_val_dict['dec4'], temp_val_dict['pheff_som3'],
-                temp_val_dict['anerb']]],
-            calc_tcflow_soil, temp_val_dict['tcflow'],
-            gdal.GDT_Float32, _IC_NODATA)
-        shutil.copyfile(
-            delta_sv_dict['som3c'], temp_val_dict['d_statv_temp'])
-        raster_difference(
-            temp_val_dict['d_statv_temp'], _IC_NODATA,
-            temp_val_dict['tcflow'], _IC_NODATA,
-            delta_sv_dict['som3c'], _IC_NODATA)
-        respiration(
-            temp_val_dict['tcflow'], param_val_dict['p3co2'],
-            sv_reg['som3c_path'], sv_reg['som3e_1_path'],
-            delta_sv_dict['som3e_1'], delta_sv_dict['minerl_1_1'],
-            gromin_1_path=temp_val_dict['gromin_1'])
-        respiration(
-            temp_val_dict['tcflow'], param_val_dict['p3co2'],
-            sv_reg['som3c_path'], sv_reg['som3e_2_path'],
-            delta_sv_dict['som3e_2'], delta_sv_dict['minerl_1_2'])
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                temp_val_dict['tcflow'], param_val_dict['p3co2']]],
-            calc_net_cflow, temp_val_dict['tosom1'], gdal.GDT_Float32,
-            _IC_NODATA)
-        shutil.copyfile(
-            delta_sv_dict['som1c_2'], temp_val_dict['d_statv_temp'])
-        raster_sum(
-            temp_val_dict['d_statv_temp'], _IC_NODATA,
-            temp_val_dict['tosom1'], _IC_NODATA,
-            delta_sv_dict['som1c_2'], _IC_NODATA)
-
-        nutrient_flow(
-            temp_val_dict['tosom1'], sv_reg['som3c_path'],
-            sv_reg['som3e_1_path'], temp_val_dict['rceto1_1'],
-            sv_reg['minerl_1_1_path'], delta_sv_dict['som3e_1'],
-            delta_sv_dict['som1e_2_1'], delta_sv_dict['minerl_1_1'],
-            gromin_path=temp_val_dict['gromin_1'])
-        nutrient_flow(
-            temp_val_dict['tosom1'], sv_reg['som3c_path'],
-            sv_reg['som3e_2_path'], temp_val_dict['rceto1_2'],
-            sv_reg['minerl_1_2_path'], delta_sv_dict['som3e_2'],
-            delta_sv_dict['som1e_2_2'], delta_sv_dict['minerl_1_2'])
-
-        # Surface SOM2 flows to soil SOM2 via mixing
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                sv_reg['som2c_1_path'], param_val_dict['cmix'],
-                temp_val_dict['defac']]],
-            calc_som2_flow, temp_val_dict['tcflow'],
-            gdal.GDT_Float32, _IC_NODATA)
-        shutil.copyfile(
-            delta_sv_dict['som2c_1'], temp_val_dict['d_statv_temp'])
-        raster_difference(
-            temp_val_dict['d_statv_temp'], _IC_NODATA,
-            temp_val_dict['tcflow'], _IC_NODATA,
-            delta_sv_dict['som2c_1'], _IC_NODATA)
-        shutil.copyfile(
-            delta_sv_dict['som2c_2'], temp_val_dict['d_statv_temp'])
-        raster_sum(
-            temp_val_dict['d_statv_temp'], _IC_NODATA,
-            temp_val_dict['tcflow'], _IC_NODATA,
-            delta_sv_dict['som2c_2'], _IC_NODATA)
-        # ratios for N and P entering soil som2 via mixing
-        raster_division(
-            sv_reg['som2c_1_path'], _SV_NODATA,
-            sv_reg['som2e_1_1_path'], _IC_NODATA,
-            temp_val_dict['rceto2_1'], _IC_NODATA)
-        raster_division(
-            sv_reg['som2c_1_path'], _SV_NODATA,
-            sv_reg['som2e_1_2_path'], _IC_NODATA,
-            temp_val_dict['rceto2_2'], _IC_NODATA)
-        nutrient_flow(
-            temp_val_dict['tcflow'], sv_reg['som2c_1_path'],
-            sv_reg['som2e_1_1_path'], temp_val_dict['rceto2_1'],
-            sv_reg['minerl_1_1_path'], delta_sv_dict['som2e_1_1'],
-            delta_sv_dict['som2e_2_1'], delta_sv_dict['minerl_1_1'],
-            gromin_path=temp_val_dict['gromin_1'])
-        nutrient_flow(
-            temp_val_dict['tcflow'], sv_reg['som2c_1_path'],
-            sv_reg['som2e_1_2_path'], temp_val_dict['rceto2_2'],
-            sv_reg['minerl_1_2_path'], delta_sv_dict['som2e_1_2'],
-            delta_sv_dict['som2e_2_2'], delta_sv_dict['minerl_1_2'])
-
-        # P flow from parent to mineral: Pschem.f
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                sv_reg['parent_2_path'], param_val_dict['pparmn_2'],
-                temp_val_dict['defac']]],
-            calc_pflow, temp_val_dict['pflow'], gdal.GDT_Float32,
-            _IC_NODATA)
-        shutil.copyfile(
-            delta_sv_dict['parent_2'], temp_val_dict['d_statv_temp'])
-        raster_difference(
-            temp_val_dict['d_statv_temp'], _IC_NODATA,
-            temp_val_dict['pflow'], _IC_NODATA,
-            delta_sv_dict['parent_2'], _IC_NODATA)
-        shutil.copyfile(
-            delta_sv_dict['minerl_1_2'], temp_val_dict['d_statv_temp'])
-        raster_sum(
-            temp_val_dict['d_statv_temp'], _IC_NODATA,
-            temp_val_dict['pflow'], _IC_NODATA,
-            delta_sv_dict['minerl_1_2'], _IC_NODATA)
-
-        # P flow from secondary to mineral
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                sv_reg['secndy_2_path'], param_val_dict['psecmn_2'],
-                temp_val_dict['defac']]],
-            calc_pflow, temp_val_dict['pflow'], gdal.GDT_Float64,
-            _IC_NODATA)
-        shutil.copyfile(
-            delta_sv_dict['secndy_2'], temp_val_dict['d_statv_temp'])
-        raster_difference(
-            temp_val_dict['d_statv_temp'], _IC_NODATA,
-            temp_val_dict['pflow'], _IC_NODATA,
-            delta_sv_dict['secndy_2'], _IC_NODATA)
-        shutil.copyfile(
-            delta_sv_dict['minerl_1_2'], temp_val_dict['d_statv_temp'])
-        raster_sum(
-            temp_val_dict['d_statv_temp'], _IC_NODATA,
-            temp_val_dict['pflow'], _IC_NODATA,
-            delta_sv_dict['minerl_1_2'], _IC_NODATA)
+            param_val_dict['aneref_2'], param_val_dict['aneref_3']]],
+        calc_anerb, temp_val_dict['anerb'], gdal.GDT_Float32,
+        _TARGET_NODATA)
 
-        # P flow from mineral to secondary
-        for lyr in range(1, nlayer_max + 1):
+    # pH effect on decomposition for structural and metabolic material,
+    #   which does not change during the model run
+    for pheff, calc_pheff in [
+            ('pheff_struc', calc_pheff_struc),
+            ('pheff_metab', calc_pheff_metab)]:
+        def create_pheff_raster(raster_path, calc_pheff=calc_pheff):
+            """Calculate the pH effect on decomposition."""
             pygeoprocessing.raster_calculator(
-                [(path, 1) for path in [
-                    sv_reg['minerl_{}_2_path'.format(lyr)],
-                    param_val_dict['pmnsec_2'], temp_val_dict['fsol'],
-                    temp_val_dict['defac']]],
-                calc_pflow_to_secndy, temp_val_dict['pflow'], gdal.GDT_Float64,
-                _IC_NODATA)
-            shutil.copyfile(
-                delta_sv_dict['minerl_{}_2'.format(lyr)],
-                temp_val_dict['d_statv_temp'])
-            raster_difference(
-                temp_val_dict['d_statv_temp'], _IC_NODATA,
-                temp_val_dict['pflow'], _IC_NODATA,
-                delta_sv_dict['minerl_{}_2'.format(lyr)], _IC_NODATA)
-            shutil.copyfile(
-                delta_sv_dict['secndy_2'], temp_val_dict['d_statv_temp'])
-            raster_sum(
-                temp_val_dict['d_statv_temp'], _IC_NODATA,
-                temp_val_dict['pflow'], _IC_NODATA,
-                delta_sv_dict['secndy_2'], _IC_NODATA)
-
-        # P flow from secondary to occluded
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                sv_reg['secndy_2_path'], param_val_dict['psecoc1'],
-                temp_val_dict['defac']]],
-            calc_pflow, temp_val_dict['pflow'], gdal.GDT_Float64,
-            _IC_NODATA)
-        shutil.copyfile(
-            delta_sv_dict['secndy_2'], temp_val_dict['d_statv_temp'])
-        raster_difference(
-            temp_val_dict['d_statv_temp'], _IC_NODATA,
-            temp_val_dict['pflow'], _IC_NODATA,
-            delta_sv_dict['secndy_2'], _IC_NODATA)
-        shutil.copyfile(
-            delta_sv_dict['occlud'], temp_val_dict['d_statv_temp'])
-        raster_sum(
-            temp_val_dict['d_statv_temp'], _IC_NODATA,
-            temp_val_dict['pflow'], _IC_NODATA,
-            delta_sv_dict['occlud'], _IC_NODATA)
+                [(aligned_inputs['ph_path'], 1)], calc_pheff, raster_path,
+                gdal.GDT_Float32, _TARGET_NODATA)
 
-        # P flow from occluded to secondary
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                sv_reg['occlud_path'], param_val_dict['psecoc2'],
-                temp_val_dict['defac']]],
-            calc_pflow, temp_val_dict['pflow'], gdal.GDT_Float64,
-            _IC_NODATA)
-        shutil.copyfile(
-            delta_sv_dict['occlud'], temp_val_dict['d_statv_temp'])
-        raster_difference(
-            temp_val_dict['d_statv_temp'], _IC_NODATA,
-            temp_val_dict['pflow'], _IC_NODATA,
-            delta_sv_dict['occlud'], _IC_NODATA)
-        shutil.copyfile(
-            delta_sv_dict['secndy_2'], temp_val_dict['d_statv_temp'])
-        raster_sum(
-            temp_val_dict['d_statv_temp'], _IC_NODATA,
-            temp_val_dict['pflow'], _IC_NODATA,
-            delta_sv_dict['secndy_2'], _IC_NODATA)
+        temp_val_dict[pheff] = _cached_param_raster(
+            aligned_inputs['ph_path'], (pheff, aligned_inputs['ph_path']),
+            temp_val_dict[pheff], create_pheff_raster)
 
-        # accumulate flows
-        compartment = 'som3'
-        state_var = '{}c'.format(compartment)
-        shutil.copyfile(
-            sv_reg['{}_path'.format(state_var)],
-            temp_val_dict['operand_temp'])
-        raster_sum(
-            delta_sv_dict[state_var], _IC_NODATA,
-            temp_val_dict['operand_temp'], _SV_NODATA,
-            sv_reg['{}_path'.format(state_var)], _SV_NODATA)
+    # state variables that are not modified by decomposition
+    nlayer_max = int(max(
+        val['nlayer'] for val in site_param_table.values()))
+    for lyr in range(2, nlayer_max + 1):
         for iel in [1, 2]:
-            state_var = '{}e_{}'.format(compartment, iel)
+            state_var = 'minerl_{}_{}'.format(lyr, iel)
             shutil.copyfile(
-                sv_reg['{}_path'.format(state_var)],
-                temp_val_dict['operand_temp'])
-            raster_sum(
-                delta_sv_dict[state_var], _IC_NODATA,
-                temp_val_dict['operand_temp'], _SV_NODATA,
-                sv_reg['{}_path'.format(state_var)], _SV_NODATA)
-        for compartment in ['struc', 'metab', 'som1', 'som2']:
+                prev_sv_reg['{}_path'.format(state_var)],
+                sv_reg['{}_path'.format(state_var)])
+    for lyr in [1, 2]:
+        state_var = 'strlig_{}'.format(lyr)
+        shutil.copyfile(
+            prev_sv_reg['{}_path'.format(state_var)],
+            sv_reg['{}_path'.format(state_var)])
+
+    # state variables that are updated by decomposition
+    decomp_sv_list = ['som3c', 'som3e_1', 'som3e_2']
+    for compartment in ['struc', 'metab', 'som1', 'som2']:
+        for lyr in [1, 2]:
+            decomp_sv_list.append('{}c_{}'.format(compartment, lyr))
+            for iel in [1, 2]:
+                decomp_sv_list.append(
+                    '{}e_{}_{}'.format(compartment, lyr, iel))
+    decomp_sv_list.extend(
+        ['minerl_1_1', 'minerl_1_2', 'parent_2', 'secndy_2', 'occlud'])
+
+    # state variables that are read, but not updated, by decomposition
+    static_sv_list = ['strlig_1', 'strlig_2'] + [
+        'minerl_{}_2'.format(lyr) for lyr in range(2, nlayer_max + 1)]
+
+    # inputs to the decomposition kernel, by the name used inside it
+    decomp_input_list = [
+        ('precip', aligned_inputs['precip_{}'.format(month_index)]),
+        ('annual_precip', year_reg['annual_precip_path']),
+        ('baseNdep', year_reg['baseNdep_path']),
+        ('pH', aligned_inputs['ph_path']),
+        ('amov_2', month_reg['amov_2'])]
+    for val in ['defac', 'anerb', 'pheff_struc', 'pheff_metab']:
+        decomp_input_list.append((val, temp_val_dict[val]))
+    for val in [
+            'rnewas_1_1', 'rnewas_2_1', 'rnewas_1_2', 'rnewas_2_2',
+            'rnewbs_1_1', 'rnewbs_2_1', 'rnewbs_1_2', 'rnewbs_2_2',
+            'eftext', 'p1co2_2', 'fps1s3', 'fps2s3', 'orglch', 'vlossg']:
+        decomp_input_list.append((val, pp_reg['{}_path'.format(val)]))
+    for val in decomp_param_list:
+        decomp_input_list.append((val, param_val_dict[val]))
+    for state_var in decomp_sv_list + static_sv_list:
+        decomp_input_list.append(
+            (state_var, prev_sv_reg['{}_path'.format(state_var)]))
+    decomp_key_list = [key for key, _ in decomp_input_list]
+    esched_all = esched(
+        ['material_leaving_a', 'material_arriving_b', 'mineral_flow'])
+
+    def decompose(*block_list):
+        """Decompose soil C, N and P in one block over four substeps.
+
+        Each pool is read once and held in memory through all four
+        decomposition substeps; only the final pools are returned. Within a
+        substep, flows are calculated from the pools at the start of the
+        substep and accumulated as changes (delta) that are applied to the
+        pools at the end of the substep, as in the Century model.
+
+        Parameters:
+            block_list (list): one array for each input in
+                `decomp_input_list`, in the same order
+
+        Returns:
+            list of arrays giving the state variables in `decomp_sv_list`
+                after decomposition
+
+        """
+        block = dict(zip(decomp_key_list, block_list))
+        sv = dict(
+            (state_var, block[state_var]) for state_var in
+            decomp_sv_list + static_sv_list)
+        defac = block['defac']
+        anerb = block['anerb']
+        pheff_struc = block['pheff_struc']
+        pheff_metab = block['pheff_metab']
+        pheff_som3 = calc_pheff_som3(block['pH'])
+
+        # gross mineralization of N
+        gromin_1 = [numpy.zeros(defac.shape, dtype=numpy.float32)]
+
+        # average mineral N and P in surface soil
+        aminrl_1 = sv['minerl_1_1'].copy()
+        fsol = fsfunc(sv['minerl_1_2'], block['sorpmx'], block['pslsrb'])
+        aminrl_2 = _array_product(
+            sv['minerl_1_2'], _SV_NODATA, fsol, _TARGET_NODATA, _SV_NODATA)
+
+        def flow_out(state_var, flow):
+            """Remove a flow from the change in a state variable."""
+            delta[state_var] = _array_difference(
+                delta[state_var], _IC_NODATA, flow, _IC_NODATA, _IC_NODATA)
+
+        def flow_in(state_var, flow):
+            """Add a flow to the change in a state variable."""
+            delta[state_var] = _array_sum(
+                delta[state_var], _IC_NODATA, flow, _IC_NODATA, _IC_NODATA)
+
+        def respire(tcflow, frac_co2, cstatv, estatv):
+            """Move N and P to mineral pools with respiration.
+
+            Equivalent to `respiration` for N and P in the pool whose C and
+            nutrient state variables are `cstatv` and `estatv`_<iel>.
+
+            """
+            for iel in [1, 2]:
+                estatv_iel = '{}_{}'.format(estatv, iel)
+                mineral_flow = calc_respiration_mineral_flow(
+                    tcflow, frac_co2, sv[estatv_iel], sv[cstatv])
+                flow_out(estatv_iel, mineral_flow)
+                flow_in('minerl_1_{}'.format(iel), mineral_flow)
+                if iel == 1:
+                    gromin_1[0] = update_gross_mineralization(
+                        gromin_1[0], mineral_flow)
+
+        def move_nutrients(cflow, cstatv, estatv, rcetob_list, receiving):
+            """Move N and P accompanying a flow of C between pools.
+
+            Equivalent to `nutrient_flow` for N and P in the donating pool
+            (`cstatv`, `estatv`_<iel>) and receiving pool (`receiving`_<iel>).
+
+            """
+            for iel in [1, 2]:
+                estatv_iel = '{}_{}'.format(estatv, iel)
+                material_leaving_a, material_arriving_b, mineral_flow = (
+                    esched_all(
+                        cflow, sv[cstatv], rcetob_list[iel - 1],
+                        sv[estatv_iel], sv['minerl_1_{}'.format(iel)]))
+                flow_out(estatv_iel, material_leaving_a)
+                flow_in('{}_{}'.format(receiving, iel), material_arriving_b)
+                flow_in('minerl_1_{}'.format(iel), mineral_flow)
+                if iel == 1:
+                    gromin_1[0] = update_gross_mineralization(
+                        gromin_1[0], mineral_flow)
+
+        for dtm in range(4):
+            # initialize change (delta, d) in state variables for this step
+            delta = dict(
+                (state_var, numpy.zeros(defac.shape, dtype=numpy.float32))
+                for state_var in decomp_sv_list + static_sv_list)
+            if dtm == 0:
+                # schedule flow of N from atmospheric fixation to surface
+                delta['minerl_1_1'] = calc_N_fixation(
+                    block['precip'], block['annual_precip'], block['baseNdep'],
+                    block['epnfs_2'])
+
+            # decomposition of structural material in surface and soil
             for lyr in [1, 2]:
-                state_var = '{}c_{}'.format(compartment, lyr)
-                shutil.copyfile(
-                    sv_reg['{}_path'.format(state_var)],
-                    temp_val_dict['operand_temp'])
-                raster_sum(
-                    delta_sv_dict[state_var], _IC_NODATA,
-                    temp_val_dict['operand_temp'], _SV_NODATA,
-                    sv_reg['{}_path'.format(state_var)], _SV_NODATA)
-                for iel in [1, 2]:
-                    state_var = '{}e_{}_{}'.format(compartment, lyr, iel)
-                    shutil.copyfile(
-                        sv_reg['{}_path'.format(state_var)],
-                        temp_val_dict['operand_temp'])
-                    raster_sum(
-                        delta_sv_dict[state_var], _IC_NODATA,
-                        temp_val_dict['operand_temp'], _SV_NODATA,
-                        sv_reg['{}_path'.format(state_var)], _SV_NODATA)
-        for iel in [1, 2]:
-            state_var = 'minerl_1_{}'.format(iel)
-            shutil.copyfile(
-                sv_reg['{}_path'.format(state_var)],
-                temp_val_dict['operand_temp'])
-            raster_sum(
-                delta_sv_dict[state_var], _IC_NODATA,
-                temp_val_dict['operand_temp'], _SV_NODATA,
-                sv_reg['{}_path'.format(state_var)], _SV_NODATA)
-        for state_var in ['parent_2', 'secndy_2', 'occlud']:
-            shutil.copyfile(
-                sv_reg['{}_path'.format(state_var)],
-                temp_val_dict['operand_temp'])
-            raster_sum(
-                delta_sv_dict[state_var], _IC_NODATA,
-                temp_val_dict['operand_temp'], _SV_NODATA,
-                sv_reg['{}_path'.format(state_var)], _SV_NODATA)
+                if lyr == 1:
+                    tcflow = calc_tcflow_strucc_1(
+                        aminrl_1, aminrl_2, sv['strucc_1'],
+                        sv['struce_1_1'], sv['struce_1_2'],
+                        block['rnewas_1_1'], block['rnewas_2_1'],
+                        block['strmax_1'], defac, block['dec1_1'],
+                        block['pligst_1'], sv['strlig_1'], pheff_struc)
+                    rcetob = 'rnewas'
+                else:
+                    tcflow = calc_tcflow_strucc_2(
+                        aminrl_1, aminrl_2, sv['strucc_2'],
+                        sv['struce_2_1'], sv['struce_2_2'],
+                        block['rnewbs_1_1'], block['rnewbs_2_1'],
+                        block['strmax_2'], defac, block['dec1_2'],
+                        block['pligst_2'], sv['strlig_2'], pheff_struc, anerb)
+                    rcetob = 'rnewbs'
+                strucc = 'strucc_{}'.format(lyr)
+                struce = 'struce_{}'.format(lyr)
+                flow_out(strucc, tcflow)
+
+                # structural material decomposes first to SOM2
+                tosom2 = _array_product(
+                    tcflow, _IC_NODATA, sv['strlig_{}'.format(lyr)],
+                    _SV_NODATA, _IC_NODATA)
+                respire(tosom2, block['rsplig'], strucc, struce)
+                net_tosom2 = calc_net_cflow(tosom2, block['rsplig'])
+                flow_in('som2c_{}'.format(lyr), net_tosom2)
+                move_nutrients(
+                    net_tosom2, strucc, struce,
+                    [block['{}_1_2'.format(rcetob)],
+                        block['{}_2_2'.format(rcetob)]],
+                    'som2e_{}'.format(lyr))
+
+                # structural material decomposes next to SOM1
+                tosom1 = _array_difference(
+                    tcflow, _IC_NODATA, tosom2, _IC_NODATA, _IC_NODATA)
+                ps1co2 = block['ps1co2_{}'.format(lyr)]
+                respire(tosom1, ps1co2, strucc, struce)
+                net_tosom1 = calc_net_cflow(tosom1, ps1co2)
+                flow_in('som1c_{}'.format(lyr), net_tosom1)
+                move_nutrients(
+                    net_tosom1, strucc, struce,
+                    [block['{}_1_1'.format(rcetob)],
+                        block['{}_2_1'.format(rcetob)]],
+                    'som1e_{}'.format(lyr))
+
+            # decomposition of metabolic material in surface and soil to SOM1
+            for lyr in [1, 2]:
+                metabc = 'metabc_{}'.format(lyr)
+                metabe = 'metabe_{}'.format(lyr)
+                if lyr == 1:
+                    # required ratio for surface metabolic decomposing to SOM1
+                    rceto1 = [
+                        _aboveground_ratio(
+                            sv['metabe_1_{}'.format(iel)], sv['metabc_1'],
+                            block['pcemic1_1_{}'.format(iel)],
+                            block['pcemic1_2_{}'.format(iel)],
+                            block['pcemic1_3_{}'.format(iel)])
+                        for iel in [1, 2]]
+                    tcflow = calc_tcflow_surface(
+                        aminrl_1, aminrl_2, sv['metabc_1'],
+                        sv['metabe_1_1'], sv['metabe_1_2'], rceto1[0],
+                        rceto1[1], defac, block['dec2_1'], pheff_metab)
+                else:
+                    # required ratio for soil metabolic decomposing to SOM1
+                    rceto1 = [
+                        _belowground_ratio(
+                            aminrl, block['varat1_1_{}'.format(iel)],
+                            block['varat1_2_{}'.format(iel)],
+                            block['varat1_3_{}'.format(iel)])
+                        for iel, aminrl in [(1, aminrl_1), (2, aminrl_2)]]
+                    tcflow = calc_tcflow_soil(
+                        aminrl_1, aminrl_2, sv['metabc_2'],
+                        sv['metabe_2_1'], sv['metabe_2_2'], rceto1[0],
+                        rceto1[1], defac, block['dec2_2'], pheff_metab, anerb)
+                flow_out(metabc, tcflow)
+                # microbial respiration with decomposition to SOM1
+                pmco2 = block['pmco2_{}'.format(lyr)]
+                respire(tcflow, pmco2, metabc, metabe)
+                net_tosom1 = calc_net_cflow(tcflow, pmco2)
+                flow_in('som1c_{}'.format(lyr), net_tosom1)
+                move_nutrients(
+                    net_tosom1, metabc, metabe, rceto1,
+                    'som1e_{}'.format(lyr))
+
+            # decomposition of surface SOM1 to surface SOM2: line 63 Somdec.f
+            rceto2 = [
+                calc_surface_som2_ratio(
+                    sv['som1c_1'], sv['som1e_1_{}'.format(iel)],
+                    block['rad1p_1_{}'.format(iel)],
+                    block['rad1p_2_{}'.format(iel)],
+                    block['rad1p_3_{}'.format(iel)],
+                    block['pcemic1_2_{}'.format(iel)])
+                for iel in [1, 2]]
+            tcflow = calc_tcflow_surface(
+                aminrl_1, aminrl_2, sv['som1c_1'], sv['som1e_1_1'],
+                sv['som1e_1_2'], rceto2[0], rceto2[1], defac, block['dec3_1'],
+                pheff_struc)
+            flow_out('som1c_1', tcflow)
+            respire(tcflow, block['p1co2a_1'], 'som1c_1', 'som1e_1')
+            net_tosom2 = calc_net_cflow(tcflow, block['p1co2a_1'])
+            flow_in('som2c_1', net_tosom2)
+            # N and P flows from som1e_1 to som2e_1, line 123 Somdec.f
+            move_nutrients(net_tosom2, 'som1c_1', 'som1e_1', rceto2, 'som2e_1')
+
+            # soil SOM1 decomposes to soil SOM3 and SOM2, line 137 Somdec.f
+            rceto2 = [
+                _belowground_ratio(
+                    aminrl, block['varat22_1_{}'.format(iel)],
+                    block['varat22_2_{}'.format(iel)],
+                    block['varat22_3_{}'.format(iel)])
+                for iel, aminrl in [(1, aminrl_1), (2, aminrl_2)]]
+            tcflow = calc_tcflow_som1c_2(
+                aminrl_1, aminrl_2, sv['som1c_2'], sv['som1e_2_1'],
+                sv['som1e_2_2'], rceto2[0], rceto2[1], defac, block['dec3_2'],
+                block['eftext'], anerb, pheff_metab)
+            flow_out('som1c_2', tcflow)
+            # microbial respiration with decomposition to SOM3, line 179
+            respire(tcflow, block['p1co2_2'], 'som1c_2', 'som1e_2')
+            tosom3 = calc_som3_flow(
+                tcflow, block['fps1s3'], block['animpt'], anerb)
+            flow_in('som3c', tosom3)
+            # required ratio for soil SOM1 decomposing to SOM3, line 198
+            rceto3 = [
+                _belowground_ratio(
+                    aminrl, block['varat3_1_{}'.format(iel)],
+                    block['varat3_2_{}'.format(iel)],
+                    block['varat3_3_{}'.format(iel)])
+                for iel, aminrl in [(1, aminrl_1), (2, aminrl_2)]]
+            move_nutrients(tosom3, 'som1c_2', 'som1e_2', rceto3, 'som3e')
+
+            # organic leaching: line 204 Somdec.f
+            cleach = calc_c_leach(
+                block['amov_2'], tcflow, block['omlech_3'], block['orglch'])
+            for iel, calc_leached_iel in [
+                    (1, calc_leached_N), (2, calc_leached_P)]:
+                som1e_2_iel = 'som1e_2_{}'.format(iel)
+                flow_out(
+                    som1e_2_iel, calc_leached_iel(
+                        sv['som1c_2'], sv[som1e_2_iel], cleach))
+
+            # rest of flow from soil SOM1 goes to SOM2
+            net_tosom2 = calc_net_cflow_tosom2(
+                tcflow, block['p1co2_2'], tosom3, cleach)
+            flow_in('som2c_2', net_tosom2)
+            # N and P flows from soil SOM1 to soil SOM2, line 257
+            move_nutrients(net_tosom2, 'som1c_2', 'som1e_2', rceto2, 'som2e_2')
+
+            # soil SOM2 decomposing to soil SOM1 and SOM3, line 269
+            tcflow = calc_tcflow_soil(
+                aminrl_1, aminrl_2, sv['som2c_2'], sv['som2e_2_1'],
+                sv['som2e_2_2'], rceto1[0], rceto1[1], defac, block['dec5_2'],
+                pheff_metab, anerb)
+            flow_out('som2c_2', tcflow)
+            respire(tcflow, block['pmco2_2'], 'som2c_2', 'som2e_2')
+            # soil SOM2 flows first to SOM3
+            tosom3 = calc_som3_flow(
+                tcflow, block['fps2s3'], block['animpt'], anerb)
+            flow_in('som3c', tosom3)
+            move_nutrients(tosom3, 'som2c_2', 'som2e_2', rceto3, 'som3e')
+            # rest of flow from soil SOM2 goes to soil SOM1
+            net_tosom1 = calc_net_cflow_tosom1(
+                tcflow, block['p2co2_2'], tosom3)
+            flow_in('som1c_2', net_tosom1)
+            move_nutrients(net_tosom1, 'som2c_2', 'som2e_2', rceto1, 'som1e_2')
+
+            # surface SOM2 decomposes to surface SOM1
+            tcflow = calc_tcflow_surface(
+                aminrl_1, aminrl_2, sv['som2c_1'], sv['som2e_1_1'],
+                sv['som2e_1_2'], rceto1[0], rceto1[1], defac, block['dec5_1'],
+                pheff_struc)
+            flow_out('som2c_1', tcflow)
+            respire(tcflow, block['p2co2_1'], 'som2c_1', 'som2e_1')
+            tosom1 = calc_net_cflow(tcflow, block['p2co2_1'])
+            flow_in('som1c_1', tosom1)
+            move_nutrients(tosom1, 'som2c_1', 'som2e_1', rceto1, 'som1e_1')
+
+            # SOM3 decomposing to soil SOM1
+            tcflow = calc_tcflow_soil(
+                aminrl_1, aminrl_2, sv['som3c'], sv['som3e_1'],
+                sv['som3e_2'], rceto1[0], rceto1[1], defac, block['dec4'],
+                pheff_som3, anerb)
+            flow_out('som3c', tcflow)
+            respire(tcflow, block['p3co2'], 'som3c', 'som3e')
+            tosom1 = calc_net_cflow(tcflow, block['p3co2'])
+            flow_in('som1c_2', tosom1)
+            move_nutrients(tosom1, 'som3c', 'som3e', rceto1, 'som1e_2')
+
+            # Surface SOM2 flows to soil SOM2 via mixing
+            tcflow = calc_som2_flow(sv['som2c_1'], block['cmix'], defac)
+            flow_out('som2c_1', tcflow)
+            flow_in('som2c_2', tcflow)
+            # ratios for N and P entering soil som2 via mixing
+            rceto2 = [
+                _array_quotient(
+                    sv['som2c_1'], _SV_NODATA, sv['som2e_1_{}'.format(iel)],
+                    _IC_NODATA, _IC_NODATA)
+                for iel in [1, 2]]
+            move_nutrients(tcflow, 'som2c_1', 'som2e_1', rceto2, 'som2e_2')
+
+            # P flow from parent to mineral: Pschem.f
+            pflow = calc_pflow(sv['parent_2'], block['pparmn_2'], defac)
+            flow_out('parent_2', pflow)
+            flow_in('minerl_1_2', pflow)
+
+            # P flow from secondary to mineral
+            pflow = calc_pflow(sv['secndy_2'], block['psecmn_2'], defac)
+            flow_out('secndy_2', pflow)
+            flow_in('minerl_1_2', pflow)
+
+            # P flow from mineral to secondary
+            for lyr in range(1, nlayer_max + 1):
+                pflow = calc_pflow_to_secndy(
+                    sv['minerl_{}_2'.format(lyr)], block['pmnsec_2'], fsol,
+                    defac)
+                flow_out('minerl_{}_2'.format(lyr), pflow)
+                flow_in('secndy_2', pflow)
+
+            # P flow from secondary to occluded
+            pflow = calc_pflow(sv['secndy_2'], block['psecoc1'], defac)
+            flow_out('secndy_2', pflow)
+            flow_in('occlud', pflow)
+
+            # P flow from occluded to secondary
+            pflow = calc_pflow(sv['occlud'], block['psecoc2'], defac)
+            flow_out('occlud', pflow)
+            flow_in('secndy_2', pflow)
+
+            # accumulate flows
+            for state_var in decomp_sv_list:
+                sv[state_var] = _array_sum(
+                    delta[state_var], _IC_NODATA, sv[state_var], _SV_NODATA,
+                    _SV_NODATA)
 
-        # update aminrl: Simsom.f line 301
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                sv_reg['minerl_1_2_path'], param_val_dict['sorpmx'],
-                param_val_dict['pslsrb']]],
-            fsfunc, temp_val_dict['fsol'], gdal.GDT_Float32, _TARGET_NODATA)
-        update_aminrl(
-            sv_reg['minerl_1_1_path'], sv_reg['minerl_1_2_path'],
-            temp_val_dict['fsol'], temp_val_dict['aminrl_1'],
-            temp_val_dict['aminrl_2'])
-
-    # volatilization loss of N: line 323 Simsom.f
-    raster_multiplication(
-        temp_val_dict['gromin_1'], _TARGET_NODATA,
-        pp_reg['vlossg_path'], _IC_NODATA,
-        temp_val_dict['operand_temp'], _TARGET_NODATA)
-    shutil.copyfile(
-        sv_reg['minerl_1_1_path'], temp_val_dict['d_statv_temp'])
-    raster_difference(
-        temp_val_dict['d_statv_temp'], _SV_NODATA,
-        temp_val_dict['operand_temp'], _TARGET_NODATA,
-        sv_reg['minerl_1_1_path'], _SV_NODATA)
+            # update aminrl: Simsom.f line 301
+            fsol = fsfunc(sv['minerl_1_2'], block['sorpmx'], block['pslsrb'])
+            aminrl_1 = calc_aminrl_1(aminrl_1, sv['minerl_1_1'])
+            aminrl_2 = calc_aminrl_2(aminrl_2, sv['minerl_1_2'], fsol)
+
+        # volatilization loss of N: line 323 Simsom.f
+        volatilized_n = _array_product(
+            gromin_1[0], _TARGET_NODATA, block['vlossg'], _IC_NODATA,
+            _TARGET_NODATA)
+        sv['minerl_1_1'] = _array_difference(
+            sv['minerl_1_1'], _SV_NODATA, volatilized_n, _TARGET_NODATA,
+            _SV_NODATA)
+        return [sv[state_var] for state_var in decomp_sv_list]
+
+    multi_raster_calculator(
+        [path for _, path in decomp_input_list], decompose,
+        [sv_reg['{}_path'.format(state_var)] for state_var in decomp_sv_list],
+        [_SV_NODATA] * len(decomp_sv_list))
 
     # clean up temporary files
     shutil.rmtree(temp_dir)
@@ -8584,7 +10737,7 @@ def partit(
         valid_mask = (
             (cpart != _TARGET_NODATA) &
             (epart_iel != _TARGET_NODATA) &
-            (~numpy.isclose(minerl_1_iel, _SV_NODATA)) &
+            _valid_mask(minerl_1_iel, _SV_NODATA) &
             (damr_lyr_iel != _IC_NODATA) &
             (pabres != _IC_NODATA) &
             (damrmn_iel != _IC_NODATA))
@@ -8757,8 +10910,8 @@ def partit(
             (frlign != _TARGET_NODATA) &
             (d_strucc_lyr != _TARGET_NODATA) &
             (cpart != _TARGET_NODATA) &
-            (~numpy.isclose(strlig_lyr, _SV_NODATA)) &
-            (~numpy.isclose(strucc_lyr, _SV_NODATA)))
+            _valid_mask(strlig_lyr, _SV_NODATA) &
+            _valid_mask(strucc_lyr, _SV_NODATA))
         movt_mask = ((cpart > 0) & valid_mask)
 
         fligst = numpy.empty(frlign.shape, dtype=numpy.float32)
@@ -8794,13 +10947,8 @@ def partit(
             'damrmn_1', 'damrmn_2', 'spl_1', 'spl_2', 'rcestr_1',
             'rcestr_2']:
         target_path = os.path.join(temp_dir, '{}.tif'.format(val))
-        param_val_dict[val] = target_path
-        site_to_val = dict(
-            [(site_code, float(table[val])) for
-                (site_code, table) in site_param_table.items()])
-        pygeoprocessing.reclassify_raster(
-            (site_index_path, 1), site_to_val, target_path,
-            gdal.GDT_Float32, _IC_NODATA)
+        param_val_dict[val] = _site_param_raster(
+            site_index_path, site_param_table, val, target_path)
 
     # direct absorption of N and P from surface mineral layer
     for iel in [1, 2]:
@@ -8925,7 +11073,7 @@ def calc_fall_standing_dead(stdedc, fallrt):
 
     """
     valid_mask = (
-        (~numpy.isclose(stdedc, _SV_NODATA)) &
+        _valid_mask(stdedc, _SV_NODATA) &
         (fallrt != _IC_NODATA))
     delta_c_standing_dead = numpy.empty(stdedc.shape, dtype=numpy.float32)
     delta_c_standing_dead[:] = _TARGET_NODATA
@@ -8962,9 +11110,9 @@ def calc_root_death(
     valid_mask = (
         (average_temperature != _IC_NODATA) &
         (rdr != _IC_NODATA) &
-        (~numpy.isclose(avh2o_1, _SV_NODATA)) &
+        _valid_mask(avh2o_1, _SV_NODATA) &
         (deck5 != _IC_NODATA) &
-        (~numpy.isclose(bglivc, _SV_NODATA)))
+        _valid_mask(bglivc, _SV_NODATA))
     root_death_rate = numpy.empty(bglivc.shape, dtype=numpy.float32)
     root_death_rate[:] = _TARGET_NODATA
     root_death_rate[valid_mask] = 0.
@@ -9004,8 +11152,8 @@ def calc_delta_iel(c_state_variable, iel_state_variable, delta_c):
 
     """
     valid_mask = (
-        (~numpy.isclose(c_state_variable, _SV_NODATA)) &
-        (~numpy.isclose(iel_state_variable, _SV_NODATA)) &
+        _valid_mask(c_state_variable, _SV_NODATA) &
+        _valid_mask(iel_state_variable, _SV_NODATA) &
         (c_state_variable > 0) &
         (delta_c != _TARGET_NODATA))
     delta_iel = numpy.empty(c_state_variable.shape, dtype=numpy.float32)
@@ -9075,8 +11223,8 @@ def _death_and_partition(
     def calc_avg_temp(max_temp, min_temp):
         """Calculate average temperature from maximum and minimum temp."""
         valid_mask = (
-            (~numpy.isclose(max_temp, max_temp_nodata)) &
-            (~numpy.isclose(min_temp, min_temp_nodata)))
+            _valid_mask(max_temp, max_temp_nodata) &
+            _valid_mask(min_temp, min_temp_nodata))
         tave = numpy.empty(max_temp.shape, dtype=numpy.float32)
         tave[:] = _IC_NODATA
         tave[valid_mask] = (max_temp[valid_mask] + min_temp[valid_mask]) / 2.
@@ -9095,13 +11243,8 @@ def _death_and_partition(
     # site-level parameters
     val = 'deck5'
     target_path = os.path.join(temp_dir, '{}.tif'.format(val))
-    param_val_dict[val] = target_path
-    site_to_val = dict(
-        [(site_code, float(table[val])) for
-            (site_code, table) in site_param_table.items()])
-    pygeoprocessing.reclassify_raster(
-        (aligned_inputs['site_index'], 1), site_to_val, target_path,
-        gdal.GDT_Float32, _IC_NODATA)
+    param_val_dict[val] = _site_param_raster(
+        aligned_inputs['site_index'], site_param_table, val, target_path)
 
     # pft-level parameters
     for val in['fallrt', 'rtdtmp', 'rdr']:
@@ -9140,26 +11283,27 @@ def _death_and_partition(
         # calculate change in C leaving the given state variable
         if state_variable == 'stded':
             fill_val = veg_trait_table[pft_i]['fallrt']
-            pygeoprocessing.new_raster_from_base(
-                aligned_inputs['site_index'], param_val_dict['fallrt'],
-                gdal.GDT_Float32, [_IC_NODATA], fill_value_list=[fill_val])
+            fallrt_path = _constant_param_raster(
+                aligned_inputs['site_index'], fill_val,
+                param_val_dict['fallrt'])
             pygeoprocessing.raster_calculator(
                 [(path, 1) for path in [
                     prev_sv_reg['stdedc_{}_path'.format(pft_i)],
-                    param_val_dict['fallrt']]],
+                    fallrt_path]],
                 calc_fall_standing_dead, temp_val_dict['delta_c'],
                 gdal.GDT_Float32, _TARGET_NODATA)
         else:
+            pft_param_path = {}
             for val in ['rtdtmp', 'rdr']:
                 fill_val = veg_trait_table[pft_i][val]
-                pygeoprocessing.new_raster_from_base(
-                    aligned_inputs['site_index'], param_val_dict[val],
-                    gdal.GDT_Float32, [_IC_NODATA], fill_value_list=[fill_val])
+                pft_param_path[val] = _constant_param_raster(
+                    aligned_inputs['site_index'], fill_val,
+                    param_val_dict[val])
             pygeoprocessing.raster_calculator(
                 [(path, 1) for path in [
                     temp_val_dict['tave'],
-                    param_val_dict['rtdtmp'],
-                    param_val_dict['rdr'],
+                    pft_param_path['rtdtmp'],
+                    pft_param_path['rdr'],
                     sv_reg['avh2o_1_{}_path'.format(pft_i)],
                     param_val_dict['deck5'],
                     prev_sv_reg['bglivc_{}_path'.format(pft_i)]]],
@@ -9283,7 +11427,7 @@ def calc_senescence_water_shading(
 
     """
     valid_mask = (
-        (~numpy.isclose(aglivc, _SV_NODATA)) &
+        _valid_mask(aglivc, _SV_NODATA) &
         (bgwfunc != _TARGET_NODATA) &
         (fsdeth_1 != _IC_NODATA) &
         (fsdeth_3 != _IC_NODATA) &
@@ -9338,103 +11482,108 @@ def _shoot_senescence(
         None
 
     """
-    temp_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
-    temp_val_dict = {}
-    for val in [
-            'operand_temp', 'fdeth', 'delta_c', 'delta_iel', 'vol_loss',
-            'to_storage', 'to_stdede']:
-        temp_val_dict[val] = os.path.join(temp_dir, '{}.tif'.format(val))
-
+    pft_id_list = sorted(pft_id_set)
+    # PFT-level parameters as vectors, broadcast over stacks of PFT rasters
     param_val_dict = {}
-    for val in[
+    for val in [
             'fsdeth_1', 'fsdeth_2', 'fsdeth_3', 'fsdeth_4', 'vlossp',
             'crprtf_1', 'crprtf_2']:
-        for pft_i in pft_id_set:
-            target_path = os.path.join(
-                temp_dir, '{}_{}.tif'.format(val, pft_i))
-            param_val_dict['{}_{}'.format(val, pft_i)] = target_path
-            fill_val = veg_trait_table[pft_i][val]
-            pygeoprocessing.new_raster_from_base(
-                prev_sv_reg['aglivc_{}_path'.format(pft_i)], target_path,
-                gdal.GDT_Float32, [_IC_NODATA], fill_value_list=[fill_val])
+        param_val_dict[val] = numpy.array(
+            [veg_trait_table[pft_i][val] for pft_i in pft_id_list],
+            dtype=numpy.float32).reshape((len(pft_id_list), 1, 1))
+    senescence_month_mask = numpy.array(
+        [current_month == veg_trait_table[pft_i]['senescence_month'] for
+         pft_i in pft_id_list]).reshape((len(pft_id_list), 1, 1))
+
+    prev_sv_list = ['aglivc', 'aglive_1', 'aglive_2', 'crpstg_1', 'crpstg_2']
+    current_sv_list = ['stdedc', 'stdede_1', 'stdede_2']
+
+    def senescence_op(bgwfunc, *sv_stack_list):
+        """Move C, N and P from live biomass to standing dead and storage.
+
+        Parameters:
+            bgwfunc (numpy.ndarray): derived, effect of soil moisture on
+                decomposition and shoot senescence
+            sv_stack_list (list): state variables stacked by PFT, in the
+                order of `prev_sv_list` (previous month) followed by
+                `current_sv_list` (current month)
+
+        Returns:
+            list of state variables stacked by PFT, in the order of
+                `prev_sv_list` followed by `current_sv_list`, for the
+                current month
+
+        """
+        sv_dict = dict(zip(prev_sv_list + current_sv_list, sv_stack_list))
+        stack_shape = sv_dict['aglivc'].shape
+
+        def broadcast(val):
+            return numpy.broadcast_to(param_val_dict[val], stack_shape)
+
+        water_shading_fdeth = calc_senescence_water_shading(
+            sv_dict['aglivc'], numpy.broadcast_to(bgwfunc, stack_shape),
+            broadcast('fsdeth_1'), broadcast('fsdeth_3'),
+            broadcast('fsdeth_4'))
+        fdeth = numpy.where(
+            senescence_month_mask, broadcast('fsdeth_2'),
+            water_shading_fdeth).astype(numpy.float32)
 
-    for pft_i in pft_id_set:
-        if current_month == veg_trait_table[pft_i]['senescence_month']:
-            temp_val_dict['fdeth'] = param_val_dict[
-                'fsdeth_2_{}'.format(pft_i)]
-        else:
-            pygeoprocessing.raster_calculator(
-                [(path, 1) for path in [
-                    prev_sv_reg['aglivc_{}_path'.format(pft_i)],
-                    month_reg['bgwfunc'],
-                    param_val_dict['fsdeth_1_{}'.format(pft_i)],
-                    param_val_dict['fsdeth_3_{}'.format(pft_i)],
-                    param_val_dict['fsdeth_4_{}'.format(pft_i)]]],
-                calc_senescence_water_shading, temp_val_dict['fdeth'],
-                gdal.GDT_Float32, _TARGET_NODATA)
         # change in C flowing from aboveground live biomass to standing dead
-        raster_multiplication(
-            temp_val_dict['fdeth'], _TARGET_NODATA,
-            prev_sv_reg['aglivc_{}_path'.format(pft_i)], _SV_NODATA,
-            temp_val_dict['delta_c'], _TARGET_NODATA)
-        raster_difference(
-            prev_sv_reg['aglivc_{}_path'.format(pft_i)], _SV_NODATA,
-            temp_val_dict['delta_c'], _TARGET_NODATA,
-            sv_reg['aglivc_{}_path'.format(pft_i)], _SV_NODATA)
-        shutil.copyfile(
-            sv_reg['stdedc_{}_path'.format(pft_i)],
-            temp_val_dict['operand_temp'])
-        raster_sum(
-            temp_val_dict['operand_temp'], _SV_NODATA,
-            temp_val_dict['delta_c'], _TARGET_NODATA,
-            sv_reg['stdedc_{}_path'.format(pft_i)], _SV_NODATA)
+        result_dict = {}
+        delta_c = _array_product(
+            fdeth, _TARGET_NODATA, sv_dict['aglivc'], _SV_NODATA,
+            _TARGET_NODATA)
+        result_dict['aglivc'] = _array_difference(
+            sv_dict['aglivc'], _SV_NODATA, delta_c, _TARGET_NODATA,
+            _SV_NODATA)
+        result_dict['stdedc'] = _array_sum(
+            sv_dict['stdedc'], _SV_NODATA, delta_c, _TARGET_NODATA,
+            _SV_NODATA)
 
         for iel in [1, 2]:
             # change in N or P flowing from aboveground live biomass to dead
-            raster_multiplication(
-                temp_val_dict['fdeth'], _TARGET_NODATA,
-                prev_sv_reg['aglive_{}_{}_path'.format(iel, pft_i)],
-                _SV_NODATA, temp_val_dict['delta_iel'], _TARGET_NODATA)
-            raster_difference(
-                prev_sv_reg['aglive_{}_{}_path'.format(iel, pft_i)],
-                _SV_NODATA, temp_val_dict['delta_iel'], _TARGET_NODATA,
-                sv_reg['aglive_{}_{}_path'.format(iel, pft_i)], _SV_NODATA)
+            delta_iel = _array_product(
+                fdeth, _TARGET_NODATA, sv_dict['aglive_{}'.format(iel)],
+                _SV_NODATA, _TARGET_NODATA)
+            result_dict['aglive_{}'.format(iel)] = _array_difference(
+                sv_dict['aglive_{}'.format(iel)], _SV_NODATA, delta_iel,
+                _TARGET_NODATA, _SV_NODATA)
             if iel == 1:
                 # volatilization loss of N
-                raster_multiplication(
-                    temp_val_dict['delta_iel'], _TARGET_NODATA,
-                    param_val_dict['vlossp_{}'.format(pft_i)], _IC_NODATA,
-                    temp_val_dict['vol_loss'], _TARGET_NODATA)
-                shutil.copyfile(
-                    temp_val_dict['delta_iel'], temp_val_dict['operand_temp'])
-                raster_difference(
-                    temp_val_dict['operand_temp'], _TARGET_NODATA,
-                    temp_val_dict['vol_loss'], _TARGET_NODATA,
-                    temp_val_dict['delta_iel'], _TARGET_NODATA)
+                vol_loss = _array_product(
+                    delta_iel, _TARGET_NODATA, broadcast('vlossp'),
+                    _IC_NODATA, _TARGET_NODATA)
+                delta_iel = _array_difference(
+                    delta_iel, _TARGET_NODATA, vol_loss, _TARGET_NODATA,
+                    _TARGET_NODATA)
             # a fraction of N and P goes to crop storage
-            raster_multiplication(
-                temp_val_dict['delta_iel'], _TARGET_NODATA,
-                param_val_dict['crprtf_{}_{}'.format(iel, pft_i)], _IC_NODATA,
-                temp_val_dict['to_storage'], _TARGET_NODATA)
-            raster_sum(
-                prev_sv_reg['crpstg_{}_{}_path'.format(iel, pft_i)],
-                _SV_NODATA, temp_val_dict['to_storage'], _TARGET_NODATA,
-                sv_reg['crpstg_{}_{}_path'.format(iel, pft_i)], _SV_NODATA)
+            to_storage = _array_product(
+                delta_iel, _TARGET_NODATA,
+                broadcast('crprtf_{}'.format(iel)), _IC_NODATA,
+                _TARGET_NODATA)
+            result_dict['crpstg_{}'.format(iel)] = _array_sum(
+                sv_dict['crpstg_{}'.format(iel)], _SV_NODATA, to_storage,
+                _TARGET_NODATA, _SV_NODATA)
             # the rest goes to standing dead biomass
-            raster_difference(
-                temp_val_dict['delta_iel'], _TARGET_NODATA,
-                temp_val_dict['to_storage'], _TARGET_NODATA,
-                temp_val_dict['to_stdede'], _TARGET_NODATA)
-            shutil.copyfile(
-                sv_reg['stdede_{}_{}_path'.format(iel, pft_i)],
-                temp_val_dict['operand_temp'])
-            raster_sum(
-                temp_val_dict['operand_temp'], _SV_NODATA,
-                temp_val_dict['to_stdede'], _TARGET_NODATA,
-                sv_reg['stdede_{}_{}_path'.format(iel, pft_i)], _SV_NODATA)
-
-    # clean up temporary files
-    shutil.rmtree(temp_dir)
+            to_stdede = _array_difference(
+                delta_iel, _TARGET_NODATA, to_storage, _TARGET_NODATA,
+                _TARGET_NODATA)
+            result_dict['stdede_{}'.format(iel)] = _array_sum(
+                sv_dict['stdede_{}'.format(iel)], _SV_NODATA, to_stdede,
+                _TARGET_NODATA, _SV_NODATA)
+        return [result_dict[sv] for sv in prev_sv_list + current_sv_list]
+
+    # all PFTs are calculated together in one pass over the rasters
+    stacked_raster_calculator(
+        [[month_reg['bgwfunc']]] +
+        [[prev_sv_reg['{}_{}_path'.format(sv, pft_i)] for
+          pft_i in pft_id_list] for sv in prev_sv_list] +
+        [[sv_reg['{}_{}_path'.format(sv, pft_i)] for
+          pft_i in pft_id_list] for sv in current_sv_list],
+        senescence_op,
+        [[sv_reg['{}_{}_path'.format(sv, pft_i)] for
+          pft_i in pft_id_list] for sv in prev_sv_list + current_sv_list],
+        [_SV_NODATA] * len(prev_sv_list + current_sv_list))
 
 
 def convert_biomass_to_C(biomass_path, c_path):
@@ -9553,7 +11702,7 @@ def c_uptake_belowground(bglivc, cprodl, rtsh):
 
     """
     valid_mask = (
-        (~numpy.isclose(bglivc, _SV_NODATA)) &
+        _valid_mask(bglivc, _SV_NODATA) &
         (cprodl != _TARGET_NODATA) &
         (rtsh != _TARGET_NODATA))
 
@@ -9607,7 +11756,7 @@ def calc_uptake_source(return_type):
             (eup_above_iel != _TARGET_NODATA) &
             (eup_below_iel != _TARGET_NODATA) &
             (plantNfix != _TARGET_NODATA) &
-            (~numpy.isclose(storage_iel, _SV_NODATA)))
+            _valid_mask(storage_iel, _SV_NODATA))
         eprodl_iel = numpy.empty(eup_above_iel.shape, dtype=numpy.float32)
         eprodl_iel[:] = _TARGET_NODATA
         eprodl_iel[valid_mask] = (
@@ -9640,12 +11789,10 @@ def calc_uptake_source(return_type):
             uptake_soil[insuff_mask] = (
                 eprodl_iel[insuff_mask] - storage_iel[insuff_mask])
 
-        if return_type == 'uptake_storage':
-            return uptake_storage
-        elif return_type == 'uptake_soil':
-            return uptake_soil
-        elif return_type == 'uptake_Nfix':
-            return uptake_Nfix
+        return _select_outputs(return_type, {
+            'uptake_storage': uptake_storage,
+            'uptake_soil': uptake_soil,
+            'uptake_Nfix': uptake_Nfix})
     return _uptake
 
 
@@ -9733,7 +11880,7 @@ def calc_minerl_uptake_lyr(uptake_soil, minerl_lyr_iel, fsol, availm):
     """
     valid_mask = (
         (uptake_soil != _TARGET_NODATA) &
-        (~numpy.isclose(minerl_lyr_iel, _SV_NODATA)) &
+        _valid_mask(minerl_lyr_iel, _SV_NODATA) &
         (fsol != _TARGET_NODATA) &
         (availm != _TARGET_NODATA) &
         (availm > 0))
@@ -9799,164 +11946,105 @@ def nutrient_uptake(
         None
 
     """
-    temp_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
-    temp_val_dict = {}
-    for val in [
-            'uptake_storage', 'uptake_soil', 'uptake_Nfix', 'statv_temp',
-            'uptake_above', 'uptake_below', 'fsol', 'minerl_uptake_lyr',
-            'uptake_weighted']:
-        temp_val_dict[val] = os.path.join(temp_dir, '{}.tif'.format(val))
-
-    # calculate uptake from crop storage
+    # calculate uptake from crop storage, from soil and, for N, from
+    # symbiotically fixed N
     pft_nodata = pygeoprocessing.get_raster_info(
         fract_cover_path)['nodata'][0]
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            eavail_path, eup_above_iel_path, eup_below_iel_path,
-            plantNfix_path, sv_reg['crpstg_{}_{}_path'.format(iel, pft_i)]]] +
-        [(iel, 'raw')],
-        calc_uptake_source('uptake_storage'), temp_val_dict['uptake_storage'],
-        gdal.GDT_Float32, _TARGET_NODATA)
-    # calculate uptake from soil
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            eavail_path, eup_above_iel_path, eup_below_iel_path,
-            plantNfix_path, sv_reg['crpstg_{}_{}_path'.format(iel, pft_i)]]] +
-        [(iel, 'raw')],
-        calc_uptake_source('uptake_soil'), temp_val_dict['uptake_soil'],
-        gdal.GDT_Float32, _TARGET_NODATA)
+    uptake_source_list = ['uptake_storage', 'uptake_soil']
     if iel == 1:
-        # calculate uptake from symbiotically fixed N
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                eavail_path, eup_above_iel_path, eup_below_iel_path,
-                plantNfix_path,
-                sv_reg['crpstg_{}_{}_path'.format(iel, pft_i)]]] +
-            [(iel, 'raw')],
-            calc_uptake_source('uptake_Nfix'), temp_val_dict['uptake_Nfix'],
-            gdal.GDT_Float32, _TARGET_NODATA)
-
-    # calculate uptake from crop storage into aboveground and belowground live
-    shutil.copyfile(
-        sv_reg['crpstg_{}_{}_path'.format(iel, pft_i)],
-        temp_val_dict['statv_temp'])
-    raster_difference(
-        temp_val_dict['statv_temp'], _SV_NODATA,
-        temp_val_dict['uptake_storage'], _TARGET_NODATA,
-        sv_reg['crpstg_{}_{}_path'.format(iel, pft_i)], _SV_NODATA)
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            temp_val_dict['uptake_storage'], eup_above_iel_path,
-            eup_below_iel_path]],
-        calc_aboveground_uptake, delta_aglive_iel_path,
-        gdal.GDT_Float32, _TARGET_NODATA)
-
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            temp_val_dict['uptake_storage'], eup_above_iel_path,
-            eup_below_iel_path]],
-        calc_belowground_uptake, temp_val_dict['uptake_below'],
-        gdal.GDT_Float32, _TARGET_NODATA)
-    shutil.copyfile(
-        sv_reg['bglive_{}_{}_path'.format(iel, pft_i)],
-        temp_val_dict['statv_temp'])
-    raster_sum(
-        temp_val_dict['statv_temp'], _SV_NODATA,
-        temp_val_dict['uptake_below'], _TARGET_NODATA,
-        sv_reg['bglive_{}_{}_path'.format(iel, pft_i)], _SV_NODATA)
-
-    # uptake from each soil layer in proportion to its contribution to availm
-    for lyr in range(1, nlay + 1):
-        if iel == 2:
-            pygeoprocessing.raster_calculator(
-                [(path, 1) for path in [
-                    sv_reg['minerl_1_2_path'], sorpmx_path,
-                    pslsrb_path]],
-                fsfunc, temp_val_dict['fsol'], gdal.GDT_Float32,
-                _TARGET_NODATA)
-        else:
-            pygeoprocessing.new_raster_from_base(
-                sv_reg['aglive_{}_{}_path'.format(iel, pft_i)],
-                temp_val_dict['fsol'],
-                gdal.GDT_Float32, [_IC_NODATA], fill_value_list=[1.])
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                temp_val_dict['uptake_soil'],
-                sv_reg['minerl_{}_{}_path'.format(lyr, iel)],
-                temp_val_dict['fsol'], availm_path]],
-            calc_minerl_uptake_lyr, temp_val_dict['minerl_uptake_lyr'],
-            gdal.GDT_Float32, _TARGET_NODATA)
+        uptake_source_list.append('uptake_Nfix')
+    calc_uptake = calc_uptake_source(uptake_source_list)
 
-        # uptake removed from soil is weighted by pft % cover
-        raster_multiplication(
-            fract_cover_path, pft_nodata,
-            temp_val_dict['minerl_uptake_lyr'], _TARGET_NODATA,
-            temp_val_dict['uptake_weighted'], _TARGET_NODATA)
-        shutil.copyfile(
-            sv_reg['minerl_{}_{}_path'.format(lyr, iel)],
-            temp_val_dict['statv_temp'])
-        raster_difference(
-            temp_val_dict['statv_temp'], _SV_NODATA,
-            temp_val_dict['uptake_weighted'], _TARGET_NODATA,
-            sv_reg['minerl_{}_{}_path'.format(lyr, iel)], _SV_NODATA)
-
-        # uptake from minerl iel in lyr into above and belowground live
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                temp_val_dict['minerl_uptake_lyr'], eup_above_iel_path,
-                eup_below_iel_path]],
-            calc_aboveground_uptake, temp_val_dict['uptake_above'],
-            gdal.GDT_Float32, _TARGET_NODATA)
-        shutil.copyfile(delta_aglive_iel_path, temp_val_dict['statv_temp'])
-        raster_sum(
-            temp_val_dict['statv_temp'], _SV_NODATA,
-            temp_val_dict['uptake_above'], _TARGET_NODATA,
-            delta_aglive_iel_path, _SV_NODATA)
+    def uptake_op(
+            eavail, eup_above, eup_below, plantNfix, crpstg, bglive,
+            fract_cover, availm, sorpmx, pslsrb, *minerl_list):
+        """Perform uptake of iel from all sources in one pass.
 
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                temp_val_dict['minerl_uptake_lyr'], eup_above_iel_path,
-                eup_below_iel_path]],
-            calc_belowground_uptake, temp_val_dict['uptake_below'],
-            gdal.GDT_Float32, _TARGET_NODATA)
-        shutil.copyfile(
-            sv_reg['bglive_{}_{}_path'.format(iel, pft_i)],
-            temp_val_dict['statv_temp'])
-        raster_sum(
-            temp_val_dict['statv_temp'], _SV_NODATA,
-            temp_val_dict['uptake_below'], _TARGET_NODATA,
-            sv_reg['bglive_{}_{}_path'.format(iel, pft_i)], _SV_NODATA)
+        Uptake from each soil layer is performed in order, so that for P the
+        fraction in solution is calculated from mineral P in the top layer
+        after uptake from the layers above.
 
-    # uptake from N fixation into above and belowground live
-    if iel == 1:
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                temp_val_dict['uptake_Nfix'], eup_above_iel_path,
-                eup_below_iel_path]],
-            calc_aboveground_uptake, temp_val_dict['uptake_above'],
-            gdal.GDT_Float32, _TARGET_NODATA)
-        shutil.copyfile(delta_aglive_iel_path, temp_val_dict['statv_temp'])
-        raster_sum(
-            temp_val_dict['statv_temp'], _SV_NODATA,
-            temp_val_dict['uptake_above'], _TARGET_NODATA,
-            delta_aglive_iel_path, _SV_NODATA)
+        Returns:
+            list of revised crop storage, revised belowground live, change in
+                aboveground live, and revised mineral iel in each soil layer
+                accessible by this plant functional type
 
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                temp_val_dict['uptake_Nfix'], eup_above_iel_path,
-                eup_below_iel_path]],
-            calc_belowground_uptake, temp_val_dict['uptake_below'],
-            gdal.GDT_Float32, _TARGET_NODATA)
-        shutil.copyfile(
-            sv_reg['bglive_{}_{}_path'.format(iel, pft_i)],
-            temp_val_dict['statv_temp'])
-        raster_sum(
-            temp_val_dict['statv_temp'], _SV_NODATA,
-            temp_val_dict['uptake_below'], _TARGET_NODATA,
-            sv_reg['bglive_{}_{}_path'.format(iel, pft_i)], _SV_NODATA)
+        """
+        uptake_list = calc_uptake(
+            eavail, eup_above, eup_below, plantNfix, crpstg, iel)
+        uptake_storage = uptake_list[0]
+        uptake_soil = uptake_list[1]
+
+        # uptake from crop storage into aboveground and belowground live
+        crpstg = _array_difference(
+            crpstg, _SV_NODATA, uptake_storage, _TARGET_NODATA, _SV_NODATA)
+        delta_aglive = calc_aboveground_uptake(
+            uptake_storage, eup_above, eup_below)
+        bglive = _array_sum(
+            bglive, _SV_NODATA,
+            calc_belowground_uptake(uptake_storage, eup_above, eup_below),
+            _TARGET_NODATA, _SV_NODATA)
+
+        # uptake from each soil layer in proportion to its contribution to
+        # availm
+        minerl_list = list(minerl_list)
+        for lyr_i in range(nlay):
+            if iel == 2:
+                fsol = fsfunc(minerl_list[0], sorpmx, pslsrb)
+            else:
+                fsol = numpy.ones(eavail.shape, dtype=numpy.float32)
+            minerl_uptake = calc_minerl_uptake_lyr(
+                uptake_soil, minerl_list[lyr_i], fsol, availm)
 
-    # clean up temporary files
-    shutil.rmtree(temp_dir)
+            # uptake removed from soil is weighted by pft % cover
+            uptake_weighted = _array_product(
+                fract_cover, pft_nodata, minerl_uptake, _TARGET_NODATA,
+                _TARGET_NODATA)
+            minerl_list[lyr_i] = _array_difference(
+                minerl_list[lyr_i], _SV_NODATA, uptake_weighted,
+                _TARGET_NODATA, _SV_NODATA)
+
+            # uptake from minerl iel in lyr into above and belowground live
+            delta_aglive = _array_sum(
+                delta_aglive, _SV_NODATA,
+                calc_aboveground_uptake(minerl_uptake, eup_above, eup_below),
+                _TARGET_NODATA, _SV_NODATA)
+            bglive = _array_sum(
+                bglive, _SV_NODATA,
+                calc_belowground_uptake(minerl_uptake, eup_above, eup_below),
+                _TARGET_NODATA, _SV_NODATA)
+
+        # uptake from N fixation into above and belowground live
+        if iel == 1:
+            uptake_Nfix = uptake_list[2]
+            delta_aglive = _array_sum(
+                delta_aglive, _SV_NODATA,
+                calc_aboveground_uptake(uptake_Nfix, eup_above, eup_below),
+                _TARGET_NODATA, _SV_NODATA)
+            bglive = _array_sum(
+                bglive, _SV_NODATA,
+                calc_belowground_uptake(uptake_Nfix, eup_above, eup_below),
+                _TARGET_NODATA, _SV_NODATA)
+        return [crpstg, bglive, delta_aglive] + minerl_list
+
+    if nlay > 0 or iel == 1:
+        delta_aglive_nodata = _SV_NODATA
+    else:
+        delta_aglive_nodata = _TARGET_NODATA
+    minerl_path_list = [
+        sv_reg['minerl_{}_{}_path'.format(lyr, iel)] for lyr in
+        range(1, nlay + 1)]
+    multi_raster_calculator(
+        [eavail_path, eup_above_iel_path, eup_below_iel_path, plantNfix_path,
+         sv_reg['crpstg_{}_{}_path'.format(iel, pft_i)],
+         sv_reg['bglive_{}_{}_path'.format(iel, pft_i)], fract_cover_path,
+         availm_path, sorpmx_path, pslsrb_path] + minerl_path_list,
+        uptake_op,
+        [sv_reg['crpstg_{}_{}_path'.format(iel, pft_i)],
+         sv_reg['bglive_{}_{}_path'.format(iel, pft_i)],
+         delta_aglive_iel_path] + minerl_path_list,
+        [_SV_NODATA, _SV_NODATA, delta_aglive_nodata] +
+        [_SV_NODATA] * nlay)
 
 
 def calc_nutrient_limitation(return_type):
@@ -10174,18 +12262,13 @@ def calc_nutrient_limitation(return_type):
         plantNfix[valid_mask] = numpy.maximum(
             eprodl_1[valid_mask] - eavail_1[valid_mask], 0.)
 
-        if return_type == 'cprodl':
-            return cprodl
-        elif return_type == 'eup_above_1':
-            return eup_above_1
-        elif return_type == 'eup_below_1':
-            return eup_below_1
-        elif return_type == 'eup_above_2':
-            return eup_above_2
-        elif return_type == 'eup_below_2':
-            return eup_below_2
-        elif return_type == 'plantNfix':
-            return plantNfix
+        return _select_outputs(return_type, {
+            'cprodl': cprodl,
+            'eup_above_1': eup_above_1,
+            'eup_below_1': eup_below_1,
+            'eup_above_2': eup_above_2,
+            'eup_below_2': eup_below_2,
+            'plantNfix': plantNfix})
     return _nutrlm
 
 
@@ -10267,13 +12350,8 @@ def _new_growth(
             'favail_1', 'favail_4', 'favail_5', 'favail_6', 'pslsrb',
             'sorpmx']:
         target_path = os.path.join(temp_dir, '{}.tif'.format(val))
-        param_val_dict[val] = target_path
-        site_to_val = dict(
-            [(site_code, float(table[val])) for
-                (site_code, table) in site_param_table.items()])
-        pygeoprocessing.reclassify_raster(
-            (aligned_inputs['site_index'], 1), site_to_val, target_path,
-            gdal.GDT_Float32, _IC_NODATA)
+        param_val_dict[val] = _site_param_raster(
+            aligned_inputs['site_index'], site_param_table, val, target_path)
     param_val_dict['favail_2'] = os.path.join(temp_dir, 'favail_2.tif')
     _calc_favail_P(sv_reg, param_val_dict)
 
@@ -10282,11 +12360,11 @@ def _new_growth(
         for val in ['snfxmx_1']:
             target_path = os.path.join(
                 temp_dir, '{}_{}.tif'.format(val, pft_i))
-            param_val_dict['{}_{}'.format(val, pft_i)] = target_path
             fill_val = veg_trait_table[pft_i][val]
-            pygeoprocessing.new_raster_from_base(
-                sv_reg['aglivc_{}_path'.format(pft_i)], target_path,
-                gdal.GDT_Float32, [_IC_NODATA], fill_value_list=[fill_val])
+            param_val_dict['{}_{}'.format(val, pft_i)] = (
+                _constant_param_raster(
+                    sv_reg['aglivc_{}_path'.format(pft_i)], fill_val,
+                    target_path))
 
     for pft_i in pft_id_set:
         if current_month != veg_trait_table[pft_i]['senescence_month']:
@@ -10328,114 +12406,29 @@ def _new_growth(
                 restrict_potential_growth,
                 temp_val_dict['potenc_lim_minerl_{}'.format(pft_i)],
                 gdal.GDT_Float32, _TARGET_NODATA)
-            pygeoprocessing.raster_calculator(
-                [(path, 1) for path in [
-                    temp_val_dict['potenc_lim_minerl_{}'.format(pft_i)],
-                    month_reg['rtsh_{}'.format(pft_i)],
-                    temp_val_dict['eavail_1_{}'.format(pft_i)],
-                    temp_val_dict['eavail_2_{}'.format(pft_i)],
-                    param_val_dict['snfxmx_1_{}'.format(pft_i)],
-                    month_reg['cercrp_max_above_1_{}'.format(pft_i)],
-                    month_reg['cercrp_max_below_1_{}'.format(pft_i)],
-                    month_reg['cercrp_max_above_2_{}'.format(pft_i)],
-                    month_reg['cercrp_max_below_2_{}'.format(pft_i)],
-                    month_reg['cercrp_min_above_1_{}'.format(pft_i)],
-                    month_reg['cercrp_min_below_1_{}'.format(pft_i)],
-                    month_reg['cercrp_min_above_2_{}'.format(pft_i)],
-                    month_reg['cercrp_min_below_2_{}'.format(pft_i)]]],
-                calc_nutrient_limitation('cprodl'),
-                temp_val_dict['cprodl_{}'.format(pft_i)],
-                gdal.GDT_Float32, _TARGET_NODATA)
-            pygeoprocessing.raster_calculator(
-                [(path, 1) for path in [
-                    temp_val_dict['potenc_lim_minerl_{}'.format(pft_i)],
-                    month_reg['rtsh_{}'.format(pft_i)],
-                    temp_val_dict['eavail_1_{}'.format(pft_i)],
-                    temp_val_dict['eavail_2_{}'.format(pft_i)],
-                    param_val_dict['snfxmx_1_{}'.format(pft_i)],
-                    month_reg['cercrp_max_above_1_{}'.format(pft_i)],
-                    month_reg['cercrp_max_below_1_{}'.format(pft_i)],
-                    month_reg['cercrp_max_above_2_{}'.format(pft_i)],
-                    month_reg['cercrp_max_below_2_{}'.format(pft_i)],
-                    month_reg['cercrp_min_above_1_{}'.format(pft_i)],
-                    month_reg['cercrp_min_below_1_{}'.format(pft_i)],
-                    month_reg['cercrp_min_above_2_{}'.format(pft_i)],
-                    month_reg['cercrp_min_below_2_{}'.format(pft_i)]]],
-                calc_nutrient_limitation('eup_above_1'),
-                temp_val_dict['eup_above_1_{}'.format(pft_i)],
-                gdal.GDT_Float32, _TARGET_NODATA)
-            pygeoprocessing.raster_calculator(
-                [(path, 1) for path in [
-                    temp_val_dict['potenc_lim_minerl_{}'.format(pft_i)],
-                    month_reg['rtsh_{}'.format(pft_i)],
-                    temp_val_dict['eavail_1_{}'.format(pft_i)],
-                    temp_val_dict['eavail_2_{}'.format(pft_i)],
-                    param_val_dict['snfxmx_1_{}'.format(pft_i)],
-                    month_reg['cercrp_max_above_1_{}'.format(pft_i)],
-                    month_reg['cercrp_max_below_1_{}'.format(pft_i)],
-                    month_reg['cercrp_max_above_2_{}'.format(pft_i)],
-                    month_reg['cercrp_max_below_2_{}'.format(pft_i)],
-                    month_reg['cercrp_min_above_1_{}'.format(pft_i)],
-                    month_reg['cercrp_min_below_1_{}'.format(pft_i)],
-                    month_reg['cercrp_min_above_2_{}'.format(pft_i)],
-                    month_reg['cercrp_min_below_2_{}'.format(pft_i)]]],
-                calc_nutrient_limitation('eup_below_1'),
-                temp_val_dict['eup_below_1_{}'.format(pft_i)],
-                gdal.GDT_Float32, _TARGET_NODATA)
-            pygeoprocessing.raster_calculator(
-                [(path, 1) for path in [
-                    temp_val_dict['potenc_lim_minerl_{}'.format(pft_i)],
-                    month_reg['rtsh_{}'.format(pft_i)],
-                    temp_val_dict['eavail_1_{}'.format(pft_i)],
-                    temp_val_dict['eavail_2_{}'.format(pft_i)],
-                    param_val_dict['snfxmx_1_{}'.format(pft_i)],
-                    month_reg['cercrp_max_above_1_{}'.format(pft_i)],
-                    month_reg['cercrp_max_below_1_{}'.format(pft_i)],
-                    month_reg['cercrp_max_above_2_{}'.format(pft_i)],
-                    month_reg['cercrp_max_below_2_{}'.format(pft_i)],
-                    month_reg['cercrp_min_above_1_{}'.format(pft_i)],
-                    month_reg['cercrp_min_below_1_{}'.format(pft_i)],
-                    month_reg['cercrp_min_above_2_{}'.format(pft_i)],
-                    month_reg['cercrp_min_below_2_{}'.format(pft_i)]]],
-                calc_nutrient_limitation('eup_above_2'),
-                temp_val_dict['eup_above_2_{}'.format(pft_i)],
-                gdal.GDT_Float32, _TARGET_NODATA)
-            pygeoprocessing.raster_calculator(
-                [(path, 1) for path in [
-                    temp_val_dict['potenc_lim_minerl_{}'.format(pft_i)],
-                    month_reg['rtsh_{}'.format(pft_i)],
-                    temp_val_dict['eavail_1_{}'.format(pft_i)],
-                    temp_val_dict['eavail_2_{}'.format(pft_i)],
-                    param_val_dict['snfxmx_1_{}'.format(pft_i)],
-                    month_reg['cercrp_max_above_1_{}'.format(pft_i)],
-                    month_reg['cercrp_max_below_1_{}'.format(pft_i)],
-                    month_reg['cercrp_max_above_2_{}'.format(pft_i)],
-                    month_reg['cercrp_max_below_2_{}'.format(pft_i)],
-                    month_reg['cercrp_min_above_1_{}'.format(pft_i)],
-                    month_reg['cercrp_min_below_1_{}'.format(pft_i)],
-                    month_reg['cercrp_min_above_2_{}'.format(pft_i)],
-                    month_reg['cercrp_min_below_2_{}'.format(pft_i)]]],
-                calc_nutrient_limitation('eup_below_2'),
-                temp_val_dict['eup_below_2_{}'.format(pft_i)],
-                gdal.GDT_Float32, _TARGET_NODATA)
-            pygeoprocessing.raster_calculator(
-                [(path, 1) for path in [
-                    temp_val_dict['potenc_lim_minerl_{}'.format(pft_i)],
-                    month_reg['rtsh_{}'.format(pft_i)],
-                    temp_val_dict['eavail_1_{}'.format(pft_i)],
-                    temp_val_dict['eavail_2_{}'.format(pft_i)],
-                    param_val_dict['snfxmx_1_{}'.format(pft_i)],
-                    month_reg['cercrp_max_above_1_{}'.format(pft_i)],
-                    month_reg['cercrp_max_below_1_{}'.format(pft_i)],
-                    month_reg['cercrp_max_above_2_{}'.format(pft_i)],
-                    month_reg['cercrp_max_below_2_{}'.format(pft_i)],
-                    month_reg['cercrp_min_above_1_{}'.format(pft_i)],
-                    month_reg['cercrp_min_below_1_{}'.format(pft_i)],
-                    month_reg['cercrp_min_above_2_{}'.format(pft_i)],
-                    month_reg['cercrp_min_below_2_{}'.format(pft_i)]]],
-                calc_nutrient_limitation('plantNfix'),
-                temp_val_dict['plantNfix_{}'.format(pft_i)],
-                gdal.GDT_Float32, _TARGET_NODATA)
+            # C, N and P in new production limited by nutrient
+            # availability, calculated together in one pass
+            nutrlm_val_list = [
+                'cprodl', 'eup_above_1', 'eup_below_1', 'eup_above_2',
+                'eup_below_2', 'plantNfix']
+            multi_raster_calculator(
+                [temp_val_dict['potenc_lim_minerl_{}'.format(pft_i)],
+                 month_reg['rtsh_{}'.format(pft_i)],
+                 temp_val_dict['eavail_1_{}'.format(pft_i)],
+                 temp_val_dict['eavail_2_{}'.format(pft_i)],
+                 param_val_dict['snfxmx_1_{}'.format(pft_i)],
+                 month_reg['cercrp_max_above_1_{}'.format(pft_i)],
+                 month_reg['cercrp_max_below_1_{}'.format(pft_i)],
+                 month_reg['cercrp_max_above_2_{}'.format(pft_i)],
+                 month_reg['cercrp_max_below_2_{}'.format(pft_i)],
+                 month_reg['cercrp_min_above_1_{}'.format(pft_i)],
+                 month_reg['cercrp_min_below_1_{}'.format(pft_i)],
+                 month_reg['cercrp_min_above_2_{}'.format(pft_i)],
+                 month_reg['cercrp_min_below_2_{}'.format(pft_i)]],
+                calc_nutrient_limitation(nutrlm_val_list),
+                [temp_val_dict['{}_{}'.format(val, pft_i)] for val in
+                 nutrlm_val_list],
+                [_TARGET_NODATA] * len(nutrlm_val_list))
 
             # calculate uptake of C into new aboveground production
             pygeoprocessing.raster_calculator(
@@ -10527,6 +12520,32 @@ def _apply_new_growth(delta_agliv_dict, pft_id_set, sv_reg):
     os.remove(statv_temp_path)
 
 
+def _sv_flow(state_variable, flow, flow_mask):
+    """Add a flow to a state variable held in memory.
+
+    Equivalent to `raster_sum` of the state variable and the flow, without
+    removing nodata, for arrays rather than rasters: the result is nodata
+    wherever the state variable is nodata or the flow is invalid.
+
+    Parameters:
+        state_variable (numpy.ndarray): state variable, with nodata value
+            _SV_NODATA
+        flow (numpy.ndarray): flow into the state variable; negative values
+            indicate flow out of the state variable
+        flow_mask (numpy.ndarray): boolean mask indicating where the flow is
+            valid
+
+    Returns:
+        the state variable after the flow, as a new array
+
+    """
+    valid_mask = _valid_mask(state_variable, _SV_NODATA) & flow_mask
+    result = numpy.empty(state_variable.shape, dtype=numpy.float32)
+    result[:] = _SV_NODATA
+    result[valid_mask] = state_variable[valid_mask] + flow[valid_mask]
+    return result
+
+
 def calc_amount_leached(minlch, amov_lyr, frlech, minerl_lyr_iel):
     """Calculate amount of mineral nutrient leaching from one soil layer.
 
@@ -10553,7 +12572,7 @@ def calc_amount_leached(minlch, amov_lyr, frlech, minerl_lyr_iel):
         (minlch != _IC_NODATA) &
         (amov_lyr != _TARGET_NODATA) &
         (frlech != _TARGET_NODATA) &
-        (~numpy.isclose(minerl_lyr_iel, _SV_NODATA)))
+        _valid_mask(minerl_lyr_iel, _SV_NODATA))
 
     linten = numpy.clip(
         1. - (minlch[valid_mask] - amov_lyr[valid_mask]) / minlch[valid_mask],
@@ -10619,7 +12638,7 @@ def _leach(aligned_inputs, site_param_table, month_reg, sv_reg):
         valid_mask = (
             (fleach_1 != _IC_NODATA) &
             (fleach_2 != _IC_NODATA) &
-            (~numpy.isclose(sand, sand_nodata)) &
+            _valid_mask(sand, sand_nodata) &
             (fleach_3 != _IC_NODATA))
 
         frlech_N = numpy.empty(fleach_1.shape, dtype=numpy.float32)
@@ -10656,7 +12675,7 @@ def _leach(aligned_inputs, site_param_table, month_reg, sv_reg):
         valid_mask = (
             (fleach_1 != _IC_NODATA) &
             (fleach_2 != _IC_NODATA) &
-            (~numpy.isclose(sand, sand_nodata)) &
+            _valid_mask(sand, sand_nodata) &
             (fleach_4 != _IC_NODATA) &
             (fsol != _TARGET_NODATA))
 
@@ -10671,21 +12690,15 @@ def _leach(aligned_inputs, site_param_table, month_reg, sv_reg):
 
     temp_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
     temp_val_dict = {}
-    for val in [
-            'fsol', 'frlech_1', 'frlech_2', 'amount_leached', 'd_statv_temp']:
+    for val in ['fsol', 'frlech_1', 'frlech_2']:
         temp_val_dict[val] = os.path.join(temp_dir, '{}.tif'.format(val))
     param_val_dict = {}
     for val in [
             'sorpmx', 'pslsrb', 'minlch', 'fleach_1', 'fleach_2', 'fleach_3',
             'fleach_4']:
         target_path = os.path.join(temp_dir, '{}.tif'.format(val))
-        param_val_dict[val] = target_path
-        site_to_val = dict(
-            [(site_code, float(table[val])) for
-                (site_code, table) in site_param_table.items()])
-        pygeoprocessing.reclassify_raster(
-            (aligned_inputs['site_index'], 1), site_to_val, target_path,
-            gdal.GDT_Float32, _IC_NODATA)
+        param_val_dict[val] = _site_param_raster(
+            aligned_inputs['site_index'], site_param_table, val, target_path)
 
     sand_nodata = pygeoprocessing.get_raster_info(
         aligned_inputs['sand'])['nodata'][0]
@@ -10708,31 +12721,54 @@ def _leach(aligned_inputs, site_param_table, month_reg, sv_reg):
         calc_frlech_P, temp_val_dict['frlech_2'], gdal.GDT_Float32,
         _TARGET_NODATA)
 
-    for iel in [1, 2]:
-        for lyr in range(1, nlayer_max + 1):
-            pygeoprocessing.raster_calculator(
-                [(path, 1) for path in [
-                    param_val_dict['minlch'], month_reg['amov_{}'.format(lyr)],
-                    temp_val_dict['frlech_{}'.format(iel)],
-                    sv_reg['minerl_{}_{}_path'.format(lyr, iel)]]],
-                calc_amount_leached, temp_val_dict['amount_leached'],
-                gdal.GDT_Float32, _TARGET_NODATA)
-            shutil.copyfile(
-                sv_reg['minerl_{}_{}_path'.format(lyr, iel)],
-                temp_val_dict['d_statv_temp'])
-            raster_difference(
-                temp_val_dict['d_statv_temp'], _SV_NODATA,
-                temp_val_dict['amount_leached'], _TARGET_NODATA,
-                sv_reg['minerl_{}_{}_path'.format(lyr, iel)], _SV_NODATA)
-            if lyr != nlayer_max:
-                shutil.copyfile(
-                    sv_reg['minerl_{}_{}_path'.format(lyr + 1, iel)],
-                    temp_val_dict['d_statv_temp'])
-                raster_sum(
-                    temp_val_dict['d_statv_temp'], _SV_NODATA,
-                    temp_val_dict['amount_leached'], _TARGET_NODATA,
-                    sv_reg['minerl_{}_{}_path'.format(lyr + 1, iel)],
-                    _SV_NODATA)
+    def leach_cascade(minlch, frlech_1, frlech_2, *layer_list):
+        """Carry mineral N and P down through all soil layers.
+
+        Layers are processed in order from the surface, so that nutrient
+        leached into a layer can leach further in the same step.
+
+        Parameters:
+            minlch (numpy.ndarray): parameter, critical water flow for
+                leaching of minerals
+            frlech_1 (numpy.ndarray): derived, potential fraction of mineral
+                N leaching
+            frlech_2 (numpy.ndarray): derived, potential fraction of mineral
+                P leaching
+            layer_list (list): saturated flow of water from each soil layer,
+                followed by mineral N in each soil layer and mineral P in each
+                soil layer
+
+        Returns:
+            list of modified mineral N in each soil layer followed by
+                modified mineral P in each soil layer
+
+        """
+        amov_list = layer_list[:nlayer_max]
+        minerl_list = list(layer_list[nlayer_max:])
+        for iel_i, frlech in enumerate([frlech_1, frlech_2]):
+            for lyr_i in range(nlayer_max):
+                sv_i = iel_i * nlayer_max + lyr_i
+                amount_leached = calc_amount_leached(
+                    minlch, amov_list[lyr_i], frlech, minerl_list[sv_i])
+                leached_mask = _valid_mask(amount_leached, _TARGET_NODATA)
+                minerl_list[sv_i] = _sv_flow(
+                    minerl_list[sv_i], -amount_leached, leached_mask)
+                if lyr_i != nlayer_max - 1:
+                    minerl_list[sv_i + 1] = _sv_flow(
+                        minerl_list[sv_i + 1], amount_leached, leached_mask)
+        return minerl_list
+
+    minerl_path_list = [
+        sv_reg['minerl_{}_{}_path'.format(lyr, iel)] for iel in [1, 2] for
+        lyr in range(1, nlayer_max + 1)]
+    multi_raster_calculator(
+        [param_val_dict['minlch'], temp_val_dict['frlech_1'],
+            temp_val_dict['frlech_2']] +
+        [month_reg['amov_{}'.format(lyr)] for lyr in
+            range(1, nlayer_max + 1)] +
+        minerl_path_list,
+        leach_cascade, minerl_path_list,
+        [_SV_NODATA] * len(minerl_path_list))
 
     # clean up temporary files
     shutil.rmtree(temp_dir)
@@ -10751,7 +12787,7 @@ def calc_c_removed(c_state_variable, percent_removed):
         c_consumed, C in the given state variable consumed by grazing
 
     """
-    valid_mask = (~numpy.isclose(c_state_variable, _SV_NODATA))
+    valid_mask = _valid_mask(c_state_variable, _SV_NODATA)
     consumed_mask = ((percent_removed != _TARGET_NODATA) & valid_mask)
     c_consumed = numpy.empty(c_state_variable.shape, dtype=numpy.float32)
     c_consumed[:] = _TARGET_NODATA
@@ -10782,8 +12818,8 @@ def calc_iel_removed(c_consumed, iel_state_variable, c_state_variable):
     """
     valid_mask = (
         (c_consumed != _TARGET_NODATA) &
-        (~numpy.isclose(iel_state_variable, _SV_NODATA)) &
-        (~numpy.isclose(c_state_variable, _SV_NODATA)) &
+        _valid_mask(iel_state_variable, _SV_NODATA) &
+        _valid_mask(c_state_variable, _SV_NODATA) &
         (c_state_variable > 0))
     iel_consumed = numpy.empty(c_consumed.shape, dtype=numpy.float32)
     iel_consumed[:] = _TARGET_NODATA
@@ -10854,7 +12890,7 @@ def _grazing(
             gret_1, fraction of consumed N that is returned in feces and urine
 
         """
-        valid_mask = (~numpy.isclose(clay, clay_nodata))
+        valid_mask = _valid_mask(clay, clay_nodata)
         gret_1 = numpy.empty(clay.shape, dtype=numpy.float32)
         gret_1[:] = _IC_NODATA
         gret_1[valid_mask] = numpy.clip(
@@ -10889,7 +12925,7 @@ def _grazing(
             (shremc != _TARGET_NODATA) &
             (sdremc != _TARGET_NODATA) &
             (gfcret != _IC_NODATA) &
-            (~numpy.isclose(pft_cover, pft_nodata)))
+            _valid_mask(pft_cover, pft_nodata))
         weighted_c_returned = numpy.empty(shremc.shape, dtype=numpy.float32)
         weighted_c_returned[:] = _TARGET_NODATA
         weighted_c_returned[valid_mask] = (
@@ -10928,7 +12964,7 @@ def _grazing(
             (sdreme != _TARGET_NODATA) &
             (gret != _IC_NODATA) &
             (fecf != _IC_NODATA) &
-            (~numpy.isclose(pft_cover, pft_nodata)))
+            _valid_mask(pft_cover, pft_nodata))
         weighted_iel_returned_feces = numpy.empty(
             shreme.shape, dtype=numpy.float32)
         weighted_iel_returned_feces[:] = _TARGET_NODATA
@@ -10963,7 +12999,7 @@ def _grazing(
             weighted_iel_returned_urine, N or P returned in urine
 
         """
-        valid_mask = (~numpy.isclose(pft_cover, pft_nodata))
+        valid_mask = _valid_mask(pft_cover, pft_nodata)
         consumed_mask = (
             (shreme != _TARGET_NODATA) &
             (sdreme != _TARGET_NODATA) &
@@ -10998,13 +13034,9 @@ def _grazing(
     param_val_dict['gret_1'] = os.path.join(temp_dir, 'gret_1.tif')
     for val in ['gfcret', 'gret_2', 'fecf_1', 'fecf_2', 'feclig']:
         target_path = os.path.join(temp_dir, '{}.tif'.format(val))
-        param_val_dict[val] = target_path
-        animal_to_val = dict(
-            [(animal_code, float(table[val])) for
-                (animal_code, table) in animal_trait_table.items()])
-        pygeoprocessing.reclassify_raster(
-            (aligned_inputs['animal_index'], 1), animal_to_val, target_path,
-            gdal.GDT_Float32, _IC_NODATA)
+        param_val_dict[val] = _animal_param_raster(
+            aligned_inputs['animal_index'], animal_trait_table, val,
+            target_path)
 
     clay_nodata = pygeoprocessing.get_raster_info(
         aligned_inputs['clay'])['nodata'][0]
@@ -11397,8 +13429,8 @@ def calc_pasture_height(sv_reg, aligned_inputs, pft_id_set, processing_dir):
 
         """
         valid_mask = (
-            (~numpy.isclose(cstatv, _SV_NODATA)) &
-            (~numpy.isclose(pft_cover, pft_nodata)))
+            _valid_mask(cstatv, _SV_NODATA) &
+            _valid_mask(pft_cover, pft_nodata))
         biomass_kgha = numpy.empty(cstatv.shape, dtype=numpy.float32)
         biomass_kgha[:] = _TARGET_NODATA
         biomass_kgha[valid_mask] = (
@@ -11425,7 +13457,7 @@ def calc_pasture_height(sv_reg, aligned_inputs, pft_id_set, processing_dir):
         """
         square_list = []
         for r in biomass_array_list:
-            numpy.place(r, numpy.isclose(r, _TARGET_NODATA), [0])
+            numpy.place(r, _nodata_mask(r, _TARGET_NODATA), [0])
             square_list.append(r ** 2)
         numerator = (numpy.sum(biomass_array_list, axis=0)) ** 2
         denominator = numpy.sum(square_list, axis=0)
@@ -11542,8 +13574,8 @@ def calc_fraction_biomass(
 
         """
         valid_mask = (
-            (~numpy.isclose(cstatv, _SV_NODATA)) &
-            (~numpy.isclose(pft_cover, pft_nodata)) &
+            _valid_mask(cstatv, _SV_NODATA) &
+            _valid_mask(pft_cover, pft_nodata) &
             (total_weighted_C != _TARGET_NODATA) &
             (total_weighted_C > 0))
         weighted_fraction = numpy.empty(cstatv.shape, dtype=numpy.float32)
@@ -11580,15 +13612,21 @@ def calc_fraction_biomass(
     return frac_biomass_dict
 
 
-def order_by_digestibility(sv_reg, pft_id_set, aoi_path):
-    """Calculate the order of feed types according to their digestibility.
+def calc_feed_type_nc_sums(
+        sv_reg, pft_id_set, aoi_path, weight_raster_path=None):
+    """Sum carbon and nitrogen of each feed type inside the study area.
 
-    During diet selection, animals select among feed types in descending order
-    by feed type digestibility. Because digestibility is linearly related to
-    crude protein content, the order of feed types may be estimated from their
-    nitrogen to carbon ratios. Order feed types by digestibility according to
-    the mean nitrogen to carbon ratio of each feed type across the study area
-    aoi.
+    Calculate the sum and count of valid pixels of the state variables
+    representing carbon and nitrogen in each feed type, inside the study area
+    aoi. Sums for all feed types are accumulated in a single pass over the
+    state variable rasters, using a raster of the study area that is
+    rasterized once per raster extent. As with zonal statistics summed
+    across the features of the study area, pixels covered by more than one
+    feature are counted once for each feature. Sums calculated for separate
+    portions of the study area may be combined to calculate the order of feed
+    types across the whole study area. If a weight raster is supplied, each
+    pixel contributes to sums and counts in proportion to its weight and the
+    study area is not rasterized.
 
     Parameters:
         sv_reg (dict): map of key, path pairs giving paths to state
@@ -11597,63 +13635,111 @@ def order_by_digestibility(sv_reg, pft_id_set, aoi_path):
         pft_id_set (set): set of integers identifying plant functional types
         aoi_path (string): path to vector layer giving the spatial extent of
             the model
+        weight_raster_path (string): optional path to a raster giving the
+            number of pixels represented by each pixel of the state variable
+            rasters. Pixels with weight <= 0 are excluded.
 
     Returns:
-        ordered_feed_types, a list of strings where each string designates a
-            feed type by a combination of pft_i and fraction (aboveground live
-            or standing dead), in descending order of digestibility
+        nc_sum_dict, a dictionary where keys are strings designating a feed
+            type by a combination of pft_i and fraction (aboveground live or
+            standing dead), and values are dictionaries with the keys
+            'c_sum', 'c_count', 'n_sum' and 'n_count'
 
     """
-    def calc_nc_ratio(cstatv_path, nstatv_path, aoi_path):
-        """Calculate the mean nitrogen to carbon ratio of a biomass fraction.
+    nc_sum_dict = {}
+    stat_key_list = []
+    stat_path_list = []
+    for pft_i in pft_id_set:
+        for statv in ['agliv', 'stded']:
+            feed_type = '{}_{}'.format(statv, pft_i)
+            nc_sum_dict[feed_type] = {
+                'c_sum': 0., 'c_count': 0, 'n_sum': 0., 'n_count': 0}
+            stat_key_list.extend([(feed_type, 'c'), (feed_type, 'n')])
+            stat_path_list.extend([
+                sv_reg['{}c_{}_path'.format(statv, pft_i)],
+                sv_reg['{}e_1_{}_path'.format(statv, pft_i)]])
+    if not stat_path_list:
+        return nc_sum_dict
 
-        Calculate the mean nitrogen to carbon ratio of a biomass fraction
-        falling inside the study area aoi.  The ratio is calculated from the
-        state variables representing carbon and nitrogen content of that
-        biomass fraction. If the area of interest vector dataset contains more
-        than one polygon feature, the average ratio is calculated across
-        features.
+    temp_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
+    try:
+        if weight_raster_path is None:
+            # each pixel is weighted by the number of study area features
+            # that it is counted for
+            weight_raster_path = _aoi_weight_raster(
+                stat_path_list[0], aoi_path,
+                os.path.join(temp_dir, 'aoi_weight.tif'))
+        nodata_list = [
+            pygeoprocessing.get_raster_info(path)['nodata'][0] for path in
+            stat_path_list]
+        weight_raster = gdal.OpenEx(weight_raster_path, gdal.OF_RASTER)
+        weight_band = weight_raster.GetRasterBand(1)
+        stat_raster_list = [
+            gdal.OpenEx(path, gdal.OF_RASTER) for path in stat_path_list]
+        stat_band_list = [
+            raster.GetRasterBand(1) for raster in stat_raster_list]
+        for offset_map in pygeoprocessing.iterblocks(
+                (weight_raster_path, 1), offset_only=True):
+            weight_array = weight_band.ReadAsArray(**offset_map)
+            aoi_mask = (weight_array > 0)
+            if not aoi_mask.any():
+                continue
+            weight_array = weight_array[aoi_mask].astype(numpy.float64)
+            for (feed_type, element), band, nodata in zip(
+                    stat_key_list, stat_band_list, nodata_list):
+                value_array = band.ReadAsArray(**offset_map)[aoi_mask]
+                pixel_weight = weight_array
+                if nodata is not None:
+                    valid_mask = _valid_mask(value_array, nodata)
+                    value_array = value_array[valid_mask]
+                    pixel_weight = weight_array[valid_mask]
+                nc_sum_dict[feed_type]['{}_sum'.format(element)] += (
+                    numpy.sum(value_array * pixel_weight, dtype=numpy.float64))
+                nc_sum_dict[feed_type]['{}_count'.format(element)] += int(
+                    numpy.rint(numpy.sum(pixel_weight)))
+        weight_band = None
+        weight_raster = None
+        stat_band_list = None
+        stat_raster_list = None
+    finally:
+        shutil.rmtree(temp_dir)
+    return nc_sum_dict
+
+
+def order_feed_types(nc_sum_dict_list):
+    """Order feed types by digestibility from sums of carbon and nitrogen.
+
+    Combine sums of carbon and nitrogen calculated for one or more portions
+    of the study area by `calc_feed_type_nc_sums` and order feed types
+    according to the ratio of mean nitrogen to mean carbon of each feed type
+    across the combined area.
 
-        Parameters:
-            cstatv_path (string): path to raster containing carbon in the
-                biomass fraction
-            nstatv_path (string): path to raster containing nitrogen in the
-                biomass fraction
-            aoi_path (string): path to vector layer defining the study area of
-                interest
+    Parameters:
+        nc_sum_dict_list (list): list of dictionaries returned by
+            `calc_feed_type_nc_sums`
 
-        Returns:
-            nc_ratio, the ratio of mean nitrogen to mean carbon for this state
-                variable inside the model area of interest
+    Returns:
+        ordered_feed_types, a list of strings where each string designates a
+            feed type by a combination of pft_i and fraction (aboveground live
+            or standing dead), in descending order of digestibility
 
-        """
-        carbon_zonal_stat_df = pandas.DataFrame.from_dict(
-            pygeoprocessing.zonal_statistics((cstatv_path, 1), aoi_path),
-            orient='index')
-        if carbon_zonal_stat_df['count'].sum() == 0:
-            return 0
-        else:
-            mean_carbon = (
-                carbon_zonal_stat_df['sum'].sum() /
-                carbon_zonal_stat_df['count'].sum())
-        nitrogen_zonal_stat_df = pandas.DataFrame.from_dict(
-            pygeoprocessing.zonal_statistics((nstatv_path, 1), aoi_path),
-            orient='index')
-        if nitrogen_zonal_stat_df['count'].sum() == 0:
+    """
+    nc_ratio_dict = {}
+    for feed_type in nc_sum_dict_list[0]:
+        totals = dict(
+            (key, numpy.float64(sum(
+                nc_sum_dict[feed_type][key] for nc_sum_dict in
+                nc_sum_dict_list))) for key in
+            ['c_sum', 'c_count', 'n_sum', 'n_count'])
+        if totals['c_count'] == 0:
+            nc_ratio_dict[feed_type] = 0
+            continue
+        mean_carbon = totals['c_sum'] / totals['c_count']
+        if totals['n_count'] == 0:
             mean_nitrogen = 0
         else:
-            mean_nitrogen = (
-                nitrogen_zonal_stat_df['sum'].sum() /
-                nitrogen_zonal_stat_df['count'].sum())
-        return (mean_nitrogen / mean_carbon)
-
-    nc_ratio_dict = {}
-    for pft_i in pft_id_set:
-        for statv in ['agliv', 'stded']:
-            cstatv_path = sv_reg['{}c_{}_path'.format(statv, pft_i)]
-            nstatv_path = sv_reg['{}e_1_{}_path'.format(statv, pft_i)]
-            nc_ratio = calc_nc_ratio(cstatv_path, nstatv_path, aoi_path)
-            nc_ratio_dict['{}_{}'.format(statv, pft_i)] = nc_ratio
+            mean_nitrogen = totals['n_sum'] / totals['n_count']
+        nc_ratio_dict[feed_type] = mean_nitrogen / mean_carbon
 
     # order the dictionary by descending N/C ratio keys, get list from values
     sorted_list = sorted(
@@ -11663,6 +13749,35 @@ def order_by_digestibility(sv_reg, pft_id_set, aoi_path):
     return ordered_feed_types
 
 
+def order_by_digestibility(sv_reg, pft_id_set, aoi_path):
+    """Calculate the order of feed types according to their digestibility.
+
+    During diet selection, animals select among feed types in descending order
+    by feed type digestibility. Because digestibility is linearly related to
+    crude protein content, the order of feed types may be estimated from their
+    nitrogen to carbon ratios. Order feed types by digestibility according to
+    the mean nitrogen to carbon ratio of each feed type across the study area
+    aoi. If the area of interest vector dataset contains more than one polygon
+    feature, the average ratio is calculated across features.
+
+    Parameters:
+        sv_reg (dict): map of key, path pairs giving paths to state
+            variables for the previous month, including C and N in aboveground
+            live and standing dead
+        pft_id_set (set): set of integers identifying plant functional types
+        aoi_path (string): path to vector layer giving the spatial extent of
+            the model
+
+    Returns:
+        ordered_feed_types, a list of strings where each string designates a
+            feed type by a combination of pft_i and fraction (aboveground live
+            or standing dead), in descending order of digestibility
+
+    """
+    return order_feed_types(
+        [calc_feed_type_nc_sums(sv_reg, pft_id_set, aoi_path)])
+
+
 def calc_digestibility(
         cstatv, nstatv, digestibility_slope, digestibility_intercept):
     """Calculate the dry matter digestibility of this feed type.
@@ -11687,8 +13802,8 @@ def calc_digestibility(
 
     """
     valid_mask = (
-        (~numpy.isclose(cstatv, _SV_NODATA)) &
-        (~numpy.isclose(nstatv, _SV_NODATA)) &
+        _valid_mask(cstatv, _SV_NODATA) &
+        _valid_mask(nstatv, _SV_NODATA) &
         (digestibility_slope != _IC_NODATA) &
         (digestibility_intercept != _IC_NODATA))
     digestibility = numpy.zeros(cstatv.shape, dtype=numpy.float32)
@@ -11847,8 +13962,8 @@ def calc_crude_protein_intake(
 
         """
         valid_mask = (
-            (~numpy.isclose(cstatv, _SV_NODATA)) &
-            (~numpy.isclose(nstatv, _SV_NODATA)) &
+            _valid_mask(cstatv, _SV_NODATA) &
+            _valid_mask(nstatv, _SV_NODATA) &
             (intake != _TARGET_NODATA))
         weighted_cp = numpy.empty(cstatv.shape, dtype=numpy.float32)
         weighted_cp[:] = _TARGET_NODATA
@@ -11910,6 +14025,53 @@ def calc_energy_intake(total_intake, total_digestibility):
     return energy_intake
 
 
+def _energy_maintenance_pixels(
+        age, sex, weight, energy_intake, total_intake, total_digestibility,
+        CK1, CK2, CM1, CM2, CM3, CM4, CM6, CM7, CM16, sv_nodata,
+        target_nodata, ic_nodata, energy_maintenance):
+    """Calculate energy requirements of maintenance pixel by pixel.
+
+    Equivalent to `calc_energy_maintenance`, as a loop that can be compiled
+    by `_jit_kernel`.
+
+    """
+    for i in range(age.size):
+        if (age[i] == target_nodata or
+                sex[i] == target_nodata or
+                weight[i] == target_nodata or
+                energy_intake[i] == target_nodata or
+                total_intake[i] == target_nodata or
+                total_digestibility[i] == target_nodata or
+                CK1[i] == ic_nodata or
+                CK2[i] == ic_nodata or
+                CM1[i] == ic_nodata or
+                CM2[i] == ic_nodata or
+                CM3[i] == ic_nodata or
+                CM4[i] == ic_nodata or
+                CM6[i] == ic_nodata or
+                CM7[i] == ic_nodata or
+                CM16[i] == ic_nodata):
+            energy_maintenance[i] = target_nodata
+            continue
+        if total_intake[i] > 0:
+            km = CK1[i] + CK2[i] * (energy_intake[i] / total_intake[i])
+            Egraze = (
+                CM6[i] * weight[i] * total_intake[i] *
+                (CM7[i] - total_digestibility[i]) + (CM16[i] * 4. * weight[i]))
+            Emetab = (
+                CM2[i] * weight[i] ** 0.75 *
+                max(math.exp(-CM3[i] * age[i]), CM4[i]))
+            energy_maintenance[i] = (
+                (Emetab + Egraze) / km + CM1[i] * energy_intake[i])
+        else:
+            energy_maintenance[i] = 0.
+        if sex[i] < 3:
+            energy_maintenance[i] = energy_maintenance[i] * 1.15
+
+
+_ENERGY_MAINTENANCE_JIT = _jit_kernel(_energy_maintenance_pixels)
+
+
 def calc_energy_maintenance(
         age, sex, weight, energy_intake, total_intake, total_digestibility,
         CK1, CK2, CM1, CM2, CM3, CM4, CM6, CM7, CM16):
@@ -11953,6 +14115,13 @@ def calc_energy_maintenance(
         energy_maintenance, energy requirements of maintenance
 
     """
+    if _ENERGY_MAINTENANCE_JIT is not None:
+        return _apply_jit_kernel(
+            _ENERGY_MAINTENANCE_JIT, [
+                age, sex, weight, energy_intake, total_intake,
+                total_digestibility, CK1, CK2, CM1, CM2, CM3, CM4, CM6, CM7,
+                CM16], 1)[0]
+
     valid_mask = (
         (age != _TARGET_NODATA) &
         (sex != _TARGET_NODATA) &
@@ -12069,7 +14238,8 @@ def calc_protein_req(
             """Calculate rumen degradable protein required.
 
             Parameters:
-                latitude (numpy.ndarray): derived, site latitude in degrees
+                latitude (numpy.ndarray): derived, site latitude in degrees,
+                    with one value per row
                 energy_intake (numpy.ndarray): derived, total intake of
                     metabolizable energy from the diet
                 energy_maintenance (numpy.ndarray): derived, energy
@@ -12101,12 +14271,15 @@ def calc_protein_req(
             # estimated day of the year in the middle of current current_month
             day_of_year = 15.2 + 30.4 * (current_month - 1)
 
-            radiation_factor = numpy.empty(latitude.shape, dtype=numpy.float32)
+            # seasonal effect varies only with latitude, i.e. by row
+            seasonal_effect = numpy.broadcast_to(
+                (latitude / 40.) * numpy.sin(
+                    (2. * numpy.pi * day_of_year) / 365.), CRD7.shape)
+            radiation_factor = numpy.empty(CRD7.shape, dtype=numpy.float32)
             radiation_factor[valid_mask] = (
-                1. + CRD7[valid_mask] * (latitude[valid_mask] / 40.) *
-                numpy.sin((2. * numpy.pi * day_of_year) / 365.))
+                1. + CRD7[valid_mask] * seasonal_effect[valid_mask])
 
-            protein_req = numpy.empty(latitude.shape, dtype=numpy.float32)
+            protein_req = numpy.empty(CRD7.shape, dtype=numpy.float32)
             protein_req[:] = _TARGET_NODATA
             protein_req[valid_mask] = 0
             protein_req[nonzero_mask] = (
@@ -12118,20 +14291,11 @@ def calc_protein_req(
             return protein_req
         return _protein_req_op
 
-    # calculate an intermediate input, latitude at each pixel center
-    temp_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
-    latitude_raster_path = os.path.join(temp_dir, 'latitude.tif')
-    calc_latitude(energy_intake_path, latitude_raster_path)
-
-    pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            latitude_raster_path, energy_intake_path, energy_maintenance_path,
-            CRD4_path, CRD5_path, CRD6_path, CRD7_path]],
-        protein_req_op(current_month), protein_req_path,
-        gdal.GDT_Float32, _TARGET_NODATA)
-
-    # clean up temporary files
-    shutil.rmtree(temp_dir)
+    _latitude_raster_calculator(
+        energy_intake_path, [
+            energy_intake_path, energy_maintenance_path, CRD4_path, CRD5_path,
+            CRD6_path, CRD7_path],
+        protein_req_op(current_month), protein_req_path)
 
 
 def revise_max_intake(
@@ -12270,7 +14434,7 @@ def calc_max_fraction_removed(total_weighted_C, management_threshold):
 def _calc_grazing_offtake(
         aligned_inputs, aoi_path, management_threshold, sv_reg, pft_id_set,
         animal_index_path, animal_trait_table, veg_trait_table, current_month,
-        month_reg):
+        month_reg, ordered_feed_types=None):
     """Calculate fraction of live and dead biomass removed by herbivores.
 
     Perform diet selection by animals grazing available forage as
@@ -12302,6 +14466,9 @@ def _calc_grazing_offtake(
             calculated values that are shared between submodels, including
             the density of grazing animals per ha and the fraction of biomass
             removed from each pft
+        ordered_feed_types (list): optional, list of feed types in descending
+            order of digestibility. If not supplied, feed types are ordered
+            by their mean nitrogen to carbon ratio inside `aoi_path`
 
     Side effects:
         creates or modifies the raster indicated by
@@ -12315,7 +14482,7 @@ def _calc_grazing_offtake(
     """
     def calc_avail_biomass(
             cstatv, pft_cover, frac_biomass, height, ZF, CR4, CR5, CR6,
-            CR12, CR13):
+            CR12, CR13, pft_nodata):
         """Calculate rate and time spent eating one forage feed type.
 
         Relative availability of a feed type is calculated from the predicted
@@ -12345,14 +14512,16 @@ def _calc_grazing_offtake(
                 relative rate of eating
             CR13 (numpy.ndarray): parameter, effect of proportion of forage in
                 this feed type on rate of eating
+            pft_nodata (float or numpy.ndarray): nodata value of `pft_cover`,
+                or an array of nodata values that can be broadcast against it
 
         Returns:
             avail_biomass, rate * time spent eating this forage feed type
 
         """
         valid_mask = (
-            (~numpy.isclose(cstatv, _SV_NODATA)) &
-            (~numpy.isclose(pft_cover, pft_nodata)) &
+            _valid_mask(cstatv, _SV_NODATA) &
+            _valid_mask(pft_cover, pft_nodata) &
             (frac_biomass != _TARGET_NODATA) &
             (height != _TARGET_NODATA) &
             (ZF != _TARGET_NODATA) &
@@ -12417,7 +14586,7 @@ def _calc_grazing_offtake(
         """
         valid_mask = (
             (digestibility != _TARGET_NODATA) &
-            (~numpy.isclose(prop_legume, legume_nodata)) &
+            _valid_mask(prop_legume, legume_nodata) &
             (CR1 != _IC_NODATA) &
             (CR3 != _IC_NODATA) &
             (species_factor != _IC_NODATA))
@@ -12463,7 +14632,7 @@ def _calc_grazing_offtake(
 
         """
         valid_mask = (
-            (~numpy.isclose(proportion_legume, legume_nodata)) &
+            _valid_mask(proportion_legume, legume_nodata) &
             (maximum_intake != _IC_NODATA) &
             (relative_availability != _TARGET_NODATA) &
             (relative_ingestibility != _TARGET_NODATA) &
@@ -12514,8 +14683,8 @@ def _calc_grazing_offtake(
 
         """
         valid_mask = (
-            (~numpy.isclose(cstatv, _SV_NODATA)) &
-            (~numpy.isclose(pft_cover, pft_nodata)) &
+            _valid_mask(cstatv, _SV_NODATA) &
+            _valid_mask(pft_cover, pft_nodata) &
             (daily_intake != _TARGET_NODATA) &
             (animal_density != _TARGET_NODATA) &
             (max_fgrem != _TARGET_NODATA))
@@ -12538,7 +14707,7 @@ def _calc_grazing_offtake(
     temp_val_dict = {}
     for val in [
             'weighted_sum_aglivc', 'weighted_sum_stdedc', 'total_weighted_C',
-            'management_threshold', 'max_fgrem', 'avail_biomass',
+            'management_threshold', 'max_fgrem',
             'relative_availability_sum', 'total_intake',
             'total_digestibility', 'total_crude_protein_intake',
             'energy_intake', 'energy_maintenance',
@@ -12561,13 +14730,8 @@ def _calc_grazing_offtake(
             'CM1', 'CM2', 'CM3', 'CM4', 'CM6', 'CM7', 'CM16', 'CRD1', 'CRD2',
             'CRD4', 'CRD5', 'CRD6', 'CRD7']:
         target_path = os.path.join(temp_dir, '{}.tif'.format(val))
-        param_val_dict[val] = target_path
-        animal_to_val = dict(
-            [(animal_code, float(table[val])) for
-                (animal_code, table) in animal_trait_table.items()])
-        pygeoprocessing.reclassify_raster(
-            (animal_index_path, 1), animal_to_val, target_path,
-            gdal.GDT_Float32, _IC_NODATA)
+        param_val_dict[val] = _animal_param_raster(
+            animal_index_path, animal_trait_table, val, target_path)
     # pft parameters
     for val in [
             'species_factor', 'digestibility_slope',
@@ -12575,11 +14739,11 @@ def _calc_grazing_offtake(
         for pft_i in pft_id_set:
             target_path = os.path.join(
                 temp_dir, '{}_{}.tif'.format(val, pft_i))
-            param_val_dict['{}_{}'.format(val, pft_i)] = target_path
             fill_val = veg_trait_table[pft_i][val]
-            pygeoprocessing.new_raster_from_base(
-                sv_reg['aglivc_{}_path'.format(pft_i)], target_path,
-                gdal.GDT_Float32, [_IC_NODATA], fill_value_list=[fill_val])
+            param_val_dict['{}_{}'.format(val, pft_i)] = (
+                _constant_param_raster(
+                    sv_reg['aglivc_{}_path'.format(pft_i)], fill_val,
+                    target_path))
 
     # calculate total weighted C in aboveground live and standing dead biomass
     weighted_state_variable_sum(
@@ -12616,97 +14780,131 @@ def _calc_grazing_offtake(
         sv_reg, aligned_inputs, pft_id_set, temp_dir)
 
     # find the order of feed types on which diet selection should proceed
-    ordered_feed_types = order_by_digestibility(sv_reg, pft_id_set, aoi_path)
-
-    # initialize relative_availability_sum to 0
-    pygeoprocessing.new_raster_from_base(
-        aligned_inputs['site_index'],
-        temp_val_dict['relative_availability_sum'],
-        gdal.GDT_Float32, [_IC_NODATA], fill_value_list=[0.])
+    if ordered_feed_types is None:
+        ordered_feed_types = order_by_digestibility(
+            sv_reg, pft_id_set, aoi_path)
 
     # calculate components of intake of each feed type
     legume_nodata = pygeoprocessing.get_raster_info(
         aligned_inputs['proportion_legume_path'])['nodata'][0]
-    relative_availability_list = []
-
+    pft_nodata_list = []
+    feed_type_path_list = []
     for feed_type in ordered_feed_types:
         statv = feed_type.split('_')[0]
         pft_i = feed_type.split('_')[1]
-        pft_nodata = pygeoprocessing.get_raster_info(
-            aligned_inputs['pft_{}'.format(pft_i)])['nodata'][0]
-
-        # calculate available biomass of this feed type
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                sv_reg['{}c_{}_path'.format(statv, pft_i)],
-                aligned_inputs['pft_{}'.format(pft_i)],
-                frac_biomass_dict['{}_{}'.format(statv, pft_i)],
-                pasture_height_dict['{}_{}'.format(statv, pft_i)],
-                param_val_dict['ZF'], param_val_dict['CR4'],
-                param_val_dict['CR5'], param_val_dict['CR6'],
-                param_val_dict['CR12'], param_val_dict['CR13']]],
-            calc_avail_biomass, temp_val_dict['avail_biomass'],
-            gdal.GDT_Float32, _TARGET_NODATA)
-
-        # calculate digestibility of this feed type
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                sv_reg['{}c_{}_path'.format(statv, pft_i)],
-                sv_reg['{}e_1_{}_path'.format(statv, pft_i)],
-                param_val_dict['digestibility_slope_{}'.format(pft_i)],
-                param_val_dict['digestibility_intercept_{}'.format(pft_i)]]],
-            calc_digestibility,
-            temp_val_dict['digestibility_{}_{}'.format(statv, pft_i)],
-            gdal.GDT_Float32, _TARGET_NODATA)
+        pft_nodata_list.append(pygeoprocessing.get_raster_info(
+            aligned_inputs['pft_{}'.format(pft_i)])['nodata'][0])
+        feed_type_path_list.extend([
+            sv_reg['{}c_{}_path'.format(statv, pft_i)],
+            sv_reg['{}e_1_{}_path'.format(statv, pft_i)],
+            aligned_inputs['pft_{}'.format(pft_i)],
+            frac_biomass_dict[feed_type], pasture_height_dict[feed_type],
+            param_val_dict['digestibility_slope_{}'.format(pft_i)],
+            param_val_dict['digestibility_intercept_{}'.format(pft_i)],
+            param_val_dict['species_factor_{}'.format(pft_i)]])
+    n_feed_inputs = 8
+    # nodata value of fractional cover, by feed type along the first axis
+    pft_nodata_array = numpy.array(
+        pft_nodata_list, dtype=numpy.float64).reshape(-1, 1, 1)
+
+    def select_diet(
+            proportion_legume, max_intake, ZF, CR1, CR2, CR3, CR4, CR5, CR6,
+            CR12, CR13, *feed_type_block_list):
+        """Select the diet from all feed types at once.
+
+        Inputs describing each feed type are stacked into arrays indexed by
+        (feed type, row, column), with feed types in descending order of
+        digestibility. The relative availability of each feed type is
+        limited by the capacity left unsatisfied by feed types of greater
+        digestibility, which is tracked as a running sum across the stack.
 
-        # calculate relative ingestibility
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                temp_val_dict['digestibility_{}_{}'.format(statv, pft_i)],
-                aligned_inputs['proportion_legume_path'],
-                param_val_dict['CR1'], param_val_dict['CR3'],
-                param_val_dict['species_factor_{}'.format(pft_i)]]],
-            calc_relative_ingestibility,
-            temp_val_dict['relative_ingestibility_{}_{}'.format(statv, pft_i)],
-            gdal.GDT_Float32, _TARGET_NODATA)
+        Parameters:
+            proportion_legume (numpy.ndarray): input, proportion of the
+                pasture that is legume by weight
+            max_intake (numpy.ndarray): derived, maximum potential daily
+                intake of forage
+            ZF, CR1, CR2, CR3, CR4, CR5, CR6, CR12, CR13 (numpy.ndarray):
+                animal parameters used in diet selection
+            feed_type_block_list (list): for each feed type in
+                `ordered_feed_types`, C and N in the feed type, fractional
+                cover of its plant functional type, fraction of total biomass,
+                height, digestibility slope and intercept, and species factor
 
-        # calculate relative availability including unsatisfied capacity
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                temp_val_dict['avail_biomass'],
-                temp_val_dict['relative_availability_sum']]],
-            calc_relative_availability,
-            temp_val_dict['relative_availability_{}_{}'.format(statv, pft_i)],
-            gdal.GDT_Float32, _TARGET_NODATA)
-        relative_availability_list.append(
-            temp_val_dict['relative_availability_{}_{}'.format(statv, pft_i)])
+        Returns:
+            list of arrays: digestibility, relative ingestibility, relative
+                availability, and daily intake of each feed type, followed by
+                the sum of relative availability across feed types and total
+                daily intake
 
-        # update running total of relative_availability_sum
-        raster_list_sum(
-            relative_availability_list, _TARGET_NODATA,
-            temp_val_dict['relative_availability_sum'], _TARGET_NODATA)
+        """
+        (cstatv, nstatv, pft_cover, frac_biomass, height, digestibility_slope,
+            digestibility_intercept, species_factor) = [
+                numpy.stack(feed_type_block_list[input_i::n_feed_inputs])
+                for input_i in range(n_feed_inputs)]
+        stack_shape = cstatv.shape
+
+        def broadcast(block):
+            """View a single block as a stack of identical feed types."""
+            return numpy.broadcast_to(block, stack_shape)
+
+        avail_biomass = calc_avail_biomass(
+            cstatv, pft_cover, frac_biomass, height, broadcast(ZF),
+            broadcast(CR4), broadcast(CR5), broadcast(CR6), broadcast(CR12),
+            broadcast(CR13), pft_nodata_array)
+        digestibility = calc_digestibility(
+            cstatv, nstatv, digestibility_slope, digestibility_intercept)
+        relative_ingestibility = calc_relative_ingestibility(
+            digestibility, broadcast(proportion_legume), broadcast(CR1),
+            broadcast(CR3), species_factor)
+
+        # relative availability including unsatisfied capacity
+        relative_availability = numpy.empty(stack_shape, dtype=numpy.float32)
+        relative_availability_sum = numpy.zeros(
+            proportion_legume.shape, dtype=numpy.float32)
+        for feed_i in range(stack_shape[0]):
+            relative_availability[feed_i] = calc_relative_availability(
+                avail_biomass[feed_i], relative_availability_sum)
+            relative_availability_sum = _array_sum(
+                relative_availability_sum, _TARGET_NODATA,
+                relative_availability[feed_i], _TARGET_NODATA,
+                _TARGET_NODATA)
 
-    # calculate daily intake of each feed type
+        daily_intake = calc_daily_intake(
+            broadcast(proportion_legume), broadcast(max_intake),
+            relative_availability, relative_ingestibility,
+            broadcast(relative_availability_sum), broadcast(CR2))
+        intake_invalid_mask = numpy.any(
+            _nodata_mask(daily_intake, _TARGET_NODATA), axis=0)
+        total_intake = numpy.where(
+            intake_invalid_mask[numpy.newaxis, :, :], 0,
+            daily_intake).sum(axis=0, dtype=numpy.float32)
+        total_intake[intake_invalid_mask] = _TARGET_NODATA
+
+        result_list = []
+        for feed_i in range(stack_shape[0]):
+            result_list.extend([
+                digestibility[feed_i], relative_ingestibility[feed_i],
+                relative_availability[feed_i], daily_intake[feed_i]])
+        return result_list + [relative_availability_sum, total_intake]
+
+    diet_path_list = []
     for feed_type in ordered_feed_types:
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                aligned_inputs['proportion_legume_path'],
-                param_val_dict['max_intake'],
-                temp_val_dict['relative_availability_{}'.format(feed_type)],
-                temp_val_dict['relative_ingestibility_{}'.format(feed_type)],
-                temp_val_dict['relative_availability_sum'],
-                param_val_dict['CR2']]],
-            calc_daily_intake,
-            temp_val_dict['daily_intake_{}'.format(feed_type)],
-            gdal.GDT_Float32, _TARGET_NODATA)
+        diet_path_list.extend([
+            temp_val_dict['{}_{}'.format(val, feed_type)] for val in [
+                'digestibility', 'relative_ingestibility',
+                'relative_availability', 'daily_intake']])
+    diet_path_list.extend([
+        temp_val_dict['relative_availability_sum'],
+        temp_val_dict['total_intake']])
+    multi_raster_calculator(
+        [aligned_inputs['proportion_legume_path']] +
+        [param_val_dict[val] for val in [
+            'max_intake', 'ZF', 'CR1', 'CR2', 'CR3', 'CR4', 'CR5', 'CR6',
+            'CR12', 'CR13']] + feed_type_path_list,
+        select_diet, diet_path_list,
+        [_TARGET_NODATA] * len(diet_path_list))
 
     # recalculate maximum potential intake according to protein in the diet
-    intake_list = [
-        temp_val_dict['daily_intake_{}'.format(feed_type)] for feed_type in
-        ordered_feed_types]
-    raster_list_sum(
-        intake_list, _TARGET_NODATA, temp_val_dict['total_intake'],
-        _TARGET_NODATA)
     calc_digestibility_intake(
         temp_val_dict, ordered_feed_types,
         temp_val_dict['total_digestibility'])
@@ -12753,18 +14951,52 @@ def _calc_grazing_offtake(
         revise_max_intake, temp_val_dict['max_intake_revised'],
         gdal.GDT_Float32, _IC_NODATA)
     # recalculate intake of each feed type according to reduced maximum intake
+    def revise_daily_intake(
+            proportion_legume, max_intake_revised, relative_availability_sum,
+            CR2, *feed_type_block_list):
+        """Calculate daily intake of all feed types from revised max intake.
+
+        Parameters:
+            proportion_legume (numpy.ndarray): input, proportion of the
+                pasture that is legume by weight
+            max_intake_revised (numpy.ndarray): derived, maximum potential
+                intake revised according to protein in the diet
+            relative_availability_sum (numpy.ndarray): derived, sum of
+                relative availability across all feed types
+            CR2 (numpy.ndarray): parameter, impact of legume on overall
+                pasture digestibility
+            feed_type_block_list (list): relative availability and relative
+                ingestibility of each feed type in `ordered_feed_types`
+
+        Returns:
+            list of arrays giving daily intake of each feed type
+
+        """
+        relative_availability = numpy.stack(feed_type_block_list[0::2])
+        relative_ingestibility = numpy.stack(feed_type_block_list[1::2])
+        stack_shape = relative_availability.shape
+        daily_intake = calc_daily_intake(
+            numpy.broadcast_to(proportion_legume, stack_shape),
+            numpy.broadcast_to(max_intake_revised, stack_shape),
+            relative_availability, relative_ingestibility,
+            numpy.broadcast_to(relative_availability_sum, stack_shape),
+            numpy.broadcast_to(CR2, stack_shape))
+        return list(daily_intake)
+
+    feed_type_path_list = []
     for feed_type in ordered_feed_types:
-        pygeoprocessing.raster_calculator(
-            [(path, 1) for path in [
-                aligned_inputs['proportion_legume_path'],
-                temp_val_dict['max_intake_revised'],
-                temp_val_dict['relative_availability_{}'.format(feed_type)],
-                temp_val_dict['relative_ingestibility_{}'.format(feed_type)],
-                temp_val_dict['relative_availability_sum'],
-                param_val_dict['CR2']]],
-            calc_daily_intake,
-            temp_val_dict['daily_intake_{}'.format(feed_type)],
-            gdal.GDT_Float32, _TARGET_NODATA)
+        feed_type_path_list.extend([
+            temp_val_dict['relative_availability_{}'.format(feed_type)],
+            temp_val_dict['relative_ingestibility_{}'.format(feed_type)]])
+    multi_raster_calculator(
+        [aligned_inputs['proportion_legume_path'],
+            temp_val_dict['max_intake_revised'],
+            temp_val_dict['relative_availability_sum'],
+            param_val_dict['CR2']] + feed_type_path_list,
+        revise_daily_intake,
+        [temp_val_dict['daily_intake_{}'.format(feed_type)] for feed_type in
+            ordered_feed_types],
+        [_TARGET_NODATA] * len(ordered_feed_types))
 
     # calculate fraction removed, restricted by management threshold
     for pft_i in pft_id_set:
@@ -13059,8 +15291,8 @@ def _animal_diet_sufficiency(
 
         """
         valid_mask = (
-            (~numpy.isclose(cstatv, _SV_NODATA)) &
-            (~numpy.isclose(pft_cover, pft_nodata)) &
+            _valid_mask(cstatv, _SV_NODATA) &
+            _valid_mask(pft_cover, pft_nodata) &
             (animal_density != _TARGET_NODATA) &
             (animal_density > 0) &
             (fgrem != _TARGET_NODATA))
@@ -13102,23 +15334,18 @@ def _animal_diet_sufficiency(
             'CL6', 'CL15', 'CA1', 'CA2', 'CA3', 'CA4', 'CA6', 'CA7', 'CW1',
             'CW2', 'CW3', 'CW5', 'CW6', 'CW7', 'CW8', 'CW9', 'CW12']:
         target_path = os.path.join(temp_dir, '{}.tif'.format(val))
-        param_val_dict[val] = target_path
-        animal_to_val = dict(
-            [(animal_code, float(table[val])) for
-                (animal_code, table) in animal_trait_table.items()])
-        pygeoprocessing.reclassify_raster(
-            (animal_index_path, 1), animal_to_val, target_path,
-            gdal.GDT_Float32, _IC_NODATA)
+        param_val_dict[val] = _animal_param_raster(
+            animal_index_path, animal_trait_table, val, target_path)
     # pft parameters
     for val in ['digestibility_slope', 'digestibility_intercept']:
         for pft_i in pft_id_set:
             target_path = os.path.join(
                 temp_dir, '{}_{}.tif'.format(val, pft_i))
-            param_val_dict['{}_{}'.format(val, pft_i)] = target_path
             fill_val = veg_trait_table[pft_i][val]
-            pygeoprocessing.new_raster_from_base(
-                sv_reg['aglivc_{}_path'.format(pft_i)], target_path,
-                gdal.GDT_Float32, [_IC_NODATA], fill_value_list=[fill_val])
+            param_val_dict['{}_{}'.format(val, pft_i)] = (
+                _constant_param_raster(
+                    sv_reg['aglivc_{}_path'.format(pft_i)], fill_val,
+                    target_path))
 
     # calculate daily intake of each feed type
     for pft_i in pft_id_set:
@@ -13353,16 +15580,271 @@ def sum_c_to_biomass(sum_aglivc, sum_stdedc):
     return total_biomass
 
 
+def _rasterize_feature_index(
+        template_raster_path, vector_path, target_path):
+    """Rasterize the FID of each feature of a polygon vector layer.
+
+    The resulting raster indexes each pixel by the feature that contains it,
+    so that any number of per-feature reductions can be calculated from it
+    with `_feature_statistics` without rasterizing the vector again.
+
+    Each pixel belongs to at most one feature. Where features overlap, the
+    pixel is assigned to the feature that is last in the layer, so that
+    statistics of the overlap are counted toward that feature only (unlike
+    `pygeoprocessing.zonal_statistics`, which counts them toward each
+    feature). A warning is logged if any pixel is covered by more than one
+    feature.
+
+    Parameters:
+        template_raster_path (string): path to raster giving the extent and
+            resolution of the index raster
+        vector_path (string): path to polygon vector layer
+        target_path (string): path where the index raster should be created
+
+    Side effects:
+        creates the raster indicated by `target_path`, where the value of
+            each pixel is the FID of the last feature containing the pixel, or
+            _TARGET_NODATA outside all features
+
+    Returns:
+        None
+
+    """
+    temp_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
+    vector_copy_path = os.path.join(temp_dir, 'vector_copy.shp')
+    add_shp_id_field(vector_path, vector_copy_path)
+    pygeoprocessing.new_raster_from_base(
+        template_raster_path, target_path, gdal.GDT_Int32, [_TARGET_NODATA],
+        fill_value_list=[_TARGET_NODATA])
+    pygeoprocessing.rasterize(
+        vector_copy_path, target_path, option_list=["ATTRIBUTE=shp_id"])
+
+    # count the features covering each pixel to detect overlapping features
+    feature_count_path = os.path.join(temp_dir, 'feature_count.tif')
+    pygeoprocessing.new_raster_from_base(
+        template_raster_path, feature_count_path, gdal.GDT_Int32, [-1],
+        fill_value_list=[0])
+    pygeoprocessing.rasterize(
+        vector_copy_path, feature_count_path, burn_values=[1],
+        option_list=["MERGE_ALG=ADD"])
+    n_overlap_pixels = 0
+    for _, feature_count in pygeoprocessing.iterblocks(
+            (feature_count_path, 1)):
+        n_overlap_pixels += numpy.count_nonzero(feature_count > 1)
+    if n_overlap_pixels > 0:
+        LOGGER.warning(
+            "%d pixels are covered by more than one feature of %s; each of "
+            "these pixels is assigned to the last feature covering it",
+            n_overlap_pixels, vector_path)
+    shutil.rmtree(temp_dir)
+
+
+def _vector_fid_list(vector_path):
+    """Get the FID of each feature of a vector layer.
+
+    Parameters:
+        vector_path (string): path to vector layer
+
+    Returns:
+        list of integer FIDs, in the order of features in the layer
+
+    """
+    vector = gdal.OpenEx(vector_path, gdal.OF_VECTOR)
+    layer = vector.GetLayer()
+    fid_list = [feature.GetFID() for feature in layer]
+    layer = None
+    vector = None
+    return fid_list
+
+
+def _feature_statistics(
+        feature_index_path, value_raster_path_list, weight_raster_path=None):
+    """Summarize valid pixel values inside each feature of a feature index.
+
+    Accumulate, in one pass over the feature index raster, the sum and count
+    of valid pixels inside each feature for each raster in
+    `value_raster_path_list`. If a weight raster is supplied, each pixel
+    contributes to the sum and count in proportion to its weight.
+
+    Parameters:
+        feature_index_path (string): path to raster giving the FID of the
+            feature containing each pixel, as created by
+            `_rasterize_feature_index`
+        value_raster_path_list (list): list of paths to rasters aligned with
+            the feature index raster
+        weight_raster_path (string): optional path to a raster aligned with
+            the feature index raster giving the number of pixels represented
+            by each pixel. Pixels with weight <= 0 are excluded.
+
+    Returns:
+        a list containing, for each raster in `value_raster_path_list`, a
+            dictionary with the keys 'fid', 'sum' and 'count', where values
+            are numpy arrays giving statistics of the features that contain
+            at least one valid pixel
+
+    """
+    def extend(array, size, fill_value):
+        """Pad `array` with `fill_value` to at least `size` elements."""
+        if array.size >= size:
+            return array
+        return numpy.concatenate(
+            [array, numpy.full(size - array.size, fill_value, array.dtype)])
+
+    stat_list = [
+        {
+            'sum': numpy.zeros(0, dtype=numpy.float64),
+            'count': numpy.zeros(0, dtype=numpy.int64),
+        } for path in value_raster_path_list]
+    index_raster = gdal.OpenEx(feature_index_path, gdal.OF_RASTER)
+    index_band = index_raster.GetRasterBand(1)
+    value_raster_list = [
+        gdal.OpenEx(path, gdal.OF_RASTER) for path in value_raster_path_list]
+    value_band_list = [
+        raster.GetRasterBand(1) for raster in value_raster_list]
+    nodata_list = [
+        pygeoprocessing.get_raster_info(path)['nodata'][0] for path in
+        value_raster_path_list]
+    if weight_raster_path is not None:
+        weight_raster = gdal.OpenEx(weight_raster_path, gdal.OF_RASTER)
+        weight_band = weight_raster.GetRasterBand(1)
+    for offset_map in pygeoprocessing.iterblocks(
+            (feature_index_path, 1), offset_only=True):
+        feature_index = index_band.ReadAsArray(**offset_map)
+        inside_mask = (feature_index != _TARGET_NODATA)
+        if weight_raster_path is not None:
+            weight_array = weight_band.ReadAsArray(**offset_map)
+            inside_mask &= (weight_array > 0)
+        if not inside_mask.any():
+            continue
+        feature_index = feature_index[inside_mask]
+        if weight_raster_path is not None:
+            weight_array = weight_array[inside_mask].astype(numpy.float64)
+        n_features = int(feature_index.max()) + 1
+        for stat_dict, value_band, nodata in zip(
+                stat_list, value_band_list, nodata_list):
+            value_array = value_band.ReadAsArray(
+                **offset_map)[inside_mask].astype(numpy.float64)
+            if nodata is not None:
+                valid_mask = _valid_mask(value_array, nodata)
+                value_array = value_array[valid_mask]
+                valid_index = feature_index[valid_mask]
+            else:
+                valid_mask = slice(None)
+                valid_index = feature_index
+            if weight_raster_path is not None:
+                pixel_weight = weight_array[valid_mask]
+                pixel_count = numpy.rint(numpy.bincount(
+                    valid_index, weights=pixel_weight,
+                    minlength=n_features)).astype(numpy.int64)
+            else:
+                pixel_weight = None
+                pixel_count = numpy.bincount(
+                    valid_index, minlength=n_features)
+            stat_dict['sum'] = extend(stat_dict['sum'], n_features, 0)
+            stat_dict['count'] = extend(stat_dict['count'], n_features, 0)
+            if pixel_weight is not None:
+                stat_dict['sum'][:n_features] += numpy.bincount(
+                    valid_index, weights=value_array * pixel_weight,
+                    minlength=n_features)
+            else:
+                stat_dict['sum'][:n_features] += numpy.bincount(
+                    valid_index, weights=value_array, minlength=n_features)
+            stat_dict['count'][:n_features] += pixel_count
+    index_band = None
+    index_raster = None
+    value_band_list = None
+    value_raster_list = None
+    weight_band = None
+    weight_raster = None
+
+    for stat_dict in stat_list:
+        fid_array = numpy.flatnonzero(stat_dict['count'])
+        for key in ['sum', 'count']:
+            stat_dict[key] = stat_dict[key][fid_array]
+        stat_dict['fid'] = fid_array
+    return stat_list
+
+
+def _new_feature_accumulator(n_features):
+    """Create empty running statistics for each feature of a vector layer.
+
+    Parameters:
+        n_features (int): number of features; must be greater than the
+            largest FID of the vector layer
+
+    Returns:
+        accumulator (dict), with the keys 'sum' and 'count', where values
+            are numpy arrays indexed by FID
+
+    """
+    return {
+        'sum': numpy.zeros(n_features, dtype=numpy.float64),
+        'count': numpy.zeros(n_features, dtype=numpy.int64),
+    }
+
+
+def _accumulate_feature_statistics(accumulator, stat_dict):
+    """Add statistics of some features to running statistics.
+
+    Parameters:
+        accumulator (dict): running statistics, as returned by
+            `_new_feature_accumulator`
+        stat_dict (dict): statistics to add, either as returned by
+            `_feature_statistics` or another accumulator
+
+    Side effects:
+        modifies the arrays of `accumulator` in place
+
+    Returns:
+        None
+
+    """
+    if 'fid' in stat_dict:
+        fid_array = stat_dict['fid']
+    else:
+        fid_array = numpy.arange(stat_dict['count'].size)
+    accumulator['sum'][fid_array] += stat_dict['sum']
+    accumulator['count'][fid_array] += stat_dict['count']
+
+
+def _feature_mean_summary(accumulator, fid_list):
+    """Calculate the mean value inside each feature from running statistics.
+
+    Parameters:
+        accumulator (dict): running statistics, as returned by
+            `_new_feature_accumulator`
+        fid_list (list): FIDs of features that should be summarized
+
+    Returns:
+        dictionary where keys are FIDs and values are dictionaries with the
+            key 'mean'. The mean of features containing no valid pixels is
+            NaN.
+
+    """
+    summary_dict = {}
+    for fid in fid_list:
+        if accumulator['count'][fid] > 0:
+            mean_val = accumulator['sum'][fid] / accumulator['count'][fid]
+        else:
+            mean_val = numpy.nan
+        summary_dict[fid] = {'mean': mean_val}
+    return summary_dict
+
+
 def _animal_density(aligned_inputs, animal_grazing_areas_path):
     """Estimate the density of grazing animals on each pixel of the study area.
 
     Grazing animals are distributed uniformly across pixels inside features of
     the animal grazing areas polygon layer. Calculate the density of grazing
-    animals in animals/ha in each pixel.
+    animals in animals/ha in each pixel. Pixels are assigned to features by
+    the grazing area index raster, so where features overlap, pixels of the
+    overlap hold only the animals of the last feature covering them, and
+    count toward the area of that feature only.
 
     Parameters:
         aligned_inputs (dict): map of key, path pairs indicating paths
-            to aligned model inputs, including animal index
+            to aligned model inputs, including animal index and grazing area
+            index
         animal_grazing_areas_path (string): path to animal vector inputs giving
             the location of grazing animals
 
@@ -13396,52 +15878,57 @@ def _animal_density(aligned_inputs, animal_grazing_areas_path):
         pixel_area_ha = (pixel_y_length_m * pixel_x_length_m) / 10000.0
         return pixel_area_ha
 
-    temp_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
-    temp_val_dict = {}
-    for val in ['total_animals', 'animal_mgmt_features', 'pixel_count']:
-        temp_val_dict[val] = os.path.join(temp_dir, '{}.tif'.format(val))
-    temp_val_dict['animal_mgmt_copy'] = os.path.join(
-        temp_dir, 'animal_mgmt_copy.shp')
+    def feature_animal_density(feature_index):
+        """Distribute total animals in each feature across its pixels.
 
-    # total animals inside each animal grazing areas feature
-    pygeoprocessing.new_raster_from_base(
-        aligned_inputs['animal_index'], temp_val_dict['total_animals'],
-        gdal.GDT_Float32, [_TARGET_NODATA], fill_value_list=[_TARGET_NODATA])
-    pygeoprocessing.rasterize(
-        animal_grazing_areas_path, temp_val_dict['total_animals'],
-        option_list=["ATTRIBUTE=num_animal"])
+        Parameters:
+            feature_index (numpy.ndarray): derived, FID of the animal grazing
+                areas feature containing each pixel
 
-    # generate raster of animal grazing areas
-    add_shp_id_field(
-        animal_grazing_areas_path, temp_val_dict['animal_mgmt_copy'])
-    pygeoprocessing.new_raster_from_base(
-        aligned_inputs['animal_index'], temp_val_dict['animal_mgmt_features'],
-        gdal.GDT_Float32, [_TARGET_NODATA], fill_value_list=[_TARGET_NODATA])
-    pygeoprocessing.rasterize(
-        temp_val_dict['animal_mgmt_copy'],
-        temp_val_dict['animal_mgmt_features'],
-        option_list=["ATTRIBUTE=shp_id"])
+        Returns:
+            animal_density, density of grazing animals inside animal
+                management polygons, in animals/ha
+
+        """
+        valid_mask = (feature_index != _TARGET_NODATA)
+        total_animals = numpy.empty(feature_index.shape, dtype=numpy.float32)
+        total_animals[:] = _TARGET_NODATA
+        total_animals[valid_mask] = total_animal_array[
+            feature_index[valid_mask]]
+        pixel_count = numpy.zeros(feature_index.shape, dtype=numpy.int32)
+        pixel_count[valid_mask] = pixel_count_array[feature_index[valid_mask]]
+        return calc_animal_density(total_animals, pixel_count, pixel_area_ha)
+
+    # total animals inside each animal grazing areas feature
+    vector = gdal.OpenEx(animal_grazing_areas_path, gdal.OF_VECTOR)
+    layer = vector.GetLayer()
+    num_animal_dict = {}
+    for feature in layer:
+        num_animal = feature.GetField('num_animal')
+        if num_animal is None:
+            num_animal = _TARGET_NODATA
+        num_animal_dict[feature.GetFID()] = float(num_animal)
+    layer = None
+    vector = None
+    total_animal_array = numpy.full(
+        max(num_animal_dict) + 1 if num_animal_dict else 0, _TARGET_NODATA,
+        dtype=numpy.float32)
+    for fid, num_animal in num_animal_dict.items():
+        total_animal_array[fid] = num_animal
 
     # number of pixels inside each animal grazing areas feature
-    zonal_dict = pygeoprocessing.zonal_statistics(
-        (aligned_inputs['animal_index'], 1), temp_val_dict['animal_mgmt_copy'])
-    feature_to_count = {
-        shp_id: zonal_dict[shp_id]['count'] for shp_id in zonal_dict}
-    pygeoprocessing.reclassify_raster(
-        (temp_val_dict['animal_mgmt_features'], 1), feature_to_count,
-        temp_val_dict['pixel_count'], gdal.GDT_Int32, _TARGET_NODATA)
+    pixel_count_array = numpy.zeros(total_animal_array.size, dtype=numpy.int64)
+    for _, feature_index in pygeoprocessing.iterblocks(
+            (aligned_inputs['grazing_area_index'], 1)):
+        valid_index = feature_index[feature_index != _TARGET_NODATA]
+        pixel_count_array += numpy.bincount(
+            valid_index, minlength=pixel_count_array.size)
 
     # calculate animals per ha from animals per feature and ha per pixel
     pixel_area_ha = get_pixel_area_ha(aligned_inputs['animal_index'])
     pygeoprocessing.raster_calculator(
-        [(path, 1) for path in [
-            temp_val_dict['total_animals'], temp_val_dict['pixel_count']]] +
-            [(pixel_area_ha, 'raw')],
-        calc_animal_density, aligned_inputs['animal_density'],
-        gdal.GDT_Float32, _TARGET_NODATA)
-
-    # clean up temporary files
-    shutil.rmtree(temp_dir)
+        [(aligned_inputs['grazing_area_index'], 1)], feature_animal_density,
+        aligned_inputs['animal_density'], gdal.GDT_Float32, _TARGET_NODATA)
 
 
 def _write_monthly_outputs(
@@ -13455,7 +15942,7 @@ def _write_monthly_outputs(
     Parameters:
         aligned_inputs (dict): map of key, path pairs indicating paths
             to aligned model inputs, including fractional cover of each plant
-            functional type
+            functional type and the grazing area index
         provisional_sv_reg (dict): map of key, path pairs giving paths to state
             variables for the current month in the absence of grazing
         sv_reg (dict): map of key, path pairs giving paths to state variables
@@ -13483,7 +15970,9 @@ def _write_monthly_outputs(
                 where animals grazed
 
     Returns:
-        None
+        output_stats (dict), map of output name to statistics of the output
+            inside each animal grazing area, as returned by
+            `_feature_statistics`
 
     """
     temp_dir = tempfile.mkdtemp(dir=PROCESSING_DIR)
@@ -13530,8 +16019,16 @@ def _write_monthly_outputs(
     shutil.copyfile(
         month_reg['diet_sufficiency'], output_val_dict['diet_sufficiency'])
 
+    # statistics inside each animal grazing area, while outputs are cached
+    stat_list = _feature_statistics(
+        aligned_inputs['grazing_area_index'],
+        [output_val_dict[val] for val in _SUMMARY_OUTPUT_VALUES],
+        weight_raster_path=aligned_inputs.get('pixel_weight'))
+    output_stats = dict(zip(_SUMMARY_OUTPUT_VALUES, stat_list))
+
     # clean up
     shutil.rmtree(temp_dir)
+    return output_stats
 
 
 def copy_intermediate_sv(pft_id_set, sv_reg, intermediate_sv_dir):
@@ -13591,85 +16088,84 @@ def create_vector_copy(base_vector_path, target_vector_path):
     target_vector = None  # seemingly uncessary but gdal seems to like it.
 
 
-def aggregate_and_pickle_results(output_dir, grazing_areas_path):
-    """Calculate aggregated biomass and diet sufficiency per grazing area.
+def _append_monthly_summary_table(
+        table_path, fid_list, current_year, current_month,
+        monthly_summary_dict):
+    """Append mean monthly outputs inside each feature to a table.
+
+    The table is in long format, with one row per feature and month. It is
+    created with a header row if it does not exist.
 
     Parameters:
-        output_dir (string): path to directory containing model outputs: diet
-            sufficiency, potential biomass, standing biomass rasters per time
-            step
-        grazing_areas_path (string): path to shapefile giving the location of
-            grazing animals. Zonal mean values are calculated per feature in
-            this dataset.
+        table_path (string): path to csv table
+        fid_list (list): FIDs of features that should be summarized
+        current_year (int): current year, for example 2016
+        current_month (int): current month of the year, such that
+            current_month=1 indicates January
+        monthly_summary_dict (dict): map of output name to a dictionary
+            returned by `_feature_mean_summary` for the current month
 
     Side effects:
-        creates pickle files for mean diet sufficiency, mean potential biomass,
-            and mean standing biomass
-
-    Returns:
-        a dictionary with the following keys, where values contain paths to
-            pickled zonal statistics for the given result:
-            'potbiom_m' (mean total potential biomass)
-            'stdbiom_m' (mean total standing biomass)
-            'dietsuff_m' (mean diet sufficiency)
-
-    """
-    def dump_zonal_stats(raster_prefix, pickle_path):
-        """Calculate zonal mean and save as pickle."""
-        raster_path_list = [
-            os.path.join(output_dir, f) for f in os.listdir(output_dir) if
-            f.startswith(raster_prefix) and f.endswith('.tif')]
-        df_list = []
-        for raster_path in raster_path_list:
-            zonal_stat_dict = pygeoprocessing.zonal_statistics(
-                (raster_path, 1), grazing_areas_path)
-            zonal_df = pandas.DataFrame(
-                {
-                    'fid': [
-                        key for key, value in sorted(
-                            zonal_stat_dict.items())],
-                    'sum': [
-                        value['sum'] for key, value in
-                        sorted(zonal_stat_dict.items())],
-                    'count': [
-                        value['count'] for key, value in
-                        sorted(zonal_stat_dict.items())]
-                })
-            df_list.append(zonal_df)
-        summary_df = pandas.concat(df_list)
-        df_means = summary_df.groupby('fid').mean()
-        df_means['mean'] = df_means['sum'] / df_means['count']
-        df_means = df_means[['mean']].to_dict(orient='index')
-        with open(pickle_path, 'wb') as target_pickle_file:
-            pickle.dump(df_means, target_pickle_file)
-
-
-    potential_biomass_pickle_path = os.path.join(
-        PROCESSING_DIR, 'potential_biomass.pickle')
-    dump_zonal_stats('potential_biomass', potential_biomass_pickle_path)
-    diet_suff_pickle_path = os.path.join(
-        PROCESSING_DIR, 'diet_sufficiency.pickle')
-    dump_zonal_stats('diet_sufficiency', diet_suff_pickle_path)
-    standing_biomass_pickle_path = os.path.join(
-        PROCESSING_DIR, 'standing_biomass.pickle')
-    dump_zonal_stats('standing_biomass', standing_biomass_pickle_path)
-
-    field_pickle_map = {
-        'potbiom_m': potential_biomass_pickle_path,
-        'stdbiom_m': standing_biomass_pickle_path,
-        'dietsuff_m': diet_suff_pickle_path,
+        creates or appends to the table indicated by `table_path`, with the
+            columns 'fid', 'year', 'month' and one column per key of
+            `monthly_summary_dict`, in the order of its keys
+
+    Returns:
+        None
+
+    """
+    table_dict = {
+        'fid': fid_list,
+        'year': [current_year] * len(fid_list),
+        'month': [current_month] * len(fid_list),
     }
-    field_header_order_list = ['potbiom_m', 'stdbiom_m', 'dietsuff_m']
-    return field_pickle_map, field_header_order_list
+    column_list = ['fid', 'year', 'month']
+    for val in monthly_summary_dict:
+        table_dict[val] = [
+            monthly_summary_dict[val][fid]['mean'] for fid in fid_list]
+        column_list.append(val)
+    table_df = pandas.DataFrame(table_dict, columns=column_list)
+    table_df.to_csv(
+        table_path, mode='a', header=not os.path.exists(table_path),
+        index=False)
+
+
+def _truncate_monthly_summary_table(
+        table_path, starting_year, starting_month, start_month_index):
+    """Remove rows of months that will be simulated again from a table.
+
+    Parameters:
+        table_path (string): path to csv table written by
+            `_append_monthly_summary_table`
+        starting_year (int): first year of the simulation
+        starting_month (int): first month of the simulation
+        start_month_index (int): month of the simulation from which the
+            simulation is resumed; rows for this and later months are removed
+
+    Side effects:
+        modifies the table indicated by `table_path`, if it exists
+
+    Returns:
+        None
+
+    """
+    if not os.path.exists(table_path):
+        return
+    table_df = pandas.read_csv(table_path)
+    table_month_index = (
+        (table_df['year'] - starting_year) * 12 + table_df['month'] -
+        starting_month)
+    table_df = table_df[table_month_index < start_month_index]
+    table_df.to_csv(table_path, index=False)
 
 
 def _add_fields_to_shapefile(
-        field_pickle_map, field_header_order, target_vector_path):
+        field_summary_map, field_header_order, target_vector_path):
     """Add fields and values to an OGR layer open for writing.
 
     Parameters:
-        field_pickle_map (dict): maps field name to a pickle file that is a
-            result of pygeoprocessing.zonal_stats with FIDs that match
+        field_summary_map (dict): maps field name to a dictionary returned by
+            `_feature_mean_summary` with FIDs that match
             `target_vector_path`.
         field_header_order (list of string): a list of field headers in the
             order to appear in the output table.
@@ -13688,8 +16184,7 @@ def _add_fields_to_shapefile(
         field_def.SetWidth(24)
         field_def.SetPrecision(11)
         target_layer.CreateField(field_def)
-        with open(field_pickle_map[field_name], 'rb') as pickle_file:
-            field_summaries[field_name] = pickle.load(pickle_file)
+        field_summaries[field_name] = field_summary_map[field_name]
 
     for feature in target_layer:
         fid = feature.GetFID()
@@ -13841,8 +16336,19 @@ def validate(args, limit_to=None):
             validation_error_list.append(
                 ([key], "Must be a number"))
 
-    # the model must be run in an empty directory
-    if os.path.exists(args['workspace_dir']):
+    # optional tile size must be a positive integer
+    if limit_to in ('tile_size', None) and args.get('tile_size') not in [
+            '', None]:
+        try:
+            if int(args['tile_size']) <= 0:
+                raise ValueError
+        except (ValueError, TypeError):
+            validation_error_list.append(
+                (['tile_size'], "Must be a positive integer"))
+
+    # the model must be run in an empty directory, unless it continues a
+    # previous run in the same directory
+    if os.path.exists(args['workspace_dir']) and not args.get('resume'):
         if len(os.listdir(args['workspace_dir'])) > 0:
             validation_error_list.append((
                 ['workspace_dir'], 'Workspace directory must be empty.'))
@@ -276,6 +276,36 @@ class Forage(model.InVESTModel):
                 "timestep, be saved?"),
             label=u'Save State Variable Rasters')
         self.add_input(self.save_sv_rasters)
+        self.in_memory_state = inputs.Checkbox(
+            args_key=u'in_memory_state',
+            helptext=(u"Should state variables and intermediate values be "
+                "held in memory-backed storage during the model run?"),
+            label=u'Hold State Variables in Memory')
+        self.add_input(self.in_memory_state)
+        self.monthly_annual_precip = inputs.Checkbox(
+            args_key=u'monthly_annual_precip',
+            helptext=(u"Should annual precipitation be updated every month "
+                "from the 12 months including the current one, rather than "
+                "once every 12 months?"),
+            label=u'Update Annual Precipitation Monthly')
+        self.add_input(self.monthly_annual_precip)
+        self.deduplicate_pixels = inputs.Checkbox(
+            args_key=u'deduplicate_pixels',
+            helptext=(u"Should pixels in the same row with identical inputs "
+                "and initial conditions be simulated once, with results "
+                "copied to each of them?"),
+            label=u'Simulate Identical Pixels Once')
+        self.add_input(self.deduplicate_pixels)
+        self.tile_size = inputs.Text(
+            args_key=u'tile_size',
+            helptext=(
+                u"Length, in pixels, of the side of square tiles into which "
+                "the study area is divided during the model run "
+                "(optional). If not supplied, the study area is simulated "
+                "as one tile."),
+            label=u'Tile Size (Pixels)',
+            validator=self.validator)
+        self.add_input(self.tile_size)
 
     def assemble_args(self):
         args = {
@@ -317,6 +347,12 @@ class Forage(model.InVESTModel):
             self.site_initial_table.args_key: self.site_initial_table.value(),
             self.pft_initial_table.args_key: self.pft_initial_table.value(),
             self.save_sv_rasters.args_key: self.save_sv_rasters.value(),
+            self.in_memory_state.args_key: self.in_memory_state.value(),
+            self.monthly_annual_precip.args_key: (
+                self.monthly_annual_precip.value()),
+            self.deduplicate_pixels.args_key: (
+                self.deduplicate_pixels.value()),
+            self.tile_size.args_key: self.tile_size.value(),
         }
 
         return args
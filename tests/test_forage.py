@@ -8,6 +8,7 @@ import math
 
 import numpy
 import pandas
+from osgeo import ogr
 from osgeo import osr
 from osgeo import gdal
 
@@ -153,6 +154,67 @@ def create_constant_raster(target_path, fill_value, n_cols=1, n_rows=1):
     target_raster = None
 
 
+def create_array_raster(target_path, value_array):
+    """Create a north-up raster with pixel values from `value_array`.
+
+    The raster has pixels of size 1 in the unprojected coordinate system WGS
+    1984, with its lower left corner at (0, 0), so that the pixel in row `i`
+    and column `j` of `value_array` covers x from j to j + 1 and y from
+    n_rows - i - 1 to n_rows - i.
+
+    Parameters:
+        target_path (string): path to result raster
+        value_array (numpy.ndarray): two-dimensional array of values
+
+    Returns:
+        None
+
+    """
+    n_rows, n_cols = value_array.shape
+    projection = osr.SpatialReference()
+    projection.SetWellKnownGeogCS('WGS84')
+    driver = gdal.GetDriverByName('GTiff')
+    target_raster = driver.Create(
+        target_path.encode('utf-8'), n_cols, n_rows, 1, gdal.GDT_Float32)
+    target_raster.SetProjection(projection.ExportToWkt())
+    target_raster.SetGeoTransform([0, 1, 0, n_rows, 0, -1])
+    target_band = target_raster.GetRasterBand(1)
+    target_band.SetNoDataValue(_TARGET_NODATA)
+    target_band.WriteArray(value_array)
+    target_raster = None
+
+
+def create_polygon_vector(target_path, polygon_wkt_list):
+    """Create a polygon shapefile with one feature for each polygon.
+
+    Parameters:
+        target_path (string): path to result shapefile
+        polygon_wkt_list (list): polygons in well-known text, in the
+            unprojected coordinate system WGS 1984. Each feature has the
+            integer field 'id' giving its position in the list.
+
+    Returns:
+        None
+
+    """
+    projection = osr.SpatialReference()
+    projection.SetWellKnownGeogCS('WGS84')
+    driver = ogr.GetDriverByName('ESRI Shapefile')
+    target_vector = driver.CreateDataSource(target_path)
+    target_layer = target_vector.CreateLayer(
+        os.path.splitext(os.path.basename(target_path))[0], projection,
+        ogr.wkbPolygon)
+    target_layer.CreateField(ogr.FieldDefn('id', ogr.OFTInteger))
+    for polygon_id, polygon_wkt in enumerate(polygon_wkt_list):
+        feature = ogr.Feature(target_layer.GetLayerDefn())
+        feature.SetField('id', polygon_id)
+        feature.SetGeometry(ogr.CreateGeometryFromWkt(polygon_wkt))
+        target_layer.CreateFeature(feature)
+        feature = None
+    target_layer = None
+    target_vector = None
+
+
 def insert_nodata_values_into_array(target_array, nodata_value):
     """Insert nodata at arbitrary locations in `target_array`."""
     modified_array = target_array
@@ -1144,6 +1206,66 @@ class foragetests(unittest.TestCase):
         for i in range(len(string_list_1)):
             self.assertEqual(string_list_1[i], string_list_2[i])
 
+    def assert_model_outputs_equal(self, workspace_1, workspace_2):
+        """Test that two model runs produced the same monthly outputs.
+
+        Compare each raster in the output directory of `workspace_1` to the
+        raster of the same name in the output directory of `workspace_2`,
+        and compare the monthly tables of outputs per grazing area.
+
+        Raises:
+            AssertionError if the output directories contain different
+                rasters, or if any pair of rasters or tables differs
+
+        Returns:
+            None
+
+        """
+        output_dir_1 = os.path.join(workspace_1, 'output')
+        output_dir_2 = os.path.join(workspace_2, 'output')
+        raster_list = sorted(
+            f for f in os.listdir(output_dir_1) if f.endswith('.tif'))
+        self.assertTrue(raster_list)
+        self.assert_sorted_lists_equal(
+            raster_list, sorted(
+                f for f in os.listdir(output_dir_2) if f.endswith('.tif')))
+        for basename in raster_list:
+            array_1 = gdal.OpenEx(
+                os.path.join(output_dir_1, basename)).ReadAsArray()
+            array_2 = gdal.OpenEx(
+                os.path.join(output_dir_2, basename)).ReadAsArray()
+            numpy.testing.assert_allclose(
+                array_1, array_2, rtol=1e-5, err_msg=basename)
+        table_1 = pandas.read_csv(os.path.join(
+            output_dir_1, 'summary_results', 'grazing_areas_monthly_rpm.csv'))
+        table_2 = pandas.read_csv(os.path.join(
+            output_dir_2, 'summary_results', 'grazing_areas_monthly_rpm.csv'))
+        self.assert_sorted_lists_equal(
+            list(table_1.columns), list(table_2.columns))
+        numpy.testing.assert_allclose(
+            table_1.values.astype(float), table_2.values.astype(float),
+            rtol=1e-5)
+
+    @staticmethod
+    def run_sample_model(workspace_dir, **kwargs):
+        """Run the forage model on sample inputs.
+
+        Parameters:
+            workspace_dir (string): path to the workspace of the run
+            kwargs: args that should be added to the base sample args, or
+                that should replace base sample args
+
+        Returns:
+            args dict of the run
+
+        """
+        from rangeland_production import forage
+
+        args = foragetests.generate_base_args(workspace_dir)
+        args.update(kwargs)
+        forage.execute(args)
+        return args
+
     @unittest.skip("did not run the whole model, running unit tests only")
     def test_model_runs(self):
         """Test forage model."""
@@ -2046,6 +2168,62 @@ class foragetests(unittest.TestCase):
             year_reg['pltlig_below_1'], 0.25946 - tolerance,
             0.25946 + tolerance, _TARGET_NODATA)
 
+    def test_roll_annual_precip(self):
+        """Test `_roll_annual_precip`.
+
+        Use the function `_roll_annual_precip` to move the 12-month window
+        of annual precipitation forward by one month. Ensure that the result
+        matches the sum of the 12 monthly rasters inside the new window, and
+        that nodata in the month entering the window is nodata in the result.
+        Ensure that once the month containing nodata leaves the window, the
+        result is valid again.
+
+        Raises:
+            AssertionError if `_roll_annual_precip` does not match the sum of
+                precipitation inside the new window
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        precip_list = [
+            os.path.join(self.workspace_dir, 'precip_{}.tif'.format(m)) for
+            m in range(13)]
+        for month, precip_path in enumerate(precip_list):
+            create_constant_raster(precip_path, month, n_cols=3, n_rows=3)
+        annual_precip_path = os.path.join(
+            self.workspace_dir, 'annual_precip.tif')
+        forage.raster_list_sum(
+            precip_list[:12], _TARGET_NODATA, annual_precip_path,
+            _TARGET_NODATA)
+
+        forage._roll_annual_precip(
+            annual_precip_path, [precip_list[12]], [precip_list[0]],
+            precip_list[1:], _TARGET_NODATA)
+        self.assert_all_values_in_raster_within_range(
+            annual_precip_path, sum(range(1, 13)), sum(range(1, 13)),
+            _TARGET_NODATA)
+
+        insert_nodata_values_into_raster(precip_list[0], _TARGET_NODATA)
+        forage._roll_annual_precip(
+            annual_precip_path, [precip_list[0]], [precip_list[12]],
+            precip_list[:12], _TARGET_NODATA)
+        annual_precip_array = gdal.OpenEx(annual_precip_path).ReadAsArray()
+        precip_array = gdal.OpenEx(precip_list[0]).ReadAsArray()
+        numpy.testing.assert_array_equal(
+            annual_precip_array == _TARGET_NODATA,
+            precip_array == _TARGET_NODATA)
+
+        # the month containing nodata leaves the window
+        forage._roll_annual_precip(
+            annual_precip_path, [precip_list[12]], [precip_list[0]],
+            precip_list[1:], _TARGET_NODATA)
+        annual_precip_array = gdal.OpenEx(annual_precip_path).ReadAsArray()
+        numpy.testing.assert_allclose(
+            annual_precip_array, numpy.full((3, 3), sum(range(1, 13))))
+
     def test_reference_evapotranspiration(self):
         """Test `_reference_evapotranspiration`.
 
@@ -2454,6 +2632,64 @@ class foragetests(unittest.TestCase):
                 min_val, (num_rasters - 1),
                 msg="Raster appears to contain nodata values")
 
+    def test_stacked_raster_calculator(self):
+        """Test `stacked_raster_calculator`.
+
+        Use the function `stacked_raster_calculator` to calculate two
+        results for a stack of two rasters, from that stack and a raster
+        shared by both layers, and write one of the results to the rasters
+        of the input stack.
+
+        Raises:
+            AssertionError if arrays passed to the local operation are not
+                stacked as expected
+            AssertionError if result rasters do not match values calculated
+                by hand
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        stack_path_list = [
+            os.path.join(self.workspace_dir, 'layer_{}.tif'.format(i)) for
+            i in [1, 2]]
+        create_array_raster(
+            stack_path_list[0], numpy.array([[1., 2.], [3., 4.]]))
+        create_array_raster(
+            stack_path_list[1], numpy.array([[5., 6.], [7., 8.]]))
+        shared_path = os.path.join(self.workspace_dir, 'shared.tif')
+        create_array_raster(shared_path, numpy.array([[1., 0.], [2., 1.]]))
+        product_path_list = [
+            os.path.join(self.workspace_dir, 'product_{}.tif'.format(i)) for
+            i in [1, 2]]
+        shape_list = []
+
+        def local_op(stack, shared, repeated_stack):
+            shape_list.extend(
+                [stack.shape, shared.shape, repeated_stack.shape])
+            return [stack * shared, stack + repeated_stack]
+
+        forage.stacked_raster_calculator(
+            [stack_path_list, [shared_path], stack_path_list], local_op,
+            [product_path_list, stack_path_list],
+            [_TARGET_NODATA, _TARGET_NODATA])
+
+        self.assertEqual(shape_list, [(2, 2, 2), (1, 2, 2), (2, 2, 2)])
+        numpy.testing.assert_allclose(
+            gdal.OpenEx(product_path_list[0]).ReadAsArray(),
+            [[1., 0.], [6., 4.]])
+        numpy.testing.assert_allclose(
+            gdal.OpenEx(product_path_list[1]).ReadAsArray(),
+            [[5., 0.], [14., 8.]])
+        numpy.testing.assert_allclose(
+            gdal.OpenEx(stack_path_list[0]).ReadAsArray(),
+            [[2., 4.], [6., 8.]])
+        numpy.testing.assert_allclose(
+            gdal.OpenEx(stack_path_list[1]).ReadAsArray(),
+            [[10., 12.], [14., 16.]])
+
     def test_weighted_state_variable_sum(self):
         """Test `weighted_state_variable_sum`.
 
@@ -3840,6 +4076,15 @@ class foragetests(unittest.TestCase):
             evap_losses, result_dict['evap_losses'] - tolerance,
             result_dict['evap_losses'] + tolerance, _TARGET_NODATA)
 
+        # all results calculated together match results calculated singly
+        result_list = forage.subtract_surface_losses(
+            ['inputs_after_surface', 'absevap', 'evap_losses'])(
+                inputs_after_snow, fracro, precro, snow,
+                alit, sd, fwloss_1, fwloss_2, pet_rem)
+        for result, single_result in zip(
+                result_list, [inputs_after_surface, absevap, evap_losses]):
+            numpy.testing.assert_array_equal(result, single_result)
+
         insert_nodata_values_into_array(pet_rem, _TARGET_NODATA)
         insert_nodata_values_into_array(snow, _TARGET_NODATA)
         insert_nodata_values_into_array(fracro, _IC_NODATA)
@@ -10330,6 +10575,341 @@ class foragetests(unittest.TestCase):
 
         self.assert_sorted_lists_equal(ordered_feed_types, digestibility_order)
 
+    def test_order_feed_types(self):
+        """Test `order_feed_types`.
+
+        Use the function `order_feed_types` to combine sums of carbon and
+        nitrogen calculated for two tiles of the study area. Ensure that the
+        order of feed types is calculated from mean nitrogen to carbon ratios
+        across both tiles, rather than the ratios within either tile.
+
+        Raises:
+            AssertionError if `order_feed_types` does not match order
+                calculated by hand
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        tile_1_dict = {
+            'agliv_1': {
+                'c_sum': 100., 'c_count': 1, 'n_sum': 10., 'n_count': 1},
+            'stded_1': {
+                'c_sum': 100., 'c_count': 1, 'n_sum': 5., 'n_count': 1},
+            'agliv_2': {
+                'c_sum': 0., 'c_count': 0, 'n_sum': 0., 'n_count': 0},
+        }
+        tile_2_dict = {
+            'agliv_1': {
+                'c_sum': 300., 'c_count': 3, 'n_sum': 3., 'n_count': 3},
+            'stded_1': {
+                'c_sum': 100., 'c_count': 1, 'n_sum': 5., 'n_count': 1},
+            'agliv_2': {
+                'c_sum': 40., 'c_count': 1, 'n_sum': 1.6, 'n_count': 1},
+        }
+        # combined N/C ratios: agliv_1 0.0325, stded_1 0.05, agliv_2 0.04
+        digestibility_order = ['stded_1', 'agliv_2', 'agliv_1']
+
+        ordered_feed_types = forage.order_feed_types(
+            [tile_1_dict, tile_2_dict])
+        self.assert_sorted_lists_equal(ordered_feed_types, digestibility_order)
+
+        # a single tile without carbon places all feed types last
+        ordered_feed_types = forage.order_feed_types([tile_1_dict])
+        self.assertEqual(ordered_feed_types[-1], 'agliv_2')
+
+    def test_mosaic_tiles(self):
+        """Test `_extract_tile` and `_mosaic_tiles`.
+
+        Divide a raster into tiles with `_tile_offset_list` and
+        `_extract_tile`, then assemble the tiles with `_mosaic_tiles`. Ensure
+        that the assembled raster is identical to the original raster.
+
+        Raises:
+            AssertionError if the number of tiles is not as expected
+            AssertionError if the assembled raster differs from the original
+                raster
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        base_path = os.path.join(self.workspace_dir, 'base.tif')
+        create_random_raster(base_path, 0, 10, nrows=5, ncols=7)
+        insert_nodata_values_into_raster(base_path, _TARGET_NODATA)
+
+        offset_list = forage._tile_offset_list(base_path, 3)
+        self.assertEqual(len(offset_list), 6)
+
+        tile_path_list = []
+        for tile_index, offset in enumerate(offset_list):
+            tile_path = os.path.join(
+                self.workspace_dir, 'tile_{}.tif'.format(tile_index))
+            forage._extract_tile(base_path, offset, tile_path)
+            tile_path_list.append(tile_path)
+        target_path = os.path.join(self.workspace_dir, 'mosaic.tif')
+        forage._mosaic_tiles(
+            tile_path_list, offset_list, base_path, target_path)
+
+        base_array = gdal.OpenEx(base_path).ReadAsArray()
+        mosaic_array = gdal.OpenEx(target_path).ReadAsArray()
+        numpy.testing.assert_array_equal(base_array, mosaic_array)
+        self.assertEqual(
+            pygeoprocessing.get_raster_info(target_path)['nodata'][0],
+            _TARGET_NODATA)
+
+        with self.assertRaises(ValueError):
+            forage._tile_offset_list(base_path, 0)
+
+    def test_extract_virtual_tile(self):
+        """Test `_extract_tile` with a virtual input raster.
+
+        Divide a virtual raster into tiles with `_extract_tile`, then
+        assemble the tiles with `_mosaic_tiles`. Ensure that the tiles are
+        virtual rasters and that the assembled raster is identical to the
+        raster to which the virtual raster refers.
+
+        Raises:
+            AssertionError if a tile of the virtual raster is not a virtual
+                raster
+            AssertionError if the assembled raster differs from the original
+                raster
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        base_path = os.path.join(self.workspace_dir, 'base.tif')
+        create_random_raster(base_path, 0, 10, nrows=5, ncols=7)
+        insert_nodata_values_into_raster(base_path, _TARGET_NODATA)
+        virtual_path = os.path.join(self.workspace_dir, 'base.vrt')
+        gdal.Translate(virtual_path, base_path, format='VRT')
+
+        offset_list = forage._tile_offset_list(virtual_path, 3)
+        tile_path_list = []
+        for tile_index, offset in enumerate(offset_list):
+            tile_path = os.path.join(
+                self.workspace_dir, 'tile_{}.vrt'.format(tile_index))
+            forage._extract_tile(virtual_path, offset, tile_path)
+            self.assertEqual(
+                gdal.OpenEx(tile_path).GetDriver().ShortName, 'VRT')
+            tile_path_list.append(tile_path)
+        target_path = os.path.join(self.workspace_dir, 'mosaic.tif')
+        forage._mosaic_tiles(
+            tile_path_list, offset_list, base_path, target_path)
+
+        base_array = gdal.OpenEx(base_path).ReadAsArray()
+        mosaic_array = gdal.OpenEx(target_path).ReadAsArray()
+        numpy.testing.assert_array_equal(base_array, mosaic_array)
+
+    def test_crop_to_valid_pixels(self):
+        """Test `_crop_to_valid_pixels`.
+
+        Use the function `_crop_to_valid_pixels` to crop tiles of a site
+        index raster where the left column and the bottom two rows contain
+        nodata. Ensure that tiles are cropped to the bounding box of valid
+        pixels and that tiles without valid pixels are dropped.
+
+        Raises:
+            AssertionError if `_crop_to_valid_pixels` does not match offsets
+                calculated by hand
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        site_index_path = os.path.join(self.workspace_dir, 'site_index.tif')
+        create_constant_raster(site_index_path, 1, n_cols=6, n_rows=6)
+        site_index_raster = gdal.OpenEx(
+            site_index_path, gdal.OF_RASTER | gdal.GA_Update)
+        site_index_band = site_index_raster.GetRasterBand(1)
+        site_index_array = site_index_band.ReadAsArray()
+        site_index_array[:, 0] = _TARGET_NODATA
+        site_index_array[4:, :] = _TARGET_NODATA
+        site_index_band.WriteArray(site_index_array)
+        site_index_band = None
+        site_index_raster = None
+
+        offset_list = forage._tile_offset_list(site_index_path, 4)
+        cropped_offset_list = forage._crop_to_valid_pixels(
+            site_index_path, offset_list)
+        self.assertEqual(cropped_offset_list, [(1, 0, 3, 4), (4, 0, 2, 4)])
+
+    def test_param_raster_cache(self):
+        """Test `_site_param_raster` and `_constant_param_raster`.
+
+        Use the functions `_site_param_raster` and `_constant_param_raster`
+        to create parameter rasters while parameter rasters are cached.
+        Ensure that identical parameter rasters are created only once, that
+        rasters holding different values are not confused, and that rasters
+        are created at the target path when the cache is not in use.
+
+        Raises:
+            AssertionError if parameter rasters are not reused as expected
+            AssertionError if parameter rasters do not contain the
+                parameter value
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        site_index_path = os.path.join(self.workspace_dir, 'site_index.tif')
+        create_constant_raster(site_index_path, 1, n_cols=3, n_rows=3)
+        site_param_table = {1: {'epnfa_1': 0.2, 'epnfa_2': 0.5}}
+
+        forage._PARAM_CACHE_DIR = os.path.join(
+            self.workspace_dir, 'parameter_cache')
+        os.makedirs(forage._PARAM_CACHE_DIR)
+        try:
+            first_path = forage._site_param_raster(
+                site_index_path, site_param_table, 'epnfa_1',
+                os.path.join(self.workspace_dir, 'first.tif'))
+            second_path = forage._site_param_raster(
+                site_index_path, site_param_table, 'epnfa_1',
+                os.path.join(self.workspace_dir, 'second.tif'))
+            other_path = forage._site_param_raster(
+                site_index_path, site_param_table, 'epnfa_2',
+                os.path.join(self.workspace_dir, 'other.tif'))
+            constant_path = forage._constant_param_raster(
+                site_index_path, 0.5,
+                os.path.join(self.workspace_dir, 'constant.tif'))
+
+            # an index raster at the same path on a different grid
+            regridded_index_path = os.path.join(
+                self.workspace_dir, 'regridded_site_index.tif')
+            shutil.copyfile(site_index_path, regridded_index_path)
+            regridded_path = forage._site_param_raster(
+                regridded_index_path, site_param_table, 'epnfa_1',
+                os.path.join(self.workspace_dir, 'regridded.tif'))
+            projection = osr.SpatialReference()
+            projection.ImportFromEPSG(32648)
+            site_index_raster = gdal.OpenEx(
+                regridded_index_path, gdal.OF_RASTER | gdal.GA_Update)
+            site_index_raster.SetProjection(projection.ExportToWkt())
+            site_index_raster = None
+            reprojected_path = forage._site_param_raster(
+                regridded_index_path, site_param_table, 'epnfa_1',
+                os.path.join(self.workspace_dir, 'reprojected.tif'))
+            cache_list = os.listdir(forage._PARAM_CACHE_DIR)
+        finally:
+            forage._PARAM_CACHE_DIR = None
+        self.assertEqual(first_path, second_path)
+        self.assertNotEqual(first_path, other_path)
+        self.assertNotEqual(regridded_path, reprojected_path)
+        self.assertEqual(
+            [path for path in cache_list if path.endswith('.tmp.tif')], [])
+        self.assertEqual(
+            os.path.dirname(first_path),
+            os.path.join(self.workspace_dir, 'parameter_cache'))
+        self.assertFalse(
+            os.path.exists(os.path.join(self.workspace_dir, 'first.tif')))
+        self.assertAlmostEqual(
+            gdal.OpenEx(first_path).ReadAsArray()[0, 0], 0.2, places=6)
+        self.assertAlmostEqual(
+            gdal.OpenEx(other_path).ReadAsArray()[0, 0], 0.5, places=6)
+        self.assertAlmostEqual(
+            gdal.OpenEx(constant_path).ReadAsArray()[0, 0], 0.5, places=6)
+
+        target_path = os.path.join(self.workspace_dir, 'uncached.tif')
+        uncached_path = forage._site_param_raster(
+            site_index_path, site_param_table, 'epnfa_1', target_path)
+        self.assertEqual(uncached_path, target_path)
+
+    @unittest.skipIf(
+        not os.path.exists(SAMPLE_DATA), "sample inputs not found")
+    def test_rerun_after_failure(self):
+        """Test a new run in the workspace of a run that failed.
+
+        Leave the intermediate files of a failed run in the workspace, as a
+        run that stores intermediate files in the workspace does when it is
+        interrupted, and run the model again in the same workspace without
+        resuming.
+
+        Raises:
+            AssertionError if the new run does not match a run in an empty
+                workspace
+
+        Returns:
+            None
+
+        """
+        workspace_1 = os.path.join(self.workspace_dir, 'rerun')
+        workspace_2 = os.path.join(self.workspace_dir, 'empty')
+        for dir_name in ['parameter_cache', 'state_variables_m-1']:
+            os.makedirs(
+                os.path.join(workspace_1, 'temporary_files', dir_name))
+        foragetests.run_sample_model(workspace_1, in_memory_state=False)
+        foragetests.run_sample_model(workspace_2, in_memory_state=False)
+        self.assert_model_outputs_equal(workspace_1, workspace_2)
+
+    def test_calc_feed_type_nc_sums(self):
+        """Test `calc_feed_type_nc_sums`.
+
+        Use the function `calc_feed_type_nc_sums` to sum carbon and nitrogen
+        of a feed type inside a study area with two overlapping features and
+        one feature that is smaller than a pixel. Ensure that sums and counts
+        match zonal statistics summed across the features of the study area.
+
+        Raises:
+            AssertionError if `calc_feed_type_nc_sums` does not match zonal
+                statistics summed across features
+            AssertionError if the weight raster of the study area does not
+                count each pixel once for each feature it is counted for
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        aoi_path = os.path.join(self.workspace_dir, 'aoi.shp')
+        create_polygon_vector(aoi_path, [
+            'POLYGON ((0 2, 2 2, 2 4, 0 4, 0 2))',
+            'POLYGON ((1 1, 3 1, 3 3, 1 3, 1 1))',
+            'POLYGON ((3.2 0.2, 3.4 0.2, 3.4 0.4, 3.2 0.4, 3.2 0.2))'])
+        sv_reg = {}
+        for statv in ['aglivc_1', 'aglive_1_1', 'stdedc_1', 'stdede_1_1']:
+            sv_reg['{}_path'.format(statv)] = os.path.join(
+                self.workspace_dir, '{}.tif'.format(statv))
+            value_array = numpy.random.uniform(1., 10., (4, 4))
+            create_array_raster(
+                sv_reg['{}_path'.format(statv)], value_array)
+        insert_nodata_values_into_raster(
+            sv_reg['aglive_1_1_path'], _SV_NODATA)
+
+        weight_path = forage._aoi_weight_raster(
+            sv_reg['aglivc_1_path'], aoi_path,
+            os.path.join(self.workspace_dir, 'aoi_weight.tif'))
+        numpy.testing.assert_array_equal(
+            gdal.OpenEx(weight_path).ReadAsArray(), [
+                [1, 1, 0, 0], [1, 2, 1, 0], [0, 1, 1, 0], [0, 0, 0, 1]])
+
+        nc_sum_dict = forage.calc_feed_type_nc_sums(
+            sv_reg, set([1]), aoi_path)
+        for feed_type, cstatv, nstatv in [
+                ('agliv_1', 'aglivc_1', 'aglive_1_1'),
+                ('stded_1', 'stdedc_1', 'stdede_1_1')]:
+            for element, statv in [('c', cstatv), ('n', nstatv)]:
+                zonal_stats = pygeoprocessing.zonal_statistics(
+                    (sv_reg['{}_path'.format(statv)], 1), aoi_path)
+                self.assertAlmostEqual(
+                    nc_sum_dict[feed_type]['{}_sum'.format(element)],
+                    sum(stats['sum'] for stats in zonal_stats.values()),
+                    places=4)
+                self.assertEqual(
+                    nc_sum_dict[feed_type]['{}_count'.format(element)],
+                    sum(stats['count'] for stats in zonal_stats.values()))
+
     def test_calc_grazing_offtake(self):
         """Test `_calc_grazing_offtake.`
 
@@ -10498,6 +11078,126 @@ class foragetests(unittest.TestCase):
             month_reg['fdgrem_1'], fdgrem - tolerance, fdgrem + tolerance,
             _TARGET_NODATA)
 
+    def test_calc_grazing_offtake_feed_types(self):
+        """Test `_calc_grazing_offtake` with several feed types and nodata.
+
+        Use the function `_calc_grazing_offtake` to perform diet selection
+        from four feed types belonging to two plant functional types. Animal
+        parameters are chosen so that relative time spent eating is 1 and
+        relative rate of eating is 1 - 2 ** -(biomass / 1000), and so that
+        protein in the diet does not limit intake. In the second pixel the
+        cover of the second plant functional type is nodata, with a nodata
+        value that differs from that of the other inputs. Compare the
+        fraction of live and dead biomass removed to values calculated by
+        hand.
+
+        Raises:
+            AssertionError if `_calc_grazing_offtake` does not match values
+                calculated by hand
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        pft_id_set = set([1, 2])
+        ordered_feed_types = ['agliv_1', 'stded_2', 'agliv_2', 'stded_1']
+        current_month = 4
+        # total biomass is 7000 kg/ha, so that at most 10% may be removed
+        management_threshold = 6300.
+
+        aligned_inputs = {
+            'site_index': os.path.join(self.workspace_dir, 'site.tif'),
+            'proportion_legume_path': os.path.join(
+                self.workspace_dir, 'proportion_legume.tif'),
+            'animal_density': os.path.join(
+                self.workspace_dir, 'animal_density.tif'),
+            'pft_1': os.path.join(self.workspace_dir, 'pft_1.tif'),
+            'pft_2': os.path.join(self.workspace_dir, 'pft_2.tif'),
+        }
+        create_constant_raster(aligned_inputs['site_index'], 1, n_cols=2)
+        create_constant_raster(
+            aligned_inputs['proportion_legume_path'], 0, n_cols=2)
+        create_constant_raster(aligned_inputs['animal_density'], 1, n_cols=2)
+        create_constant_raster(aligned_inputs['pft_1'], 0.4, n_cols=2)
+        create_constant_raster(aligned_inputs['pft_2'], 0.5, n_cols=2)
+        pft_2_raster = gdal.OpenEx(
+            aligned_inputs['pft_2'], gdal.OF_RASTER | gdal.GA_Update)
+        pft_2_band = pft_2_raster.GetRasterBand(1)
+        pft_2_band.SetNoDataValue(-9999.)
+        pft_2_band.WriteArray(numpy.array([[0.5, -9999.]]))
+        pft_2_band = None
+        pft_2_raster = None
+
+        # biomass in kg/ha: agliv_1 1000, stded_1 3000, agliv_2 1000,
+        # stded_2 2000. Crude protein is 0.1 in each feed type
+        sv_reg = {}
+        for statv, value in [
+                ('aglivc_1', 100.), ('aglive_1_1', 4.),
+                ('stdedc_1', 300.), ('stdede_1_1', 12.),
+                ('aglivc_2', 80.), ('aglive_1_2', 3.2),
+                ('stdedc_2', 160.), ('stdede_1_2', 6.4)]:
+            sv_path = os.path.join(self.workspace_dir, '{}.tif'.format(statv))
+            sv_reg['{}_path'.format(statv)] = sv_path
+            create_constant_raster(sv_path, value, n_cols=2)
+
+        animal_index_path = os.path.join(self.workspace_dir, 'animal.tif')
+        create_constant_raster(animal_index_path, 1, n_cols=2)
+        animal_trait_table = {
+            1: {
+                'age': 116, 'sex_int': 4, 'type_int': 4, 'W_total': 18.6,
+                'max_intake': 10., 'ZF': 1., 'CR1': 0.8, 'CR2': 0.17,
+                'CR3': 2., 'CR4': math.log(2) / 1000., 'CR5': 0.,
+                'CR6': 0.00112, 'CR12': 0., 'CR13': 0., 'CK1': 1.,
+                'CK2': 0., 'CM1': 1., 'CM2': 0., 'CM3': 0., 'CM4': 0.,
+                'CM6': 0., 'CM7': 0., 'CM16': 0., 'CRD1': 0.3, 'CRD2': 0.25,
+                'CRD4': 0., 'CRD5': 0., 'CRD6': 0.35, 'CRD7': 0.1,
+            }
+        }
+        # digestibility is 0.7 for pft 1 and 0.5 for pft 2, so that
+        # relative ingestibility is 0.8 for pft 1 and 0.6 for pft 2
+        veg_trait_table = {
+            1: {
+                'species_factor': 0,
+                'digestibility_intercept': 0.6,
+                'digestibility_slope': 1.,
+            },
+            2: {
+                'species_factor': 0.1,
+                'digestibility_intercept': 0.4,
+                'digestibility_slope': 1.,
+            },
+        }
+        month_reg = {}
+        for pft_i in pft_id_set:
+            for val in ['flgrem', 'fdgrem']:
+                key = '{}_{}'.format(val, pft_i)
+                month_reg[key] = os.path.join(
+                    self.workspace_dir, '{}.tif'.format(key))
+
+        forage._calc_grazing_offtake(
+            aligned_inputs, None, management_threshold, sv_reg, pft_id_set,
+            animal_index_path, animal_trait_table, veg_trait_table,
+            current_month, month_reg,
+            ordered_feed_types=ordered_feed_types)
+
+        # relative availability: agliv_1 0.5, stded_2 0.5 * 0.75 = 0.375,
+        # agliv_2 0.125 * 0.5 = 0.0625, stded_1 0.0625 * 0.875 = 0.0546875.
+        # daily intake is 10 * relative availability * relative
+        # ingestibility, and the fraction removed is intake * 30.4 / biomass
+        expected_dict = {
+            'flgrem_1': min(10. * 0.5 * 0.8 * 30.4 / 1000., 0.1),
+            'fdgrem_2': 10. * 0.375 * 0.6 * 30.4 / 2000.,
+            'flgrem_2': 10. * 0.0625 * 0.6 * 30.4 / 1000.,
+            'fdgrem_1': 10. * 0.0546875 * 0.8 * 30.4 / 3000.,
+        }
+        for key in sorted(month_reg):
+            numpy.testing.assert_allclose(
+                gdal.OpenEx(month_reg[key]).ReadAsArray(),
+                numpy.array([[expected_dict[key], _TARGET_NODATA]]),
+                rtol=1e-5, err_msg='{} does not match'.format(key))
+
     def test_animal_diet_sufficiency(self):
         """Test `_animal_diet_sufficiency`.
 
@@ -11024,3 +11724,1154 @@ class foragetests(unittest.TestCase):
         create_constant_raster(aligned_inputs['pft_4'], 0.3)
         with self.assertRaises(ValueError):
             forage._check_pft_fractional_cover_sum(aligned_inputs, pft_id_set)
+
+    def test_feature_statistics(self):
+        """Test statistics of model outputs inside grazing areas.
+
+        Use `_feature_statistics`, `_accumulate_feature_statistics` and
+        `_feature_mean_summary` to calculate the mean of two rasters containing
+        nodata pixels inside each feature of a small polygon layer, including
+        a feature that lies outside the rasters. Ensure that sums, counts and
+        means match those calculated by `pygeoprocessing.zonal_statistics`.
+
+        Raises:
+            AssertionError if feature statistics do not match zonal
+                statistics
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        vector_path = os.path.join(self.workspace_dir, 'grazing_areas.shp')
+        create_polygon_vector(vector_path, [
+            'POLYGON ((0 2, 2 2, 2 4, 0 4, 0 2))',
+            'POLYGON ((2 0, 4 0, 4 3, 2 3, 2 0))',
+            'POLYGON ((10 10, 11 10, 11 11, 10 11, 10 10))'])
+        fid_list = forage._vector_fid_list(vector_path)
+        self.assertEqual(fid_list, [0, 1, 2])
+
+        raster_path_list = []
+        for month in [1, 2]:
+            raster_path = os.path.join(
+                self.workspace_dir, 'output_{}.tif'.format(month))
+            create_array_raster(
+                raster_path, numpy.random.uniform(0., 100., (4, 4)))
+            insert_nodata_values_into_raster(raster_path, _TARGET_NODATA)
+            raster_path_list.append(raster_path)
+        feature_index_path = os.path.join(self.workspace_dir, 'index.tif')
+        forage._rasterize_feature_index(
+            raster_path_list[0], vector_path, feature_index_path)
+
+        stat_list = forage._feature_statistics(
+            feature_index_path, raster_path_list)
+        expected_sum = numpy.zeros(len(fid_list))
+        expected_count = numpy.zeros(len(fid_list), dtype=numpy.int64)
+        for raster_path, stat_dict in zip(raster_path_list, stat_list):
+            zonal_stats = pygeoprocessing.zonal_statistics(
+                (raster_path, 1), vector_path)
+            zonal_sum = numpy.array([
+                zonal_stats.get(fid, {'sum': 0.})['sum'] for fid in fid_list])
+            zonal_count = numpy.array([
+                zonal_stats.get(fid, {'count': 0})['count'] for fid in
+                fid_list])
+            numpy.testing.assert_array_equal(
+                stat_dict['fid'], numpy.flatnonzero(zonal_count))
+            numpy.testing.assert_allclose(
+                stat_dict['sum'], zonal_sum[stat_dict['fid']], rtol=1e-6)
+            numpy.testing.assert_array_equal(
+                stat_dict['count'], zonal_count[stat_dict['fid']])
+            expected_sum += zonal_sum
+            expected_count += zonal_count
+
+        # running statistics across both rasters
+        accumulator = forage._new_feature_accumulator(len(fid_list))
+        for stat_dict in stat_list:
+            forage._accumulate_feature_statistics(accumulator, stat_dict)
+        numpy.testing.assert_allclose(
+            accumulator['sum'], expected_sum, rtol=1e-6)
+        numpy.testing.assert_array_equal(accumulator['count'], expected_count)
+
+        # running statistics combined with another accumulator
+        combined_accumulator = forage._new_feature_accumulator(len(fid_list))
+        forage._accumulate_feature_statistics(
+            combined_accumulator, accumulator)
+        forage._accumulate_feature_statistics(
+            combined_accumulator, accumulator)
+        numpy.testing.assert_allclose(
+            combined_accumulator['sum'], 2 * expected_sum, rtol=1e-6)
+        numpy.testing.assert_array_equal(
+            combined_accumulator['count'], 2 * expected_count)
+
+        summary_dict = forage._feature_mean_summary(accumulator, fid_list)
+        self.assertEqual(sorted(summary_dict), fid_list)
+        for fid in [0, 1]:
+            self.assertAlmostEqual(
+                summary_dict[fid]['mean'],
+                expected_sum[fid] / expected_count[fid], places=4)
+        self.assertTrue(numpy.isnan(summary_dict[2]['mean']))
+
+    def test_rasterize_feature_index_overlap(self):
+        """Test `_rasterize_feature_index` with overlapping features.
+
+        Rasterize a polygon layer containing two features that overlap in one
+        pixel. Ensure that the overlapping pixel is assigned to the last
+        feature and that a warning is logged.
+
+        Raises:
+            AssertionError if the feature index raster does not match the
+                index calculated by hand
+            AssertionError if no warning about the overlap is logged
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        vector_path = os.path.join(self.workspace_dir, 'grazing_areas.shp')
+        create_polygon_vector(vector_path, [
+            'POLYGON ((0 0, 3 0, 3 3, 0 3, 0 0))',
+            'POLYGON ((2 2, 4 2, 4 4, 2 4, 2 2))'])
+        template_path = os.path.join(self.workspace_dir, 'template.tif')
+        create_array_raster(template_path, numpy.zeros((4, 4)))
+        feature_index_path = os.path.join(self.workspace_dir, 'index.tif')
+        with self.assertLogs(
+                'rangeland_production.forage', level='WARNING') as log:
+            forage._rasterize_feature_index(
+                template_path, vector_path, feature_index_path)
+        self.assertTrue(any(
+            '1 pixels are covered by more than one feature' in message for
+            message in log.output))
+
+        nodata = _TARGET_NODATA
+        expected_index = numpy.array([
+            [nodata, nodata, 1, 1],
+            [0, 0, 1, 1],
+            [0, 0, 0, nodata],
+            [0, 0, 0, nodata]])
+        numpy.testing.assert_array_equal(
+            gdal.OpenEx(feature_index_path).ReadAsArray(), expected_index)
+
+    def test_warp_virtual_raster(self):
+        """Test `_warp_virtual_raster`.
+
+        Align a raster without a nodata value, on a larger grid than an
+        existing aligned input, to the grid of that input with an area of
+        interest covering half of it. Ensure that the hash of the virtual
+        raster calculated by `_aligned_input_md5` changes when its source
+        raster is modified.
+
+        Raises:
+            AssertionError if the virtual raster is not on the grid of the
+                template raster
+            AssertionError if pixels outside the area of interest are not
+                `_TARGET_NODATA`, or pixels inside it do not match the source
+            AssertionError if the hash of the virtual raster does not change
+                when its source raster is modified
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        template_path = os.path.join(self.workspace_dir, 'template.tif')
+        create_array_raster(
+            template_path, numpy.zeros((4, 4), dtype=numpy.float32))
+        aoi_path = os.path.join(self.workspace_dir, 'aoi.shp')
+        create_polygon_vector(
+            aoi_path, ['POLYGON ((0 0, 2 0, 2 4, 0 4, 0 0))'])
+
+        # source raster extends one pixel beyond the template on each side
+        base_path = os.path.join(self.workspace_dir, 'precip_2016_1.tif')
+        base_array = numpy.arange(1, 37, dtype=numpy.float32).reshape(6, 6)
+
+        def create_base_raster(value_array):
+            projection = osr.SpatialReference()
+            projection.SetWellKnownGeogCS('WGS84')
+            driver = gdal.GetDriverByName('GTiff')
+            base_raster = driver.Create(
+                base_path.encode('utf-8'), 6, 6, 1, gdal.GDT_Float32)
+            base_raster.SetProjection(projection.ExportToWkt())
+            base_raster.SetGeoTransform([-1, 1, 0, 5, 0, -1])
+            base_raster.GetRasterBand(1).WriteArray(value_array)
+            base_raster = None
+
+        create_base_raster(base_array)
+        self.assertIsNone(
+            pygeoprocessing.get_raster_info(base_path)['nodata'][0])
+
+        target_path = os.path.join(self.workspace_dir, 'aligned_precip.vrt')
+        forage._warp_virtual_raster(
+            base_path, template_path, aoi_path, target_path)
+
+        template_info = pygeoprocessing.get_raster_info(template_path)
+        target_info = pygeoprocessing.get_raster_info(target_path)
+        self.assertEqual(
+            target_info['raster_size'], template_info['raster_size'])
+        numpy.testing.assert_allclose(
+            target_info['geotransform'], template_info['geotransform'])
+        self.assertTrue(osr.SpatialReference(
+            target_info['projection_wkt']).IsSame(
+                osr.SpatialReference(template_info['projection_wkt'])))
+        self.assertEqual(target_info['nodata'][0], forage._TARGET_NODATA)
+
+        expected_array = base_array[1:5, 1:5].copy()
+        expected_array[:, 2:] = forage._TARGET_NODATA
+        numpy.testing.assert_array_equal(
+            gdal.OpenEx(target_path).ReadAsArray(), expected_array)
+
+        md5_dict = forage._aligned_input_md5({'precip_0': target_path})
+        create_base_raster(base_array * 2)
+        os.utime(base_path, (0, 0))
+        self.assertNotEqual(
+            forage._aligned_input_md5({'precip_0': target_path}), md5_dict)
+
+    def test_checkpoint(self):
+        """Test `_write_checkpoint` and `_read_checkpoint`.
+
+        Write a checkpoint containing numpy values and read it back, then
+        remove a file recorded in the checkpoint.
+
+        Raises:
+            AssertionError if the checkpoint read by `_read_checkpoint` does
+                not match the checkpoint written by `_write_checkpoint`
+            AssertionError if `_read_checkpoint` does not raise ValueError
+                when the workspace contains no checkpoint or when a file
+                recorded in the checkpoint is missing
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        with self.assertRaises(ValueError):
+            forage._read_checkpoint(self.workspace_dir)
+
+        sv_path = os.path.join(self.workspace_dir, 'aglivc_1.tif')
+        pp_path = os.path.join(self.workspace_dir, 'afiel_1.tif')
+        input_path = os.path.join(self.workspace_dir, 'site.tif')
+        for path in [sv_path, pp_path, input_path]:
+            create_constant_raster(path, 1)
+        aligned_inputs = {'site_index': input_path}
+        checkpoint = {
+            'month_index': 4,
+            'sv_dir': self.workspace_dir,
+            'sv_reg': {'aglivc_1_path': sv_path},
+            'sv_nodata': -1.0,
+            'pp_reg': {'afiel_1_path': pp_path},
+            'animal_trait_table': [
+                (1, {'sex': 'breeding_female', 'W_total': numpy.float32(2.)}),
+            ],
+            'aligned_inputs': aligned_inputs,
+            'aligned_input_md5': forage._aligned_input_md5(aligned_inputs),
+            'summary_accumulator': {
+                'potential_biomass': {
+                    'sum': [1.5, 0.], 'count': [1, 0]},
+            },
+        }
+        forage._write_checkpoint(self.workspace_dir, checkpoint)
+        result = forage._read_checkpoint(self.workspace_dir)
+        self.assertEqual(result['month_index'], 4)
+        self.assertEqual(result['sv_reg'], checkpoint['sv_reg'])
+        self.assertEqual(
+            result['aligned_input_md5'], checkpoint['aligned_input_md5'])
+        self.assertEqual(
+            result['animal_trait_table'],
+            [[1, {'sex': 'breeding_female', 'W_total': 2.}]])
+        self.assertEqual(
+            result['summary_accumulator']['potential_biomass'],
+            {'sum': [1.5, 0.], 'count': [1, 0]})
+
+        os.remove(pp_path)
+        with self.assertRaises(ValueError):
+            forage._read_checkpoint(self.workspace_dir)
+
+    def test_compact_pixels(self):
+        """Test `_compact_pixels` and `_scatter_compact_raster`.
+
+        Compact rasters containing repeated pixels and a nodata pixel, then
+        copy compact values back to every pixel of the study area.
+
+        Raises:
+            AssertionError if the number of pixels represented by each class
+                does not match values calculated by hand
+            AssertionError if scattered rasters do not match the rasters
+                from which they were compacted
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        site_array = numpy.array(
+            [[1, 1, 2, 1], [2, 2, 2, _TARGET_NODATA]], dtype=numpy.float32)
+        sv_array = numpy.array(
+            [[5, 5, 5, 6], [7, 7, 7, 7]], dtype=numpy.float32)
+        path_array_list = [
+            (os.path.join(self.workspace_dir, 'site.tif'), site_array),
+            (os.path.join(self.workspace_dir, 'som3c.tif'), sv_array)]
+        for path, array in path_array_list:
+            create_constant_raster(path, 0, n_cols=4, n_rows=2)
+            raster = gdal.OpenEx(path, gdal.OF_RASTER | gdal.GA_Update)
+            raster.GetRasterBand(1).WriteArray(array)
+            raster = None
+
+        compact_dir = os.path.join(self.workspace_dir, 'compact')
+        os.makedirs(compact_dir)
+        (compact_inputs, compact_sv_reg, compact_pp_reg,
+         class_column_path) = forage._compact_pixels(
+            {'site_index': path_array_list[0][0]},
+            {'som3c_path': path_array_list[1][0]},
+            {'afiel_1_path': os.path.join(self.workspace_dir, 'missing.tif')},
+            compact_dir)
+        self.assertEqual(compact_pp_reg, {})
+
+        weight_raster = gdal.OpenEx(
+            compact_inputs['pixel_weight'], gdal.OF_RASTER)
+        numpy.testing.assert_allclose(
+            weight_raster.GetRasterBand(1).ReadAsArray(),
+            [[2, 1, 1], [3, 0, 0]])
+        weight_raster = None
+
+        for compact_path, (base_path, base_array) in zip(
+                [compact_inputs['site_index'], compact_sv_reg['som3c_path']],
+                path_array_list):
+            target_path = os.path.join(self.workspace_dir, 'scattered.tif')
+            forage._scatter_compact_raster(
+                compact_path, class_column_path, target_path)
+            target_raster = gdal.OpenEx(target_path, gdal.OF_RASTER)
+            target_array = target_raster.GetRasterBand(1).ReadAsArray()
+            target_raster = None
+            numpy.testing.assert_allclose(
+                target_array[site_array != _TARGET_NODATA],
+                base_array[site_array != _TARGET_NODATA])
+            self.assertEqual(target_array[1, 3], _TARGET_NODATA)
+            os.remove(target_path)
+
+    def test_mean_of_arrays(self):
+        """Test `_mean_of_arrays`.
+
+        Average three arrays containing nodata values, where each array has
+        a different nodata value.
+
+        Raises:
+            AssertionError if `_mean_of_arrays` does not match values
+                calculated by hand
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        nodata_list = [-9999., 255., None]
+        array_list = [
+            numpy.array([[1., 2., -9999., 4.]], dtype=numpy.float32),
+            numpy.array([[3., 4., 5., 255.]], dtype=numpy.float32),
+            numpy.array([[5., 9., 6., 7.]], dtype=numpy.float32)]
+        result = forage._mean_of_arrays(
+            *(array_list + nodata_list + [forage._TARGET_NODATA]))
+        numpy.testing.assert_allclose(
+            result,
+            [[3., 5., forage._TARGET_NODATA, forage._TARGET_NODATA]])
+
+    def test_count_unconverged_pixels(self):
+        """Test `_count_unconverged_pixels`.
+
+        Compare slow soil organic matter pools at the end of two years on
+        five pixels: one unchanged, one changing by less than the tolerance,
+        one changing by more than the tolerance in two pools, one changing by
+        more than the tolerance in one pool, and one where a pool is nodata
+        in the previous year.
+
+        Raises:
+            AssertionError if `_count_unconverged_pixels` does not return the
+                number of pixels where any pool changes by more than the
+                tolerance
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        prev_value_dict = {
+            'som2c_1_path': [[100., 100., 100., 100., forage._SV_NODATA]],
+            'som2c_2_path': [[10., 10., 10., 10., 10.]],
+            'som3c_path': [[1000., 1000., 1000., 1000., 1000.]],
+        }
+        value_dict = {
+            'som2c_1_path': [[100., 100.05, 102., 100., 100.]],
+            'som2c_2_path': [[10., 10., 10.5, 11., 10.]],
+            'som3c_path': [[1000., 1000., 1000., 1000., 1000.]],
+        }
+        prev_sv_reg = {}
+        sv_reg = {}
+        for key in prev_value_dict:
+            prev_sv_reg[key] = os.path.join(
+                self.workspace_dir, 'prev_{}.tif'.format(key))
+            create_array_raster(
+                prev_sv_reg[key], numpy.array(prev_value_dict[key]))
+            sv_reg[key] = os.path.join(
+                self.workspace_dir, '{}.tif'.format(key))
+            create_array_raster(sv_reg[key], numpy.array(value_dict[key]))
+
+        self.assertEqual(
+            forage._count_unconverged_pixels(prev_sv_reg, sv_reg, 0.001), 2)
+        self.assertEqual(
+            forage._count_unconverged_pixels(prev_sv_reg, sv_reg, 0.2), 0)
+        self.assertEqual(
+            forage._count_unconverged_pixels(prev_sv_reg, prev_sv_reg, 0), 0)
+
+    def test_jit_pixel_loops(self):
+        """Test per-pixel loops used by the optional compiled backend.
+
+        Apply the uncompiled per-pixel loops through `_apply_jit_kernel` and
+        compare the results to the NumPy implementation of each kernel, on
+        arrays containing nodata values. The compiled loops are disabled
+        while calculating the NumPy results, so that the two differ when
+        numba is installed.
+
+        Raises:
+            AssertionError if a per-pixel loop does not match the NumPy
+                implementation of the same kernel
+            AssertionError if energy requirements of maintenance of males
+                are not 1.15 times those of females
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        jit_name_list = [
+            '_ESCHED_JIT', '_RESPIRATION_MINERAL_FLOW_JIT',
+            '_SURFACE_TCFLOW_JIT', '_STRUCTURAL_TCFLOW_JIT',
+            '_ENERGY_MAINTENANCE_JIT']
+        jit_kernel_dict = dict(
+            (name, getattr(forage, name)) for name in jit_name_list)
+        for name in jit_name_list:
+            setattr(forage, name, None)
+        try:
+            self._check_jit_pixel_loops()
+        finally:
+            for name, kernel in jit_kernel_dict.items():
+                setattr(forage, name, kernel)
+
+    def _check_jit_pixel_loops(self):
+        """Compare per-pixel loops to the NumPy implementation of kernels.
+
+        Raises:
+            AssertionError if a per-pixel loop does not match the NumPy
+                implementation of the same kernel
+            AssertionError if energy requirements of maintenance of males
+                are not 1.15 times those of females
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        array_shape = (10, 10)
+        numpy.random.seed(1)
+
+        def random_array(low, high, nodata):
+            array = numpy.random.uniform(
+                low, high, array_shape).astype(numpy.float32)
+            return insert_nodata_values_into_array(array, nodata)
+
+        cflow = random_array(0., 20., _IC_NODATA)
+        tca = random_array(0., 200., _SV_NODATA)
+        rcetob = random_array(5., 200., _TARGET_NODATA)
+        anps = random_array(0., 2., _SV_NODATA)
+        labile = random_array(-1., 5., _SV_NODATA)
+        expected_list = [
+            forage.esched(return_type)(cflow, tca, rcetob, anps, labile) for
+            return_type in [
+                'material_leaving_a', 'material_arriving_b', 'mineral_flow']]
+        result_list = forage._apply_jit_kernel(
+            forage._esched_pixels, [cflow, tca, rcetob, anps, labile], 3)
+        for result, expected in zip(result_list, expected_list):
+            numpy.testing.assert_allclose(result, expected, rtol=1e-5)
+
+        frac_co2 = random_array(0., 1., _IC_NODATA)
+        estatv = random_array(0., 2., _SV_NODATA)
+        cstatv = random_array(0., 200., _SV_NODATA)
+        expected = forage.calc_respiration_mineral_flow(
+            cflow, frac_co2, estatv, cstatv)
+        result = forage._apply_jit_kernel(
+            forage._respiration_mineral_flow_pixels,
+            [cflow, frac_co2, estatv, cstatv], 1)[0]
+        numpy.testing.assert_allclose(result, expected, rtol=1e-5)
+
+        surface_input_list = [
+            random_array(0., 1e-6, _SV_NODATA),
+            random_array(0., 1e-6, _SV_NODATA),
+            cstatv,
+            estatv,
+            random_array(0., 2., _SV_NODATA),
+            rcetob,
+            random_array(5., 200., _TARGET_NODATA),
+            random_array(0., 1., _TARGET_NODATA),
+            random_array(0., 4., _IC_NODATA),
+            random_array(0., 1., _TARGET_NODATA)]
+        expected = forage.calc_tcflow_surface(*surface_input_list)
+        result = forage._apply_jit_kernel(
+            forage._surface_tcflow_pixels, surface_input_list, 1)[0]
+        numpy.testing.assert_allclose(result, expected, rtol=1e-5)
+
+        # mineral N and P are limiting on some pixels
+        structural_input_list = [
+            random_array(-1e-6, 1e-6, _SV_NODATA),
+            random_array(-1e-6, 1e-6, _SV_NODATA),
+            random_array(0., 200., _SV_NODATA),
+            random_array(0.5, 5., _SV_NODATA),
+            random_array(0.5, 5., _SV_NODATA),
+            random_array(5., 200., _TARGET_NODATA),
+            random_array(5., 200., _TARGET_NODATA),
+            random_array(0., 150., _IC_NODATA),
+            random_array(0., 1., _TARGET_NODATA),
+            random_array(0., 4., _IC_NODATA),
+            random_array(0., 5., _IC_NODATA),
+            random_array(0., 0.5, _SV_NODATA),
+            random_array(0., 1., _TARGET_NODATA)]
+        anerb = random_array(0., 1., _TARGET_NODATA)
+        expected = forage.calc_tcflow_strucc_1(*structural_input_list)
+        result = forage._apply_jit_kernel(
+            forage._structural_tcflow_pixels,
+            structural_input_list + [numpy.float32(1.)], 1)[0]
+        numpy.testing.assert_allclose(result, expected, rtol=1e-5)
+        self.assertTrue(numpy.any(result > 0))
+        self.assertTrue(numpy.any(result == 0))
+        expected = forage.calc_tcflow_strucc_2(
+            *(structural_input_list + [anerb]))
+        result = forage._apply_jit_kernel(
+            forage._structural_tcflow_pixels,
+            structural_input_list + [anerb], 1)[0]
+        numpy.testing.assert_allclose(result, expected, rtol=1e-5)
+
+        sex = numpy.random.randint(1, 5, array_shape).astype(numpy.float32)
+        insert_nodata_values_into_array(sex, _TARGET_NODATA)
+        maintenance_input_list = [
+            random_array(0., 3000., _TARGET_NODATA),
+            sex,
+            random_array(100., 500., _TARGET_NODATA),
+            random_array(0., 200., _TARGET_NODATA),
+            random_array(-0.5, 15., _TARGET_NODATA),
+            random_array(0.4, 0.8, _TARGET_NODATA),
+            random_array(0.4, 0.6, _IC_NODATA),
+            random_array(0.01, 0.03, _IC_NODATA),
+            random_array(0.05, 0.1, _IC_NODATA),
+            random_array(0.2, 0.3, _IC_NODATA),
+            random_array(0., 0.0001, _IC_NODATA),
+            random_array(0.8, 0.9, _IC_NODATA),
+            random_array(0.002, 0.003, _IC_NODATA),
+            random_array(0.8, 1., _IC_NODATA),
+            random_array(0.002, 0.003, _IC_NODATA)]
+        expected = forage.calc_energy_maintenance(*maintenance_input_list)
+        result = forage._apply_jit_kernel(
+            forage._energy_maintenance_pixels, maintenance_input_list, 1)[0]
+        numpy.testing.assert_allclose(result, expected, rtol=1e-5)
+
+        # identical animals differing only in sex
+        female_input_list = [
+            numpy.array([[value]], dtype=numpy.float32) for value in [
+                1000., 4., 300., 100., 8., 0.6, 0.5, 0.02, 0.09, 0.26,
+                0.00008, 0.84, 0.0025, 0.9, 0.0026]]
+        female_result = forage._apply_jit_kernel(
+            forage._energy_maintenance_pixels, female_input_list, 1)[0]
+        for male_sex in [1., 2.]:
+            male_input_list = list(female_input_list)
+            male_input_list[1] = numpy.array(
+                [[male_sex]], dtype=numpy.float32)
+            male_result = forage._apply_jit_kernel(
+                forage._energy_maintenance_pixels, male_input_list, 1)[0]
+            numpy.testing.assert_allclose(
+                male_result, female_result * 1.15, rtol=1e-5)
+            numpy.testing.assert_allclose(
+                male_result,
+                forage.calc_energy_maintenance(*male_input_list), rtol=1e-5)
+
+    def test_valid_mask(self):
+        """Test `_nodata_mask` and `_valid_mask`.
+
+        Identify nodata values in float and integer arrays and compare the
+        result to `numpy.isclose`.
+
+        Raises:
+            AssertionError if `_nodata_mask` does not match `numpy.isclose`
+            AssertionError if `_valid_mask` is not the inverse of
+                `_nodata_mask`
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        float_array = numpy.array(
+            [[_SV_NODATA, _SV_NODATA + 1e-6, 0., 2.5, _IC_NODATA, numpy.nan]],
+            dtype=numpy.float32)
+        for nodata in [_SV_NODATA, _IC_NODATA, 0.]:
+            numpy.testing.assert_array_equal(
+                forage._nodata_mask(float_array, nodata),
+                numpy.isclose(float_array, nodata))
+            numpy.testing.assert_array_equal(
+                forage._valid_mask(float_array, nodata),
+                ~numpy.isclose(float_array, nodata))
+
+        int_array = numpy.array([[-9999, 0, 3]], dtype=numpy.int32)
+        numpy.testing.assert_array_equal(
+            forage._nodata_mask(int_array, -9999), [[True, False, False]])
+        numpy.testing.assert_array_equal(
+            forage._valid_mask(int_array, -9999), [[False, True, True]])
+
+    def test_make_processing_dir(self):
+        """Test `_make_processing_dir`.
+
+        Create the temporary directory for intermediate files with and
+        without a memory-backed file system.
+
+        Raises:
+            AssertionError if intermediate files are not stored on the
+                memory-backed file system when it is available and requested
+            AssertionError if intermediate files are not stored in the
+                workspace when the memory-backed file system is missing
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        ram_backed_dir = os.path.join(self.workspace_dir, 'shm')
+        os.makedirs(ram_backed_dir)
+        default_ram_backed_dir = forage._RAM_BACKED_DIR
+        forage._RAM_BACKED_DIR = ram_backed_dir
+        try:
+            processing_dir = forage._make_processing_dir(
+                self.workspace_dir, True, False)
+            self.assertEqual(
+                os.path.dirname(processing_dir),
+                os.path.abspath(ram_backed_dir))
+            self.assertTrue(os.path.isdir(processing_dir))
+
+            processing_dir = forage._make_processing_dir(
+                self.workspace_dir, False, False)
+            self.assertEqual(
+                processing_dir,
+                os.path.join(self.workspace_dir, 'temporary_files'))
+
+            # fall back to the workspace if the file system is missing
+            forage._RAM_BACKED_DIR = os.path.join(
+                self.workspace_dir, 'missing')
+            processing_dir = forage._make_processing_dir(
+                self.workspace_dir, True, False)
+            self.assertEqual(
+                processing_dir,
+                os.path.join(self.workspace_dir, 'temporary_files'))
+            self.assertTrue(os.path.isdir(processing_dir))
+        finally:
+            forage._RAM_BACKED_DIR = default_ram_backed_dir
+
+    def test_execute_removes_memory_backed_dir(self):
+        """Test that `execute` releases memory-backed storage on failure.
+
+        Replace the body of the model with a function that creates the
+        temporary directory on a memory-backed file system and then fails.
+
+        Raises:
+            AssertionError if the temporary directory remains after the run
+                fails
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        ram_backed_dir = os.path.join(self.workspace_dir, 'shm')
+        os.makedirs(ram_backed_dir)
+
+        def failing_execute(args):
+            forage.PROCESSING_DIR = forage._make_processing_dir(
+                args['workspace_dir'], True, False)
+            raise RuntimeError("simulated failure")
+
+        default_ram_backed_dir = forage._RAM_BACKED_DIR
+        default_execute = forage._execute
+        forage._RAM_BACKED_DIR = ram_backed_dir
+        forage._execute = failing_execute
+        try:
+            with self.assertRaises(RuntimeError):
+                forage.execute({'workspace_dir': self.workspace_dir})
+        finally:
+            forage._RAM_BACKED_DIR = default_ram_backed_dir
+            forage._execute = default_execute
+        self.assertEqual(os.listdir(ram_backed_dir), [])
+
+    @unittest.skipIf(
+        not os.path.exists(SAMPLE_DATA), "sample inputs not found")
+    def test_in_memory_state(self):
+        """Test that `in_memory_state` does not change model results.
+
+        Run the model on sample inputs with and without holding state
+        variables on a memory-backed file system.
+
+        Raises:
+            AssertionError if monthly outputs differ between the two runs
+
+        Returns:
+            None
+
+        """
+        workspace_1 = os.path.join(self.workspace_dir, 'in_memory')
+        workspace_2 = os.path.join(self.workspace_dir, 'on_disk')
+        foragetests.run_sample_model(workspace_1, in_memory_state=True)
+        foragetests.run_sample_model(workspace_2, in_memory_state=False)
+        self.assert_model_outputs_equal(workspace_1, workspace_2)
+
+    @unittest.skipIf(
+        not os.path.exists(SAMPLE_DATA), "sample inputs not found")
+    def test_tiled_simulation(self):
+        """Test that simulating tiles does not change model results.
+
+        Run the model on sample inputs for three months as one tile and as
+        tiles of 5 by 5 pixels, saving state variables of each month.
+
+        Raises:
+            AssertionError if monthly outputs or state variables at the end
+                of the simulation differ between the two runs
+
+        Returns:
+            None
+
+        """
+        workspace_1 = os.path.join(self.workspace_dir, 'untiled')
+        workspace_2 = os.path.join(self.workspace_dir, 'tiled')
+        foragetests.run_sample_model(
+            workspace_1, n_months=3, save_sv_rasters=True)
+        foragetests.run_sample_model(
+            workspace_2, n_months=3, save_sv_rasters=True, tile_size=5)
+        self.assert_model_outputs_equal(workspace_1, workspace_2)
+
+        sv_dir_1 = os.path.join(workspace_1, 'state_variables_m2')
+        sv_dir_2 = os.path.join(workspace_2, 'state_variables_m2')
+        sv_list = sorted(os.listdir(sv_dir_1))
+        self.assert_sorted_lists_equal(sv_list, sorted(os.listdir(sv_dir_2)))
+        for basename in sv_list:
+            numpy.testing.assert_allclose(
+                gdal.OpenEx(os.path.join(sv_dir_1, basename)).ReadAsArray(),
+                gdal.OpenEx(os.path.join(sv_dir_2, basename)).ReadAsArray(),
+                rtol=1e-5, err_msg=basename)
+
+    def test_map_tiles(self):
+        """Test `_map_tiles` in this process and in worker processes.
+
+        Apply a function to a list of arguments without a pool of worker
+        processes and with a pool of two worker processes.
+
+        Raises:
+            AssertionError if results differ between the two, or are not
+                returned in the order of arguments
+
+        Returns:
+            None
+
+        """
+        import multiprocessing
+        from rangeland_production import forage
+
+        func_args_list = [
+            (numpy.array([[float(i), 1.]]), numpy.array([[3., 5.]]),
+             _TARGET_NODATA, _TARGET_NODATA, _TARGET_NODATA)
+            for i in range(5)]
+        expected_list = forage._map_tiles(
+            None, forage._mean_of_arrays, func_args_list)
+        worker_pool = multiprocessing.Pool(processes=2)
+        try:
+            result_list = forage._map_tiles(
+                worker_pool, forage._mean_of_arrays, func_args_list)
+        finally:
+            worker_pool.terminate()
+            worker_pool.join()
+        self.assertEqual(len(result_list), len(func_args_list))
+        for result, expected in zip(result_list, expected_list):
+            numpy.testing.assert_allclose(result, expected)
+        numpy.testing.assert_allclose(result_list[4], [[3.5, 3.]])
+
+    @unittest.skipIf(
+        not os.path.exists(SAMPLE_DATA), "sample inputs not found")
+    def test_n_workers(self):
+        """Test that simulating tiles in parallel does not change results.
+
+        Run the model on sample inputs as tiles of 5 by 5 pixels in the main
+        process and in two worker processes.
+
+        Raises:
+            AssertionError if monthly outputs differ between the two runs
+
+        Returns:
+            None
+
+        """
+        workspace_1 = os.path.join(self.workspace_dir, 'one_worker')
+        workspace_2 = os.path.join(self.workspace_dir, 'two_workers')
+        foragetests.run_sample_model(workspace_1, tile_size=5, n_workers=1)
+        foragetests.run_sample_model(workspace_2, tile_size=5, n_workers=2)
+        self.assert_model_outputs_equal(workspace_1, workspace_2)
+
+    def test_decomposition(self):
+        """Test `_decomposition`.
+
+        Run decomposition on small constant rasters where snow cover, a
+        saturated, freely drained soil and high pH fix the decomposition
+        factor, the anaerobic effect and the pH effects at 1. Decomposition
+        rates of all pools except SOM3 are zero, so the only flows are
+        atmospheric N deposition, decomposition of SOM3 to soil SOM1,
+        mixing of surface SOM2 into soil SOM2, weathering of parent P and
+        volatilization of mineralized N. Each of these removes a constant
+        fraction of its source pool in each of the four decomposition
+        substeps, so that state variables can be calculated by hand.
+
+        Raises:
+            AssertionError if `_decomposition` does not match values
+                calculated by hand
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        tolerance = 0.0001
+        current_month = 6
+        month_index = 18
+        pft_id_set = set([1])
+        site_param_table = {
+            1: {
+                'fwloss_4': 0.8, 'elitst': 0.4, 'pmntmp': 0.004,
+                'pmxtmp': -0.0035, 'teff_1': 0., 'teff_2': 11.75,
+                'teff_3': 0., 'teff_4': 0.031, 'drain': 1.,
+                'aneref_1': 1.5, 'aneref_2': 3., 'aneref_3': 0.3,
+                'sorpmx': 2., 'pslsrb': 1., 'strmax_1': 5000., 'dec1_1': 0.,
+                'pligst_1': 3., 'strmax_2': 5000., 'dec1_2': 0.,
+                'pligst_2': 3., 'rsplig': 0.3, 'ps1co2_1': 0.45,
+                'ps1co2_2': 0.55, 'dec2_1': 0., 'pcemic1_1_1': 16.,
+                'pcemic1_2_1': 10., 'pcemic1_3_1': 0.02,
+                'pcemic1_1_2': 200., 'pcemic1_2_2': 100.,
+                'pcemic1_3_2': 0.0015, 'varat1_1_1': 12., 'varat1_2_1': 12.,
+                'varat1_3_1': 2., 'varat1_1_2': 150., 'varat1_2_2': 150.,
+                'varat1_3_2': 2., 'dec2_2': 0., 'pmco2_1': 0.6,
+                'pmco2_2': 0.55, 'rad1p_1_1': 12., 'rad1p_2_1': 3.,
+                'rad1p_3_1': 5., 'rad1p_1_2': 220., 'rad1p_2_2': 5.,
+                'rad1p_3_2': 100., 'dec3_1': 0., 'p1co2a_1': 0.6,
+                'varat22_1_1': 20., 'varat22_2_1': 12., 'varat22_3_1': 2.,
+                'varat22_1_2': 400., 'varat22_2_2': 100.,
+                'varat22_3_2': 2., 'dec3_2': 0., 'animpt': 5.,
+                'varat3_1_1': 8., 'varat3_2_1': 6., 'varat3_3_1': 2.,
+                'varat3_1_2': 200., 'varat3_2_2': 20., 'varat3_3_2': 2.,
+                'omlech_3': 60., 'dec5_2': 0., 'p2co2_2': 0.55,
+                'dec5_1': 0., 'p2co2_1': 0.55, 'dec4': 0.5,
+                'p3co2': 0.55, 'cmix': 0.5, 'pparmn_2': 0.5,
+                'psecmn_2': 0., 'pmnsec_2': 0., 'psecoc1': 0.,
+                'psecoc2': 0., 'epnfs_2': 0.03, 'nlayer': 3,
+            },
+        }
+
+        input_dir = os.path.join(self.workspace_dir, 'inputs')
+        os.makedirs(input_dir)
+        aligned_inputs = {
+            'site_index': os.path.join(input_dir, 'site_index.tif'),
+            'ph_path': os.path.join(input_dir, 'ph.tif'),
+            'precip_{}'.format(month_index): os.path.join(
+                input_dir, 'precip.tif'),
+            'min_temp_{}'.format(current_month): os.path.join(
+                input_dir, 'min_temp.tif'),
+            'max_temp_{}'.format(current_month): os.path.join(
+                input_dir, 'max_temp.tif'),
+            'pft_1': os.path.join(input_dir, 'pft_1.tif'),
+        }
+        for key, value in [
+                ('site_index', 1), ('ph_path', 10.),
+                ('precip_{}'.format(month_index), 10.),
+                ('min_temp_{}'.format(current_month), 10.),
+                ('max_temp_{}'.format(current_month), 25.),
+                ('pft_1', 1.)]:
+            create_constant_raster(
+                aligned_inputs[key], value, n_cols=NCOLS, n_rows=NROWS)
+
+        year_reg = {
+            'annual_precip_path': os.path.join(
+                input_dir, 'annual_precip.tif'),
+            'baseNdep_path': os.path.join(input_dir, 'baseNdep.tif'),
+        }
+        create_constant_raster(
+            year_reg['annual_precip_path'], 50., n_cols=NCOLS, n_rows=NROWS)
+        create_constant_raster(
+            year_reg['baseNdep_path'], 1., n_cols=NCOLS, n_rows=NROWS)
+
+        pp_reg = {}
+        for key, value in [
+                ('rnewas_1_1', 20.), ('rnewas_2_1', 200.),
+                ('rnewas_1_2', 20.), ('rnewas_2_2', 200.),
+                ('rnewbs_1_1', 20.), ('rnewbs_2_1', 200.),
+                ('rnewbs_1_2', 20.), ('rnewbs_2_2', 200.),
+                ('eftext', 0.75), ('p1co2_2', 0.4), ('fps1s3', 0.3),
+                ('fps2s3', 0.3), ('orglch', 0.02), ('vlossg', 0.05)]:
+            pp_reg['{}_path'.format(key)] = os.path.join(
+                input_dir, '{}.tif'.format(key))
+            create_constant_raster(
+                pp_reg['{}_path'.format(key)], value, n_cols=NCOLS,
+                n_rows=NROWS)
+
+        prev_sv_dict = {
+            'som3c': 1000., 'som3e_1': 100., 'som3e_2': 10.,
+            'aglivc_1': 100., 'stdedc_1': 50., 'minerl_1_1': 2.,
+            'minerl_1_2': 2., 'parent_2': 40., 'secndy_2': 10.,
+            'occlud': 10., 'strlig_1': 0.2, 'strlig_2': 0.2,
+            'som2c_1': 500., 'som2e_1_1': 25., 'som2e_1_2': 2.5,
+            'som2c_2': 1000., 'som2e_2_1': 50., 'som2e_2_2': 5.,
+        }
+        for lyr in [1, 2]:
+            prev_sv_dict.update({
+                'strucc_{}'.format(lyr): 100.,
+                'struce_{}_1'.format(lyr): 1.,
+                'struce_{}_2'.format(lyr): 0.2,
+                'metabc_{}'.format(lyr): 50.,
+                'metabe_{}_1'.format(lyr): 2.5,
+                'metabe_{}_2'.format(lyr): 0.25,
+                'som1c_{}'.format(lyr): 50.,
+                'som1e_{}_1'.format(lyr): 5.,
+                'som1e_{}_2'.format(lyr): 0.5})
+        for lyr in [2, 3]:
+            for iel in [1, 2]:
+                prev_sv_dict['minerl_{}_{}'.format(lyr, iel)] = 1.
+        prev_sv_dir = os.path.join(self.workspace_dir, 'prev_sv')
+        os.makedirs(prev_sv_dir)
+        prev_sv_reg = {}
+        for state_var, value in prev_sv_dict.items():
+            prev_sv_reg['{}_path'.format(state_var)] = os.path.join(
+                prev_sv_dir, '{}.tif'.format(state_var))
+            create_constant_raster(
+                prev_sv_reg['{}_path'.format(state_var)], value,
+                n_cols=NCOLS, n_rows=NROWS)
+
+        # snow makes soil surface temperature, and so the decomposition
+        # factor, independent of climate; soil moisture is saturated
+        sv_dir = os.path.join(self.workspace_dir, 'sv')
+        os.makedirs(sv_dir)
+        sv_reg = dict(
+            (key, os.path.join(sv_dir, os.path.basename(path)))
+            for key, path in prev_sv_reg.items())
+        sv_reg['avh2o_3_path'] = os.path.join(sv_dir, 'avh2o_3.tif')
+        sv_reg['snow_path'] = os.path.join(sv_dir, 'snow.tif')
+        month_reg = {
+            'snowmelt': os.path.join(sv_dir, 'snowmelt.tif'),
+            'amov_2': os.path.join(sv_dir, 'amov_2.tif'),
+            'bgwfunc': os.path.join(sv_dir, 'bgwfunc.tif'),
+        }
+        for path, value in [
+                (sv_reg['avh2o_3_path'], 1000.), (sv_reg['snow_path'], 1.),
+                (month_reg['snowmelt'], 0.), (month_reg['amov_2'], 1.)]:
+            create_constant_raster(
+                path, value, n_cols=NCOLS, n_rows=NROWS)
+
+        forage._decomposition(
+            aligned_inputs, current_month, month_index, pft_id_set,
+            site_param_table, year_reg, month_reg, prev_sv_reg, pp_reg,
+            sv_reg)
+
+        # dec4, cmix and pparmn_2 are all 0.5, so SOM3, surface SOM2 and
+        # parent P each lose the same fraction in each substep
+        frac_remaining = (1. - 0.5 * 0.020833) ** 4
+        # C leaving SOM3; 55% is respired and the rest flows to soil SOM1 at
+        # the required ratios varat1_1_<iel>, releasing the remaining N and
+        # P to the mineral pool
+        som3_cflow = 1000. * (1. - frac_remaining)
+        som3_to_som1 = som3_cflow * (1. - 0.55)
+        n_mineralized = som3_cflow * 100. / 1000. - som3_to_som1 / 12.
+        p_mineralized = som3_cflow * 10. / 1000. - som3_to_som1 / 150.
+        expected_sv_dict = dict(prev_sv_dict)
+        expected_sv_dict.update({
+            'som3c': 1000. * frac_remaining,
+            'som3e_1': 100. * frac_remaining,
+            'som3e_2': 10. * frac_remaining,
+            'som1c_2': 50. + som3_to_som1,
+            'som1e_2_1': 5. + som3_to_som1 / 12.,
+            'som1e_2_2': 0.5 + som3_to_som1 / 150.,
+            'som2c_1': 500. * frac_remaining,
+            'som2e_1_1': 25. * frac_remaining,
+            'som2e_1_2': 2.5 * frac_remaining,
+            'som2c_2': 1000. + 500. * (1. - frac_remaining),
+            'som2e_2_1': 50. + 25. * (1. - frac_remaining),
+            'som2e_2_2': 5. + 2.5 * (1. - frac_remaining),
+            'parent_2': 40. * frac_remaining,
+            # N deposition: baseNdep * precip / annual_precip +
+            #   epnfs_2 * annual_precip * precip / annual_precip = 0.5
+            # all mineralized N contributes to gross mineralization, of
+            #   which vlossg is volatilized
+            'minerl_1_1': 2. + 0.5 + n_mineralized * (1. - 0.05),
+            'minerl_1_2': 2. + 40. * (1. - frac_remaining) + p_mineralized,
+        })
+        # aboveground live and standing dead are not written by decomposition
+        for state_var in ['aglivc_1', 'stdedc_1']:
+            del expected_sv_dict[state_var]
+        for state_var, expected_value in expected_sv_dict.items():
+            numpy.testing.assert_allclose(
+                gdal.OpenEx(
+                    sv_reg['{}_path'.format(state_var)]).ReadAsArray(),
+                expected_value, rtol=1e-5, atol=tolerance,
+                err_msg='{} does not match'.format(state_var))
+        numpy.testing.assert_allclose(
+            gdal.OpenEx(month_reg['bgwfunc']).ReadAsArray(), 1.,
+            atol=tolerance)
+
+    @unittest.skipIf(
+        not os.path.exists(SAMPLE_DATA), "sample inputs not found")
+    def test_extend(self):
+        """Test `extend`.
+
+        Run the model on sample inputs for two months, then extend the run
+        by two more months. Ensure that precipitation of the new months is
+        aligned to the grid of the inputs aligned by the first run, that the
+        extended run continues from the state variables of the last month of
+        the first run, and that its outputs match those of a run of four
+        months.
+
+        Raises:
+            AssertionError if inputs of the new months are not aligned to the
+                grid of the first run
+            AssertionError if the extended run does not match an
+                uninterrupted run of the same length
+            ValueError if `extend` does not raise it when no months are added
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        workspace_1 = os.path.join(self.workspace_dir, 'extended')
+        workspace_2 = os.path.join(self.workspace_dir, 'uninterrupted')
+        args = foragetests.run_sample_model(
+            workspace_1, n_months=2, save_sv_rasters=True)
+        first_checkpoint = forage._read_checkpoint(workspace_1)
+        self.assertEqual(first_checkpoint['month_index'], 1)
+        self.assertNotIn('precip_2', first_checkpoint['aligned_inputs'])
+
+        args['n_months'] = 2
+        with self.assertRaises(ValueError):
+            forage.extend(args)
+
+        args['n_months'] = 4
+        forage.extend(args)
+        checkpoint = forage._read_checkpoint(workspace_1)
+        self.assertEqual(checkpoint['month_index'], 3)
+
+        # inputs aligned by the first run are kept
+        for key, path in first_checkpoint['aligned_inputs'].items():
+            self.assertEqual(checkpoint['aligned_inputs'][key], path)
+        # precipitation of the new months is on the grid of the first run
+        template_info = pygeoprocessing.get_raster_info(
+            checkpoint['aligned_inputs']['site_index'])
+        for key in ['precip_2', 'precip_3']:
+            aligned_info = pygeoprocessing.get_raster_info(
+                checkpoint['aligned_inputs'][key])
+            self.assertEqual(
+                aligned_info['raster_size'], template_info['raster_size'])
+            numpy.testing.assert_allclose(
+                aligned_info['geotransform'], template_info['geotransform'])
+            self.assertTrue(osr.SpatialReference(
+                aligned_info['projection_wkt']).IsSame(
+                    osr.SpatialReference(template_info['projection_wkt'])))
+
+        # the extended run continues from the last month of the first run
+        for key, path in first_checkpoint['sv_reg'].items():
+            self.assertTrue(os.path.exists(path), key)
+        self.assertEqual(
+            os.path.dirname(checkpoint['sv_reg']['som3c_path']),
+            forage._state_variable_dir(workspace_1, 3))
+        foragetests.run_sample_model(
+            workspace_2, n_months=4, save_sv_rasters=True)
+        self.assert_model_outputs_equal(workspace_1, workspace_2)
+        for key, path in checkpoint['sv_reg'].items():
+            numpy.testing.assert_allclose(
+                gdal.OpenEx(path).ReadAsArray(),
+                gdal.OpenEx(os.path.join(
+                    forage._state_variable_dir(workspace_2, 3),
+                    os.path.basename(path))).ReadAsArray(),
+                rtol=1e-5, err_msg=key)
+
+    @unittest.skipIf(
+        not os.path.exists(SAMPLE_DATA), "sample inputs not found")
+    def test_spin_up(self):
+        """Test `spin_up`.
+
+        Run spin-up on sample inputs with a tolerance that cannot be met, so
+        that it stops after the maximum number of years. Ensure that the
+        equilibrated state variables are those of the last month simulated,
+        that outputs in the workspace cover only the last year simulated, and
+        that inputs built for spin-up are removed from the workspace.
+
+        Raises:
+            AssertionError if spin-up does not stop after the maximum number
+                of years, or does not warn that it did not converge
+            AssertionError if the equilibrated state variables do not match
+                state variables of the last month simulated
+            AssertionError if monthly outputs or summary table rows of the
+                first year are left in the workspace
+            AssertionError if inputs built for spin-up are left in the
+                workspace
+
+        Returns:
+            None
+
+        """
+        from rangeland_production import forage
+
+        workspace_dir = os.path.join(self.workspace_dir, 'spin_up')
+        args = foragetests.generate_base_args(workspace_dir)
+        args['n_months'] = 12
+        args['spin_up_max_years'] = 2
+        args['spin_up_tolerance'] = 0
+        with self.assertLogs(
+                'rangeland_production.forage', level='WARNING') as log:
+            spin_up_dir = forage.spin_up(args)
+        self.assertTrue(any(
+            'did not converge within 2 years' in message for message in
+            log.output))
+
+        checkpoint = forage._read_checkpoint(workspace_dir)
+        self.assertEqual(checkpoint['month_index'], 23)
+        for key, path in checkpoint['sv_reg'].items():
+            if key in forage._SITE_STATE_VARIABLE_FILES:
+                basename = forage._SITE_STATE_VARIABLE_FILES[key]
+            else:
+                basename = '{}.tif'.format(key[:-len('_path')])
+            numpy.testing.assert_allclose(
+                gdal.OpenEx(os.path.join(spin_up_dir, basename)).ReadAsArray(),
+                gdal.OpenEx(path).ReadAsArray(), err_msg=key)
+
+        # outputs of the first year are removed
+        output_dir = os.path.join(workspace_dir, 'output')
+        for month in range(1, 13):
+            self.assertFalse(os.path.exists(os.path.join(
+                output_dir, 'potential_biomass_2016_{}.tif'.format(month))))
+            self.assertTrue(os.path.exists(os.path.join(
+                output_dir, 'potential_biomass_2017_{}.tif'.format(month))))
+        summary_table = pandas.read_csv(os.path.join(
+            output_dir, 'summary_results', 'grazing_areas_monthly_rpm.csv'))
+        self.assertEqual(sorted(summary_table['year'].unique()), [2017])
+        self.assertEqual(
+            sorted(summary_table['month'].unique()), list(range(1, 13)))
+
+        self.assertEqual(
+            [f for f in os.listdir(workspace_dir) if
+             f.startswith('spin_up_inputs_')], [])